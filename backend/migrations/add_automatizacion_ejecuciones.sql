@@ -0,0 +1,39 @@
+-- Migración: historial de jobs en segundo plano (ver db_sistema_facturacion/sistema_facturacion/superadmin/automatizacion_ejecuciones.sql)
+
+BEGIN;
+
+-- ===================================================================
+-- TABLA: automatizacion_ejecuciones
+-- ===================================================================
+-- Historial de ejecuciones de los jobs en segundo plano (ciclo diario,
+-- limpieza de sesiones...). Solo el worker que obtiene el advisory lock
+-- del job registra y ejecuta.
+CREATE TABLE IF NOT EXISTS sistema_facturacion.automatizacion_ejecuciones (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    job VARCHAR(50) NOT NULL,
+    origen VARCHAR(20) NOT NULL
+        CHECK (origen IN ('CRON', 'INICIO', 'MANUAL')),
+    disparado_por UUID
+        REFERENCES sistema_facturacion.users(id) ON DELETE SET NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'EN_CURSO'
+        CHECK (estado IN ('EN_CURSO', 'EXITOSO', 'FALLIDO', 'OMITIDO')),
+    worker TEXT,
+    -- Horario programado (America/Guayaquil) al que corresponde la ejecución;
+    -- NULL en las ejecuciones MANUAL
+    slot TIMESTAMPTZ,
+    resultado JSONB,
+    error TEXT,
+    iniciado_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    finalizado_at TIMESTAMPTZ,
+    duracion_ms INT,
+
+    -- Cada horario de un job termina con éxito una sola vez, aunque varios
+    -- workers corran el mismo cron
+    CONSTRAINT uq_automatizacion_ejecuciones_job_slot
+        EXCLUDE USING btree (job WITH =, slot WITH =) WHERE (estado = 'EXITOSO')
+);
+
+CREATE INDEX IF NOT EXISTS idx_automatizacion_ejecuciones_job_fecha
+ON sistema_facturacion.automatizacion_ejecuciones (job, iniciado_at DESC);
+
+COMMIT;
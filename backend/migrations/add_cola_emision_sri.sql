@@ -0,0 +1,64 @@
+-- Migración: cola durable de emisión SRI (ver db_sistema_facturacion/sistema_facturacion/sri/cola_emision_sri.sql)
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sistema_facturacion.cola_emision_sri (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+
+    factura_id UUID NOT NULL
+        REFERENCES sistema_facturacion.facturas(id) ON DELETE CASCADE,
+    empresa_id UUID NOT NULL
+        REFERENCES sistema_facturacion.empresas(id) ON DELETE CASCADE,
+    usuario_id UUID
+        REFERENCES sistema_facturacion.users(id) ON DELETE SET NULL,
+
+    -- Ciclo de vida del trabajo
+    estado VARCHAR(30) NOT NULL DEFAULT 'PENDIENTE'
+        CHECK (estado IN ('PENDIENTE', 'PROCESANDO', 'ESPERANDO_AUTORIZACION', 'COMPLETADO', 'FALLIDO')),
+    etapa VARCHAR(20) NOT NULL DEFAULT 'RECEPCION'
+        CHECK (etapa IN ('RECEPCION', 'AUTORIZACION')),
+    intentos INT NOT NULL DEFAULT 0,
+    consultas_autorizacion INT NOT NULL DEFAULT 0,
+    proximo_intento_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    bloqueado_hasta TIMESTAMPTZ,
+    worker_id TEXT,
+
+    -- Contexto persistido entre etapas
+    ambiente VARCHAR(1),
+    clave_acceso VARCHAR(49),
+    xml_firmado TEXT,
+    ya_en_procesamiento BOOLEAN NOT NULL DEFAULT FALSE,
+    intento_emision INT,
+    facturacion_programada_id UUID,
+    client_info JSONB NOT NULL DEFAULT '{}'::jsonb,
+    inicio_emision TIMESTAMPTZ,
+
+    -- Resultado
+    estado_sri VARCHAR(30),
+    resultado JSONB,
+    ultimo_error TEXT,
+
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    finalizado_at TIMESTAMPTZ
+);
+
+-- Una sola emisión activa por factura
+CREATE UNIQUE INDEX IF NOT EXISTS uq_cola_emision_sri_factura_activa
+ON sistema_facturacion.cola_emision_sri (factura_id)
+WHERE estado IN ('PENDIENTE', 'PROCESANDO', 'ESPERANDO_AUTORIZACION');
+
+-- Búsqueda del siguiente trabajo listo para los workers
+CREATE INDEX IF NOT EXISTS idx_cola_emision_sri_pendientes
+ON sistema_facturacion.cola_emision_sri (proximo_intento_at)
+WHERE estado IN ('PENDIENTE', 'ESPERANDO_AUTORIZACION');
+
+-- Recuperación de trabajos abandonados por un worker caído
+CREATE INDEX IF NOT EXISTS idx_cola_emision_sri_bloqueados
+ON sistema_facturacion.cola_emision_sri (bloqueado_hasta)
+WHERE estado = 'PROCESANDO';
+
+COMMENT ON TABLE sistema_facturacion.cola_emision_sri IS
+'Cola durable de emisión de facturas al SRI (recepción + consulta de autorización con backoff).';
+
+COMMIT;
@@ -0,0 +1,47 @@
+-- Migración: contadores de consumo de planes (ver db_sistema_facturacion/sistema_facturacion/suscripciones/consumo_suscripciones.sql)
+-- Incluye la carga inicial; después los mantienen los repositorios y el job `conciliacion_consumo`
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sistema_facturacion.consumo_suscripciones (
+    empresa_id UUID PRIMARY KEY
+        REFERENCES sistema_facturacion.empresas(id)
+        ON DELETE CASCADE,
+
+    periodo_inicio TIMESTAMPTZ NOT NULL,
+    periodo_fin TIMESTAMPTZ,
+
+    facturas INT NOT NULL DEFAULT 0,
+    usuarios INT NOT NULL DEFAULT 0,
+    establecimientos INT NOT NULL DEFAULT 0,
+    programaciones INT NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO sistema_facturacion.consumo_suscripciones
+    (empresa_id, periodo_inicio, periodo_fin, facturas, usuarios, establecimientos, programaciones)
+SELECT s.empresa_id, s.fecha_inicio, s.fecha_fin,
+    (SELECT COUNT(*) FROM sistema_facturacion.facturas f
+     WHERE f.empresa_id = s.empresa_id AND f.estado != 'ANULADA'
+       AND f.fecha_emision >= s.fecha_inicio
+       AND (s.fecha_fin IS NULL OR f.fecha_emision <= s.fecha_fin)),
+    (SELECT COUNT(*) FROM sistema_facturacion.usuarios u
+     WHERE u.empresa_id = s.empresa_id),
+    (SELECT COUNT(*) FROM sistema_facturacion.establecimientos est
+     WHERE est.empresa_id = s.empresa_id),
+    (SELECT COUNT(*) FROM sistema_facturacion.facturacion_programada fp
+     WHERE fp.empresa_id = s.empresa_id AND fp.activo = TRUE
+       AND fp.created_at >= s.fecha_inicio
+       AND (s.fecha_fin IS NULL OR fp.created_at <= s.fecha_fin))
+FROM sistema_facturacion.suscripciones s
+ON CONFLICT (empresa_id) DO UPDATE SET
+    periodo_inicio = EXCLUDED.periodo_inicio,
+    periodo_fin = EXCLUDED.periodo_fin,
+    facturas = EXCLUDED.facturas,
+    usuarios = EXCLUDED.usuarios,
+    establecimientos = EXCLUDED.establecimientos,
+    programaciones = EXCLUDED.programaciones,
+    updated_at = NOW();
+
+COMMIT;
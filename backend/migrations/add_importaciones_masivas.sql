@@ -0,0 +1,44 @@
+-- Migración: importaciones masivas de clientes/productos (ver db_sistema_facturacion/sistema_facturacion/importaciones/importaciones_masivas.sql)
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sistema_facturacion.importaciones_masivas (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+
+    empresa_id UUID NOT NULL
+        REFERENCES sistema_facturacion.empresas(id) ON DELETE CASCADE,
+    usuario_id UUID
+        REFERENCES sistema_facturacion.users(id) ON DELETE SET NULL,
+
+    tipo VARCHAR(20) NOT NULL
+        CHECK (tipo IN ('CLIENTES', 'PRODUCTOS')),
+    archivo_nombre TEXT NOT NULL,
+    -- FALSE: las filas que ya existen se omiten; TRUE: se actualizan
+    actualizar_existentes BOOLEAN NOT NULL DEFAULT FALSE,
+
+    estado VARCHAR(20) NOT NULL DEFAULT 'PENDIENTE'
+        CHECK (estado IN ('PENDIENTE', 'PROCESANDO', 'COMPLETADO', 'FALLIDO')),
+
+    -- Avance
+    total_filas INT,
+    filas_procesadas INT NOT NULL DEFAULT 0,
+    insertadas INT NOT NULL DEFAULT 0,
+    actualizadas INT NOT NULL DEFAULT 0,
+    omitidas INT NOT NULL DEFAULT 0,
+    con_error INT NOT NULL DEFAULT 0,
+
+    -- [{"fila": 12, "campo": "identificacion", "valor": "...", "mensaje": "..."}] (acotado)
+    errores JSONB NOT NULL DEFAULT '[]'::jsonb,
+    ultimo_error TEXT,
+
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    iniciado_at TIMESTAMPTZ,
+    finalizado_at TIMESTAMPTZ
+);
+
+-- Historial de importaciones de una empresa
+CREATE INDEX IF NOT EXISTS idx_importaciones_masivas_empresa
+ON sistema_facturacion.importaciones_masivas (empresa_id, created_at DESC);
+
+COMMIT;
@@ -0,0 +1,56 @@
+-- Migración: índices para las consultas calientes de facturas, cartera, gastos y sesiones
+-- (ver db_sistema_facturacion/sistema_facturacion/facturacion/facturas/05-indices_consultas.sql,
+--  gastos/gastos.sql y users/user_sessions.sql)
+-- Se crean CONCURRENTLY para no bloquear escrituras en tablas grandes;
+-- por eso este archivo NO va dentro de BEGIN/COMMIT.
+-- Verificación: python scripts/plan_regresion_consultas.py
+
+-- facturas
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_facturas_empresa_fecha_emision
+ON sistema_facturacion.facturas (empresa_id, fecha_emision DESC, created_at DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_facturas_autorizadas_empresa_fecha
+ON sistema_facturacion.facturas (empresa_id, fecha_emision)
+WHERE estado = 'AUTORIZADA' AND tipo_documento = '01';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_facturas_cliente_fecha
+ON sistema_facturacion.facturas (cliente_id, fecha_emision DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_facturas_programada_fecha
+ON sistema_facturacion.facturas (facturacion_programada_id, fecha_emision)
+WHERE facturacion_programada_id IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_facturas_en_proceso
+ON sistema_facturacion.facturas (updated_at)
+WHERE estado = 'EN_PROCESO';
+
+-- facturas_detalle
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_facturas_detalle_factura
+ON sistema_facturacion.facturas_detalle (factura_id, created_at);
+
+-- cuentas_cobrar
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_cuentas_cobrar_empresa_vencimiento
+ON sistema_facturacion.cuentas_cobrar (empresa_id, fecha_vencimiento)
+WHERE saldo_pendiente > 0;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_cuentas_cobrar_cliente
+ON sistema_facturacion.cuentas_cobrar (cliente_id);
+
+-- gastos
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_gastos_empresa_fecha_activos
+ON sistema_facturacion.gastos (empresa_id, fecha_emision)
+WHERE deleted_at IS NULL;
+
+-- user_sessions: el índice sobre is_valid (booleano) no filtra casi nada;
+-- se reemplaza por uno parcial sobre las sesiones vigentes de cada usuario
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_sessions_user_vigentes
+ON sistema_facturacion.user_sessions (user_id, expires_at)
+WHERE is_valid = TRUE;
+
+DROP INDEX CONCURRENTLY IF EXISTS sistema_facturacion.idx_user_sessions_valid;
+
+ANALYZE sistema_facturacion.facturas;
+ANALYZE sistema_facturacion.facturas_detalle;
+ANALYZE sistema_facturacion.cuentas_cobrar;
+ANALYZE sistema_facturacion.gastos;
+ANALYZE sistema_facturacion.user_sessions;
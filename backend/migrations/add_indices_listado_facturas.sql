@@ -0,0 +1,18 @@
+-- Migración: índices para el listado paginado de facturas (ver db_sistema_facturacion/sistema_facturacion/facturacion/facturas/03-indices_listado.sql)
+-- Se crean CONCURRENTLY para no bloquear escrituras en tablas grandes;
+-- por eso este archivo NO va dentro de BEGIN/COMMIT.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_facturas_empresa_created_id
+ON sistema_facturacion.facturas (empresa_id, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_facturas_empresa_usuario_created_id
+ON sistema_facturacion.facturas (empresa_id, usuario_id, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_facturas_created_id
+ON sistema_facturacion.facturas (created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_formas_pago_factura_created
+ON sistema_facturacion.formas_pago (factura_id, created_at);
+
+ANALYZE sistema_facturacion.facturas;
+ANALYZE sistema_facturacion.formas_pago;
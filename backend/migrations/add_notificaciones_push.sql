@@ -0,0 +1,32 @@
+-- Migración: contador de notificaciones sin leer y listado por cursor
+-- (ver db_sistema_facturacion/sistema_facturacion/notificaciones/)
+-- Incluye la carga inicial; después lo mantienen los repositorios y el job `conciliacion_notificaciones`
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sistema_facturacion.notificaciones_conteo (
+    user_id UUID PRIMARY KEY
+        REFERENCES sistema_facturacion.users(id)
+        ON DELETE CASCADE,
+
+    no_leidas INT NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_notificaciones_user_created
+ON sistema_facturacion.notificaciones (user_id, created_at DESC, id DESC);
+
+-- Sin notificaciones nuevas ni lecturas mientras se carga el conteo
+LOCK TABLE sistema_facturacion.notificaciones IN SHARE MODE;
+
+INSERT INTO sistema_facturacion.notificaciones_conteo (user_id, no_leidas)
+SELECT user_id, COUNT(*)
+FROM sistema_facturacion.notificaciones
+WHERE leido = false
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET
+    no_leidas = EXCLUDED.no_leidas,
+    updated_at = NOW();
+
+COMMIT;
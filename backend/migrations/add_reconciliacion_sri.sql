@@ -0,0 +1,42 @@
+-- Migración: reconciliación en segundo plano de comprobantes pendientes en el SRI (ver db_sistema_facturacion/sistema_facturacion/sri/reconciliacion_sri.sql)
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sistema_facturacion.reconciliacion_sri (
+    tipo_documento VARCHAR(20) NOT NULL
+        CHECK (tipo_documento IN ('FACTURA', 'NOTA_CREDITO')),
+    documento_id UUID NOT NULL,
+    empresa_id UUID
+        REFERENCES sistema_facturacion.empresas(id) ON DELETE CASCADE,
+    -- Emisor de la factura (o de la factura modificada); firma los logs de consulta
+    usuario_id UUID,
+    clave_acceso VARCHAR(49) NOT NULL,
+
+    -- PENDIENTE: se sigue consultando; AGOTADO: se alcanzó el máximo de consultas
+    estado VARCHAR(20) NOT NULL DEFAULT 'PENDIENTE'
+        CHECK (estado IN ('PENDIENTE', 'AGOTADO')),
+    consultas INT NOT NULL DEFAULT 0,
+    proximo_intento_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    bloqueado_hasta TIMESTAMPTZ,
+
+    -- Última respuesta y latencia de las consultas (ms)
+    ultimo_estado_sri VARCHAR(30),
+    ultima_latencia_ms INT,
+    latencia_total_ms BIGINT NOT NULL DEFAULT 0,
+    ultima_consulta_at TIMESTAMPTZ,
+
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (tipo_documento, documento_id)
+);
+
+-- Siguiente lote listo para consultar
+CREATE INDEX IF NOT EXISTS idx_reconciliacion_sri_pendientes
+ON sistema_facturacion.reconciliacion_sri (proximo_intento_at)
+WHERE estado = 'PENDIENTE';
+
+COMMENT ON TABLE sistema_facturacion.reconciliacion_sri IS
+'Comprobantes pendientes de autorización que el reconciliador consulta en segundo plano (backoff por documento).';
+
+COMMIT;
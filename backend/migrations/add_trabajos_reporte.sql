@@ -0,0 +1,57 @@
+-- Migración: generación asíncrona de reportes (ver db_sistema_facturacion/sistema_facturacion/reportes/trabajos_reporte.sql)
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sistema_facturacion.trabajos_reporte (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+
+    -- Ámbito del reporte: empresa, vendedor o global (superadmin)
+    empresa_id UUID
+        REFERENCES sistema_facturacion.empresas(id) ON DELETE CASCADE,
+    vendedor_id UUID,
+    usuario_id UUID,
+
+    nombre TEXT NOT NULL,
+    tipo VARCHAR(40) NOT NULL,
+    formato VARCHAR(10) NOT NULL
+        CHECK (formato IN ('pdf', 'excel', 'csv')),
+    parametros JSONB NOT NULL DEFAULT '{}'::jsonb,
+    -- Hash de (ámbito, tipo, formato, parámetros): deduplica pedidos idénticos en curso
+    huella VARCHAR(64) NOT NULL,
+
+    estado VARCHAR(20) NOT NULL DEFAULT 'PENDIENTE'
+        CHECK (estado IN ('PENDIENTE', 'PROCESANDO', 'COMPLETADO', 'FALLIDO')),
+    progreso SMALLINT NOT NULL DEFAULT 0,
+
+    -- Resultado
+    archivo TEXT,
+    url_descarga TEXT,
+    tamano_bytes BIGINT,
+    ultimo_error TEXT,
+    expira_at TIMESTAMPTZ,
+
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    iniciado_at TIMESTAMPTZ,
+    finalizado_at TIMESTAMPTZ
+);
+
+-- Un solo trabajo en curso por pedido idéntico
+CREATE UNIQUE INDEX IF NOT EXISTS uq_trabajos_reporte_huella_activa
+ON sistema_facturacion.trabajos_reporte (huella)
+WHERE estado IN ('PENDIENTE', 'PROCESANDO');
+
+-- Listados por empresa / vendedor
+CREATE INDEX IF NOT EXISTS idx_trabajos_reporte_empresa
+ON sistema_facturacion.trabajos_reporte (empresa_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_trabajos_reporte_vendedor
+ON sistema_facturacion.trabajos_reporte (vendedor_id, created_at DESC)
+WHERE vendedor_id IS NOT NULL;
+
+-- Purga de resultados vencidos
+CREATE INDEX IF NOT EXISTS idx_trabajos_reporte_expira
+ON sistema_facturacion.trabajos_reporte (expira_at)
+WHERE expira_at IS NOT NULL;
+
+COMMIT;
@@ -0,0 +1,38 @@
+-- Migración: agregado diario de ventas (ver db_sistema_facturacion/sistema_facturacion/facturacion/facturas/04-ventas_diarias.sql)
+-- Incluye la carga inicial; para reconstruir más adelante usar scripts/backfill_ventas_diarias.py
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sistema_facturacion.ventas_diarias (
+    empresa_id UUID NOT NULL
+        REFERENCES sistema_facturacion.empresas(id) ON DELETE CASCADE,
+    fecha DATE NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    usuario_id UUID NOT NULL,
+
+    num_facturas INT NOT NULL DEFAULT 0,
+    subtotal NUMERIC(14,2) NOT NULL DEFAULT 0,
+    iva NUMERIC(14,2) NOT NULL DEFAULT 0,
+    total NUMERIC(14,2) NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (empresa_id, fecha, estado, usuario_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ventas_diarias_fecha
+ON sistema_facturacion.ventas_diarias (fecha);
+
+-- Sin escrituras concurrentes mientras se carga el histórico
+LOCK TABLE sistema_facturacion.facturas IN SHARE MODE;
+
+DELETE FROM sistema_facturacion.ventas_diarias;
+
+INSERT INTO sistema_facturacion.ventas_diarias
+    (empresa_id, fecha, estado, usuario_id, num_facturas, subtotal, iva, total)
+SELECT empresa_id, fecha_emision::date, estado, usuario_id,
+       COUNT(*), SUM(total_sin_impuestos), SUM(iva), SUM(total)
+FROM sistema_facturacion.facturas
+GROUP BY empresa_id, fecha_emision::date, estado, usuario_id;
+
+COMMIT;
@@ -0,0 +1,63 @@
+"""
+Reconstruye el agregado `ventas_diarias` desde `facturas` (todas las empresas
+o una) y, opcionalmente, mide las consultas del dashboard que lo leen.
+
+Mientras corre bloquea escrituras sobre facturas (LOCK ... IN SHARE MODE).
+
+Uso:
+    python scripts/backfill_ventas_diarias.py
+    python scripts/backfill_ventas_diarias.py --empresa-id <uuid> --medir
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.session import crear_conexion_directa
+from src.modules.facturas.repository_ventas_diarias import RepositorioVentasDiarias
+from src.modules.dashboards.repository import RepositorioDashboards
+
+
+def medir_dashboard(conn, empresa_id: str, repeticiones: int = 20):
+    repo = RepositorioDashboards(db=conn)
+    consultas = {
+        "kpis_principales": lambda: repo.obtener_kpis_principales(empresa_id=empresa_id, periodo='month'),
+        "variacion_ventas": lambda: repo.obtener_variacion_ventas_empresa(empresa_id),
+        "ventas_tendencia": lambda: repo.obtener_ventas_tendencia(empresa_id, 'month'),
+        "facturas_mensuales": lambda: repo.obtener_facturas_mensuales(empresa_id=empresa_id, periodo='year'),
+    }
+    total = 0.0
+    for nombre, consulta in consultas.items():
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            consulta()
+        promedio = (time.perf_counter() - inicio) / repeticiones * 1000
+        total += promedio
+        print(f"  {nombre:<20} {promedio:7.2f} ms")
+    print(f"  {'total':<20} {total:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--empresa-id", help="Reconstruir solo esta empresa")
+    parser.add_argument("--medir", action="store_true", help="Medir las consultas del dashboard (requiere --empresa-id)")
+    parser.add_argument("--sin-reconstruir", action="store_true")
+    args = parser.parse_args()
+
+    conn = crear_conexion_directa()
+    try:
+        if not args.sin_reconstruir:
+            inicio = time.perf_counter()
+            filas = RepositorioVentasDiarias(db=conn).reconstruir(args.empresa_id)
+            print(f"ventas_diarias: {filas} filas en {time.perf_counter() - inicio:.2f} s")
+        if args.medir and args.empresa_id:
+            print("Dashboard (promedio por consulta):")
+            medir_dashboard(conn, args.empresa_id)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
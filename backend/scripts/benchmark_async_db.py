@@ -0,0 +1,154 @@
+"""
+Benchmark de concurrencia: endpoint `def` con psycopg2 vs. `async def` con el
+pool asíncrono (psycopg 3).
+
+Levanta en el proceso una app FastAPI mínima con dos endpoints que ejecutan la
+misma consulta (`SELECT pg_sleep(%s)` más una lectura barata) y lanza N clientes
+HTTP concurrentes contra cada uno. Reporta req/s y latencias p50/p95/p99.
+
+Con --base-url y --token se mide en cambio una API ya desplegada, comparando
+las rutas indicadas con --ruta (por defecto listado de facturas y conteo de
+notificaciones).
+
+Uso:
+    python scripts/benchmark_async_db.py --clientes 500 --requests 5000 --espera-ms 5
+    python scripts/benchmark_async_db.py --base-url http://localhost:8000 --token <jwt> \\
+        --ruta /api/facturas/?limit=20 --ruta /api/notificaciones/conteo-no-leidas
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from src.database.session import conexion_pool
+from src.database.pool import obtener_pool
+from src.database.pool_async import abrir_pool_async, cerrar_pool_async, conexion_pool_async, estadisticas_pool_async
+
+QUERY = "SELECT pg_sleep(%s), (SELECT id FROM sistema_facturacion.planes LIMIT 1) AS plan_id"
+
+RUTAS_DEFECTO = ["/api/facturas/?limit=20", "/api/notificaciones/conteo-no-leidas"]
+
+
+def crear_app(espera: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.on_event("startup")
+    async def _inicio():
+        obtener_pool()
+        await abrir_pool_async()
+
+    @app.on_event("shutdown")
+    async def _fin():
+        await cerrar_pool_async()
+
+    @app.get("/sync")
+    def consulta_sync():
+        with conexion_pool() as conn:
+            with conn.cursor() as cur:
+                cur.execute(QUERY, (espera,))
+                cur.fetchall()
+        return {"ok": True}
+
+    @app.get("/async")
+    async def consulta_async():
+        async with conexion_pool_async() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(QUERY, (espera,))
+                await cur.fetchall()
+        return {"ok": True}
+
+    return app
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def levantar_servidor(app: FastAPI) -> tuple:
+    puerto = puerto_libre()
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=puerto, log_level="warning"))
+    hilo = threading.Thread(target=servidor.run, daemon=True)
+    hilo.start()
+    while not servidor.started:
+        time.sleep(0.05)
+    return servidor, hilo, f"http://127.0.0.1:{puerto}"
+
+
+def percentil(latencias: list, p: float) -> float:
+    return latencias[max(0, int(len(latencias) * p) - 1)] * 1000
+
+
+async def ejecutar(nombre: str, url: str, clientes: int, total: int, headers: dict):
+    latencias, errores = [], 0
+    pendientes = iter(range(total))
+    limites = httpx.Limits(max_connections=clientes, max_keepalive_connections=clientes)
+
+    async with httpx.AsyncClient(headers=headers, limits=limites, timeout=60) as http:
+        async def cliente():
+            nonlocal errores
+            for _ in pendientes:
+                inicio = time.perf_counter()
+                try:
+                    resp = await http.get(url)
+                    if resp.status_code >= 400:
+                        errores += 1
+                except httpx.HTTPError:
+                    errores += 1
+                latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente() for _ in range(clientes)))
+        duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    print(
+        f"{nombre:<45} {total / duracion:>9.1f} req/s   "
+        f"p50={percentil(latencias, 0.50):8.2f} ms   p95={percentil(latencias, 0.95):8.2f} ms   "
+        f"p99={percentil(latencias, 0.99):8.2f} ms   errores={errores}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--espera-ms", type=float, default=5.0, help="pg_sleep por request (app local)")
+    parser.add_argument("--base-url", help="API desplegada a medir en lugar de la app local")
+    parser.add_argument("--token", help="JWT para --base-url")
+    parser.add_argument("--ruta", action="append", help="Ruta a medir con --base-url (repetible)")
+    args = parser.parse_args()
+
+    print(f"Clientes concurrentes: {args.clientes}  |  Requests por modo: {args.requests}")
+
+    if args.base_url:
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        for ruta in args.ruta or RUTAS_DEFECTO:
+            asyncio.run(ejecutar(ruta, args.base_url.rstrip("/") + ruta, args.clientes, args.requests, headers))
+        return
+
+    servidor, hilo, base = levantar_servidor(crear_app(args.espera_ms / 1000))
+    try:
+        # Calentar ambos caminos antes de medir
+        asyncio.run(ejecutar("calentamiento", f"{base}/async", 20, 100, {}))
+        asyncio.run(ejecutar("def + psycopg2 (threadpool)", f"{base}/sync", args.clientes, args.requests, {}))
+        asyncio.run(ejecutar("async def + psycopg 3", f"{base}/async", args.clientes, args.requests, {}))
+        print("Pool síncrono:", obtener_pool().estadisticas())
+        print("Pool asíncrono:", estadisticas_pool_async())
+    finally:
+        servidor.should_exit = True
+        hilo.join(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
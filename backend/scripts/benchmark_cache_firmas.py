@@ -0,0 +1,60 @@
+"""
+Prueba de carga: costo de firmar N comprobantes cargando el .p12 en cada
+emisión (comportamiento anterior) vs. reutilizando el signer cacheado.
+
+Uso:
+    python scripts/benchmark_cache_firmas.py --p12 firma.p12 --clave secreto --ruc 1790012345001 --firmas 200
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.modules.sri.signer import XMLSigner
+from src.modules.sri.signer_cache import CacheSigners
+
+XML_PRUEBA = b'<?xml version="1.0" encoding="UTF-8"?><factura id="comprobante" version="1.1.0"><infoTributaria><claveAcceso>0</claveAcceso></infoTributaria></factura>'
+
+
+def medir(nombre, total, obtener_signer, ruc):
+    inicio = time.perf_counter()
+    for _ in range(total):
+        signer = obtener_signer()
+        signer.verify_ruc(ruc)
+        signer.sign_xml(XML_PRUEBA)
+        signer.cleanup()
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<12} {total / duracion:8.1f} firmas/s   promedio={duracion / total * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--p12", required=True)
+    parser.add_argument("--clave", required=True)
+    parser.add_argument("--ruc", required=True)
+    parser.add_argument("--firmas", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.p12, "rb") as f:
+        p12 = f.read()
+
+    medir("sin cache", args.firmas, lambda: XMLSigner(p12, args.clave), args.ruc)
+
+    cache = CacheSigners(ttl=3600, max_entradas=10)
+    version = ("benchmark", "0")
+
+    def desde_cache():
+        signer = cache.obtener("empresa", version)
+        if signer is None:
+            signer = XMLSigner(p12, args.clave)
+            cache.guardar("empresa", version, signer)
+        return signer
+
+    medir("con cache", args.firmas, desde_cache, args.ruc)
+    print("Estadísticas:", cache.estadisticas())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Prueba de carga: consultas SQL por request autenticada con y sin cache de principales.
+
+Inicia sesión con un usuario real, y luego valida el token N veces contando
+cuántas sentencias SQL se ejecutan por validación.
+
+Uso:
+    python scripts/benchmark_cache_principal.py --email admin@empresa.com --clave secreto --requests 500
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import RealDictCursor
+
+from src.database.session import crear_conexion_directa
+from src.modules.autenticacion.services import AuthServices
+from src.modules.autenticacion.repositories import AuthRepository
+from src.modules.autenticacion.principal_cache import principal_cache
+from src.modules.usuarios.repositories import RepositorioUsuarios
+from src.modules.vendedores.repositories import RepositorioVendedores
+
+
+class CursorContador(RealDictCursor):
+    ejecuciones = 0
+
+    def execute(self, query, vars=None):
+        CursorContador.ejecuciones += 1
+        return super().execute(query, vars)
+
+
+def _servicio(conn) -> AuthServices:
+    return AuthServices(
+        user_repo=RepositorioUsuarios(db=conn),
+        auth_repo=AuthRepository(db=conn),
+        vendedor_repo=RepositorioVendedores(db=conn)
+    )
+
+
+def medir(nombre, servicio, token, total, usar_cache):
+    CursorContador.ejecuciones = 0
+    inicio = time.perf_counter()
+    for _ in range(total):
+        if not usar_cache:
+            principal_cache.limpiar()
+        servicio.validar_token_y_obtener_usuario(token)
+    duracion = time.perf_counter() - inicio
+    print(
+        f"{nombre:<12} consultas/request={CursorContador.ejecuciones / total:5.2f}   "
+        f"{total / duracion:8.1f} req/s   promedio={duracion / total * 1000:6.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--clave", required=True)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    conn = crear_conexion_directa()
+    conn.cursor_factory = CursorContador
+    try:
+        servicio = _servicio(conn)
+        login = servicio.iniciar_sesion(args.email, args.clave, "127.0.0.1", "benchmark")
+        token = login["detalles"]["access_token"]
+
+        medir("sin cache", servicio, token, args.requests, usar_cache=False)
+        principal_cache.limpiar()
+        medir("con cache", servicio, token, args.requests, usar_cache=True)
+        print("Estadísticas:", principal_cache.estadisticas())
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
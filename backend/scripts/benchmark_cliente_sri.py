@@ -0,0 +1,174 @@
+"""
+Benchmark del cliente SRI contra un servidor SOAP falso local.
+
+Compara el esquema anterior (una `requests.Session` nueva por request, sobre
+armado con f-strings y respuesta recorrida varias veces con ElementTree) con el
+transporte compartido keep-alive y el parser de una pasada con lxml. Mide:
+
+1. Consultas de autorización concurrentes (req/s, p50/p99) contra
+   scripts/fake_sri_server.py levantado en el mismo proceso (HTTP/1.1).
+2. Solo el parseo de una respuesta de autorización con el comprobante embebido
+   y `--mensajes` mensajes.
+
+En local no hay TLS: la ganancia del keep-alive frente al SRI real (handshake
+por request) es mayor que la que se ve aquí.
+
+Uso:
+    python scripts/benchmark_cliente_sri.py --hilos 20 --requests 2000 --latencia 0.01
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from fake_sri_server import ManejadorSRI
+from src.config.env import env
+from src.modules.sri.client import ClienteSRI
+from src.modules.sri.parser_respuesta import parsear_autorizacion
+from src.modules.sri.transporte import estadisticas_transporte_sri
+
+CLAVE = "1" * 49
+
+SOBRE_LEGADO = """
+        <soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:ec="http://ec.gob.sri.ws.autorizacion">
+           <soapenv:Header/>
+           <soapenv:Body>
+              <ec:autorizacionComprobante><claveAccesoComprobante>{clave}</claveAccesoComprobante></ec:autorizacionComprobante>
+           </soapenv:Body>
+        </soapenv:Envelope>
+        """
+
+
+class ManejadorKeepAlive(ManejadorSRI):
+    protocol_version = "HTTP/1.1"
+
+
+def _local(tag: str) -> str:
+    return tag.split('}')[-1]
+
+
+def parsear_legado(xml_text: str) -> dict:
+    """Referencia: el parseo anterior (un recorrido para campos y otro para mensajes)."""
+    root = ET.fromstring(xml_text)
+    campos = {}
+    for elem in root.iter():
+        if _local(elem.tag) in ('estado', 'numeroAutorizacion', 'fechaAutorizacion', 'claveAccesoConsultada', 'numeroComprobantes'):
+            campos[_local(elem.tag)] = elem.text
+    codigos, mensajes = [], []
+    for node in root.iter():
+        tag = _local(node.tag)
+        if tag == 'mensaje' and len(list(node)) > 0:
+            for child in node:
+                c_tag = _local(child.tag).lower()
+                if 'identificador' in c_tag: codigos.append(child.text)
+                elif 'mensaje' in c_tag and child.text: mensajes.append(child.text)
+        elif tag in ['mensaje', 'faultstring', 'message'] and len(list(node)) == 0 and node.text:
+            if node.text not in mensajes:
+                mensajes.append(node.text)
+    return {**campos, "codigos": codigos, "mensajes": mensajes}
+
+
+def consulta_legado(base: str) -> float:
+    inicio = time.perf_counter()
+    with requests.Session() as session:
+        response = session.post(
+            f"{base}/AutorizacionComprobantesOffline",
+            data=SOBRE_LEGADO.format(clave=CLAVE),
+            headers={'Content-Type': 'text/xml;charset=UTF-8'},
+            timeout=30
+        )
+        response.raise_for_status()
+        parsear_legado(response.text)
+    return time.perf_counter() - inicio
+
+
+def consulta_compartida(_base: str) -> float:
+    inicio = time.perf_counter()
+    ClienteSRI().autorizar_comprobante(CLAVE)
+    return time.perf_counter() - inicio
+
+
+def ejecutar(nombre, fn, base, hilos, total):
+    with ThreadPoolExecutor(max_workers=hilos) as ex:
+        inicio = time.perf_counter()
+        latencias = list(ex.map(lambda _: fn(base), range(total)))
+        duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    p50 = statistics.median(latencias) * 1000
+    p99 = latencias[int(len(latencias) * 0.99) - 1] * 1000
+    print(f"{nombre:<32} {total / duracion:>9.1f} req/s   p50={p50:7.2f} ms   p99={p99:7.2f} ms")
+
+
+def respuesta_sintetica(mensajes: int, kb_comprobante: int) -> bytes:
+    detalle = "".join(
+        f"<mensaje><identificador>{i}</identificador><mensaje>MENSAJE {i}</mensaje>"
+        f"<informacionAdicional>Detalle {i}</informacionAdicional><tipo>ADVERTENCIA</tipo></mensaje>"
+        for i in range(mensajes)
+    )
+    comprobante = "<factura>" + "x" * (kb_comprobante * 1024) + "</factura>"
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>
+<ns2:autorizacionComprobanteResponse xmlns:ns2="http://ec.gob.sri.ws.autorizacion">
+<RespuestaAutorizacionComprobante><claveAccesoConsultada>{CLAVE}</claveAccesoConsultada>
+<numeroComprobantes>1</numeroComprobantes><autorizaciones><autorizacion>
+<estado>AUTORIZADO</estado><numeroAutorizacion>{CLAVE}</numeroAutorizacion>
+<fechaAutorizacion>2024-01-01T00:00:00</fechaAutorizacion><ambiente>PRUEBAS</ambiente>
+<comprobante><![CDATA[{comprobante}]]></comprobante><mensajes>{detalle}</mensajes>
+</autorizacion></autorizaciones></RespuestaAutorizacionComprobante>
+</ns2:autorizacionComprobanteResponse></soap:Body></soap:Envelope>""".encode("utf-8")
+
+
+def medir_parseo(nombre, fn, iteraciones):
+    inicio = time.perf_counter()
+    for _ in range(iteraciones):
+        fn()
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<32} {duracion / iteraciones * 1e6:>9.1f} µs/respuesta")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hilos", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latencia", type=float, default=0.01, help="Segundos de espera del SRI falso")
+    parser.add_argument("--mensajes", type=int, default=20)
+    parser.add_argument("--kb-comprobante", type=int, default=30)
+    parser.add_argument("--iteraciones", type=int, default=2000)
+    args = parser.parse_args()
+
+    ManejadorKeepAlive.latencia = args.latencia
+    ManejadorKeepAlive.consultas_en_proceso = 0
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ManejadorKeepAlive)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{servidor.server_address[1]}"
+    env.SRI_WS_BASE_URL = base
+
+    print(f"Hilos: {args.hilos}  |  Requests: {args.requests}  |  Latencia SRI: {args.latencia}s")
+    try:
+        ejecutar("sesión por request + ET", consulta_legado, base, args.hilos, args.requests)
+        ejecutar("transporte compartido + lxml", consulta_compartida, base, args.hilos, args.requests)
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    contenido = respuesta_sintetica(args.mensajes, args.kb_comprobante)
+    texto = contenido.decode("utf-8")
+    print(f"\nParseo ({args.mensajes} mensajes, comprobante de {args.kb_comprobante} KB):")
+    medir_parseo("ElementTree (varias pasadas)", lambda: parsear_legado(texto), args.iteraciones)
+    medir_parseo("lxml iterparse (una pasada)", lambda: parsear_autorizacion(contenido), args.iteraciones)
+
+    print("\nTransporte:", estadisticas_transporte_sri())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Prueba de carga: inserción de detalles de factura línea por línea (un INSERT y
+un commit por detalle, comportamiento anterior) vs. INSERT multi-fila en una
+sola transacción (crear_detalles_lote).
+
+Usa una factura BORRADOR existente como padre; las filas insertadas se
+eliminan al terminar cada medición.
+
+Uso:
+    python scripts/benchmark_creacion_factura.py --factura-id <uuid> --lineas 10 100 1000
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import RealDictCursor
+
+from src.database.session import crear_conexion_directa
+from src.modules.facturas.repository import RepositorioFacturas
+
+
+class CursorContador(RealDictCursor):
+    ejecuciones = 0
+
+    def execute(self, query, vars=None):
+        CursorContador.ejecuciones += 1
+        return super().execute(query, vars)
+
+
+def _detalles(factura_id: str, total: int) -> list:
+    return [
+        {
+            "factura_id": factura_id,
+            "codigo_producto": f"BENCH-{i:05d}",
+            "nombre": f"Producto {i}",
+            "descripcion": "Línea de prueba de carga",
+            "cantidad": 1 + i % 5,
+            "precio_unitario": 10.0,
+            "descuento": 0,
+            "subtotal": 10.0 * (1 + i % 5),
+            "tipo_iva": "4",
+            "valor_iva": round(1.5 * (1 + i % 5), 2),
+        }
+        for i in range(total)
+    ]
+
+
+def _limpiar(conn, factura_id: str):
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM sistema_facturacion.facturas_detalle WHERE factura_id = %s AND codigo_producto LIKE 'BENCH-%%'",
+            (factura_id,)
+        )
+    conn.commit()
+
+
+def medir(nombre, conn, factura_id, total, insertar):
+    repo = RepositorioFacturas(db=conn)
+    detalles = _detalles(factura_id, total)
+    CursorContador.ejecuciones = 0
+    inicio = time.perf_counter()
+    insertar(repo, detalles)
+    duracion = time.perf_counter() - inicio
+    sentencias = CursorContador.ejecuciones
+    _limpiar(conn, factura_id)
+    print(
+        f"{total:>5} líneas  {nombre:<12} sentencias={sentencias:5d}   "
+        f"total={duracion * 1000:9.1f} ms   por línea={duracion / total * 1000:6.3f} ms"
+    )
+
+
+def linea_por_linea(repo, detalles):
+    for d in detalles:
+        repo.crear_detalle(d)
+
+
+def en_lote(repo, detalles):
+    repo.crear_detalles_lote(detalles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--factura-id", required=True)
+    parser.add_argument("--lineas", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    conn = crear_conexion_directa()
+    conn.cursor_factory = CursorContador
+    try:
+        for total in args.lineas:
+            medir("por línea", conn, args.factura_id, total, linea_por_linea)
+            medir("en lote", conn, args.factura_id, total, en_lote)
+    finally:
+        _limpiar(conn, args.factura_id)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Prueba de carga: listado de facturas con OFFSET vs. cursor (keyset) sobre un
+dataset sintético.
+
+Clona una factura existente N veces (por defecto 1.000.000) dentro de una
+transacción, mide páginas a distintas profundidades con ambas estrategias y
+hace ROLLBACK al terminar: la base queda intacta.
+
+Requiere los índices de migrations/add_indices_listado_facturas.sql.
+
+Uso:
+    python scripts/benchmark_listado_facturas.py --factura-id <uuid> --filas 1000000 --limit 50
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.session import crear_conexion_directa
+from src.modules.facturas.repository import RepositorioFacturas
+
+# Columnas que no se copian tal cual de la factura modelo
+COLUMNAS_SINTETICAS = {
+    "id": "gen_random_uuid()",
+    "created_at": "NOW() - (g * INTERVAL '1 second')",
+    "updated_at": "NOW()",
+    "numero_factura": "NULL",
+    "clave_acceso": "NULL",
+    "numero_autorizacion": "NULL",
+}
+
+
+def sembrar(conn, factura_id: str, filas: int) -> str:
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = 'sistema_facturacion' AND table_name = 'facturas'
+            ORDER BY ordinal_position
+        """)
+        columnas = [r['column_name'] for r in cur.fetchall()]
+        valores = [COLUMNAS_SINTETICAS.get(c, c) for c in columnas]
+        cur.execute(f"""
+            INSERT INTO sistema_facturacion.facturas ({', '.join(columnas)})
+            SELECT {', '.join(valores)}
+            FROM sistema_facturacion.facturas, generate_series(1, %s) g
+            WHERE id = %s
+        """, (filas, factura_id))
+        cur.execute("ANALYZE sistema_facturacion.facturas")
+        cur.execute("SELECT empresa_id FROM sistema_facturacion.facturas WHERE id = %s", (factura_id,))
+        return cur.fetchone()['empresa_id']
+
+
+def medir(nombre, funcion, repeticiones=3):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    print(f"  {nombre:<28} {mejor * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--factura-id", required=True, help="Factura modelo a clonar")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--profundidades", type=int, nargs="+", default=[0, 100, 1000, 10000])
+    args = parser.parse_args()
+
+    conn = crear_conexion_directa()
+    try:
+        inicio = time.perf_counter()
+        empresa_id = sembrar(conn, args.factura_id, args.filas)
+        print(f"Dataset: {args.filas} facturas sintéticas en {time.perf_counter() - inicio:.1f} s")
+        repo = RepositorioFacturas(db=conn)
+
+        for pagina in args.profundidades:
+            offset = pagina * args.limit
+            # Cursor equivalente: última fila de la página anterior
+            cursor = None
+            if pagina:
+                previa = repo.listar_facturas(empresa_id=empresa_id, limit=1, offset=offset - 1)
+                if not previa:
+                    continue
+                cursor = (previa[0]['created_at'], previa[0]['id'])
+
+            print(f"Página {pagina} (offset {offset}):")
+            medir("OFFSET", lambda: repo.listar_facturas(empresa_id=empresa_id, limit=args.limit, offset=offset))
+            medir("cursor (keyset)", lambda: repo.listar_facturas(empresa_id=empresa_id, limit=args.limit, cursor=cursor))
+
+        print("Conteo:")
+        medir("exacto", lambda: repo.contar_listado(empresa_id=empresa_id))
+        medir("estimado", lambda: repo.contar_listado(empresa_id=empresa_id, estimado=True))
+        print(f"  exacto={repo.contar_listado(empresa_id=empresa_id)} estimado={repo.contar_listado(empresa_id=empresa_id, estimado=True)}")
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Prueba de memoria: exportación de auditoría con fetchall vs. cursor de servidor.
+
+Cada modo corre en un proceso aparte (el pico de RSS no se puede reiniciar
+dentro de un proceso). El proceso inserta N filas sintéticas en users_logs
+(por defecto 1.000.000) dentro de una transacción, mide el pico de RSS al
+recorrer la consulta de exportación y hace ROLLBACK: la base queda intacta.
+
+Modos:
+    fetchall  lectura anterior: RealDictCursor + fetchall() + dict por fila
+    cursor    iterar_consulta (cursor de servidor, filas en tupla)
+    csv       cursor + stream_csv_report descartando los bytes
+    excel     cursor + stream_excel_report descartando los bytes
+
+Uso:
+    python scripts/benchmark_memoria_exportacion.py --filas 1000000
+    python scripts/benchmark_memoria_exportacion.py --modo cursor --itersize 5000
+"""
+import os
+import sys
+import time
+import argparse
+import resource
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.session import crear_conexion_directa
+from src.modules.logs.repository import RepositorioLogs
+from src.utils.excel_generator import stream_csv_report, stream_excel_report
+
+MODOS = ("fetchall", "cursor", "csv", "excel")
+HEADERS = ["Fecha", "Módulo", "Actor", "Email", "Evento", "Detalle", "IP"]
+KEYS = ["created_at", "modulo", "actor_nombre", "actor_email", "evento", "motivo", "ip_address"]
+
+
+def pico_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def sembrar(conn, filas: int):
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO sistema_facturacion.users_logs (evento, origen, ip_address, user_agent, motivo, created_at)
+            SELECT 'LOGIN_OK', 'SISTEMA', '10.0.' || (g %% 255) || '.' || (g %% 251),
+                   'Mozilla/5.0 (benchmark)', 'Inicio de sesión sintético #' || g,
+                   NOW() - g * INTERVAL '1 second'
+            FROM generate_series(1, %s) g
+        """, (filas,))
+
+
+def ejecutar_modo(modo: str, filas: int, itersize: int):
+    conn = crear_conexion_directa()
+    try:
+        inicio = time.perf_counter()
+        sembrar(conn, filas)
+        print(f"  dataset: {filas} filas en {time.perf_counter() - inicio:.1f} s")
+        repo = RepositorioLogs(db=conn)
+        base = pico_rss_mb()
+
+        inicio = time.perf_counter()
+        leidas = 0
+        if modo == "fetchall":
+            query, params = repo._construir_query_auditoria()
+            with conn.cursor() as cur:
+                cur.execute(query + " ORDER BY created_at DESC", tuple(params))
+                datos = [dict(row) for row in cur.fetchall()]
+            leidas = len(datos)
+        elif modo == "cursor":
+            for _ in repo.iterar_auditoria_exportar(itersize=itersize):
+                leidas += 1
+        else:
+            filas_iter = repo.iterar_auditoria_exportar(itersize=itersize)
+            if modo == "csv":
+                bloques = stream_csv_report(HEADERS, filas_iter, KEYS)
+            else:
+                bloques = stream_excel_report("Reporte de Auditoria", HEADERS, filas_iter, KEYS)
+            for bloque in bloques:
+                leidas += len(bloque)
+
+        duracion = time.perf_counter() - inicio
+        unidad = "bytes" if modo in ("csv", "excel") else "filas"
+        print(f"  {modo:<9} {leidas:>12} {unidad}  {duracion:7.1f} s  "
+              f"pico RSS {pico_rss_mb():8.1f} MB (+{pico_rss_mb() - base:.1f} MB sobre la base)")
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--itersize", type=int, default=2000)
+    parser.add_argument("--modo", choices=MODOS, help="Ejecuta un solo modo en este proceso")
+    args = parser.parse_args()
+
+    if args.modo:
+        ejecutar_modo(args.modo, args.filas, args.itersize)
+        return
+
+    for modo in MODOS:
+        print(f"Modo {modo}:")
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--modo", modo,
+             "--filas", str(args.filas), "--itersize", str(args.itersize)],
+            check=True
+        )
+
+
+if __name__ == "__main__":
+    main()
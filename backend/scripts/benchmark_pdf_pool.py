@@ -0,0 +1,116 @@
+"""
+Prueba de carga: throughput de generación de RIDE con N requests concurrentes,
+lanzando Chromium por PDF (comportamiento anterior) vs. el pool de navegadores
+precalentados (utils/pdf_pool.py).
+
+No requiere base de datos: usa una factura sintética.
+
+Uso:
+    python scripts/benchmark_pdf_pool.py --concurrencias 1 10 50 --pdfs 50 --navegadores 4
+"""
+import os
+import sys
+import time
+import copy
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import pdf_generator
+from src.utils.pdf_pool import PoolNavegadores, ARGS_CHROMIUM, OPCIONES_PDF
+
+FACTURA = {
+    "numero_factura": "001-001-000000123",
+    "fecha_emision": "2026-01-15 10:30:00",
+    "estado": "AUTORIZADA",
+    "ambiente": 1,
+    "tipo_emision": 1,
+    "clave_acceso": "1501202601179001234500110010010000001231234567811",
+    "forma_pago_sri": "01",
+    "tipo_documento": "01",
+    "snapshot_empresa": {"razon_social": "EMPRESA DEMO S.A.", "ruc": "1790012345001", "direccion": "Quito", "tipo_contribuyente": "REGIMEN_GENERAL"},
+    "snapshot_establecimiento": {"codigo": "001", "direccion": "Quito"},
+    "snapshot_punto_emision": {"codigo": "001"},
+    "snapshot_cliente": {"razon_social": "CLIENTE DEMO", "identificacion": "1712345678", "direccion": "Quito", "email": "cliente@demo.com"},
+    "subtotal_con_iva": 200.0, "subtotal_sin_iva": 0.0, "descuento": 0.0, "iva": 30.0, "propina": 0.0, "total": 230.0,
+    "detalles": [
+        {"codigo_producto": f"P{i:03d}", "descripcion": f"Producto {i}", "cantidad": 2, "precio_unitario": 5.0, "descuento": 0, "subtotal": 10.0, "tipo_iva": "4"}
+        for i in range(20)
+    ],
+}
+
+
+def html_ride() -> str:
+    """HTML del RIDE tal como lo arma crear_ride_factura (sin renderizar el PDF)."""
+    capturado = {}
+    original = pdf_generator.render_to_pdf
+
+    def capturar(template_src, context):
+        capturado["html"] = pdf_generator.env.get_template(template_src).render(context)
+
+    pdf_generator.render_to_pdf = capturar
+    try:
+        pdf_generator.crear_ride_factura(copy.deepcopy(FACTURA))
+    finally:
+        pdf_generator.render_to_pdf = original
+    return capturado["html"]
+
+
+def pdf_en_frio(html: str) -> bytes:
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True, args=ARGS_CHROMIUM)
+        page = browser.new_page()
+        page.set_content(html, wait_until="networkidle")
+        pdf_bytes = page.pdf(**OPCIONES_PDF)
+        browser.close()
+    return pdf_bytes
+
+
+def medir(nombre, generar, html, total, concurrencia):
+    latencias = []
+
+    def uno(_):
+        inicio = time.perf_counter()
+        generar(html)
+        latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        list(executor.map(uno, range(total)))
+    duracion = time.perf_counter() - inicio
+    latencias.sort()
+    p95 = latencias[int(len(latencias) * 0.95) - 1] if latencias else 0
+    print(
+        f"{nombre:<10} concurrencia={concurrencia:<3} {total / duracion:7.2f} PDFs/s   "
+        f"p50={latencias[len(latencias) // 2] * 1000:7.0f} ms   p95={p95 * 1000:7.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--pdfs", type=int, default=50)
+    parser.add_argument("--navegadores", type=int, default=4)
+    parser.add_argument("--sin-frio", action="store_true", help="Omitir la medición lanzando Chromium por PDF")
+    args = parser.parse_args()
+
+    html = html_ride()
+    pool = PoolNavegadores(navegadores=args.navegadores, cola_max=max(args.concurrencias) * 2, timeout=120, reciclar_cada=1000)
+    pool.iniciar()
+    pool.generar_pdf(html)  # precalentar
+
+    try:
+        for concurrencia in args.concurrencias:
+            if not args.sin_frio:
+                medir("en frío", pdf_en_frio, html, args.pdfs, concurrencia)
+            medir("pool", pool.generar_pdf, html, args.pdfs, concurrencia)
+        print("Estadísticas del pool:", pool.estadisticas())
+    finally:
+        pool.cerrar()
+
+
+if __name__ == "__main__":
+    main()
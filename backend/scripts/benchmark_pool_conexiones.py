@@ -0,0 +1,76 @@
+"""
+Benchmark: conexión nueva por request vs. pool de conexiones.
+
+Simula N clientes concurrentes que ejecutan una consulta barata (como un endpoint
+simple) y reporta requests/seg y latencias para ambos modos.
+
+Uso:
+    python scripts/benchmark_pool_conexiones.py --hilos 20 --requests 2000
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.session import crear_conexion_directa, get_db_connection_raw
+from src.database.pool import obtener_pool
+
+QUERY = "SELECT id FROM sistema_facturacion.planes LIMIT 1"
+
+
+def _request_directa():
+    inicio = time.perf_counter()
+    conn = crear_conexion_directa()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(QUERY)
+            cur.fetchall()
+    finally:
+        conn.close()
+    return time.perf_counter() - inicio
+
+
+def _request_pool():
+    inicio = time.perf_counter()
+    conn = get_db_connection_raw()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(QUERY)
+            cur.fetchall()
+    finally:
+        conn.close()
+    return time.perf_counter() - inicio
+
+
+def ejecutar(nombre, fn, hilos, total):
+    with ThreadPoolExecutor(max_workers=hilos) as ex:
+        inicio = time.perf_counter()
+        latencias = list(ex.map(lambda _: fn(), range(total)))
+        duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    p50 = statistics.median(latencias) * 1000
+    p99 = latencias[int(len(latencias) * 0.99) - 1] * 1000
+    print(f"{nombre:<10} {total / duracion:>10.1f} req/s   p50={p50:7.2f} ms   p99={p99:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hilos", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"Clientes concurrentes: {args.hilos}  |  Requests: {args.requests}")
+    ejecutar("directa", _request_directa, args.hilos, args.requests)
+    # Calentar el pool antes de medir
+    obtener_pool()
+    ejecutar("pool", _request_pool, args.hilos, args.requests)
+    print("Estadísticas del pool:", obtener_pool().estadisticas())
+
+
+if __name__ == "__main__":
+    main()
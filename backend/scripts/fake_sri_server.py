@@ -0,0 +1,115 @@
+"""
+Servidor SOAP falso del SRI para pruebas de la cola de emisión.
+
+Responde RECIBIDA en Recepción y, en Autorización, EN PROCESO durante las
+primeras N consultas de cada clave de acceso y luego AUTORIZADO.
+
+Uso:
+    python scripts/fake_sri_server.py --port 8089 --consultas-en-proceso 2 --latencia 0.2
+    # y en el backend: SRI_WS_BASE_URL=http://127.0.0.1:8089
+"""
+import re
+import time
+import argparse
+import threading
+from datetime import datetime
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPUESTA_RECEPCION = """<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap:Body>
+    <ns2:validarComprobanteResponse xmlns:ns2="http://ec.gob.sri.ws.recepcion">
+      <RespuestaRecepcionComprobante>
+        <estado>RECIBIDA</estado>
+        <comprobantes/>
+      </RespuestaRecepcionComprobante>
+    </ns2:validarComprobanteResponse>
+  </soap:Body>
+</soap:Envelope>"""
+
+RESPUESTA_AUTORIZACION = """<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap:Body>
+    <ns2:autorizacionComprobanteResponse xmlns:ns2="http://ec.gob.sri.ws.autorizacion">
+      <RespuestaAutorizacionComprobante>
+        <claveAccesoConsultada>{clave}</claveAccesoConsultada>
+        <numeroComprobantes>1</numeroComprobantes>
+        <autorizaciones>
+          <autorizacion>
+            <estado>{estado}</estado>
+            {extra}
+            <mensajes/>
+          </autorizacion>
+        </autorizaciones>
+      </RespuestaAutorizacionComprobante>
+    </ns2:autorizacionComprobanteResponse>
+  </soap:Body>
+</soap:Envelope>"""
+
+_consultas = defaultdict(int)
+_lock = threading.Lock()
+
+
+class ManejadorSRI(BaseHTTPRequestHandler):
+    consultas_en_proceso = 1
+    latencia = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        cuerpo = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8", errors="ignore")
+        time.sleep(self.latencia)
+
+        if "Recepcion" in self.path:
+            respuesta = RESPUESTA_RECEPCION
+        elif "Autorizacion" in self.path:
+            match = re.search(r"<claveAccesoComprobante>(.*?)</claveAccesoComprobante>", cuerpo)
+            clave = match.group(1) if match else ""
+            with _lock:
+                _consultas[clave] += 1
+                n = _consultas[clave]
+            if n <= self.consultas_en_proceso:
+                respuesta = RESPUESTA_AUTORIZACION.format(clave=clave, estado="EN PROCESO", extra="")
+            else:
+                extra = (
+                    f"<numeroAutorizacion>{clave}</numeroAutorizacion>"
+                    f"<fechaAutorizacion>{datetime.now().isoformat()}</fechaAutorizacion>"
+                )
+                respuesta = RESPUESTA_AUTORIZACION.format(clave=clave, estado="AUTORIZADO", extra=extra)
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        datos = respuesta.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml;charset=UTF-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--consultas-en-proceso", type=int, default=1)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos de espera por respuesta")
+    args = parser.parse_args()
+
+    ManejadorSRI.consultas_en_proceso = args.consultas_en_proceso
+    ManejadorSRI.latencia = args.latencia
+    servidor = ThreadingHTTPServer((args.host, args.port), ManejadorSRI)
+    print(f"SRI falso escuchando en http://{args.host}:{args.port}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Regresión de planes de ejecución de las consultas calientes.
+
+Carga un dataset sintético multi-empresa (empresas, usuarios, clientes,
+facturas con detalle y formas de pago, cuentas por cobrar, gastos y sesiones) dentro
+de una transacción, ejecuta los métodos reales de los repositorios para una
+empresa y captura el plan de cada SELECT con EXPLAIN (ANALYZE, BUFFERS).
+Al terminar hace ROLLBACK: la base queda intacta.
+
+Falla (exit code 1) si algún plan hace Seq Scan sobre una de las tablas que
+el caso filtra (la relación que recorre la consulta, no el lado build de un
+hash join); es la señal de que falta un índice o de que una consulta dejó de
+poder usarlo. Requiere migrations/add_indices_consultas_calientes.sql.
+
+Uso:
+    python scripts/plan_regresion_consultas.py --empresas 200 --facturas-por-empresa 500
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.session import crear_conexion_directa
+from src.modules.autenticacion.repositories import AuthRepository
+from src.modules.cuentas_cobrar.repository import RepositorioCuentasCobrar
+from src.modules.dashboards.repository import RepositorioDashboards
+from src.modules.facturas.repository import RepositorioFacturas
+from src.modules.facturas.repository_ventas_diarias import RepositorioVentasDiarias
+from src.modules.reportes.usuarios.R_027.declaracion_cache import declaracion_iva_cache
+from src.modules.reportes.usuarios.R_027.repository import RepositorioR027
+
+SQL_DATASET = """
+    CREATE TEMP TABLE _plan_empresas ON COMMIT DROP AS
+    SELECT gen_random_uuid() AS id, gen_random_uuid() AS user_id, gen_random_uuid() AS rol_id,
+           gen_random_uuid() AS usuario_id, gen_random_uuid() AS establecimiento_id,
+           gen_random_uuid() AS punto_id, gen_random_uuid() AS categoria_id, n
+    FROM generate_series(1, %(empresas)s) n;
+
+    INSERT INTO sistema_facturacion.empresas
+        (id, ruc, razon_social, email, direccion, tipo_persona, tipo_contribuyente)
+    SELECT id, '99' || lpad(n::text, 8, '0') || '001', 'Empresa plan ' || n,
+           'empresa' || n || '@plan.test', 'Dirección plan', 'JURIDICA', 'REGIMEN_GENERAL'
+    FROM _plan_empresas;
+
+    INSERT INTO sistema_facturacion.users (id, email, password_hash, role)
+    SELECT user_id, 'usuario' || n || '@plan.test', 'x', 'USUARIO' FROM _plan_empresas;
+
+    INSERT INTO sistema_facturacion.empresa_roles (id, empresa_id, codigo, nombre)
+    SELECT rol_id, id, 'PLAN_' || n, 'Rol plan' FROM _plan_empresas;
+
+    INSERT INTO sistema_facturacion.usuarios (id, user_id, empresa_id, empresa_rol_id, nombres, apellidos, telefono)
+    SELECT usuario_id, user_id, id, rol_id, 'Usuario', 'Plan', '0999999999' FROM _plan_empresas;
+
+    INSERT INTO sistema_facturacion.establecimientos (id, empresa_id, codigo, nombre, direccion)
+    SELECT establecimiento_id, id, '001', 'Matriz', 'Dirección plan' FROM _plan_empresas;
+
+    INSERT INTO sistema_facturacion.puntos_emision (id, establecimiento_id, codigo, nombre)
+    SELECT punto_id, establecimiento_id, '001', 'Caja' FROM _plan_empresas;
+
+    INSERT INTO sistema_facturacion.clientes (empresa_id, identificacion, tipo_identificacion, razon_social)
+    SELECT e.id, lpad(k::text, 10, '0'), '05', 'Cliente ' || k
+    FROM _plan_empresas e, generate_series(1, %(clientes)s) k;
+
+    CREATE TEMP TABLE _plan_clientes ON COMMIT DROP AS
+    SELECT c.id, c.empresa_id, row_number() OVER (PARTITION BY c.empresa_id ORDER BY c.id) AS k
+    FROM sistema_facturacion.clientes c
+    JOIN _plan_empresas e ON e.id = c.empresa_id;
+    CREATE INDEX ON _plan_clientes (empresa_id, k);
+
+    INSERT INTO sistema_facturacion.facturas
+        (empresa_id, establecimiento_id, punto_emision_id, cliente_id, usuario_id, fecha_emision,
+         subtotal_con_iva, iva, total_sin_impuestos, total, estado, tipo_documento, origen,
+         created_at, updated_at)
+    SELECT e.id, e.establecimiento_id, e.punto_id, c.id, e.usuario_id, f.fecha,
+           f.subtotal, ROUND(f.subtotal * 0.15, 2), f.subtotal, f.subtotal + ROUND(f.subtotal * 0.15, 2),
+           f.estado, '01', 'MANUAL', f.fecha, f.fecha
+    FROM _plan_empresas e
+    CROSS JOIN LATERAL (
+        SELECT g,
+               NOW() - random() * 365 * INTERVAL '1 day' AS fecha,
+               ROUND((10 + random() * 500)::numeric, 2) AS subtotal,
+               CASE g %% 20 WHEN 0 THEN 'ANULADA' WHEN 1 THEN 'BORRADOR'
+                            WHEN 2 THEN 'EN_PROCESO' WHEN 3 THEN 'DEVUELTA'
+                            ELSE 'AUTORIZADA' END AS estado
+        FROM generate_series(1, %(facturas)s) g
+    ) f
+    JOIN _plan_clientes c ON c.empresa_id = e.id AND c.k = 1 + f.g %% %(clientes)s;
+
+    CREATE TEMP TABLE _plan_facturas ON COMMIT DROP AS
+    SELECT f.* FROM sistema_facturacion.facturas f JOIN _plan_empresas e ON e.id = f.empresa_id;
+
+    INSERT INTO sistema_facturacion.facturas_detalle
+        (factura_id, codigo_producto, nombre, descripcion, cantidad, precio_unitario, subtotal,
+         tipo_iva, valor_iva, base_imponible, tarifa_iva, codigo_impuesto, created_at)
+    SELECT f.id, 'P' || d, 'Producto ' || d, 'Producto ' || d, 1,
+           ROUND(f.subtotal_con_iva / 2, 2), ROUND(f.subtotal_con_iva / 2, 2),
+           '4', ROUND(f.iva / 2, 2), ROUND(f.subtotal_con_iva / 2, 2), 15, '2', f.created_at
+    FROM _plan_facturas f, generate_series(1, 2) d;
+
+    INSERT INTO sistema_facturacion.formas_pago (factura_id, valor, forma_pago_sri, created_at)
+    SELECT id, total, CASE WHEN random() < 0.5 THEN '01' ELSE '20' END, created_at
+    FROM _plan_facturas;
+
+    INSERT INTO sistema_facturacion.cuentas_cobrar
+        (empresa_id, factura_id, cliente_id, numero_documento, fecha_emision, fecha_vencimiento,
+         monto_total, monto_pagado, saldo_pendiente, estado)
+    SELECT empresa_id, id, cliente_id, 'PLAN-' || id, fecha_emision::date, fecha_emision::date + 30,
+           total, 0, total, 'pendiente'
+    FROM _plan_facturas
+    WHERE estado = 'AUTORIZADA' AND random() < 0.3;
+
+    INSERT INTO sistema_facturacion.categoria_gasto (id, empresa_id, codigo, nombre, tipo)
+    SELECT categoria_id, id, 'PLAN', 'Gastos plan', 'operativo' FROM _plan_empresas;
+
+    -- Gastos al mismo volumen que las facturas (R_027 bloque 500 y KPI de gastos)
+    INSERT INTO sistema_facturacion.gastos
+        (empresa_id, categoria_gasto_id, user_id, fecha_emision, concepto, subtotal, tipo_iva, total, estado_pago)
+    SELECT e.id, e.categoria_id, e.user_id, g.fecha, 'Gasto ' || g.n, g.subtotal, g.tipo_iva,
+           CASE g.tipo_iva WHEN '0' THEN g.subtotal ELSE g.subtotal + ROUND(g.subtotal * 0.15, 2) END,
+           'pagado'
+    FROM _plan_empresas e
+    CROSS JOIN LATERAL (
+        SELECT n,
+               CURRENT_DATE - (random() * 365)::int AS fecha,
+               ROUND((5 + random() * 300)::numeric, 2) AS subtotal,
+               CASE WHEN n %% 5 = 0 THEN '0' ELSE '2' END AS tipo_iva
+        FROM generate_series(1, %(facturas)s) n
+    ) g;
+
+    INSERT INTO sistema_facturacion.user_sessions (user_id, is_valid, created_at, expires_at)
+    SELECT e.user_id, s > 1, NOW() - s * INTERVAL '1 day', NOW() - s * INTERVAL '1 day' + INTERVAL '1 day'
+    FROM _plan_empresas e, generate_series(0, %(sesiones)s - 1) s;
+"""
+
+TABLAS_ANALYZE = (
+    "empresas", "clientes", "facturas", "facturas_detalle", "formas_pago",
+    "cuentas_cobrar", "user_sessions", "ventas_diarias", "categoria_gasto", "gastos",
+)
+
+
+class CursorPlan:
+    """Cursor que, antes de cada SELECT, guarda su plan real con EXPLAIN ANALYZE."""
+
+    def __init__(self, conn, cur, planes: list):
+        self._conn = conn
+        self._cur = cur
+        self._planes = planes
+
+    def execute(self, query, params=None):
+        sql = query.as_string(self._cur) if hasattr(query, "as_string") else query
+        if self._planes is not None and _es_lectura(sql):
+            # Cursor aparte: los cursores de servidor (iterar_consulta) no admiten EXPLAIN
+            with self._conn.cursor() as aux:
+                aux.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+                self._planes.append((sql, aux.fetchone()["QUERY PLAN"][0]))
+        return self._cur.execute(query, params)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cur.close()
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cur, nombre)
+
+
+class ConexionPlan:
+    """
+    Envuelve la conexión del dataset: `commit` no hace nada (todo queda en la
+    transacción que se revierte al final) y los cursores registran planes.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.planes = None
+
+    def cursor(self, *args, **kwargs):
+        return CursorPlan(self._conn, self._conn.cursor(*args, **kwargs), self.planes)
+
+    def commit(self):
+        pass
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+
+def _es_lectura(sql: str) -> bool:
+    texto = sql.lstrip().upper()
+    if not (texto.startswith("SELECT") or texto.startswith("WITH")):
+        return False
+    return not any(p in texto for p in ("INSERT ", "UPDATE ", "DELETE ", "FOR UPDATE"))
+
+
+def _nodos(plan: dict):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from _nodos(hijo)
+
+
+def sembrar(conn, args) -> dict:
+    with conn.cursor() as cur:
+        cur.execute(SQL_DATASET, {
+            "empresas": args.empresas,
+            "clientes": args.clientes_por_empresa,
+            "facturas": args.facturas_por_empresa,
+            "sesiones": args.sesiones_por_usuario,
+        })
+        # Empresa de referencia: la del medio del dataset
+        cur.execute("""
+            SELECT e.id AS empresa_id, e.user_id,
+                   (SELECT f.id FROM _plan_facturas f WHERE f.empresa_id = e.id LIMIT 1) AS factura_id
+            FROM _plan_empresas e WHERE e.n = %s
+        """, (max(1, args.empresas // 2),))
+        referencia = dict(cur.fetchone())
+
+    for empresa_id in _ids_empresas(conn):
+        RepositorioVentasDiarias(db=conn).reconstruir(empresa_id)
+
+    with conn.cursor() as cur:
+        for tabla in TABLAS_ANALYZE:
+            cur.execute(f"ANALYZE sistema_facturacion.{tabla}")
+    return referencia
+
+
+def _ids_empresas(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM _plan_empresas")
+        return [r["id"] for r in cur.fetchall()]
+
+
+def casos(conn, ref: dict):
+    """(nombre, tablas que el caso filtra, función que ejecuta las consultas)."""
+    empresa_id = ref["empresa_id"]
+    hoy = date.today()
+    inicio_mes = hoy.replace(day=1) - timedelta(days=1)
+    desde, hasta = inicio_mes.replace(day=1).isoformat(), inicio_mes.isoformat()
+
+    facturas = RepositorioFacturas(db=conn)
+    r027 = RepositorioR027(db=conn)
+    dashboards = RepositorioDashboards(db=conn)
+    cartera = RepositorioCuentasCobrar(db=conn)
+    auth = AuthRepository(db=conn)
+
+    return [
+        ("facturas.listar", {"facturas"},
+         lambda: facturas.listar_facturas(empresa_id=empresa_id, limit=50)),
+        ("facturas.obtener_por_id", {"facturas", "formas_pago"},
+         lambda: facturas.obtener_por_id(ref["factura_id"])),
+        ("r027.totales_periodo", {"facturas", "gastos"},
+         lambda: (declaracion_iva_cache.limpiar(), r027.obtener_totales_periodo(empresa_id, desde, hasta))),
+        ("dashboard.kpis", {"ventas_diarias", "facturas", "gastos"},
+         lambda: dashboards.obtener_kpis_principales(empresa_id=empresa_id)),
+        ("dashboard.recientes", {"facturas"},
+         lambda: dashboards.obtener_facturas_recientes(empresa_id)),
+        ("dashboard.tendencia", {"ventas_diarias", "facturas"},
+         lambda: dashboards.obtener_ventas_tendencia(empresa_id)),
+        ("dashboard.pagos", {"facturas"},
+         lambda: dashboards.obtener_distribucion_pagos(empresa_id)),
+        ("cartera.resumen", {"cuentas_cobrar"},
+         lambda: cartera.obtener_resumen_cobros(empresa_id, hoy)),
+        ("auth.sesion_activa", {"user_sessions"},
+         lambda: auth.tiene_sesion_activa(ref["user_id"])),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--empresas", type=int, default=200)
+    parser.add_argument("--facturas-por-empresa", type=int, default=500)
+    parser.add_argument("--clientes-por-empresa", type=int, default=50)
+    parser.add_argument("--sesiones-por-usuario", type=int, default=20)
+    parser.add_argument("--mostrar-sql", action="store_true", help="Imprime el SQL de las consultas con regresión")
+    args = parser.parse_args()
+
+    conn = ConexionPlan(crear_conexion_directa())
+    regresiones = 0
+    try:
+        inicio = time.perf_counter()
+        ref = sembrar(conn, args)
+        print(f"Dataset: {args.empresas} empresas x {args.facturas_por_empresa} facturas "
+              f"en {time.perf_counter() - inicio:.1f} s")
+
+        for nombre, tablas, funcion in casos(conn, ref):
+            conn.planes = []
+            funcion()
+            planes, conn.planes = conn.planes, None
+            for i, (sql, plan) in enumerate(planes, 1):
+                raiz = plan["Plan"]
+                buffers = raiz.get("Shared Hit Blocks", 0) + raiz.get("Shared Read Blocks", 0)
+                seq = sorted({
+                    n["Relation Name"] for n in _nodos(raiz)
+                    if n.get("Node Type") == "Seq Scan" and n.get("Relation Name") in tablas
+                })
+                estado = "OK" if not seq else "SEQ SCAN: " + ", ".join(seq)
+                print(f"  {nombre + '#' + str(i):<28} {plan['Execution Time']:9.2f} ms "
+                      f"{buffers:8d} buffers  {estado}")
+                if seq:
+                    regresiones += 1
+                    if args.mostrar_sql:
+                        print(sql)
+    finally:
+        conn.rollback()
+        conn.close()
+
+    if regresiones:
+        print(f"{regresiones} consultas con Seq Scan sobre las tablas que filtran")
+        sys.exit(1)
+    print("Sin regresiones de plan")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,13 +13,101 @@ class EnvSettings(BaseSettings):
     DB_PASSWORD: str
     DB_PORT: int = 5432
 
+    # Pool de conexiones
+    DB_POOL_MIN: int = 2
+    DB_POOL_MAX: int = 20
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_MAX_LIFETIME: float = 1800.0
+    DB_POOL_HEALTHCHECK_INTERVAL: float = 30.0
+    # Pool asíncrono (psycopg 3) de los endpoints async; usa el mismo timeout y vida máxima
+    DB_ASYNC_POOL_MIN: int = 2
+    DB_ASYNC_POOL_MAX: int = 20
+    # Filas por viaje en lecturas con cursor de servidor (exportaciones, reportes)
+    DB_ITERSIZE: int = 2000
+
     # Seguridad / JWT
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    AUTH_PRINCIPAL_CACHE_TTL: float = 30.0
+    AUTH_PRINCIPAL_CACHE_MAX: int = 10000
     
     # SRI Seguridad
     CERT_MASTER_KEY: str
     CERT_CIPHER_ALGORITHM: str = "AES-256-GCM"
+    SRI_SIGNER_CACHE_TTL: float = 3600.0
+    SRI_SIGNER_CACHE_MAX: int = 200
+    # Perfil del emisor (datos de la empresa para facturar y emitir)
+    EMISOR_PERFIL_CACHE_TTL: float = 300.0
+    EMISOR_PERFIL_CACHE_MAX: int = 5000
+    # Datos de referencia (config, flags, catálogos, planes, permisos, módulos); invalidación por LISTEN/NOTIFY
+    REFERENCIA_CACHE_TTL: float = 3600.0
+    REFERENCIA_CACHE_MAX: int = 2000
+    REFERENCIA_CACHE_CANAL: str = "cache_referencia"
+
+    # Jobs en segundo plano (ciclo diario, limpieza de sesiones)
+    AUTOMATIZACION_HABILITADA: bool = True
+    AUTOMATIZACION_HILOS: int = 2
+
+    # Facturación recurrente (corrida nocturna)
+    RECURRENTE_CONCURRENCIA: int = 4
+    RECURRENTE_MAX_POR_EMPRESA: int = 2
+
+    # SRI Cola de emisión asíncrona
+    SRI_COLA_WORKERS: int = 2
+    SRI_COLA_POLL_SEGUNDOS: float = 1.0
+    SRI_COLA_LEASE_SEGUNDOS: int = 120
+    SRI_COLA_MAX_CONSULTAS: int = 8
+    SRI_COLA_BACKOFF_BASE: float = 2.0
+    SRI_COLA_BACKOFF_MAX: float = 60.0
+    # Reconciliador de comprobantes pendientes (EN_PROCESO / RECIBIDO)
+    SRI_RECONCILIADOR_HILOS: int = 4
+    SRI_RECONCILIADOR_LOTE: int = 50
+    SRI_RECONCILIADOR_INTERVALO_SEGUNDOS: float = 30.0
+    SRI_RECONCILIADOR_GRACIA_SEGUNDOS: int = 60
+    SRI_RECONCILIADOR_MAX_CONSULTAS: int = 12
+    SRI_RECONCILIADOR_BACKOFF_BASE: float = 30.0
+    SRI_RECONCILIADOR_BACKOFF_MAX: float = 3600.0
+    # Transporte SRI compartido (keep-alive, circuit breaker por endpoint)
+    SRI_POOL_CONEXIONES: int = 20
+    SRI_CIRCUITO_FALLOS: int = 5
+    SRI_CIRCUITO_ESPERA_SEGUNDOS: float = 30.0
+    # URL base alternativa de los web services del SRI (p. ej. scripts/fake_sri_server.py)
+    SRI_WS_BASE_URL: Optional[str] = None
+
+    # Notificaciones en tiempo real (SSE sobre LISTEN/NOTIFY)
+    NOTIFICACIONES_CANAL: str = "notificaciones_usuario"
+    NOTIFICACIONES_PING_SEGUNDOS: float = 20.0
+
+    # Pool de navegadores para PDFs (RIDE y reportes)
+    PDF_POOL_NAVEGADORES: int = 2
+    PDF_POOL_COLA_MAX: int = 50
+    PDF_POOL_TIMEOUT: float = 30.0
+    PDF_POOL_RECICLAR_CADA: int = 200
+    PDF_POOL_PRECALENTAR: bool = False
+    # Cache en disco de RIDEs de facturas autorizadas (0 MB = deshabilitado)
+    RIDE_CACHE_DIR: str = "cache/rides"
+    RIDE_CACHE_MAX_MB: int = 512
+
+    # Dashboard: cache del overview por empresa y secciones en paralelo
+    DASHBOARD_CACHE_TTL: float = 30.0
+    DASHBOARD_CACHE_MAX: int = 2000
+    DASHBOARD_OVERVIEW_HILOS: int = 4
+
+    # Reporte R_027 (Formulario 104): totales por empresa y período
+    DECLARACION_IVA_CACHE_TTL: float = 600.0
+    DECLARACION_IVA_CACHE_MAX: int = 5000
+
+    # Importación masiva de clientes/productos (CSV/XLSX en segundo plano)
+    IMPORTACION_DIR: str = "cache/importaciones"
+    IMPORTACION_MAX_MB: int = 20
+    IMPORTACION_LOTE: int = 5000
+    IMPORTACION_HILOS: int = 2
+    IMPORTACION_MAX_ERRORES: int = 1000
+
+    # Reportes asíncronos: renders simultáneos y trabajos en cola por proceso, vigencia del archivo
+    REPORTES_HILOS: int = 2
+    REPORTES_COLA_MAX: int = 20
+    REPORTES_TTL_HORAS: int = 24
 
     # Configuración General
     DEBUG: bool = False
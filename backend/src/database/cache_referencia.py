@@ -0,0 +1,236 @@
+"""
+Cache de datos de referencia compartido por los módulos.
+
+Configuración global, feature flags, catálogos, plantillas, planes, permisos,
+módulos por plan y el teléfono del superadmin cambian muy poco y se leen en
+casi cada request. Se guardan en memoria por espacio de nombres con claves
+versionadas: `(espacio, version, clave)`. Subir la versión de un espacio deja
+inalcanzables todas sus entradas anteriores, incluso las que otro hilo estaba
+cargando mientras ocurría el cambio.
+
+Coherencia entre workers de uvicorn:
+
+- Las escrituras llaman a `notificar_cambio(cur, espacio)` dentro de su
+  transacción. Emite un `pg_notify` que Postgres entrega al hacer commit y sube
+  la versión local de inmediato (lecturas del mismo proceso).
+- Cada proceso corre `EscuchaReferencia`: un hilo con `LISTEN` en una conexión
+  dedicada que sube la versión del espacio notificado. La notificación posterior
+  al commit también descarta lo que el propio proceso haya cargado entre la
+  invalidación local y el commit.
+- Mientras la escucha no está conectada (arranque, caída de la BD, scripts) no se
+  sirve desde cache y al reconectar se descarta todo, porque pudieron perderse
+  notificaciones. El TTL queda solo como red de seguridad.
+
+Un cambio hecho a mano por SQL se propaga con
+`SELECT pg_notify('<REFERENCIA_CACHE_CANAL>', '<espacio>')`, o con `'*'` para todos.
+
+Otros caches por proceso se suben al mismo canal con `suscribir(prefijo, cache)`:
+reciben los payloads `'<prefijo>:<detalle>'` en `aplicar_invalidacion(detalle)`,
+se vacían junto con este y solo deben servir mientras `escuchando` sea verdadero.
+"""
+
+import copy
+import select
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from psycopg2 import sql
+
+from ..config.env import env
+from ..utils.cache import CacheTTL
+from .session import crear_conexion_directa
+
+logger = logging.getLogger("facturacion_api.database")
+
+# Espacios de nombres (payload de las notificaciones)
+CONFIGURACION = "configuracion"
+FEATURE_FLAGS = "feature_flags"
+CATALOGOS = "catalogos"
+PLANTILLAS = "plantillas"
+PLANES = "planes"
+PERMISOS = "permisos"
+MODULOS = "modulos"
+SUPERADMIN_TELEFONO = "superadmin_telefono"
+TODOS = "*"
+
+# Espera máxima del select(): cada cuánto se revisa si hay que detener la escucha
+INTERVALO_ESCUCHA = 5.0
+REINTENTO_SEGUNDOS = 5.0
+
+
+class CacheReferencia:
+    def __init__(self, ttl: float, max_entradas: int, canal: str):
+        self.canal = canal
+        self._cache = CacheTTL(ttl=ttl, max_entradas=max_entradas, nombre="datos_referencia")
+        self._versiones: Dict[str, int] = {}
+        # Sube con limpiar(): invalida todos los espacios a la vez
+        self._generacion = 0
+        self._lock = threading.Lock()
+        self._notificaciones = 0
+        self._dependientes: Dict[str, Any] = {}
+        self.escuchando = False
+
+    @property
+    def habilitado(self) -> bool:
+        return self._cache.habilitado
+
+    @property
+    def requiere_escucha(self) -> bool:
+        return self._cache.habilitado or any(d.habilitado for d in self._dependientes.values())
+
+    def suscribir(self, prefijo: str, cache):
+        """Registra un cache que se invalida por este canal (ver docstring del módulo)."""
+        self._dependientes[prefijo] = cache
+
+    def version(self, espacio: str) -> tuple:
+        with self._lock:
+            return self._generacion, self._versiones.get(espacio, 0)
+
+    def obtener_o_cargar(self, espacio: str, clave: Hashable, cargar: Callable[[], Any]) -> Any:
+        """
+        Retorna una copia del valor cacheado o lo carga con `cargar()`.
+        Sin escucha activa siempre carga desde la BD.
+        """
+        if not (self.escuchando and self._cache.habilitado):
+            return cargar()
+        version = self.version(espacio)
+        llave = (espacio, version, clave)
+        # Tupla: también se cachean resultados None
+        entrada = self._cache.obtener(llave)
+        if entrada is None:
+            entrada = (cargar(),)
+            self._cache.guardar(llave, entrada)
+        # Copia profunda: los servicios enriquecen las filas (p. ej. conteos por vendedor)
+        return copy.deepcopy(entrada[0])
+
+    async def obtener_o_cargar_async(self, espacio: str, clave: Hashable, cargar: Callable[[], Awaitable[Any]]) -> Any:
+        """Variante de `obtener_o_cargar` para cargas con el pool asíncrono."""
+        if not (self.escuchando and self._cache.habilitado):
+            return await cargar()
+        version = self.version(espacio)
+        llave = (espacio, version, clave)
+        entrada = self._cache.obtener(llave)
+        if entrada is None:
+            entrada = (await cargar(),)
+            self._cache.guardar(llave, entrada)
+        return copy.deepcopy(entrada[0])
+
+    def invalidar(self, espacio: str):
+        """Sube la versión del espacio y libera sus entradas."""
+        if espacio == TODOS:
+            self.limpiar()
+            return
+        with self._lock:
+            self._versiones[espacio] = self._versiones.get(espacio, 0) + 1
+        self._cache.invalidar_si(lambda llave, _: llave[0] == espacio)
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+        self._cache.limpiar()
+        for dependiente in self._dependientes.values():
+            dependiente.limpiar()
+
+    def notificar_cambio(self, cur, *espacios: str):
+        """
+        Publica el cambio de los espacios a todos los procesos. Debe llamarse con
+        el cursor de la transacción que escribe: si hay rollback no se notifica.
+        """
+        for espacio in espacios:
+            cur.execute("SELECT pg_notify(%s, %s)", (self.canal, espacio))
+            self.invalidar(espacio)
+
+    def publicar(self, cur, prefijo: str, detalle: str):
+        """Como `notificar_cambio`, para el cache suscrito con `prefijo`."""
+        cur.execute("SELECT pg_notify(%s, %s)", (self.canal, f"{prefijo}:{detalle}"))
+        self._dependientes[prefijo].aplicar_invalidacion(detalle)
+
+    def registrar_notificacion(self, payload: str):
+        self._notificaciones += 1
+        prefijo, separador, detalle = payload.partition(":")
+        dependiente = self._dependientes.get(prefijo) if separador else None
+        if dependiente is not None:
+            dependiente.aplicar_invalidacion(detalle)
+        else:
+            self.invalidar(payload)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            versiones = dict(self._versiones)
+        return {
+            **self._cache.estadisticas(),
+            "canal": self.canal,
+            "escuchando": self.escuchando,
+            "notificaciones_recibidas": self._notificaciones,
+            "generacion": self._generacion,
+            "versiones": versiones,
+            "suscritos": sorted(self._dependientes),
+        }
+
+
+class EscuchaReferencia:
+    """Hilo por proceso que escucha el canal de invalidación (LISTEN)."""
+
+    def __init__(self, cache: CacheReferencia):
+        self._cache = cache
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        if not self._cache.requiere_escucha or self.activo:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="cache-referencia", daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout: float = 10.0):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout=timeout)
+            self._hilo = None
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            conn = None
+            try:
+                conn = crear_conexion_directa()
+                conn.commit()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self._cache.canal)))
+                # Lo escrito mientras no se escuchaba no llegó a este proceso
+                self._cache.limpiar()
+                self._cache.escuchando = True
+                logger.info(f"[CACHE-REFERENCIA] Escuchando el canal '{self._cache.canal}'")
+                self._escuchar(conn)
+            except Exception as e:
+                logger.warning(f"[CACHE-REFERENCIA] Escucha interrumpida, se lee desde la BD: {str(e)}")
+            finally:
+                self._cache.escuchando = False
+                if conn is not None and not conn.closed:
+                    conn.close()
+            self._detener.wait(REINTENTO_SEGUNDOS)
+
+    def _escuchar(self, conn):
+        while not self._detener.is_set():
+            listos, _, _ = select.select([conn], [], [], INTERVALO_ESCUCHA)
+            if not listos:
+                continue
+            conn.poll()
+            while conn.notifies:
+                notificacion = conn.notifies.pop(0)
+                self._cache.registrar_notificacion(notificacion.payload)
+
+
+# Instancias globales por proceso
+cache_referencia = CacheReferencia(
+    ttl=env.REFERENCIA_CACHE_TTL,
+    max_entradas=env.REFERENCIA_CACHE_MAX,
+    canal=env.REFERENCIA_CACHE_CANAL
+)
+escucha_referencia = EscuchaReferencia(cache_referencia)
@@ -0,0 +1,67 @@
+"""
+Iteración de lecturas grandes con cursores de servidor.
+
+`RealDictCursor` + `fetchall()` + `[dict(row) for row in ...]` mantiene dos
+copias completas del resultado, con un dict por fila. `iterar_consulta` usa un
+cursor con nombre (el resultado queda en PostgreSQL y se traen `itersize`
+filas por viaje) y filas como tuplas envueltas en `FilaVista`, que comparte el
+mapa de columnas entre todas las filas de la consulta.
+"""
+
+from collections.abc import Mapping
+from itertools import count
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+from psycopg2.extensions import cursor as CursorTuplas
+
+from ..config.env import env
+
+_secuencia = count(1)
+
+
+class FilaVista(Mapping):
+    """Vista de solo lectura tipo dict sobre una fila en tupla."""
+
+    __slots__ = ("_valores", "_columnas")
+
+    def __init__(self, valores: tuple, columnas: Dict[str, int]):
+        self._valores = valores
+        self._columnas = columnas
+
+    def __getitem__(self, clave: str) -> Any:
+        return self._valores[self._columnas[clave]]
+
+    def __iter__(self):
+        return iter(self._columnas)
+
+    def __len__(self) -> int:
+        return len(self._columnas)
+
+    def __repr__(self) -> str:
+        return f"FilaVista({dict(self)!r})"
+
+
+def iterar_consulta(
+    conn,
+    query: str,
+    params: Optional[Sequence] = None,
+    itersize: Optional[int] = None,
+    nombre: Optional[str] = None
+) -> Iterator[FilaVista]:
+    """
+    Ejecuta `query` con un cursor de servidor y produce una `FilaVista` por fila.
+
+    El cursor vive dentro de la transacción de `conn`; con autocommit se abre
+    WITH HOLD para que sobreviva al commit implícito. Quien necesite modificar
+    o serializar la fila la copia con `dict(fila)`.
+    """
+    nombre = nombre or f"iter_{next(_secuencia)}"
+    with conn.cursor(name=nombre, cursor_factory=CursorTuplas, withhold=conn.autocommit) as cur:
+        cur.itersize = itersize or env.DB_ITERSIZE
+        cur.execute(query, params)
+        columnas = None
+        for valores in cur:
+            if columnas is None:
+                # En cursores con nombre, description se conoce tras el primer fetch
+                columnas = {col.name: i for i, col in enumerate(cur.description)}
+            yield FilaVista(valores, columnas)
@@ -0,0 +1,293 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Optional
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor, register_uuid
+
+from ..config.env import env
+from ..errors.app_error import AppError
+
+logger = logging.getLogger("facturacion_api.database")
+
+
+class PoolAgotadoError(AppError):
+    """No se obtuvo una conexión libre dentro del tiempo de espera configurado."""
+
+    def __init__(self, message: str):
+        super().__init__(message, status_code=503, code="DB_POOL_EXHAUSTED")
+
+
+class ConexionPool(extensions.connection):
+    """
+    Conexión psycopg2 que conoce su pool de origen.
+    Llamar a close() la devuelve al pool en lugar de cerrar el socket,
+    de modo que el código existente que hace `conn.close()` sigue funcionando.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool: Optional["PoolConexiones"] = None
+        self._prestada = False
+        self._creada_en = time.monotonic()
+        self._ultimo_uso = self._creada_en
+
+    def close(self):
+        if self._pool is None:
+            super().close()
+        elif self._prestada:
+            self._pool.devolver(self)
+
+    def cerrar_fisicamente(self):
+        self._pool = None
+        if not self.closed:
+            super().close()
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones PostgreSQL thread-safe.
+
+    - Mantiene entre `minimo` y `maximo` conexiones abiertas.
+    - Cada conexión se configura una sola vez al crearse (UUID nativo y search_path).
+    - Descarta conexiones que superan `vida_maxima` segundos o que fallan el health check.
+    - Si el pool está lleno, espera hasta `timeout` segundos antes de lanzar PoolAgotadoError.
+    """
+
+    def __init__(
+        self,
+        minimo: int,
+        maximo: int,
+        timeout: float = 10.0,
+        vida_maxima: float = 1800.0,
+        intervalo_health_check: float = 30.0,
+        **conn_kwargs
+    ):
+        if minimo < 0 or maximo < 1 or minimo > maximo:
+            raise ValueError("Configuración de pool inválida: se requiere 0 <= minimo <= maximo y maximo >= 1")
+
+        self.minimo = minimo
+        self.maximo = maximo
+        self.timeout = timeout
+        self.vida_maxima = vida_maxima
+        self.intervalo_health_check = intervalo_health_check
+        self._conn_kwargs = conn_kwargs
+
+        self._libres: deque = deque()
+        self._en_uso: set = set()
+        self._reservadas = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._cerrado = False
+
+        # Métricas
+        self._total_creadas = 0
+        self._total_descartadas = 0
+        self._total_checkouts = 0
+        self._total_esperas = 0
+        self._total_agotado = 0
+        self._tiempo_espera_total = 0.0
+        self._pico_en_uso = 0
+
+        for _ in range(minimo):
+            self._libres.append(self._crear_conexion())
+            self._total_creadas += 1
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida de conexiones físicas
+    # ------------------------------------------------------------------
+
+    def _crear_conexion(self) -> ConexionPool:
+        conn = psycopg2.connect(
+            connection_factory=ConexionPool,
+            cursor_factory=RealDictCursor,
+            client_encoding="UTF8",
+            **self._conn_kwargs
+        )
+        register_uuid(conn_or_curs=conn)
+        with conn.cursor() as cur:
+            cur.execute("SET search_path TO sistema_facturacion, public")
+        conn.commit()
+        conn._pool = self
+        return conn
+
+    def _descartar(self, conn: ConexionPool):
+        self._total_descartadas += 1
+        try:
+            conn.cerrar_fisicamente()
+        except Exception:
+            pass
+
+    def _expirada(self, conn: ConexionPool) -> bool:
+        return self.vida_maxima > 0 and (time.monotonic() - conn._creada_en) > self.vida_maxima
+
+    def _saludable(self, conn: ConexionPool) -> bool:
+        """Verifica la conexión con un SELECT 1 solo si lleva inactiva más del intervalo configurado."""
+        if conn.closed:
+            return False
+        if (time.monotonic() - conn._ultimo_uso) < self.intervalo_health_check:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def obtener(self) -> ConexionPool:
+        """Obtiene una conexión del pool (bloquea hasta `timeout` si está agotado)."""
+        inicio = time.monotonic()
+        esperado = False
+
+        with self._cond:
+            while True:
+                if self._cerrado:
+                    raise PoolAgotadoError("El pool de conexiones está cerrado")
+
+                if self._libres:
+                    conn = self._libres.pop()
+                elif len(self._en_uso) + self._reservadas < self.maximo:
+                    # Reservamos el cupo y creamos la conexión fuera del lock
+                    self._reservadas += 1
+                    break
+                else:
+                    restante = self.timeout - (time.monotonic() - inicio)
+                    if restante <= 0:
+                        self._total_agotado += 1
+                        logger.warning(
+                            f"[POOL] Agotado: {len(self._en_uso)}/{self.maximo} conexiones en uso tras {self.timeout}s"
+                        )
+                        raise PoolAgotadoError(
+                            f"No hay conexiones disponibles (máximo {self.maximo}) tras esperar {self.timeout}s"
+                        )
+                    esperado = True
+                    self._cond.wait(restante)
+                    continue
+
+                if self._expirada(conn) or not self._saludable(conn):
+                    self._descartar(conn)
+                    continue
+
+                self._registrar_checkout(conn, inicio, esperado)
+                return conn
+
+        # Creación de una nueva conexión física (fuera del lock)
+        try:
+            conn = self._crear_conexion()
+        except Exception:
+            with self._cond:
+                self._reservadas -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._reservadas -= 1
+            self._total_creadas += 1
+            self._registrar_checkout(conn, inicio, esperado)
+        return conn
+
+    def _registrar_checkout(self, conn: ConexionPool, inicio: float, esperado: bool):
+        conn._prestada = True
+        self._en_uso.add(conn)
+        self._total_checkouts += 1
+        if esperado:
+            self._total_esperas += 1
+            self._tiempo_espera_total += time.monotonic() - inicio
+        self._pico_en_uso = max(self._pico_en_uso, len(self._en_uso))
+
+    def devolver(self, conn: ConexionPool):
+        """
+        Devuelve una conexión al pool.
+        Revierte cualquier transacción abierta para que el siguiente usuario la reciba limpia.
+        """
+        descartar = conn.closed or self._expirada(conn)
+        if not descartar:
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                descartar = True
+
+        with self._cond:
+            if conn not in self._en_uso:
+                return
+            self._en_uso.discard(conn)
+            conn._prestada = False
+            conn._ultimo_uso = time.monotonic()
+
+            if descartar or self._cerrado:
+                self._descartar(conn)
+            else:
+                self._libres.append(conn)
+            self._cond.notify()
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres y rechaza nuevos checkouts."""
+        with self._cond:
+            self._cerrado = True
+            while self._libres:
+                self._descartar(self._libres.pop())
+            self._cond.notify_all()
+        logger.info("[POOL] Pool de conexiones cerrado.")
+
+    def estadisticas(self) -> dict:
+        """Métricas del pool para monitoreo."""
+        with self._cond:
+            en_uso = len(self._en_uso)
+            return {
+                "minimo": self.minimo,
+                "maximo": self.maximo,
+                "en_uso": en_uso,
+                "libres": len(self._libres),
+                "pico_en_uso": self._pico_en_uso,
+                "total_creadas": self._total_creadas,
+                "total_descartadas": self._total_descartadas,
+                "total_checkouts": self._total_checkouts,
+                "total_esperas": self._total_esperas,
+                "total_agotado": self._total_agotado,
+                "espera_promedio_ms": round(
+                    (self._tiempo_espera_total / self._total_esperas) * 1000, 2
+                ) if self._total_esperas else 0.0,
+            }
+
+
+_pool: Optional[PoolConexiones] = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool() -> PoolConexiones:
+    """Retorna el pool global del proceso, creándolo bajo demanda."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexiones(
+                    minimo=env.DB_POOL_MIN,
+                    maximo=env.DB_POOL_MAX,
+                    timeout=env.DB_POOL_TIMEOUT,
+                    vida_maxima=env.DB_POOL_MAX_LIFETIME,
+                    intervalo_health_check=env.DB_POOL_HEALTHCHECK_INTERVAL,
+                    host=env.DB_HOST,
+                    database=env.DB_NAME,
+                    user=env.DB_USER,
+                    password=env.DB_PASSWORD,
+                    port=env.DB_PORT,
+                )
+                logger.info(f"[POOL] Pool de conexiones iniciado (min={env.DB_POOL_MIN}, max={env.DB_POOL_MAX}).")
+    return _pool
+
+
+def cerrar_pool():
+    """Cierra el pool global (hook de apagado)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.cerrar()
+            _pool = None
@@ -0,0 +1,108 @@
+"""
+Pool de conexiones asíncrono (psycopg 3) para los endpoints `async def`.
+
+Los repositorios síncronos (psycopg2 + `PoolConexiones`) siguen siendo el
+camino de scripts, jobs y endpoints `def`. Los endpoints de lectura más
+concurridos usan este pool para no ocupar un hilo del threadpool por request
+ni bloquear el event loop con llamadas de psycopg2.
+
+Las conexiones se configuran igual que las del pool síncrono: filas como dict,
+`search_path` del esquema y binding de parámetros del lado del cliente
+(`AsyncClientCursor`), de modo que el SQL de los repositorios síncronos se
+reutiliza tal cual (`%s`, casts implícitos de texto a uuid, EXPLAIN con parámetros).
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Optional
+
+from psycopg import AsyncClientCursor
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+
+from ..config.env import env
+from .pool import PoolAgotadoError
+
+logger = logging.getLogger("facturacion_api.database")
+
+_pool: Optional[AsyncConnectionPool] = None
+
+
+def conninfo_async() -> str:
+    """Cadena de conexión de psycopg 3 (también la usan las conexiones dedicadas de LISTEN)."""
+    return make_conninfo(
+        host=env.DB_HOST,
+        dbname=env.DB_NAME,
+        user=env.DB_USER,
+        password=env.DB_PASSWORD,
+        port=env.DB_PORT,
+        client_encoding="UTF8",
+        options="-c search_path=sistema_facturacion,public",
+    )
+
+
+def _crear_pool() -> AsyncConnectionPool:
+    return AsyncConnectionPool(
+        conninfo_async(),
+        min_size=env.DB_ASYNC_POOL_MIN,
+        max_size=env.DB_ASYNC_POOL_MAX,
+        timeout=env.DB_POOL_TIMEOUT,
+        max_lifetime=env.DB_POOL_MAX_LIFETIME,
+        kwargs={"row_factory": dict_row, "cursor_factory": AsyncClientCursor},
+        check=AsyncConnectionPool.check_connection,
+        name="facturacion_async",
+        open=False,
+    )
+
+
+async def abrir_pool_async():
+    """Crea y abre el pool del proceso (hook de arranque; requiere el event loop)."""
+    global _pool
+    if _pool is None:
+        _pool = _crear_pool()
+        await _pool.open()
+        logger.info(
+            f"[POOL-ASYNC] Pool asíncrono iniciado (min={env.DB_ASYNC_POOL_MIN}, max={env.DB_ASYNC_POOL_MAX})."
+        )
+
+
+def obtener_pool_async() -> AsyncConnectionPool:
+    if _pool is None:
+        raise PoolAgotadoError("El pool asíncrono no está abierto")
+    return _pool
+
+
+async def cerrar_pool_async():
+    """Cierra el pool asíncrono (hook de apagado)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+        logger.info("[POOL-ASYNC] Pool asíncrono cerrado.")
+
+
+@asynccontextmanager
+async def conexion_pool_async():
+    """
+    Toma una conexión del pool asíncrono y la devuelve al salir. Si queda una
+    transacción abierta se confirma (o se revierte ante una excepción).
+    """
+    try:
+        async with obtener_pool_async().connection() as conn:
+            yield conn
+    except PoolTimeout:
+        raise PoolAgotadoError(
+            f"No hay conexiones asíncronas disponibles (máximo {env.DB_ASYNC_POOL_MAX}) tras esperar {env.DB_POOL_TIMEOUT}s"
+        )
+
+
+async def get_db_async() -> AsyncGenerator:
+    """Dependencia de FastAPI: conexión asíncrona por request."""
+    async with conexion_pool_async() as conn:
+        yield conn
+
+
+def estadisticas_pool_async() -> dict:
+    """Métricas del pool asíncrono del proceso (vacío si no está abierto)."""
+    return _pool.get_stats() if _pool is not None else {}
@@ -1,12 +1,14 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor, register_uuid
+from contextlib import contextmanager
 from typing import Generator
 from ..config.env import env
+from .pool import obtener_pool
 
-def get_db_connection_raw():
+def crear_conexion_directa():
     """
-    Crea una conexión raw a PostgreSQL usando psycopg2.
-    Útil para tareas en segundo plano o scripts.
+    Crea una conexión PostgreSQL nueva, fuera del pool.
+    Útil para scripts de mantenimiento o conexiones de larga duración (LISTEN).
     """
     try:
         conn = psycopg2.connect(
@@ -30,10 +32,27 @@ def get_db_connection_raw():
         print(f"Error fatal de BD: {e}")
         raise e
 
+def get_db_connection_raw():
+    """
+    Obtiene una conexión del pool global.
+    Útil para tareas en segundo plano o scripts: al llamar `conn.close()`
+    la conexión se devuelve al pool en lugar de cerrarse.
+    """
+    return obtener_pool().obtener()
+
+@contextmanager
+def conexion_pool():
+    """Context manager que toma una conexión del pool y la devuelve al salir."""
+    conn = get_db_connection_raw()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
 def get_db() -> Generator:
     """
     Dependencia de FastAPI para obtener conexión a BD.
-    Se asegura de cerrar la conexión al finalizar.
+    Se asegura de devolver la conexión al pool al finalizar.
     """
     conn = get_db_connection_raw()
     try:
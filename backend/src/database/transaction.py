@@ -1,4 +1,4 @@
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
 from psycopg2.extras import RealDictCursor
 
 @contextmanager
@@ -16,3 +16,19 @@ def db_transaction(conn):
         raise
     finally:
         cur.close()
+
+@asynccontextmanager
+async def transaccion_async(conn):
+    """
+    Equivalente de `db_transaction` para conexiones del pool asíncrono:
+    commit al salir, rollback ante una excepción.
+    """
+    cur = conn.cursor()
+    try:
+        yield cur
+        await conn.commit()
+    except Exception:
+        await conn.rollback()
+        raise
+    finally:
+        await cur.close()
@@ -0,0 +1,25 @@
+import logging
+from src.database.session import get_db_connection_raw
+from src.modules.suscripciones.repository_consumo import RepositorioConsumo
+from src.modules.suscripciones.service_consumo import ServicioConsumo
+
+logger = logging.getLogger("facturacion_api.jobs")
+
+def conciliar_consumo_suscripciones() -> dict:
+    """
+    Recalcula los contadores de consumo de planes (consumo_suscripciones)
+    y corrige los que se hayan desviado. Se recomienda ejecutar diariamente.
+    """
+    logger.info("[JOB] Iniciando conciliación de consumo de planes...")
+    db = get_db_connection_raw()
+    try:
+        resultado = ServicioConsumo(repo=RepositorioConsumo(db=db)).conciliar()
+        logger.info(f"[JOB] Conciliación completada: {resultado}")
+        return resultado
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    # Permite ejecución manual por línea de comandos
+    logging.basicConfig(level=logging.INFO)
+    conciliar_consumo_suscripciones()
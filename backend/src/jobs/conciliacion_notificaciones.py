@@ -0,0 +1,24 @@
+import logging
+from src.database.session import get_db_connection_raw
+from src.modules.notificaciones.repository import RepositorioNotificaciones
+
+logger = logging.getLogger("facturacion_api.jobs")
+
+def conciliar_conteo_notificaciones() -> dict:
+    """
+    Recalcula el contador de notificaciones sin leer (notificaciones_conteo)
+    y corrige los usuarios que se hayan desviado. Se recomienda ejecutar diariamente.
+    """
+    logger.info("[JOB] Iniciando conciliación de notificaciones sin leer...")
+    db = get_db_connection_raw()
+    try:
+        resultado = {"usuarios_corregidos": RepositorioNotificaciones(db=db).conciliar_conteos()}
+        logger.info(f"[JOB] Conciliación completada: {resultado}")
+        return resultado
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    # Permite ejecución manual por línea de comandos
+    logging.basicConfig(level=logging.INFO)
+    conciliar_conteo_notificaciones()
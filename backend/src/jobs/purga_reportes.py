@@ -0,0 +1,61 @@
+import os
+import time
+import logging
+from src.config.env import env
+from src.database.session import get_db_connection_raw
+from src.modules.reportes.repository_trabajos import RepositorioTrabajosReporte
+from src.modules.reportes.trabajos import DIRECTORIO_REPORTES, MINUTOS_ABANDONO
+
+logger = logging.getLogger("facturacion_api.jobs")
+
+def purgar_reportes() -> dict:
+    """
+    Elimina los trabajos de reporte vencidos y sus archivos, marca como
+    fallidos los que quedaron a medias y borra de static/reportes los archivos
+    huérfanos más antiguos que REPORTES_TTL_HORAS. Se ejecuta cada hora.
+    """
+    logger.info("[JOB] Iniciando purga de reportes...")
+    db = get_db_connection_raw()
+    try:
+        repo = RepositorioTrabajosReporte(db=db)
+        abandonados = repo.marcar_abandonados(MINUTOS_ABANDONO, env.REPORTES_TTL_HORAS)
+        vencidos = repo.purgar_expirados()
+        vigentes = repo.archivos_vigentes()
+    finally:
+        db.close()
+
+    borrados = 0
+    for archivo in vencidos:
+        try:
+            os.remove(os.path.join(DIRECTORIO_REPORTES, os.path.basename(archivo)))
+            borrados += 1
+        except FileNotFoundError:
+            pass
+
+    # Archivos sin trabajo (generados antes de la cola, o de renders interrumpidos)
+    limite = time.time() - env.REPORTES_TTL_HORAS * 3600
+    huerfanos = 0
+    if os.path.isdir(DIRECTORIO_REPORTES):
+        for entrada in os.scandir(DIRECTORIO_REPORTES):
+            if not entrada.is_file() or entrada.name in vigentes:
+                continue
+            try:
+                if entrada.stat().st_mtime < limite:
+                    os.remove(entrada.path)
+                    huerfanos += 1
+            except FileNotFoundError:
+                pass
+
+    resultado = {
+        "trabajos_vencidos": len(vencidos),
+        "archivos_borrados": borrados,
+        "huerfanos_borrados": huerfanos,
+        "abandonados": abandonados
+    }
+    logger.info(f"[JOB] Purga de reportes completada: {resultado}")
+    return resultado
+
+if __name__ == "__main__":
+    # Permite ejecución manual por línea de comandos
+    logging.basicConfig(level=logging.INFO)
+    purgar_reportes()
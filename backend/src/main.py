@@ -9,7 +9,14 @@ from .middlewares.error_middleware import ErrorMiddleware
 from .errors.app_error import AppError
 from .errors.handlers import app_error_handler, validation_error_handler, general_exception_handler
 from .modules.superadmin.automation import automation_service
-from .jobs.session_cleanup import cleanup_expired_sessions
+from .database.pool import cerrar_pool
+from .database.pool_async import abrir_pool_async, cerrar_pool_async
+from .database.cache_referencia import escucha_referencia
+from .modules.notificaciones.canal import canal_notificaciones
+from .modules.sri.cola_emision import worker_emision
+from .modules.sri.reconciliador import reconciliador_sri
+from .modules.importaciones.service import recuperar_importaciones_abandonadas
+from .utils.pdf_pool import pdf_pool
 
 app = FastAPI(
     title="Sistema de Facturación API",
@@ -41,18 +48,34 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # 4. Eventos
 @app.on_event("startup")
 async def startup_event():
-    import asyncio
-    # Ejecutar tareas diarias automatizadas
-    asyncio.create_task(automation_service.start_daily_tasks())
-    # Ejecutar limpieza de sesiones al inicio de forma asíncrona
-    loop = asyncio.get_event_loop()
-    loop.run_in_executor(None, cleanup_expired_sessions)
-    pass
+    # Pool asíncrono (psycopg 3) de los endpoints async: autenticación, facturas, dashboard, notificaciones
+    await abrir_pool_async()
+    # Notificaciones en tiempo real hacia los streams SSE (LISTEN)
+    canal_notificaciones.iniciar()
+    # Invalidación del cache de datos de referencia entre workers (LISTEN)
+    escucha_referencia.iniciar()
+    # Jobs en segundo plano (ciclo diario y limpieza de sesiones) en el pool del scheduler
+    automation_service.start_daily_tasks()
+    # Workers de la cola de emisión SRI
+    worker_emision.iniciar()
+    # Consulta en segundo plano de facturas/notas de crédito pendientes de autorización
+    reconciliador_sri.iniciar()
+    # Importaciones masivas que quedaron a medias por un reinicio
+    recuperar_importaciones_abandonadas()
+    # Navegadores para PDFs (si no, se lanzan con el primer PDF)
+    if env.PDF_POOL_PRECALENTAR:
+        pdf_pool.iniciar()
 
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
     automation_service.stop()
-    pass
+    worker_emision.detener()
+    reconciliador_sri.detener()
+    escucha_referencia.detener()
+    await canal_notificaciones.detener()
+    pdf_pool.cerrar()
+    await cerrar_pool_async()
+    cerrar_pool()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,6 +1,7 @@
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI
 from ..config.env import env
+from ..utils.paginacion import HEADER_SIGUIENTE_CURSOR, HEADER_TOTAL, HEADER_TOTAL_ESTIMADO
 
 def add_cors_middleware(app: FastAPI):
     app.add_middleware(
@@ -9,4 +10,6 @@ def add_cors_middleware(app: FastAPI):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Paginación por cursor de los listados (ver utils/paginacion.py)
+        expose_headers=[HEADER_SIGUIENTE_CURSOR, HEADER_TOTAL, HEADER_TOTAL_ESTIMADO, "Server-Timing"],
     )
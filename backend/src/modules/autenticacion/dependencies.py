@@ -1,18 +1,17 @@
 from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
-from .services import AuthServices
-from ...utils.jwt import decode_access_token
-from ..suscripciones.repositories import RepositorioSuscripciones
+from .services_async import autenticar_token_async, obtener_estado_suscripcion_async
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/autenticacion/iniciar-sesion")
 
+# Las dependencias son `async def`: se resuelven en el event loop sin pasar por
+# el threadpool ni tomar una conexión síncrona del pool por request.
 async def get_current_user(
     request: Request,
-    token: str = Depends(oauth2_scheme),
-    service: AuthServices = Depends()
+    token: str = Depends(oauth2_scheme)
 ):
-    user = service.validar_token_y_obtener_usuario(token)
-    request.state.jwt_payload = decode_access_token(token)
+    payload, user = await autenticar_token_async(token)
+    request.state.jwt_payload = payload
     return user
 
 # Alias para compatibilidad
@@ -21,7 +20,7 @@ obtener_usuario_actual = get_current_user
 from fastapi import HTTPException, status
 
 def requerir_rol(rol: str):
-    def rol_dependency(current_user: dict = Depends(get_current_user)):
+    async def rol_dependency(current_user: dict = Depends(get_current_user)):
         user_role = str(current_user.get("role") or current_user.get("rol") or "").upper()
         if user_role != rol.upper():
             raise HTTPException(
@@ -31,7 +30,7 @@ def requerir_rol(rol: str):
         return current_user
     return rol_dependency
 
-def requerir_superadmin(current_user: dict = Depends(get_current_user)):
+async def requerir_superadmin(current_user: dict = Depends(get_current_user)):
     role = str(current_user.get("role") or current_user.get("rol") or "").upper()
     if role != "SUPERADMIN" and not current_user.get("is_superadmin"):
         raise HTTPException(
@@ -47,8 +46,7 @@ import json
 from datetime import datetime, date
 
 async def requerir_suscripcion_activa(
-    current_user: dict = Depends(get_current_user),
-    repo_suscripciones: RepositorioSuscripciones = Depends()
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Verifica que la empresa del usuario tenga una suscripción activa.
@@ -64,18 +62,8 @@ async def requerir_suscripcion_activa(
     if not empresa_id:
         return current_user
         
-    # 1. Consultar datos de empresa, vendedor y superadmin (para fallback dinámico)
-    with repo_suscripciones.db.cursor() as cur:
-        cur.execute("""
-            SELECT e.ruc, e.razon_social, e.vendedor_id, v.telefono as vendedor_telefono, e.activo,
-                   (SELECT u.telefono FROM sistema_facturacion.usuarios u 
-                    JOIN sistema_facturacion.users us ON u.user_id = us.id 
-                    WHERE us.role = 'SUPERADMIN' AND u.telefono IS NOT NULL LIMIT 1) as admin_telefono
-            FROM sistema_facturacion.empresas e
-            LEFT JOIN sistema_facturacion.vendedores v ON e.vendedor_id = v.id
-            WHERE e.id = %s
-        """, (str(empresa_id),))
-        e = cur.fetchone()
+    # 1. Empresa, teléfono del vendedor y suscripción en una consulta (teléfono del superadmin desde cache)
+    e, superadmin_phone = await obtener_estado_suscripcion_async(empresa_id)
     
     if not e:
         return current_user
@@ -84,7 +72,6 @@ async def requerir_suscripcion_activa(
     ruc = e['ruc']
     nombre = e['razon_social']
     vendedor_phone = e['vendedor_telefono']
-    superadmin_phone = e['admin_telefono'] or "593900000000"
     
     # 3. Caso: Empresa Inhabilitada (403)
     if not e['activo']:
@@ -96,10 +83,9 @@ async def requerir_suscripcion_activa(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=json.dumps(res))
 
     # 4. Caso: Suscripción (402)
-    suscripcion = repo_suscripciones.obtener_suscripcion_por_empresa(empresa_id)
-    estado = suscripcion['estado'] if suscripcion else 'INEXISTENTE'
+    estado = e['suscripcion_estado'] or 'INEXISTENTE'
     
-    fecha_fin_raw = suscripcion['fecha_fin'] if suscripcion else None
+    fecha_fin_raw = e['fecha_fin']
     if hasattr(fecha_fin_raw, 'date'):
         fecha_fin_raw = fecha_fin_raw.date()
         
@@ -108,7 +94,7 @@ async def requerir_suscripcion_activa(
     if estado != 'ACTIVA' or vencida:
         # Lógica de 5 días para cambio de contacto (Vendedor vs Superadmin)
         target_phone = vendedor_phone if vendedor_phone else superadmin_phone
-        fecha_fin = suscripcion['fecha_fin'] if suscripcion else date.today()
+        fecha_fin = e['fecha_fin'] or date.today()
         
         if isinstance(fecha_fin, datetime):
             fecha_fin = fecha_fin.date()
@@ -14,7 +14,7 @@ class PermissionChecker:
         else:
             self.required_permissions = [required_permission]
 
-    def __call__(self, usuario: dict = Depends(get_current_user)):
+    async def __call__(self, usuario: dict = Depends(get_current_user)):
         # 1. Superadmin and Vendor bypass (They don't use granular company permissions)
         if usuario.get(AuthKeys.IS_SUPERADMIN) or usuario.get(AuthKeys.IS_VENDEDOR):
             return usuario
@@ -42,7 +42,7 @@ class PermissionChecker:
 # Alias for easy import
 requerir_permiso = PermissionChecker
 
-def requerir_gestion_roles(usuario: dict = Depends(get_current_user)):
+async def requerir_gestion_roles(usuario: dict = Depends(get_current_user)):
     """
     Requirement: Only an empresa admin OR a user with CONFIG_ROLES permission can manage roles.
     Superadmins and Vendedores always have access (to list/manage for their scope).
@@ -0,0 +1,128 @@
+"""
+Cache de principales autenticados.
+
+Guarda, por id de sesión (`sid`), el usuario ya resuelto por
+`AuthServices.autenticar_token` o `autenticar_token_async` (perfil, permisos, bloqueo de empresa)
+para que las requests autenticadas en estado estable no consulten la BD.
+
+Las escrituras que afectan al principal (logout, invalidación de sesiones,
+cambios de roles/permisos, desactivación de usuarios o empresas) deben llamar
+a `notificar_sesion`, `notificar_usuario`, `notificar_empresa` o
+`notificar_todos` con el cursor de su transacción. La invalidación viaja por el
+canal de `cache_referencia` (pg_notify, entregado al hacer commit) y llega a
+todos los workers; mientras la escucha no está conectada no se sirve desde cache.
+"""
+
+import copy
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from ...config.env import env
+from ...database.cache_referencia import CacheReferencia, cache_referencia
+from ...utils.cache import CacheTTL
+
+# Prefijo de los payloads en el canal de cache_referencia
+PREFIJO = "principal"
+
+
+class CachePrincipales:
+    def __init__(self, ttl: float, max_entradas: int, referencia: CacheReferencia):
+        self._cache = CacheTTL(ttl=ttl, max_entradas=max_entradas, nombre="principales_auth")
+        self._referencia = referencia
+        # Sube con cada invalidación: un principal cargado antes no se guarda
+        self._generacion = 0
+        self._lock = threading.Lock()
+        referencia.suscribir(PREFIJO, self)
+
+    @property
+    def habilitado(self) -> bool:
+        return self._cache.habilitado
+
+    def obtener(self, sid: str, user_id: str) -> Optional[dict]:
+        """Retorna una copia del principal cacheado si la sesión sigue vigente."""
+        # Sin escucha una revocación hecha en otro worker no llegaría
+        if not self._referencia.escuchando:
+            return None
+        entrada = self._cache.obtener(sid)
+        if entrada is None:
+            return None
+        if entrada["user_id"] != str(user_id) or entrada["expires_at"] < datetime.now(timezone.utc):
+            self._cache.invalidar(sid)
+            return None
+        # Copia profunda: los handlers enriquecen el dict del usuario (ip, user_agent...)
+        return copy.deepcopy(entrada["principal"])
+
+    def generacion(self) -> int:
+        """Tomarla antes de leer de la BD y pasarla a `guardar`."""
+        with self._lock:
+            return self._generacion
+
+    def _avanzar(self):
+        with self._lock:
+            self._generacion += 1
+
+    def guardar(self, sid: str, principal: dict, expires_at: datetime, generacion: int):
+        # Hubo una invalidación mientras se leía: el principal puede venir revocado
+        if generacion != self.generacion():
+            return
+        self._cache.guardar(sid, {
+            "user_id": str(principal.get("id")),
+            "empresa_id": str(principal["empresa_id"]) if principal.get("empresa_id") else None,
+            "expires_at": expires_at,
+            "principal": copy.deepcopy(principal),
+        })
+
+    def invalidar_sesion(self, sid: str):
+        self._avanzar()
+        self._cache.invalidar(str(sid))
+
+    def invalidar_usuario(self, user_id) -> int:
+        self._avanzar()
+        uid = str(user_id)
+        return self._cache.invalidar_si(lambda _, e: e["user_id"] == uid)
+
+    def invalidar_empresa(self, empresa_id) -> int:
+        self._avanzar()
+        eid = str(empresa_id)
+        return self._cache.invalidar_si(lambda _, e: e["empresa_id"] == eid)
+
+    def limpiar(self):
+        self._avanzar()
+        self._cache.limpiar()
+
+    def aplicar_invalidacion(self, detalle: str):
+        """Aplica un payload del canal: 'sesion:<sid>', 'usuario:<id>', 'empresa:<id>' o '*'."""
+        alcance, _, valor = detalle.partition(":")
+        if alcance == "sesion":
+            self.invalidar_sesion(valor)
+        elif alcance == "usuario":
+            self.invalidar_usuario(valor)
+        elif alcance == "empresa":
+            self.invalidar_empresa(valor)
+        else:
+            self.limpiar()
+
+    # Publicación a todos los workers: llamar con el cursor de la transacción que escribe
+    def notificar_sesion(self, cur, sid):
+        self._referencia.publicar(cur, PREFIJO, f"sesion:{sid}")
+
+    def notificar_usuario(self, cur, user_id):
+        self._referencia.publicar(cur, PREFIJO, f"usuario:{user_id}")
+
+    def notificar_empresa(self, cur, empresa_id):
+        self._referencia.publicar(cur, PREFIJO, f"empresa:{empresa_id}")
+
+    def notificar_todos(self, cur):
+        self._referencia.publicar(cur, PREFIJO, "*")
+
+    def estadisticas(self) -> dict:
+        return self._cache.estadisticas()
+
+
+# Instancia global por proceso
+principal_cache = CachePrincipales(
+    ttl=env.AUTH_PRINCIPAL_CACHE_TTL,
+    max_entradas=env.AUTH_PRINCIPAL_CACHE_MAX,
+    referencia=cache_referencia
+)
@@ -4,6 +4,25 @@ from uuid import UUID
 from typing import Optional
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from .principal_cache import principal_cache
+
+# Consultas compartidas con AuthRepositoryAsync (repositories_async.py)
+SQL_SESION_POR_ID = "SELECT * FROM sistema_facturacion.user_sessions WHERE id = %s"
+
+SQL_ESTADO_EMPRESA = """
+    SELECT e.ruc, e.razon_social, v.telefono as vendedor_telefono, e.activo,
+           s.estado as suscripcion_estado, s.fecha_fin
+    FROM sistema_facturacion.empresas e
+    LEFT JOIN sistema_facturacion.vendedores v ON e.vendedor_id = v.id
+    LEFT JOIN sistema_facturacion.suscripciones s ON s.empresa_id = e.id
+    WHERE e.id = %s
+"""
+
+SQL_TELEFONO_SUPERADMIN = """
+    SELECT u.telefono FROM sistema_facturacion.usuarios u
+    JOIN sistema_facturacion.users us ON u.user_id = us.id
+    WHERE us.role = 'SUPERADMIN' AND u.telefono IS NOT NULL LIMIT 1
+"""
 
 class AuthRepository:
     def __init__(self, db=Depends(get_db)):
@@ -29,6 +48,7 @@ class AuthRepository:
         """
         with db_transaction(self.db) as cur:
             cur.execute(query, (reason, sid))
+            principal_cache.notificar_sesion(cur, sid)
 
     def invalidar_todas_sesiones(self, user_id: str, reason: str = 'LOGOUT'):
         """Invalida todas las sesiones activas del usuario"""
@@ -39,6 +59,7 @@ class AuthRepository:
         """
         with db_transaction(self.db) as cur:
             cur.execute(query, (reason, str(user_id)))
+            principal_cache.notificar_usuario(cur, user_id)
 
     def tiene_sesion_activa(self, user_id: UUID) -> bool:
         query = """
@@ -56,12 +77,24 @@ class AuthRepository:
             cur.execute(query, (str(user_id),))
 
     def obtener_sesion(self, sid: str) -> Optional[dict]:
-        query = "SELECT * FROM sistema_facturacion.user_sessions WHERE id = %s"
         with db_transaction(self.db) as cur:
-            cur.execute(query, (sid,))
+            cur.execute(SQL_SESION_POR_ID, (sid,))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def obtener_estado_empresa(self, empresa_id) -> Optional[dict]:
+        """Empresa, teléfono del vendedor y suscripción: insumo del bloqueo proactivo."""
+        with self.db.cursor() as cur:
+            cur.execute(SQL_ESTADO_EMPRESA, (str(empresa_id),))
             row = cur.fetchone()
             return dict(row) if row else None
 
+    def obtener_telefono_superadmin(self) -> Optional[str]:
+        with self.db.cursor() as cur:
+            cur.execute(SQL_TELEFONO_SUPERADMIN)
+            row = cur.fetchone()
+            return row['telefono'] if row else None
+
     def registrar_log(self, user_id: UUID, evento: str, origen: str = 'SISTEMA', detail: str = None, ip_address: str = None, ua: str = None):
         query = """
             INSERT INTO sistema_facturacion.users_logs (user_id, evento, origen, motivo, ip_address, user_agent)
@@ -0,0 +1,52 @@
+"""
+Lecturas de autenticación sobre el pool asíncrono (psycopg 3).
+
+Mismo SQL que los repositorios síncronos (AuthRepository, RepositorioUsuarios,
+RepositorioVendedores): solo cubre lo que necesita resolver un principal.
+"""
+
+from typing import List, Optional
+
+from ...constants.roles import RolCodigo
+from ..usuarios.repositories import (
+    SQL_USUARIO_POR_ID, SQL_ROL_SISTEMA, SQL_TODOS_LOS_PERMISOS, SQL_PERMISOS_POR_ROL
+)
+from ..vendedores.repositories import SQL_VENDEDOR_POR_USER_ID
+from .repositories import SQL_SESION_POR_ID, SQL_ESTADO_EMPRESA, SQL_TELEFONO_SUPERADMIN
+
+
+class AuthRepositoryAsync:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def _uno(self, query: str, params: tuple = ()) -> Optional[dict]:
+        async with self.conn.cursor() as cur:
+            await cur.execute(query, params)
+            row = await cur.fetchone()
+            return dict(row) if row else None
+
+    async def obtener_sesion(self, sid: str) -> Optional[dict]:
+        return await self._uno(SQL_SESION_POR_ID, (sid,))
+
+    async def obtener_usuario(self, user_id) -> Optional[dict]:
+        return await self._uno(SQL_USUARIO_POR_ID, (str(user_id),))
+
+    async def obtener_vendedor(self, user_id) -> Optional[dict]:
+        return await self._uno(SQL_VENDEDOR_POR_USER_ID, (str(user_id),))
+
+    async def obtener_estado_empresa(self, empresa_id) -> Optional[dict]:
+        return await self._uno(SQL_ESTADO_EMPRESA, (str(empresa_id),))
+
+    async def obtener_telefono_superadmin(self) -> Optional[str]:
+        row = await self._uno(SQL_TELEFONO_SUPERADMIN)
+        return row['telefono'] if row else None
+
+    async def obtener_permisos(self, user_id) -> List[str]:
+        async with self.conn.cursor() as cur:
+            await cur.execute(SQL_ROL_SISTEMA, (str(user_id),))
+            user = await cur.fetchone()
+            if user and user['role'] == RolCodigo.SUPERADMIN.value:
+                await cur.execute(SQL_TODOS_LOS_PERMISOS)
+            else:
+                await cur.execute(SQL_PERMISOS_POR_ROL, (str(user_id),))
+            return [row['codigo'] for row in await cur.fetchall()]
@@ -17,9 +17,137 @@ from ...constants.roles import RolCodigo
 from ..usuarios.repositories import RepositorioUsuarios
 from ..vendedores.repositories import RepositorioVendedores
 from .repositories import AuthRepository
+from .principal_cache import principal_cache
+from ...database.cache_referencia import cache_referencia, SUPERADMIN_TELEFONO
 
 logger = logging.getLogger("facturacion_api")
 
+# Fallback cuando no hay superadmin con teléfono registrado
+TELEFONO_SOPORTE_DEFECTO = "593900000000"
+
+# Las funciones de módulo siguientes no tocan la BD: las comparten AuthServices
+# y el camino asíncrono de autenticación (services_async.py).
+
+def construir_bloqueo_empresa(e_data: dict, superadmin_phone: str) -> tuple[Optional[dict], Optional[dict]]:
+    """
+    Determina el bloqueo o aviso de renovación a partir del estado de la empresa y su suscripción.
+    Retorna (empresa_lock, aviso_renovacion)
+    """
+    empresa_lock = None
+    aviso_renovacion = None
+
+    if not e_data['activo']:
+        empresa_lock = {
+            "type": "COMPANY_DISABLED",
+            "phone": superadmin_phone,
+            "message": f"Hola, soy {e_data['razon_social']} (RUC: {e_data['ruc']}). Mi cuenta de empresa aparece inhabilitada. Por favor, desearía saber el motivo y los pasos para reactivarla."
+        }
+    else:
+        estado_s = e_data['suscripcion_estado'] or 'INEXISTENTE'
+        fecha_f = e_data['fecha_fin']
+        
+        # Normalizar a date si es datetime (Postgres TIMESTAMPTZ)
+        if hasattr(fecha_f, 'date'):
+            fecha_f = fecha_f.date()
+            
+        vencida = (fecha_f < date.today()) if fecha_f else True
+        
+        if estado_s != 'ACTIVA' or vencida:
+            target_p = e_data['vendedor_telefono'] or superadmin_phone
+            
+            # Al día siguiente del vencimiento (days_diff >= 1) -> SuperAdmin
+            if fecha_f:
+                days_diff = (date.today() - fecha_f).days
+                if days_diff >= 1: target_p = superadmin_phone
+            
+            empresa_lock = {
+                "type": f"SUBSCRIPTION_{estado_s}",
+                "phone": target_p,
+                "message": f"Hola, mi nombre es {e_data['razon_social']} (RUC: {e_data['ruc']}). Mi suscripción venció el {fecha_f or 'N/A'} y deseo renovar mi plan. Por favor, ayúdeme con la información para el pago."
+            }
+        
+        # AVISO DE RENOVACIÓN (Si no hay bloqueo duro, pero faltan <= 7 días)
+        elif fecha_f:
+            days_left = (fecha_f - date.today()).days
+            if 0 <= days_left <= 7:
+                aviso_renovacion = {
+                    "dias": days_left,
+                    "phone": e_data['vendedor_telefono'] or superadmin_phone,
+                    "message": f"Hola, mi nombre es {e_data['razon_social']} (RUC: {e_data['ruc']}). Mi suscripción vence el {fecha_f} (en {days_left} días) y deseo renovar mi plan. Por favor, ayúdeme con la información."
+                }
+    
+    return empresa_lock, aviso_renovacion
+
+
+def decodificar_token(token: str) -> dict:
+    """Decodifica el JWT y exige los claims de sesión (sub, sid)."""
+    payload = decode_access_token(token)
+    if not payload:
+        logger.warning("[VALIDACIÓN] Token inválido o no decodificable")
+        raise AppError(AppMessages.AUTH_TOKEN_INVALID, 401, ErrorCodes.AUTH_TOKEN_INVALID)
+
+    if not payload.get("sid") or not payload.get("sub"):
+         logger.warning("[VALIDACIÓN] Faltan parámetros en token (session_id o user_id)")
+         raise AppError(AppMessages.AUTH_TOKEN_INVALID, 401, ErrorCodes.AUTH_TOKEN_INVALID)
+    return payload
+
+
+def validar_sesion(session: Optional[dict], user_id: str):
+    if not session or not session['is_valid'] or str(session['user_id']) != str(user_id):
+        logger.warning(f"[VALIDACIÓN] Sesión inválida para usuario: {user_id}")
+        raise AppError("Sesión inválida o expirada", 401, "AUTH_SESSION_INVALID")
+
+    if session['expires_at'] < datetime.now(timezone.utc):
+        logger.warning(f"[VALIDACIÓN] Sesión expirada para usuario: {user_id}")
+        raise AppError("Sesión expirada", 401, "AUTH_SESSION_EXPIRED")
+
+
+def preparar_principal(user: Optional[dict], user_id: str, role: str) -> dict:
+    """Valida el estado de la cuenta e inyecta los flags de rol en el usuario."""
+    if not user:
+        logger.warning(f"[VALIDACIÓN] Usuario no encontrado: {user_id}")
+        raise AppError("Usuario no encontrado", 404, "AUTH_USER_NOT_FOUND")
+
+    # 1. Verificar estado de la cuenta global (tabla users)
+    if user.get('estado') != 'ACTIVA':
+        logger.warning(f"[VALIDACIÓN] Cuenta bloqueada o inactiva: {user_id}, estado: {user.get('estado')}")
+        raise AppError(f"Tu cuenta está {user.get('estado')}. Contacta a soporte.", 403, "AUTH_ACCOUNT_INACTIVE")
+
+    # 2. Verificar estado del perfil en la empresa (si aplica)
+    # Nota: Superadmin y Vendedores no tienen registro en tabla 'usuarios' necesariamente o su estado se maneja distinto
+    if str(role).upper() == 'USUARIO' and not user.get('activo', True):
+        logger.warning(f"[VALIDACIÓN] Perfil de usuario inactivo en la empresa: {user_id}")
+        raise AppError("Tu perfil de usuario en esta empresa ha sido desactivado.", 403, "AUTH_PROFILE_INACTIVE")
+    
+    logger.info(f"[ÉXITO] Token y usuario validados - usuario ID: {user_id}")
+
+    # 5. Inyectar flags de rol para compatibilidad
+    role_upper = str(role).strip().upper()
+    user["role"] = role
+    user["is_superadmin"] = (role_upper == "SUPERADMIN")
+    user["is_vendedor"] = (role_upper == "VENDEDOR")
+    user["is_usuario"] = (role_upper == "USUARIO")
+    user["empresa_activa"] = user.get("empresa_activa", True)
+    # Asegurar que rol_codigo y rol_nombre estén presentes (vienen del repo en obtener_por_id)
+    user["rol_codigo"] = user.get("rol_codigo")
+    user["rol_nombre"] = user.get("rol_nombre")
+    user["empresa_lock"] = None
+    user["aviso_renovacion"] = None
+    return user
+
+
+def requiere_bloqueo_empresa(user: dict) -> bool:
+    """El bloqueo proactivo solo aplica a usuarios de empresa."""
+    return not user["is_superadmin"] and user["is_usuario"] and bool(user.get("empresa_id"))
+
+
+def aplicar_perfil_vendedor(user: dict, vendedor_profile: Optional[dict]):
+    if vendedor_profile:
+        user["internal_vendedor_id"] = str(vendedor_profile["id"])
+        for p in ["puede_crear_empresas", "puede_gestionar_planes", "puede_acceder_empresas", "puede_ver_reportes"]:
+            if p in vendedor_profile: user[p] = vendedor_profile[p]
+
+
 class AuthServices:
     def __init__(
         self, 
@@ -31,72 +159,21 @@ class AuthServices:
         self.auth_repo = auth_repo
         self.vendedor_repo = vendedor_repo
 
+    def _cargar_telefono_superadmin(self) -> Optional[str]:
+        return self.auth_repo.obtener_telefono_superadmin()
+
     def _resolver_bloqueo_empresa(self, empresa_id: str) -> tuple[Optional[dict], Optional[dict]]:
         """
         Consulta el estado de la empresa y su suscripción para determinar bloqueos o avisos.
         Retorna (empresa_lock, aviso_renovacion)
         """
-        empresa_lock = None
-        aviso_renovacion = None
-
-        with self.user_repo.db.cursor() as cur:
-            cur.execute("""
-                SELECT e.ruc, e.razon_social, v.telefono as vendedor_telefono, e.activo,
-                       s.estado as suscripcion_estado, s.fecha_fin,
-                       (SELECT u.telefono FROM sistema_facturacion.usuarios u 
-                        JOIN sistema_facturacion.users us ON u.user_id = us.id 
-                        WHERE us.role = 'SUPERADMIN' AND u.telefono IS NOT NULL LIMIT 1) as admin_telefono
-                FROM sistema_facturacion.empresas e
-                LEFT JOIN sistema_facturacion.vendedores v ON e.vendedor_id = v.id
-                LEFT JOIN sistema_facturacion.suscripciones s ON s.empresa_id = e.id
-                WHERE e.id = %s
-            """, (str(empresa_id),))
-            e_data = cur.fetchone()
-        
-        if e_data:
-            superadmin_phone = e_data['admin_telefono'] or "593900000000"
-            
-            if not e_data['activo']:
-                empresa_lock = {
-                    "type": "COMPANY_DISABLED",
-                    "phone": superadmin_phone,
-                    "message": f"Hola, soy {e_data['razon_social']} (RUC: {e_data['ruc']}). Mi cuenta de empresa aparece inhabilitada. Por favor, desearía saber el motivo y los pasos para reactivarla."
-                }
-            else:
-                estado_s = e_data['suscripcion_estado'] or 'INEXISTENTE'
-                fecha_f = e_data['fecha_fin']
-                
-                # Normalizar a date si es datetime (Postgres TIMESTAMPTZ)
-                if hasattr(fecha_f, 'date'):
-                    fecha_f = fecha_f.date()
-                    
-                vencida = (fecha_f < date.today()) if fecha_f else True
-                
-                if estado_s != 'ACTIVA' or vencida:
-                    target_p = e_data['vendedor_telefono'] or superadmin_phone
-                    
-                    # Al día siguiente del vencimiento (days_diff >= 1) -> SuperAdmin
-                    if fecha_f:
-                        days_diff = (date.today() - fecha_f).days
-                        if days_diff >= 1: target_p = superadmin_phone
-                    
-                    empresa_lock = {
-                        "type": f"SUBSCRIPTION_{estado_s}",
-                        "phone": target_p,
-                        "message": f"Hola, mi nombre es {e_data['razon_social']} (RUC: {e_data['ruc']}). Mi suscripción venció el {fecha_f or 'N/A'} y deseo renovar mi plan. Por favor, ayúdeme con la información para el pago."
-                    }
-                
-                # AVISO DE RENOVACIÓN (Si no hay bloqueo duro, pero faltan <= 7 días)
-                elif fecha_f:
-                    days_left = (fecha_f - date.today()).days
-                    if 0 <= days_left <= 7:
-                        aviso_renovacion = {
-                            "dias": days_left,
-                            "phone": e_data['vendedor_telefono'] or superadmin_phone,
-                            "message": f"Hola, mi nombre es {e_data['razon_social']} (RUC: {e_data['ruc']}). Mi suscripción vence el {fecha_f} (en {days_left} días) y deseo renovar mi plan. Por favor, ayúdeme con la información."
-                        }
-        
-        return empresa_lock, aviso_renovacion
+        e_data = self.auth_repo.obtener_estado_empresa(empresa_id)
+        if not e_data:
+            return None, None
+        superadmin_phone = cache_referencia.obtener_o_cargar(
+            SUPERADMIN_TELEFONO, "telefono", self._cargar_telefono_superadmin
+        ) or TELEFONO_SOPORTE_DEFECTO
+        return construir_bloqueo_empresa(e_data, superadmin_phone)
 
     def iniciar_sesion(self, correo: str, clave: str, ip_address: str, user_agent: str):
         logger.info(f"[INICIO] Intentando iniciar sesión - email: {correo}")
@@ -254,78 +331,46 @@ class AuthServices:
 
     def validar_token_y_obtener_usuario(self, token: str) -> dict:
         """Absorbe la lógica de dependencies.py y strategies.py"""
-        logger.info("[INICIO] Validando token y obteniendo usuario")
-        payload = decode_access_token(token)
-        if not payload:
-            logger.warning("[VALIDACIÓN] Token inválido o no decodificable")
-            raise AppError(AppMessages.AUTH_TOKEN_INVALID, 401, ErrorCodes.AUTH_TOKEN_INVALID)
+        _, user = self.autenticar_token(token)
+        return user
+
+    def autenticar_token(self, token: str) -> tuple[dict, dict]:
+        """
+        Decodifica el token una sola vez y resuelve el principal.
+        Retorna (payload, usuario). El usuario se sirve desde el cache de principales
+        cuando la sesión ya fue validada recientemente.
+        """
+        payload = decodificar_token(token)
+        user = principal_cache.obtener(payload["sid"], payload["sub"])
+        if user is None:
+            user = self._resolver_principal(payload)
+        return payload, user
 
+    def _resolver_principal(self, payload: dict) -> dict:
+        """Valida la sesión contra la BD y construye el principal (camino sin cache)."""
+        logger.info("[INICIO] Validando token y obteniendo usuario")
         user_id = payload.get("sub")
         session_id = payload.get("sid")
-        role = payload.get("role")
-
-        if not session_id or not user_id:
-             logger.warning("[VALIDACIÓN] Faltan parámetros en token (session_id o user_id)")
-             raise AppError(AppMessages.AUTH_TOKEN_INVALID, 401, ErrorCodes.AUTH_TOKEN_INVALID)
+        generacion = principal_cache.generacion()
 
         # Validar Sesión
         session = self.auth_repo.obtener_sesion(session_id)
-        if not session or not session['is_valid'] or str(session['user_id']) != str(user_id):
-            logger.warning(f"[VALIDACIÓN] Sesión inválida para usuario: {user_id}")
-            raise AppError("Sesión inválida o expirada", 401, "AUTH_SESSION_INVALID")
-
-        if session['expires_at'] < datetime.now(timezone.utc):
-            logger.warning(f"[VALIDACIÓN] Sesión expirada para usuario: {user_id}")
-            raise AppError("Sesión expirada", 401, "AUTH_SESSION_EXPIRED")
+        validar_sesion(session, user_id)
 
         # Obtener Usuario (Absorbe strategies)
-        user = self.user_repo.obtener_por_id(user_id)
-        if not user:
-            logger.warning(f"[VALIDACIÓN] Usuario no encontrado: {user_id}")
-            raise AppError("Usuario no encontrado", 404, "AUTH_USER_NOT_FOUND")
-
-        # 1. Verificar estado de la cuenta global (tabla users)
-        if user.get('estado') != 'ACTIVA':
-            logger.warning(f"[VALIDACIÓN] Cuenta bloqueada o inactiva: {user_id}, estado: {user.get('estado')}")
-            raise AppError(f"Tu cuenta está {user.get('estado')}. Contacta a soporte.", 403, "AUTH_ACCOUNT_INACTIVE")
-
-        # 2. Verificar estado del perfil en la empresa (si aplica)
-        # Nota: Superadmin y Vendedores no tienen registro en tabla 'usuarios' necesariamente o su estado se maneja distinto
-        if str(role).upper() == 'USUARIO' and not user.get('activo', True):
-            logger.warning(f"[VALIDACIÓN] Perfil de usuario inactivo en la empresa: {user_id}")
-            raise AppError("Tu perfil de usuario en esta empresa ha sido desactivado.", 403, "AUTH_PROFILE_INACTIVE")
-        
-        logger.info(f"[ÉXITO] Token y usuario validados - usuario ID: {user_id}")
-
-        # 5. Inyectar flags de rol para compatibilidad
-        role_upper = str(role).strip().upper()
-        user["role"] = role
-        user["is_superadmin"] = (role_upper == "SUPERADMIN")
-        user["is_vendedor"] = (role_upper == "VENDEDOR")
-        user["is_usuario"] = (role_upper == "USUARIO")
-        user["empresa_activa"] = user.get("empresa_activa", True)
-        # Asegurar que rol_codigo y rol_nombre estén presentes (vienen del repo en obtener_por_id)
-        user["rol_codigo"] = user.get("rol_codigo")
-        user["rol_nombre"] = user.get("rol_nombre")
+        user = preparar_principal(self.user_repo.obtener_por_id(user_id), user_id, payload.get("role"))
 
         # 6. Bloqueo Proactivo y Aviso (Lógica dinámica)
-        empresa_id = user.get("empresa_id")
-        if not user["is_superadmin"] and user["is_usuario"] and empresa_id:
-            user["empresa_lock"], user["aviso_renovacion"] = self._resolver_bloqueo_empresa(empresa_id)
-        else:
-            user["empresa_lock"] = None
-            user["aviso_renovacion"] = None
+        if requiere_bloqueo_empresa(user):
+            user["empresa_lock"], user["aviso_renovacion"] = self._resolver_bloqueo_empresa(user["empresa_id"])
 
         # Si es VENDEDOR/USUARIO, inyectar permisos
         if user["is_vendedor"]:
-            vendedor_profile = self.vendedor_repo.obtener_por_user_id(user_id)
-            if vendedor_profile:
-                user["internal_vendedor_id"] = str(vendedor_profile["id"])
-                for p in ["puede_crear_empresas", "puede_gestionar_planes", "puede_acceder_empresas", "puede_ver_reportes"]:
-                    if p in vendedor_profile: user[p] = vendedor_profile[p]
+            aplicar_perfil_vendedor(user, self.vendedor_repo.obtener_por_user_id(user_id))
         
         if user["is_usuario"]:
             user["permisos"] = self.user_repo.obtener_permisos_por_user_id(user_id)
 
         user.pop("password_hash", None)
+        principal_cache.guardar(session_id, user, session['expires_at'], generacion)
         return user
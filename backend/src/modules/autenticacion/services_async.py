@@ -0,0 +1,79 @@
+"""
+Autenticación por request sin bloquear el event loop.
+
+`get_current_user` es una dependencia `async def`: con psycopg2 cada validación
+de token en frío bloqueaba el loop. Aquí el principal se sirve del cache en
+memoria y, solo si falta, se resuelve con una conexión del pool asíncrono que
+se devuelve antes de entrar al handler. Las reglas (sesión, estado de la cuenta,
+flags de rol, bloqueo de empresa) son las mismas funciones de `services.py`.
+"""
+
+import logging
+from typing import Optional
+
+from ...database.pool_async import conexion_pool_async
+from ...database.cache_referencia import cache_referencia, SUPERADMIN_TELEFONO
+from .principal_cache import principal_cache
+from .repositories_async import AuthRepositoryAsync
+from .services import (
+    TELEFONO_SOPORTE_DEFECTO, construir_bloqueo_empresa, decodificar_token,
+    validar_sesion, preparar_principal, requiere_bloqueo_empresa, aplicar_perfil_vendedor
+)
+
+logger = logging.getLogger("facturacion_api")
+
+
+async def obtener_telefono_superadmin_async(repo: AuthRepositoryAsync) -> str:
+    telefono = await cache_referencia.obtener_o_cargar_async(
+        SUPERADMIN_TELEFONO, "telefono", repo.obtener_telefono_superadmin
+    )
+    return telefono or TELEFONO_SOPORTE_DEFECTO
+
+
+async def autenticar_token_async(token: str) -> tuple[dict, dict]:
+    """Equivalente asíncrono de `AuthServices.autenticar_token`. Retorna (payload, usuario)."""
+    payload = decodificar_token(token)
+    user = principal_cache.obtener(payload["sid"], payload["sub"])
+    if user is None:
+        async with conexion_pool_async() as conn:
+            user = await _resolver_principal(AuthRepositoryAsync(conn), payload)
+    return payload, user
+
+
+async def _resolver_principal(repo: AuthRepositoryAsync, payload: dict) -> dict:
+    logger.info("[INICIO] Validando token y obteniendo usuario")
+    user_id = payload.get("sub")
+    session_id = payload.get("sid")
+    generacion = principal_cache.generacion()
+
+    session = await repo.obtener_sesion(session_id)
+    validar_sesion(session, user_id)
+
+    user = preparar_principal(await repo.obtener_usuario(user_id), user_id, payload.get("role"))
+
+    if requiere_bloqueo_empresa(user):
+        e_data = await repo.obtener_estado_empresa(user["empresa_id"])
+        if e_data:
+            user["empresa_lock"], user["aviso_renovacion"] = construir_bloqueo_empresa(
+                e_data, await obtener_telefono_superadmin_async(repo)
+            )
+
+    if user["is_vendedor"]:
+        aplicar_perfil_vendedor(user, await repo.obtener_vendedor(user_id))
+
+    if user["is_usuario"]:
+        user["permisos"] = await repo.obtener_permisos(user_id)
+
+    user.pop("password_hash", None)
+    principal_cache.guardar(session_id, user, session['expires_at'], generacion)
+    return user
+
+
+async def obtener_estado_suscripcion_async(empresa_id) -> tuple[Optional[dict], str]:
+    """Empresa con su suscripción y el teléfono del superadmin, en una sola conexión."""
+    async with conexion_pool_async() as conn:
+        repo = AuthRepositoryAsync(conn)
+        e_data = await repo.obtener_estado_empresa(empresa_id)
+        if not e_data:
+            return None, TELEFONO_SOPORTE_DEFECTO
+        return e_data, await obtener_telefono_superadmin_async(repo)
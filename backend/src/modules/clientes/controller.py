@@ -6,6 +6,7 @@ from .schemas import ClienteCreacion, ClienteActualizacion
 from uuid import UUID
 from typing import Optional
 from ...utils.response import success_response
+from ...utils.excel_generator import MEDIA_TYPE_CSV, MEDIA_TYPE_EXCEL
 
 class ClienteController:
     def __init__(self, service: ServicioClientes = Depends()):
@@ -35,12 +36,13 @@ class ClienteController:
         stats = self.service.obtener_stats(usuario_actual)
         return success_response(stats)
 
-    def exportar_clientes(self, usuario_actual: dict, start_date: Optional[str] = None, end_date: Optional[str] = None):
-        output = self.service.exportar_clientes(usuario_actual, start_date, end_date)
-        filename = f"clientes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    def exportar_clientes(self, usuario_actual: dict, start_date: Optional[str] = None, end_date: Optional[str] = None, formato: str = 'excel'):
+        chunks = self.service.exportar_clientes(usuario_actual, start_date, end_date, formato)
+        extension, media_type = ("csv", MEDIA_TYPE_CSV) if formato == 'csv' else ("xlsx", MEDIA_TYPE_EXCEL)
+        filename = f"clientes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
         return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            chunks,
+            media_type=media_type,
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
 
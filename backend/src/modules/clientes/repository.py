@@ -1,8 +1,9 @@
 from fastapi import Depends
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from uuid import UUID
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ...database.cursores import FilaVista, iterar_consulta
 
 class RepositorioClientes:
     def __init__(self, db=Depends(get_db)):
@@ -19,8 +20,17 @@ class RepositorioClientes:
             cur.execute(query, (str(empresa_id),))
             return [dict(row) for row in cur.fetchall()]
 
-    def listar_para_exportar(self, empresa_id: UUID, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[dict]:
-        """Obtiene clientes filtrados por fecha para exportación"""
+    def iterar_para_exportar(
+        self,
+        empresa_id: UUID,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        itersize: Optional[int] = None
+    ) -> Iterator[FilaVista]:
+        """
+        Recorre los clientes filtrados por fecha para exportación con un cursor
+        de servidor: se traen `itersize` filas por vez en lugar de todo el resultado.
+        """
         query = "SELECT * FROM sistema_facturacion.clientes WHERE empresa_id = %s"
         params = [str(empresa_id)]
 
@@ -36,9 +46,7 @@ class RepositorioClientes:
 
         query += " ORDER BY created_at DESC"
 
-        with self.db.cursor() as cur:
-            cur.execute(query, tuple(params))
-            return [dict(row) for row in cur.fetchall()]
+        return iterar_consulta(self.db, query, tuple(params), itersize, nombre="exportar_clientes")
 
     def obtener_por_id(self, id: UUID, empresa_id: Optional[UUID] = None) -> Optional[dict]:
         """Obtiene un cliente por ID, opcionalmente verifica que pertenezca a la empresa"""
@@ -27,10 +27,11 @@ def obtener_stats(
 def exportar_clientes(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
+    formato: str = Query(default="excel", pattern="^(excel|csv)$"),
     usuario: dict = Depends(requerir_permiso(PermissionCodes.CLIENTES_EXPORTAR)),
     controller: ClienteController = Depends()
 ):
-    return controller.exportar_clientes(usuario, start_date, end_date)
+    return controller.exportar_clientes(usuario, start_date, end_date, formato)
 
 # ----------------------------------------------------------------
 # ANALÍTICA (deben ir ANTES de /{id} para evitar conflictos)
@@ -1,9 +1,8 @@
 from fastapi import Depends, Request
 from uuid import UUID
-from typing import List, Optional
+from typing import Iterator, List, Optional
 import logging
-import io
-import pandas as pd
+from itertools import chain
 from datetime import datetime, date
 
 from .repository import RepositorioClientes
@@ -18,9 +17,37 @@ from ..vendedores.repositories import RepositorioVendedores
 from ..empresas.repositories import RepositorioEmpresas
 from ...constants.enums import AuthKeys
 from ...errors.app_error import AppError
+from ...database.session import conexion_pool
+from ...utils.excel_generator import stream_report
 
 logger = logging.getLogger("facturacion_api")
 
+# Columnas del Excel/CSV de clientes (clave → encabezado visible)
+COLUMNAS_EXPORTAR = {
+    'identificacion': 'Identificación',
+    'tipo_identificacion': 'Tipo ID',
+    'razon_social': 'Razón Social',
+    'nombre_comercial': 'Nombre Comercial',
+    'email': 'Email',
+    'telefono': 'Teléfono',
+    'direccion': 'Dirección',
+    'ciudad': 'Ciudad',
+    'provincia': 'Provincia',
+    'dias_credito': 'Días Crédito',
+    'limite_credito': 'Límite Crédito',
+    'activo': 'Activo',
+    'created_at': 'Fecha Registro'
+}
+
+
+def _iterar_clientes_exportar(empresa_id, start_date, end_date) -> Iterator[dict]:
+    """
+    Filas a exportar con una conexión propia del pool: la respuesta se
+    transmite después de que FastAPI liberó la conexión del request.
+    """
+    with conexion_pool() as conn:
+        yield from RepositorioClientes(db=conn).iterar_para_exportar(empresa_id, start_date, end_date)
+
 class ServicioClientes:
     def __init__(
         self, 
@@ -198,8 +225,14 @@ class ServicioClientes:
         logger.info(f"[ÉXITO] Estadísticas obtenidas")
         return result
 
-    def exportar_clientes(self, usuario_actual: dict, start_date: Optional[str] = None, end_date: Optional[str] = None):
-        """Genera un archivo Excel con el listado de clientes"""
+    def exportar_clientes(
+        self,
+        usuario_actual: dict,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        formato: str = 'excel'
+    ) -> Iterator[bytes]:
+        """Genera el listado de clientes (Excel o CSV) como un flujo de bytes"""
         logger.info("[EXPORTAR] Generando reporte de clientes")
         ctx = self._get_context(usuario_actual)
         
@@ -208,49 +241,17 @@ class ServicioClientes:
             if ctx["is_superadmin"] or ctx["is_vendedor"]:
                 raise AppError("Debe proporcionar contexto de empresa para exportar", 400)
             raise AppError("No autorizado", 403)
-            
-        clientes = self.repo.listar_para_exportar(ctx["empresa_id"], start_date, end_date)
-        
-        if not clientes:
+
+        filas = _iterar_clientes_exportar(ctx["empresa_id"], start_date, end_date)
+        # La primera fila se lee aquí para responder 404 antes de empezar a transmitir
+        primera = next(filas, None)
+        if primera is None:
             raise AppError("No se encontraron clientes para exportar en el rango seleccionado", 404)
-            
-        # Transformar a DataFrame
-        df = pd.DataFrame(clientes)
-        
-        # Eliminar zona horaria de las fechas (Excel no las soporta)
-        if 'created_at' in df.columns:
-            df['created_at'] = pd.to_datetime(df['created_at']).dt.tz_localize(None)
-        
-        # Mapeo de columnas para que se vean bien en el excel
-        columnas_visible = {
-            'identificacion': 'Identificación',
-            'tipo_identificacion': 'Tipo ID',
-            'razon_social': 'Razón Social',
-            'nombre_comercial': 'Nombre Comercial',
-            'email': 'Email',
-            'telefono': 'Teléfono',
-            'direccion': 'Dirección',
-            'ciudad': 'Ciudad',
-            'provincia': 'Provincia',
-            'dias_credito': 'Días Crédito',
-            'limite_credito': 'Límite Crédito',
-            'activo': 'Activo',
-            'created_at': 'Fecha Registro'
-        }
-        
-        # Filtrar solo las que queremos y renombrar
-        df = df[list(columnas_visible.keys())].rename(columns=columnas_visible)
-        
-        # Formatear booleano 'Activo'
-        df['Activo'] = df['Activo'].apply(lambda x: 'Sí' if x else 'No')
 
-        # Escribir a buffer de memoria
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Clientes')
-            
-        output.seek(0)
-        return output
+        return stream_report(
+            formato, "Clientes", list(COLUMNAS_EXPORTAR.values()),
+            chain([primera], filas), list(COLUMNAS_EXPORTAR.keys())
+        )
 
     # ----------------------------------------------------------------
     # R-017: CLIENTES NUEVOS POR MES
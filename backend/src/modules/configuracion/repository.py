@@ -1,6 +1,7 @@
 from typing import List, Optional
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ...database.cache_referencia import cache_referencia, CONFIGURACION, FEATURE_FLAGS, CATALOGOS, PLANTILLAS
 from fastapi import Depends
 
 class RepositorioConfiguracion:
@@ -9,6 +10,9 @@ class RepositorioConfiguracion:
 
     # --- Configuracion Global ---
     def listar_config(self) -> List[dict]:
+        return cache_referencia.obtener_o_cargar(CONFIGURACION, "todas", self._cargar_config)
+
+    def _cargar_config(self) -> List[dict]:
         with self.db.cursor() as cur:
             cur.execute("SELECT * FROM configuracion_global ORDER BY categoria, clave")
             return [dict(row) for row in cur.fetchall()]
@@ -25,10 +29,16 @@ class RepositorioConfiguracion:
                 "UPDATE configuracion_global SET valor = %s, updated_at = NOW() WHERE clave = %s",
                 (valor, clave)
             )
-            return cur.rowcount > 0
+            if cur.rowcount == 0:
+                return False
+            cache_referencia.notificar_cambio(cur, CONFIGURACION)
+            return True
 
     # --- Feature Flags ---
     def listar_flags(self) -> List[dict]:
+        return cache_referencia.obtener_o_cargar(FEATURE_FLAGS, "todos", self._cargar_flags)
+
+    def _cargar_flags(self) -> List[dict]:
         with self.db.cursor() as cur:
             cur.execute("SELECT * FROM feature_flag ORDER BY codigo")
             return [dict(row) for row in cur.fetchall()]
@@ -39,16 +49,25 @@ class RepositorioConfiguracion:
                 "UPDATE feature_flag SET activo = %s, updated_at = NOW() WHERE codigo = %s",
                 (activo, codigo)
             )
-            return cur.rowcount > 0
+            if cur.rowcount == 0:
+                return False
+            cache_referencia.notificar_cambio(cur, FEATURE_FLAGS)
+            return True
 
     # --- Catálogos ---
     def listar_catalogos(self) -> List[dict]:
+        return cache_referencia.obtener_o_cargar(CATALOGOS, "todos", self._cargar_catalogos)
+
+    def _cargar_catalogos(self) -> List[dict]:
         with self.db.cursor() as cur:
             cur.execute("SELECT * FROM catalogo ORDER BY nombre")
             return [dict(row) for row in cur.fetchall()]
 
     # --- Plantillas ---
     def listar_plantillas(self) -> List[dict]:
+        return cache_referencia.obtener_o_cargar(PLANTILLAS, "todas", self._cargar_plantillas)
+
+    def _cargar_plantillas(self) -> List[dict]:
         with self.db.cursor() as cur:
             cur.execute("SELECT * FROM plantilla_notificacion ORDER BY codigo")
             return [dict(row) for row in cur.fetchall()]
@@ -4,12 +4,13 @@ from typing import List, Optional
 from uuid import UUID
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ...database.cursores import iterar_consulta
 
 class RepositorioCuentasCobrar:
     def __init__(self, db=Depends(get_db)):
         self.db = db
 
-    def crear_cuenta(self, data: dict) -> Optional[dict]:
+    def crear_cuenta(self, data: dict, cur=None) -> Optional[dict]:
         fields = list(data.keys())
         values = [str(v) if isinstance(v, UUID) else v for v in data.values()]
         placeholders = ["%s"] * len(fields)
@@ -19,6 +20,11 @@ class RepositorioCuentasCobrar:
             VALUES ({', '.join(placeholders)})
             RETURNING *
         """
+        if cur:
+            cur.execute(query, tuple(values))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
@@ -145,37 +151,36 @@ class RepositorioCuentasCobrar:
         # Note: we reuse some params but need to prepend the fecha_corte twice for the CASE
         listado_params = [fecha_corte, fecha_corte] + params
         
-        with self.db.cursor() as cur:
-            cur.execute(query_listado, tuple(listado_params))
-            listado = [dict(row) for row in cur.fetchall()]
-            
-            # 2. AGREGACIONES PARA EL RESUMEN
-            total_por_cobrar = sum(item['saldo_pendiente'] for item in listado)
-            
-            resumen = {
-                "total_por_cobrar": total_por_cobrar,
-                "vigente": {"monto": 0, "porcentaje": 0},
-                "vencido_1_30": {"monto": 0, "porcentaje": 0},
-                "vencido_31_60": {"monto": 0, "porcentaje": 0},
-                "vencido_60_mas": {"monto": 0, "porcentaje": 0}
-            }
-            
-            if total_por_cobrar > 0:
-                for item in listado:
-                    dv = item['dias_vencido']
-                    monto = item['saldo_pendiente']
-                    
-                    if dv <= 0: bucket = "vigente"
-                    elif dv <= 30: bucket = "vencido_1_30"
-                    elif dv <= 60: bucket = "vencido_31_60"
-                    else: bucket = "vencido_60_mas"
-                    
-                    resumen[bucket]["monto"] += monto
-                
-                # Calcular porcentajes
-                for k in ["vigente", "vencido_1_30", "vencido_31_60", "vencido_60_mas"]:
-                    resumen[k]["porcentaje"] = round(float(resumen[k]["monto"] / total_por_cobrar) * 100, 2)
+        # 2. AGREGACIONES PARA EL RESUMEN (en la misma pasada que arma el listado)
+        resumen = {
+            "total_por_cobrar": 0,
+            "vigente": {"monto": 0, "porcentaje": 0},
+            "vencido_1_30": {"monto": 0, "porcentaje": 0},
+            "vencido_31_60": {"monto": 0, "porcentaje": 0},
+            "vencido_60_mas": {"monto": 0, "porcentaje": 0}
+        }
+        listado = []
+        for fila in iterar_consulta(self.db, query_listado, tuple(listado_params), nombre="resumen_cobros"):
+            item = dict(fila)
+            listado.append(item)
+            dv = item['dias_vencido']
+            monto = item['saldo_pendiente']
+
+            if dv <= 0: bucket = "vigente"
+            elif dv <= 30: bucket = "vencido_1_30"
+            elif dv <= 60: bucket = "vencido_31_60"
+            else: bucket = "vencido_60_mas"
 
+            resumen[bucket]["monto"] += monto
+            resumen["total_por_cobrar"] += monto
+
+        total_por_cobrar = resumen["total_por_cobrar"]
+        if total_por_cobrar > 0:
+            # Calcular porcentajes
+            for k in ["vigente", "vencido_1_30", "vencido_31_60", "vencido_60_mas"]:
+                resumen[k]["porcentaje"] = round(float(resumen[k]["monto"] / total_por_cobrar) * 100, 2)
+
+        with self.db.cursor() as cur:
             # 3. GRÁFICOS (Top 10 Morosos)
             query_morosos = f"""
                 SELECT 
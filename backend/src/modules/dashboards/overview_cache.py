@@ -0,0 +1,86 @@
+"""
+Cache del overview del dashboard por empresa.
+
+Guarda, por (empresa_id, periodo), el `DashboardOverview` ya armado para que
+recargas y pestañas abiertas no repitan las ~10 consultas de la carga inicial.
+El TTL es corto; además RepositorioFacturas llama a `notificar_empresa` con el
+cursor de cada escritura de facturas para que una venta nueva se vea de
+inmediato. La invalidación viaja por el canal de `cache_referencia` a todos los
+workers y sin escucha no se sirve desde cache.
+"""
+
+import threading
+from typing import Optional
+
+from ...config.env import env
+from ...database.cache_referencia import CacheReferencia, cache_referencia
+from ...utils.cache import CacheTTL
+
+# Prefijo de los payloads en el canal de cache_referencia
+PREFIJO = "dashboard_overview"
+
+
+class CacheOverview:
+    def __init__(self, ttl: float, max_entradas: int, referencia: CacheReferencia):
+        self._cache = CacheTTL(ttl=ttl, max_entradas=max_entradas, nombre="dashboard_overview")
+        self._referencia = referencia
+        # Sube con cada invalidación: un overview armado antes no se guarda
+        self._generacion = 0
+        self._lock = threading.Lock()
+        referencia.suscribir(PREFIJO, self)
+
+    @property
+    def habilitado(self) -> bool:
+        return self._cache.habilitado
+
+    def obtener(self, empresa_id, periodo: str) -> Optional[dict]:
+        if not self._referencia.escuchando:
+            return None
+        return self._cache.obtener((str(empresa_id), periodo))
+
+    def generacion(self) -> int:
+        with self._lock:
+            return self._generacion
+
+    def _avanzar(self):
+        with self._lock:
+            self._generacion += 1
+
+    def guardar(self, empresa_id, periodo: str, overview: dict, generacion: int):
+        if generacion != self.generacion():
+            return
+        self._cache.guardar((str(empresa_id), periodo), overview)
+
+    def invalidar_empresa(self, empresa_id) -> int:
+        if not empresa_id:
+            return 0
+        self._avanzar()
+        eid = str(empresa_id)
+        return self._cache.invalidar_si(lambda clave, _: clave[0] == eid)
+
+    def limpiar(self):
+        self._avanzar()
+        self._cache.limpiar()
+
+    def aplicar_invalidacion(self, detalle: str):
+        """Aplica un payload del canal: '<empresa_id>' o '*'."""
+        if detalle == "*":
+            self.limpiar()
+        else:
+            self.invalidar_empresa(detalle)
+
+    # Publicación a todos los workers: llamar con el cursor de la transacción que escribe
+    def notificar_empresa(self, cur, empresa_id):
+        if empresa_id:
+            self._referencia.publicar(cur, PREFIJO, str(empresa_id))
+
+    def estadisticas(self) -> dict:
+        return self._cache.estadisticas()
+
+
+# Instancia global por proceso
+overview_cache = CacheOverview(
+    ttl=env.DASHBOARD_CACHE_TTL,
+    max_entradas=env.DASHBOARD_CACHE_MAX,
+    referencia=cache_referencia
+)
@@ -23,7 +23,7 @@ class AdminRepository(BaseRepository):
             cur.execute("SELECT COUNT(*) as count FROM sistema_facturacion.comisiones WHERE estado = 'PENDIENTE'")
             stats['comisiones_pendientes_count'] = cur.fetchone()['count']
 
-            cur.execute("SELECT COUNT(*) as count FROM sistema_facturacion.facturas WHERE estado != 'ANULADA'")
+            cur.execute("SELECT COALESCE(SUM(num_facturas), 0) as count FROM sistema_facturacion.ventas_diarias WHERE estado != 'ANULADA'")
             stats['total_facturas'] = cur.fetchone()['count']
 
             cur.execute("""
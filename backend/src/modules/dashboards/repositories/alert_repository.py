@@ -1,7 +1,27 @@
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from .base import BaseRepository
 
+# Rama empresa compartida con RepositorioDashboardsAsync
+SQL_VENCIMIENTO_SUSCRIPCION = """
+    SELECT s.fecha_fin as fecha_vencimiento 
+    FROM sistema_facturacion.suscripciones s 
+    WHERE s.empresa_id = %s AND s.estado = 'ACTIVA'
+"""
+
+
+def alertas_suscripcion_empresa(row: Optional[dict]) -> List[Dict[str, Any]]:
+    """Alerta crítica si la suscripción activa vence en menos de 7 días."""
+    if row and row['fecha_vencimiento']:
+        fecha_venc = row['fecha_vencimiento']
+        if hasattr(fecha_venc, 'date'): fecha_venc = fecha_venc.date()
+        if fecha_venc < (datetime.now().date() + timedelta(days=7)):
+            return [{
+                "tipo": "Suscripción", "cantidad": 1, "nivel": "critical", "mensaje": "Su suscripción vence pronto"
+            }]
+    return []
+
+
 class AlertRepository(BaseRepository):
     def obtener_alertas_sistema(self, vendedor_id=None, empresa_id=None) -> Dict[str, List[Dict[str, Any]]]:
         """Obtiene alertas categorizadas por rol."""
@@ -10,19 +30,8 @@ class AlertRepository(BaseRepository):
         with self.db.cursor() as cur:
             if empresa_id:
                 # Alertas para Empresa
-                cur.execute("""
-                    SELECT s.fecha_fin as fecha_vencimiento 
-                    FROM sistema_facturacion.suscripciones s 
-                    WHERE s.empresa_id = %s AND s.estado = 'ACTIVA'
-                """, (empresa_id,))
-                row = cur.fetchone()
-                if row and row['fecha_vencimiento']:
-                    fecha_venc = row['fecha_vencimiento']
-                    if hasattr(fecha_venc, 'date'): fecha_venc = fecha_venc.date()
-                    if fecha_venc < (datetime.now().date() + timedelta(days=7)):
-                        alertas["criticas"].append({
-                            "tipo": "Suscripción", "cantidad": 1, "nivel": "critical", "mensaje": "Su suscripción vence pronto"
-                        })
+                cur.execute(SQL_VENCIMIENTO_SUSCRIPCION, (empresa_id,))
+                alertas["criticas"].extend(alertas_suscripcion_empresa(cur.fetchone()))
             
             elif vendedor_id:
                 # Alertas para Vendedor
@@ -41,7 +50,10 @@ class AlertRepository(BaseRepository):
                 # Alertas Globales (Superadmin)
                 cur.execute("""
                     SELECT COUNT(*) as count FROM sistema_facturacion.empresas 
-                    WHERE id NOT IN (SELECT DISTINCT empresa_id FROM sistema_facturacion.facturas WHERE fecha_emision > CURRENT_DATE - INTERVAL '30 days')
+                    WHERE id NOT IN (
+                        SELECT DISTINCT empresa_id FROM sistema_facturacion.ventas_diarias
+                        WHERE fecha >= CURRENT_DATE - 30 AND num_facturas > 0
+                    )
                 """)
                 inactivas = cur.fetchone()['count']
                 if inactivas > 0:
@@ -3,6 +3,103 @@ from uuid import UUID
 from typing import Dict, Any
 from .base import BaseRepository
 
+def rango_periodo(periodo: str) -> tuple:
+    """
+    (inicio, fin) del periodo como expresiones SQL sobre CURRENT_DATE, para
+    filtrar con rangos (>= inicio AND < fin). (None, None) = sin filtro ('all').
+    """
+    rangos = {
+        'day': ("CURRENT_DATE", "CURRENT_DATE + 1"),
+        'today': ("CURRENT_DATE", "CURRENT_DATE + 1"),
+        # Igual que antes: últimos 7 días sin tope superior
+        'week': ("CURRENT_DATE - 6", "'infinity'::date"),
+        'month': ("DATE_TRUNC('month', CURRENT_DATE)::date", "(DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month')::date"),
+        'year': ("DATE_TRUNC('year', CURRENT_DATE)::date", "(DATE_TRUNC('year', CURRENT_DATE) + INTERVAL '1 year')::date"),
+        'last_month': ("DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')::date", "DATE_TRUNC('month', CURRENT_DATE)::date"),
+        'all': (None, None),
+    }
+    return rangos.get(periodo, rangos['month'])
+
+
+# Consultas de la rama empresa compartidas con RepositorioDashboardsAsync
+def consultas_kpis_empresa(empresa_id, periodo: str) -> Dict[str, tuple]:
+    """(query, params) por KPI de empresa; `armar_kpis_empresa` combina las filas."""
+    inicio, fin = rango_periodo(periodo)
+    rango_ventas = f"AND fecha >= {inicio} AND fecha < {fin}" if inicio else ""
+    # Rango sargable sobre fecha_emision (usa índices, a diferencia de DATE_TRUNC(...) = ...)
+    rango_emision = f"AND f.fecha_emision >= {inicio} AND f.fecha_emision < {fin}" if inicio else ""
+    rango_gastos = f"AND fecha_emision >= {inicio} AND fecha_emision < {fin}" if inicio else ""
+    params = (str(empresa_id),)
+    return {
+        "ventas": (f"""
+            SELECT COALESCE(SUM(total) FILTER (WHERE estado != 'ANULADA'), 0) as total,
+                   COALESCE(SUM(num_facturas) FILTER (WHERE estado != 'ANULADA'), 0) as count,
+                   COALESCE(SUM(num_facturas) FILTER (WHERE estado = 'RECHAZADA'), 0) as rechazadas
+            FROM sistema_facturacion.ventas_diarias 
+            WHERE empresa_id = %s 
+            {rango_ventas}
+        """, params),
+        "cuentas_cobrar": (f"""
+            SELECT COALESCE(SUM(f.total - COALESCE((
+                SELECT SUM(p.monto) 
+                FROM sistema_facturacion.pagos_factura p 
+                JOIN sistema_facturacion.cuentas_cobrar c ON p.cuenta_cobrar_id = c.id 
+                WHERE c.factura_id = f.id
+            ), 0)), 0) as saldo
+            FROM sistema_facturacion.facturas f 
+            WHERE f.empresa_id = %s 
+            AND f.estado = 'AUTORIZADA' 
+            AND f.estado_pago != 'PAGADO'
+            {rango_emision}
+        """, params),
+        "stock_bajo": ("""
+            SELECT COUNT(*) as count 
+            FROM sistema_facturacion.productos 
+            WHERE empresa_id = %s 
+            AND activo = TRUE 
+            AND maneja_inventario = TRUE 
+            AND stock_actual <= stock_minimo
+        """, params),
+        "gastos": (f"""
+            SELECT COALESCE(SUM(total), 0) as total 
+            FROM sistema_facturacion.gastos 
+            WHERE empresa_id = %s 
+            {rango_gastos}
+        """, params),
+    }
+
+
+def armar_kpis_empresa(filas: Dict[str, dict]) -> Dict[str, Any]:
+    ventas = filas["ventas"]
+    return {
+        'ventas_periodo': float(ventas['total']),
+        'ventas_hoy': int(ventas['count']),
+        'facturas_rechazadas': int(ventas['rechazadas']),
+        'cuentas_cobrar': float(filas["cuentas_cobrar"]['saldo']),
+        'productos_stock_bajo': filas["stock_bajo"]['count'],
+        'total_gastos': float(filas["gastos"]['total']),
+    }
+
+
+SQL_VARIACION_VENTAS_EMPRESA = """
+    SELECT COALESCE(SUM(total) FILTER (WHERE fecha >= DATE_TRUNC('month', CURRENT_DATE)), 0) as actual,
+           COALESCE(SUM(total) FILTER (WHERE fecha < DATE_TRUNC('month', CURRENT_DATE)), 0) as anterior
+    FROM sistema_facturacion.ventas_diarias 
+    WHERE empresa_id = %s AND estado != 'ANULADA'
+    AND fecha >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')
+    AND fecha < DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month'
+"""
+
+
+def variacion_ventas(row: dict) -> float:
+    actual = float(row['actual'])
+    anterior = float(row['anterior'])
+
+    if anterior == 0: return 100.0 if actual > 0 else 0.0
+    return ((actual - anterior) / anterior) * 100
+
+
+
 class KpiRepository(BaseRepository):
     def obtener_kpis_principales(self, vendedor_id=None, empresa_id=None, periodo: str = 'month') -> Dict[str, Any]:
         """Obtiene métricas principales para los KPIs filtrados por periodo."""
@@ -22,87 +119,26 @@ class KpiRepository(BaseRepository):
         period_condition = intervals.get(periodo, intervals['month'])
         
         if periodo in ['today', 'day']:
-            date_filter = "fecha_emision::date = CURRENT_DATE"
             susc_filter = "fecha_pago::date = CURRENT_DATE"
             expired_filter = "s.fecha_fin < CURRENT_DATE"
         elif periodo == 'week':
-            date_filter = "fecha_emision >= CURRENT_DATE - INTERVAL '6 days'"
             susc_filter = "fecha_pago >= CURRENT_DATE - INTERVAL '6 days'"
             expired_filter = "s.fecha_fin < CURRENT_DATE"
         elif periodo == 'all':
-            date_filter = "1=1"
             susc_filter = "1=1"
             expired_filter = "s.fecha_fin < CURRENT_DATE"
         else:
-            date_filter = f"DATE_TRUNC('{periodo if periodo in ['month', 'year'] else 'month'}', fecha_emision) = {period_condition}"
             susc_filter = f"DATE_TRUNC('{periodo if periodo in ['month', 'year'] else 'month'}', fecha_pago) = {period_condition}"
             expired_filter = f"s.fecha_fin < CURRENT_DATE"
 
         with self.db.cursor() as cur:
             if empresa_id:
-                # KPIs para Empresa
-                cur.execute(f"""
-                    SELECT COALESCE(SUM(total), 0) as total 
-                    FROM sistema_facturacion.facturas 
-                    WHERE empresa_id = %s 
-                    AND estado != 'ANULADA'
-                    AND {date_filter}
-                """, (empresa_id,))
-                kpis['ventas_periodo'] = float(cur.fetchone()['total'])
-
-                cur.execute(f"""
-                    SELECT COUNT(*) as count 
-                    FROM sistema_facturacion.facturas 
-                    WHERE empresa_id = %s 
-                    AND estado != 'ANULADA'
-                    AND {date_filter}
-                """, (empresa_id,))
-                kpis['ventas_hoy'] = cur.fetchone()['count']
-
-                cur.execute(f"""
-                    SELECT COALESCE(SUM(f.total - COALESCE((
-                        SELECT SUM(p.monto) 
-                        FROM sistema_facturacion.pagos_factura p 
-                        JOIN sistema_facturacion.cuentas_cobrar c ON p.cuenta_cobrar_id = c.id 
-                        WHERE c.factura_id = f.id
-                    ), 0)), 0) as saldo
-                    FROM sistema_facturacion.facturas f 
-                    WHERE f.empresa_id = %s 
-                    AND f.estado = 'AUTORIZADA' 
-                    AND f.estado_pago != 'PAGADO'
-                    AND {date_filter} -- <--- AGREGAR ESTA LÍNEA
-                """, (empresa_id,))
-                kpis['cuentas_cobrar'] = float(cur.fetchone()['saldo'])
-                
-                cur.execute("""
-                    SELECT COUNT(*) as count 
-                    FROM sistema_facturacion.productos 
-                    WHERE empresa_id = %s 
-                    AND activo = TRUE 
-                    AND maneja_inventario = TRUE 
-                    AND stock_actual <= stock_minimo
-                """, (empresa_id,))
-                kpis['productos_stock_bajo'] = cur.fetchone()['count']
-
-                cur.execute(f"""
-                    SELECT COUNT(*) as count 
-                    FROM sistema_facturacion.facturas 
-                    WHERE empresa_id = %s 
-                    AND estado = 'RECHAZADA'
-                    AND {date_filter}
-                """, (empresa_id,))
-                kpis['facturas_rechazadas'] = cur.fetchone()['count']
-
-                cur.execute(f"""
-                    SELECT COALESCE(SUM(total), 0) as total 
-                    FROM sistema_facturacion.gastos 
-                    WHERE empresa_id = %s 
-                    AND {date_filter}
-                """, (empresa_id,))
-                kpis['total_gastos'] = float(cur.fetchone()['total'])
-
-
-
+                # KPIs para Empresa: ventas, conteo y rechazadas salen del agregado diario
+                filas = {}
+                for nombre, (query, params) in consultas_kpis_empresa(empresa_id, periodo).items():
+                    cur.execute(query, params)
+                    filas[nombre] = cur.fetchone()
+                kpis.update(armar_kpis_empresa(filas))
 
             elif vendedor_id:
                 # KPIs para Vendedor
@@ -179,26 +215,8 @@ class KpiRepository(BaseRepository):
     def obtener_variacion_ventas_empresa(self, empresa_id: UUID) -> float:
         """Calcula variación porcentual de ventas de la empresa vs mes anterior."""
         with self.db.cursor() as cur:
-            cur.execute("""
-                SELECT COALESCE(SUM(total), 0) as total 
-                FROM sistema_facturacion.facturas 
-                WHERE empresa_id = %s AND estado != 'ANULADA'
-                AND DATE_TRUNC('month', fecha_emision) = DATE_TRUNC('month', CURRENT_DATE)
-            """, (str(empresa_id),))
-            actual = float(cur.fetchone()['total'])
-
-            cur.execute("""
-                SELECT COALESCE(SUM(total), 0) as total 
-                FROM sistema_facturacion.facturas 
-                WHERE empresa_id = %s AND estado != 'ANULADA'
-                AND DATE_TRUNC('month', fecha_emision) = DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')
-            """, (str(empresa_id),))
-            anterior = float(cur.fetchone()['total'])
-
-            if anterior == 0: return 100.0 if actual > 0 else 0.0
-            return ((actual - anterior) / anterior) * 100
-
-
+            cur.execute(SQL_VARIACION_VENTAS_EMPRESA, (str(empresa_id),))
+            return variacion_ventas(cur.fetchone())
 
 
     def obtener_variacion_ingresos(self, periodo: str = 'month') -> float:
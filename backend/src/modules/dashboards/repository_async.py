@@ -0,0 +1,63 @@
+"""
+Secciones del overview de empresa sobre el pool asíncrono (psycopg 3).
+
+Mismo SQL y mismo armado de filas que los sub-repositorios síncronos; las
+ramas de superadmin y vendedor siguen solo en `RepositorioDashboards`.
+"""
+
+from typing import Any, Dict, List
+
+from .repositories.kpi_repository import (
+    consultas_kpis_empresa, armar_kpis_empresa, SQL_VARIACION_VENTAS_EMPRESA, variacion_ventas
+)
+from .repositories.alert_repository import SQL_VENCIMIENTO_SUSCRIPCION, alertas_suscripcion_empresa
+from .repositories.empresa_repository import (
+    SQL_INFO_FIRMA, SQL_FACTURAS_RECIENTES, info_firma, factura_reciente
+)
+from .repositories.chart_repository import (
+    consulta_ventas_tendencia, punto_tendencia, consulta_distribucion_pagos, distribucion_pagos,
+    SQL_TOP_PRODUCTOS, top_producto
+)
+
+
+class RepositorioDashboardsAsync:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def _uno(self, query: str, params: tuple):
+        async with self.conn.cursor() as cur:
+            await cur.execute(query, params)
+            return await cur.fetchone()
+
+    async def _todos(self, query: str, params: tuple) -> List[dict]:
+        async with self.conn.cursor() as cur:
+            await cur.execute(query, params)
+            return await cur.fetchall()
+
+    async def obtener_kpis_empresa(self, empresa_id, periodo: str = 'month') -> Dict[str, Any]:
+        filas = {}
+        for nombre, (query, params) in consultas_kpis_empresa(empresa_id, periodo).items():
+            filas[nombre] = await self._uno(query, params)
+        return armar_kpis_empresa(filas)
+
+    async def obtener_alertas_empresa(self, empresa_id) -> Dict[str, List[Dict[str, Any]]]:
+        row = await self._uno(SQL_VENCIMIENTO_SUSCRIPCION, (empresa_id,))
+        return {"criticas": alertas_suscripcion_empresa(row), "advertencias": [], "informativas": []}
+
+    async def obtener_variacion_ventas_empresa(self, empresa_id) -> float:
+        return variacion_ventas(await self._uno(SQL_VARIACION_VENTAS_EMPRESA, (str(empresa_id),)))
+
+    async def obtener_info_firma(self, empresa_id) -> Dict[str, Any]:
+        return info_firma(await self._uno(SQL_INFO_FIRMA, (empresa_id,)))
+
+    async def obtener_top_productos(self, empresa_id, limite: int = 3) -> List[Dict[str, Any]]:
+        return [top_producto(r) for r in await self._todos(SQL_TOP_PRODUCTOS, (empresa_id, limite))]
+
+    async def obtener_facturas_recientes(self, empresa_id, limite: int = 5) -> List[Dict[str, Any]]:
+        return [factura_reciente(r) for r in await self._todos(SQL_FACTURAS_RECIENTES, (empresa_id, limite))]
+
+    async def obtener_ventas_tendencia(self, empresa_id, periodo: str = 'month') -> List[Dict[str, Any]]:
+        return [punto_tendencia(r) for r in await self._todos(*consulta_ventas_tendencia(empresa_id, periodo))]
+
+    async def obtener_distribucion_pagos(self, empresa_id, periodo: str = 'month') -> List[Dict[str, Any]]:
+        return distribucion_pagos(await self._todos(*consulta_distribucion_pagos(empresa_id, periodo)))
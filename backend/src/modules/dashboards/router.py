@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from .service import ServicioDashboards
+from .service_async import ServicioDashboardsAsync
 from .schemas import (
     ResumenDashboard, 
     DashboardGraficos, 
@@ -45,10 +46,16 @@ def obtener_alertas(
     return servicio.obtener_alertas(usuario)
 
 @router.get("/overview", response_model=DashboardOverview)
-def obtener_overview(
+async def obtener_overview(
+    response: Response,
     periodo: str = 'month',
     usuario: dict = Depends(requerir_permiso(PermissionCodes.DASHBOARD_VER)),
-    servicio: ServicioDashboards = Depends()
+    servicio: ServicioDashboardsAsync = Depends()
 ):
-    """Objeto agregado para carga inicial adaptado al rol."""
-    return servicio.obtener_overview(usuario, periodo=periodo)
+    """
+    Objeto agregado para carga inicial adaptado al rol.
+    Los tiempos por sección viajan en el header `Server-Timing`.
+    """
+    overview, tiempos = await servicio.obtener_overview_medido(usuario, periodo=periodo)
+    response.headers["Server-Timing"] = ", ".join(f"{nombre};dur={ms}" for nombre, ms in tiempos.items())
+    return overview
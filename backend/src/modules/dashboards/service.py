@@ -1,19 +1,64 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import Depends
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Tuple
 from .repository import RepositorioDashboards
 from .schemas import DashboardKPIs, DashboardAlertas, DashboardOverview, DashboardAlerta
+from .overview_cache import overview_cache
 
+from ...config.env import env
 from ...constants.enums import AuthKeys
+from ...database.session import conexion_pool
+
+logger = logging.getLogger("facturacion_api")
+
+# Secciones del overview en paralelo; cada una toma su propia conexión del pool.
+# Compartido entre requests para acotar las conexiones extra que usa el dashboard.
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, env.DASHBOARD_OVERVIEW_HILOS),
+    thread_name_prefix="dashboard"
+)
+
+# Secciones más lentas que esto se registran en el log
+UMBRAL_SECCION_LENTA_MS = 500
+
+
+def _con_porcentaje(dist_pagos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    total_pagos = sum(p['value'] for p in dist_pagos)
+    return [
+        {**p, "percent": round((p['value'] / total_pagos * 100), 1) if total_pagos > 0 else 0}
+        for p in dist_pagos
+    ]
+
 
 class ServicioDashboards:
     def __init__(self, repo: RepositorioDashboards = Depends()):
         self.repo = repo
 
-    def _get_ids(self, usuario: dict):
+    @staticmethod
+    def _get_ids(usuario: dict):
         vendedor_id = usuario.get('id') if usuario.get(AuthKeys.IS_VENDEDOR) else None
         empresa_id = usuario.get('empresa_id') if usuario.get(AuthKeys.IS_USUARIO) else None
         return vendedor_id, empresa_id
 
+    @staticmethod
+    def _armar_kpis(base_kpis: dict, variacion_ingresos=0, variacion_ventas=0, firma_data=None) -> DashboardKPIs:
+        return DashboardKPIs(
+            **base_kpis, 
+            variacion_ingresos=round(variacion_ingresos, 2), 
+            variacion_ventas=round(variacion_ventas, 2),
+            firma_expiracion_dias=firma_data.get('dias_restantes') if firma_data else None
+        )
+
+    @staticmethod
+    def _armar_alertas(raw_alerts: dict) -> DashboardAlertas:
+        return DashboardAlertas(
+            criticas=[DashboardAlerta(**a) for a in raw_alerts['criticas']],
+            advertencias=[DashboardAlerta(**a) for a in raw_alerts['advertencias']],
+            informativas=[DashboardAlerta(**a) for a in raw_alerts['informativas']]
+        )
+
     def obtener_kpis(self, usuario: dict, periodo: str = 'month') -> DashboardKPIs:
         v_id, e_id = self._get_ids(usuario)
         base_kpis = self.repo.obtener_kpis_principales(vendedor_id=v_id, empresa_id=e_id, periodo=periodo)
@@ -28,56 +73,126 @@ class ServicioDashboards:
             variacion_ventas = self.repo.obtener_variacion_ventas_empresa(e_id)
         
         # Firma info para Empresa
-        firma_dias = None
-        if e_id:
-            firma_data = self.repo.obtener_info_firma(e_id)
-            firma_dias = firma_data.get('dias_restantes')
+        firma_data = self.repo.obtener_info_firma(e_id) if e_id else None
             
-        return DashboardKPIs(
-            **base_kpis, 
-            variacion_ingresos=round(variacion_ingresos, 2), 
-            variacion_ventas=round(variacion_ventas, 2),
-            firma_expiracion_dias=firma_dias
-        )
+        return self._armar_kpis(base_kpis, variacion_ingresos, variacion_ventas, firma_data)
 
 
     def obtener_alertas(self, usuario: dict) -> DashboardAlertas:
         v_id, e_id = self._get_ids(usuario)
-        raw_alerts = self.repo.obtener_alertas_sistema(vendedor_id=v_id, empresa_id=e_id)
-        
-        return DashboardAlertas(
-            criticas=[DashboardAlerta(**a) for a in raw_alerts['criticas']],
-            advertencias=[DashboardAlerta(**a) for a in raw_alerts['advertencias']],
-            informativas=[DashboardAlerta(**a) for a in raw_alerts['informativas']]
-        )
+        return self._armar_alertas(self.repo.obtener_alertas_sistema(vendedor_id=v_id, empresa_id=e_id))
+
+    def _ejecutar_secciones(
+        self, secciones: Dict[str, Callable[[RepositorioDashboards], Any]]
+    ) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Ejecuta las secciones independientes del overview en paralelo.
+        La primera corre en el hilo de la request con su conexión; el resto en
+        el executor, cada una con una conexión del pool.
+        Retorna (resultados, tiempos en ms por sección).
+        """
+        tiempos: Dict[str, float] = {}
+
+        def correr(nombre, consulta, repo):
+            inicio = time.perf_counter()
+            try:
+                return consulta(repo)
+            finally:
+                tiempos[nombre] = round((time.perf_counter() - inicio) * 1000, 2)
+
+        def en_pool(nombre, consulta):
+            with conexion_pool() as conn:
+                return correr(nombre, consulta, RepositorioDashboards(db=conn))
+
+        nombres = list(secciones)
+        if env.DASHBOARD_OVERVIEW_HILOS <= 1:
+            return {n: correr(n, secciones[n], self.repo) for n in nombres}, tiempos
+
+        futuros = {n: _executor.submit(en_pool, n, secciones[n]) for n in nombres[1:]}
+        resultados = {nombres[0]: correr(nombres[0], secciones[nombres[0]], self.repo)}
+        for nombre, futuro in futuros.items():
+            resultados[nombre] = futuro.result()
+        return resultados, tiempos
 
     def obtener_overview(self, usuario: dict, periodo: str = 'month') -> DashboardOverview:
+        return self.obtener_overview_medido(usuario, periodo)[0]
+
+    def obtener_overview_medido(self, usuario: dict, periodo: str = 'month') -> Tuple[DashboardOverview, Dict[str, float]]:
+        """
+        Overview con los tiempos por sección (ms). Para usuarios de empresa se
+        cachea por (empresa, periodo); en un hit los tiempos solo traen `cache`.
+        """
         v_id, e_id = self._get_ids(usuario)
+        inicio = time.perf_counter()
+
+        if e_id:
+            cacheado = overview_cache.obtener(e_id, periodo)
+            if cacheado is not None:
+                return cacheado, {"cache": round((time.perf_counter() - inicio) * 1000, 2)}
+            generacion = overview_cache.generacion()
+
+        secciones = {
+            "kpis": lambda r: r.obtener_kpis_principales(vendedor_id=v_id, empresa_id=e_id, periodo=periodo),
+            "alertas": lambda r: r.obtener_alertas_sistema(vendedor_id=v_id, empresa_id=e_id),
+        }
+        if e_id:
+            secciones.update({
+                "variacion": lambda r: r.obtener_variacion_ventas_empresa(e_id),
+                # Una sola lectura de la firma para el KPI y el bloque firma_info
+                "firma": lambda r: r.obtener_info_firma(e_id),
+                "consumo_plan": lambda r: r.obtener_consumo_plan(e_id),
+                "top_productos": lambda r: r.obtener_top_productos(e_id),
+                "facturas_recientes": lambda r: r.obtener_facturas_recientes(e_id),
+                "ventas_tendencia": lambda r: r.obtener_ventas_tendencia(e_id, periodo),
+                "distribucion_pagos": lambda r: r.obtener_distribucion_pagos(e_id, periodo),
+            })
+        else:
+            secciones["variacion"] = lambda r: r.obtener_variacion_ingresos(periodo=periodo)
+            # Solo para superadmin agregamos empresas recientes
+            if not v_id:
+                secciones["empresas_recientes"] = lambda r: r.obtener_empresas_recientes()
+
+        res, tiempos = self._ejecutar_secciones(secciones)
+        ov = self._armar_overview(res, e_id)
+        if e_id:
+            overview_cache.guardar(e_id, periodo, ov, generacion)
+
+        tiempos["total"] = round((time.perf_counter() - inicio) * 1000, 2)
+        self._registrar_tiempos(e_id, periodo, tiempos)
+        return ov, tiempos
+
+    @staticmethod
+    def _armar_overview(res: Dict[str, Any], e_id) -> DashboardOverview:
+        """Arma el overview con los resultados de cada sección (compartido con ServicioDashboardsAsync)."""
         ov = DashboardOverview(
-            kpis=self.obtener_kpis(usuario, periodo=periodo),
-            alertas=self.obtener_alertas(usuario)
+            kpis=ServicioDashboards._armar_kpis(
+                res["kpis"],
+                variacion_ingresos=0 if e_id else res["variacion"],
+                variacion_ventas=res["variacion"] if e_id else 0,
+                firma_data=res.get("firma")
+            ),
+            alertas=ServicioDashboards._armar_alertas(res["alertas"]),
+            empresas_recientes=res.get("empresas_recientes")
         )
-        # Solo para superadmin agregamos empresas recientes
-        if not v_id and not e_id:
-            ov.empresas_recientes = self.repo.obtener_empresas_recientes()
-            
+
         # Para Empresa agregamos info extra
         if e_id:
-            ov.consumo_plan = self.repo.obtener_consumo_plan(e_id)
-            ov.top_productos = self.repo.obtener_top_productos(e_id)
-            ov.firma_info = self.repo.obtener_info_firma(e_id)
-            ov.facturas_recientes = self.repo.obtener_facturas_recientes(e_id)
-            ov.ventas_tendencia = self.repo.obtener_ventas_tendencia(e_id, periodo)
-            
-            dist_pagos = self.repo.obtener_distribucion_pagos(e_id, periodo)
-            total_pagos = sum(p['value'] for p in dist_pagos)
-            ov.distribucion_pagos = [
-                {**p, "percent": round((p['value'] / total_pagos * 100), 1) if total_pagos > 0 else 0}
-                for p in dist_pagos
-            ]
-           
+            ov.consumo_plan = res["consumo_plan"]
+            ov.top_productos = res["top_productos"]
+            ov.firma_info = res["firma"]
+            ov.facturas_recientes = res["facturas_recientes"]
+            ov.ventas_tendencia = res["ventas_tendencia"]
+            ov.distribucion_pagos = _con_porcentaje(res["distribucion_pagos"])
         return ov
 
+    @staticmethod
+    def _registrar_tiempos(e_id, periodo: str, tiempos: Dict[str, float]):
+        lentas = {n: t for n, t in tiempos.items() if n != "total" and t > UMBRAL_SECCION_LENTA_MS}
+        if lentas:
+            logger.warning(f"Dashboard overview lento (empresa={e_id}, periodo={periodo}): {tiempos}")
+        else:
+            logger.debug(f"Dashboard overview (empresa={e_id}, periodo={periodo}): {tiempos}")
+
 
 
     def obtener_resumen(self, usuario: dict) -> Dict[str, Any]:
@@ -124,11 +239,6 @@ class ServicioDashboards:
         
         if e_id:
             res["ventas_tendencia"] = self.repo.obtener_ventas_tendencia(e_id, periodo)
-            dist_pagos = self.repo.obtener_distribucion_pagos(e_id, periodo)
-            total_pagos = sum(p['value'] for p in dist_pagos)
-            res["distribucion_pagos"] = [
-                {**p, "percent": round((p['value'] / total_pagos * 100), 1) if total_pagos > 0 else 0}
-                for p in dist_pagos
-            ]
+            res["distribucion_pagos"] = _con_porcentaje(self.repo.obtener_distribucion_pagos(e_id, periodo))
         
         return res
@@ -0,0 +1,99 @@
+"""
+Overview del dashboard para el endpoint `async def`.
+
+- Hit del cache: se responde en el event loop, sin conexión ni threadpool.
+- Usuario de empresa: las secciones corren concurrentes sobre el pool
+  asíncrono (una conexión por sección, como mucho DASHBOARD_OVERVIEW_HILOS a
+  la vez). `consumo_plan` puede escribir (sincroniza contadores), así que usa
+  el repositorio síncrono en el threadpool.
+- Superadmin y vendedor: el servicio síncrono completo en el threadpool.
+"""
+
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from .repository import RepositorioDashboards
+from .repository_async import RepositorioDashboardsAsync
+from .schemas import DashboardOverview
+from .service import ServicioDashboards
+from .overview_cache import overview_cache
+from ...config.env import env
+from ...database.pool_async import conexion_pool_async
+from ...database.session import conexion_pool
+
+# Acota las conexiones asíncronas que usa un overview en frío por proceso
+_limite_secciones: Optional[asyncio.Semaphore] = None
+
+
+def _semaforo() -> asyncio.Semaphore:
+    global _limite_secciones
+    if _limite_secciones is None:
+        _limite_secciones = asyncio.Semaphore(max(1, env.DASHBOARD_OVERVIEW_HILOS))
+    return _limite_secciones
+
+
+def _overview_sync(usuario: dict, periodo: str) -> Tuple[DashboardOverview, Dict[str, float]]:
+    with conexion_pool() as conn:
+        return ServicioDashboards(RepositorioDashboards(db=conn)).obtener_overview_medido(usuario, periodo)
+
+
+def _consumo_plan_sync(empresa_id) -> Dict[str, Any]:
+    with conexion_pool() as conn:
+        return RepositorioDashboards(db=conn).obtener_consumo_plan(empresa_id)
+
+
+class ServicioDashboardsAsync:
+    async def obtener_overview_medido(self, usuario: dict, periodo: str = 'month') -> Tuple[DashboardOverview, Dict[str, float]]:
+        """Ver `ServicioDashboards.obtener_overview_medido`."""
+        _, e_id = ServicioDashboards._get_ids(usuario)
+        if not e_id:
+            return await run_in_threadpool(_overview_sync, usuario, periodo)
+
+        inicio = time.perf_counter()
+        cacheado = overview_cache.obtener(e_id, periodo)
+        if cacheado is not None:
+            return cacheado, {"cache": round((time.perf_counter() - inicio) * 1000, 2)}
+        generacion = overview_cache.generacion()
+
+        secciones: Dict[str, Callable[[RepositorioDashboardsAsync], Awaitable[Any]]] = {
+            "kpis": lambda r: r.obtener_kpis_empresa(e_id, periodo),
+            "alertas": lambda r: r.obtener_alertas_empresa(e_id),
+            "variacion": lambda r: r.obtener_variacion_ventas_empresa(e_id),
+            # Una sola lectura de la firma para el KPI y el bloque firma_info
+            "firma": lambda r: r.obtener_info_firma(e_id),
+            "top_productos": lambda r: r.obtener_top_productos(e_id),
+            "facturas_recientes": lambda r: r.obtener_facturas_recientes(e_id),
+            "ventas_tendencia": lambda r: r.obtener_ventas_tendencia(e_id, periodo),
+            "distribucion_pagos": lambda r: r.obtener_distribucion_pagos(e_id, periodo),
+        }
+        tiempos: Dict[str, float] = {}
+
+        async def correr(nombre, consulta):
+            async with _semaforo():
+                t0 = time.perf_counter()
+                try:
+                    async with conexion_pool_async() as conn:
+                        return await consulta(RepositorioDashboardsAsync(conn))
+                finally:
+                    tiempos[nombre] = round((time.perf_counter() - t0) * 1000, 2)
+
+        async def consumo():
+            t0 = time.perf_counter()
+            try:
+                return await run_in_threadpool(_consumo_plan_sync, e_id)
+            finally:
+                tiempos["consumo_plan"] = round((time.perf_counter() - t0) * 1000, 2)
+
+        nombres = list(secciones)
+        valores = await asyncio.gather(consumo(), *(correr(n, secciones[n]) for n in nombres))
+        res = {"consumo_plan": valores[0], **dict(zip(nombres, valores[1:]))}
+
+        ov = ServicioDashboards._armar_overview(res, e_id)
+        overview_cache.guardar(e_id, periodo, ov, generacion)
+
+        tiempos["total"] = round((time.perf_counter() - inicio) * 1000, 2)
+        ServicioDashboards._registrar_tiempos(e_id, periodo, tiempos)
+        return ov, tiempos
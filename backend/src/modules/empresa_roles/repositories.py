@@ -3,6 +3,8 @@ from uuid import UUID
 from typing import List, Optional
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ...database.cache_referencia import cache_referencia, PERMISOS
+from ..autenticacion.principal_cache import principal_cache
 
 class RepositorioRoles:
     def __init__(self, db=Depends(get_db)):
@@ -11,6 +13,9 @@ class RepositorioRoles:
     # --- Permisos (System-wide catalog) ---
     def listar_permisos(self) -> List[dict]:
         """List all system permissions"""
+        return cache_referencia.obtener_o_cargar(PERMISOS, "todos", self._cargar_permisos)
+
+    def _cargar_permisos(self) -> List[dict]:
         query = """
             SELECT * FROM sistema_facturacion.empresa_permisos
             ORDER BY modulo, nombre
@@ -39,6 +44,7 @@ class RepositorioRoles:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            cache_referencia.notificar_cambio(cur, PERMISOS)
             return dict(row) if row else None
     
     # --- Roles (Empresa-specific) ---
@@ -169,18 +175,24 @@ class RepositorioRoles:
                         INSERT INTO sistema_facturacion.empresa_roles_permisos (rol_id, permiso_id)
                         VALUES (%s, %s)
                     """, (str(id), str(permiso_id)))
-            
-            return dict(rol) if rol else None
+
+            if rol:
+                principal_cache.notificar_empresa(cur, rol['empresa_id'])
+        return dict(rol) if rol else None
     
     def eliminar_rol(self, id: UUID) -> bool:
         """Delete role (only if not es_sistema)"""
         query = """
             DELETE FROM sistema_facturacion.empresa_roles
             WHERE id = %s AND es_sistema = FALSE
+            RETURNING empresa_id
         """
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(id),))
-            return cur.rowcount > 0
+            row = cur.fetchone()
+            if row:
+                principal_cache.notificar_empresa(cur, row['empresa_id'])
+        return row is not None
     
     # --- Individual Permission Management ---
     def asignar_permiso(self, rol_id: UUID, permiso_id: UUID) -> bool:
@@ -192,7 +204,8 @@ class RepositorioRoles:
         """
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(rol_id), str(permiso_id)))
-            return True
+            self._invalidar_principales_rol(cur, rol_id)
+        return True
     
     def remover_permiso(self, rol_id: UUID, permiso_id: UUID) -> bool:
         """Remove a single permission from a role"""
@@ -202,5 +215,14 @@ class RepositorioRoles:
         """
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(rol_id), str(permiso_id)))
-            return cur.rowcount > 0
+            removido = cur.rowcount > 0
+            self._invalidar_principales_rol(cur, rol_id)
+        return removido
+
+    def _invalidar_principales_rol(self, cur, rol_id: UUID):
+        """Invalida el cache de autenticación de la empresa dueña del rol (en la transacción de `cur`)."""
+        cur.execute("SELECT empresa_id FROM sistema_facturacion.empresa_roles WHERE id = %s", (str(rol_id),))
+        row = cur.fetchone()
+        if row:
+            principal_cache.notificar_empresa(cur, row['empresa_id'])
 
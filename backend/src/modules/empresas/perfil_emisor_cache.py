@@ -0,0 +1,108 @@
+"""
+Cache del perfil del emisor por empresa.
+
+Crear y emitir una factura solo necesita los datos tributarios de la empresa
+(RUC, razón social, dirección, régimen, obligado a contabilidad) y el estado de
+su configuración SRI. `RepositorioEmpresas.obtener_por_id` trae además plan,
+suscripción y varios conteos (facturas del mes, consumidas, usuarios...), por
+lo que el camino caliente usa `RepositorioEmpresas.obtener_perfil_emisor` y
+conserva el resultado aquí.
+
+Las escrituras que cambian el perfil deben llamar a `notificar_empresa` (o
+`notificar_todos`) con el cursor de su transacción: `RepositorioEmpresas`
+(actualizar_empresa, asignar_vendedor, eliminar_empresa), la configuración SRI
+en `RepositorioSRI` (certificado y parámetros), la reasignación de vendedores y
+la reactivación de empresas. Igual que el cache de principales, la invalidación
+viaja por el canal de `cache_referencia` a todos los workers y sin escucha no
+se sirve desde cache.
+"""
+
+import copy
+import threading
+from typing import Optional
+
+from ...config.env import env
+from ...database.cache_referencia import CacheReferencia, cache_referencia
+from ...utils.cache import CacheTTL
+
+# Prefijo de los payloads en el canal de cache_referencia
+PREFIJO = "perfil_emisor"
+
+
+class CachePerfilEmisor:
+    def __init__(self, ttl: float, max_entradas: int, referencia: CacheReferencia):
+        self._cache = CacheTTL(ttl=ttl, max_entradas=max_entradas, nombre="perfil_emisor")
+        self._referencia = referencia
+        # Sube con cada invalidación: un perfil leído antes no se guarda
+        self._generacion = 0
+        self._lock = threading.Lock()
+        referencia.suscribir(PREFIJO, self)
+
+    @property
+    def habilitado(self) -> bool:
+        return self._cache.habilitado
+
+    def obtener(self, empresa_id) -> Optional[dict]:
+        if not self._referencia.escuchando:
+            return None
+        perfil = self._cache.obtener(str(empresa_id))
+        # Copia: los consumidores arman snapshots y XML a partir del dict
+        return copy.copy(perfil) if perfil is not None else None
+
+    def generacion(self) -> int:
+        with self._lock:
+            return self._generacion
+
+    def _avanzar(self):
+        with self._lock:
+            self._generacion += 1
+
+    def guardar(self, empresa_id, perfil: dict, generacion: int):
+        if generacion != self.generacion():
+            return
+        self._cache.guardar(str(empresa_id), copy.copy(perfil))
+
+    def invalidar_empresa(self, empresa_id):
+        self._avanzar()
+        self._cache.invalidar(str(empresa_id))
+
+    def limpiar(self):
+        self._avanzar()
+        self._cache.limpiar()
+
+    def aplicar_invalidacion(self, detalle: str):
+        """Aplica un payload del canal: '<empresa_id>' o '*'."""
+        if detalle == "*":
+            self.limpiar()
+        else:
+            self.invalidar_empresa(detalle)
+
+    # Publicación a todos los workers: llamar con el cursor de la transacción que escribe
+    def notificar_empresa(self, cur, empresa_id):
+        self._referencia.publicar(cur, PREFIJO, str(empresa_id))
+
+    def notificar_todos(self, cur):
+        self._referencia.publicar(cur, PREFIJO, "*")
+
+    def estadisticas(self) -> dict:
+        return self._cache.estadisticas()
+
+
+# Instancia global por proceso
+perfil_emisor_cache = CachePerfilEmisor(
+    ttl=env.EMISOR_PERFIL_CACHE_TTL,
+    max_entradas=env.EMISOR_PERFIL_CACHE_MAX,
+    referencia=cache_referencia
+)
+
+
+def obtener_perfil_emisor(repo, empresa_id) -> Optional[dict]:
+    """Perfil del emisor desde el cache; en un miss lo lee con `repo` (RepositorioEmpresas)."""
+    perfil = perfil_emisor_cache.obtener(empresa_id)
+    if perfil is not None:
+        return perfil
+    generacion = perfil_emisor_cache.generacion()
+    perfil = repo.obtener_perfil_emisor(empresa_id)
+    if perfil:
+        perfil_emisor_cache.guardar(empresa_id, perfil, generacion)
+    return perfil
@@ -4,6 +4,8 @@ from datetime import datetime
 from uuid import UUID
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ..autenticacion.principal_cache import principal_cache
+from .perfil_emisor_cache import perfil_emisor_cache
 
 class RepositorioEmpresas:
     def __init__(self, db=Depends(get_db)):
@@ -72,6 +74,27 @@ class RepositorioEmpresas:
             row = cur.fetchone()
             return dict(row) if row else None
 
+    def obtener_perfil_emisor(self, empresa_id: UUID) -> Optional[dict]:
+        """
+        Datos del emisor para crear y emitir comprobantes: sin plan, suscripción
+        ni conteos (ver perfil_emisor_cache).
+        """
+        query = """
+            SELECT e.id, e.vendedor_id, e.ruc, e.razon_social, e.nombre_comercial,
+                   e.email, e.telefono, e.direccion, e.logo_url, e.activo,
+                   e.tipo_persona, e.tipo_contribuyente, e.obligado_contabilidad,
+                   csri.ambiente as sri_ambiente,
+                   csri.estado as sri_estado,
+                   csri.fecha_expiracion_cert as firma_expiracion
+            FROM sistema_facturacion.empresas e
+            LEFT JOIN sistema_facturacion.configuraciones_sri csri ON e.id = csri.empresa_id
+            WHERE e.id = %s
+        """
+        with self.db.cursor() as cur:
+            cur.execute(query, (str(empresa_id),))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
     def obtener_por_ruc(self, ruc: str) -> Optional[dict]:
         with self.db.cursor() as cur:
             cur.execute("SELECT * FROM sistema_facturacion.empresas WHERE ruc=%s", (ruc,))
@@ -164,7 +187,10 @@ class RepositorioEmpresas:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(clean_values))
             row = cur.fetchone()
-            return dict(row) if row else None
+            # El estado de la empresa forma parte del bloqueo calculado en cada principal
+            principal_cache.notificar_empresa(cur, empresa_id)
+            perfil_emisor_cache.notificar_empresa(cur, empresa_id)
+        return dict(row) if row else None
 
     def check_expired_subscriptions(self, tolerance_days: int = 0) -> int:
         """
@@ -216,13 +242,18 @@ class RepositorioEmpresas:
         """
         with db_transaction(self.db) as cur:
             cur.execute(query, (tolerance_days,))
-            return cur.rowcount
+            vencidas = cur.rowcount
+            if vencidas:
+                principal_cache.notificar_todos(cur)
+        return vencidas
 
     def eliminar_empresa(self, empresa_id: UUID) -> bool:
         query = "DELETE FROM sistema_facturacion.empresas WHERE id = %s"
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(empresa_id),))
-            return cur.rowcount > 0
+            eliminada = cur.rowcount > 0
+            perfil_emisor_cache.notificar_empresa(cur, empresa_id)
+        return eliminada
 
     def create_manual_subscription(self, data: dict) -> bool:
         # Note: data must contain correct string/values.
@@ -245,4 +276,7 @@ class RepositorioEmpresas:
         
         with db_transaction(self.db) as cur:
             cur.execute(query, (val_id, str(empresa_id)))
-            return cur.rowcount > 0
+            asignado = cur.rowcount > 0
+            # El vendedor_id del perfil decide el acceso de vendedores
+            perfil_emisor_cache.notificar_empresa(cur, empresa_id)
+        return asignado
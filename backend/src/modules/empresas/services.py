@@ -5,6 +5,7 @@ from typing import List, Optional
 import logging
 
 from .repositories import RepositorioEmpresas
+from .perfil_emisor_cache import obtener_perfil_emisor
 from ..vendedores.repositories import RepositorioVendedores
 from ..empresa_roles.services import ServicioRoles
 from .schemas import EmpresaCreacion, EmpresaActualizacion
@@ -111,6 +112,21 @@ class ServicioEmpresas:
     def obtener_empresa(self, empresa_id: UUID, usuario_actual: dict):
         logger.info(f"[INICIO] Obteniendo empresa: {empresa_id}")
         empresa = self.repo.obtener_por_id(empresa_id)
+        logger.debug(f"[DEBUG] Raw Repository Data for {empresa_id}: {empresa}")
+        self._validar_lectura(empresa, empresa_id, usuario_actual)
+        logger.info(f"[ÉXITO] Empresa obtenida - ID: {empresa_id}")
+        return empresa
+
+    def obtener_perfil_emisor(self, empresa_id: UUID, usuario_actual: dict):
+        """
+        Perfil del emisor (cacheado) con los mismos permisos que `obtener_empresa`;
+        para crear/emitir comprobantes sin los conteos de plan y suscripción.
+        """
+        perfil = obtener_perfil_emisor(self.repo, empresa_id)
+        self._validar_lectura(perfil, empresa_id, usuario_actual)
+        return perfil
+
+    def _validar_lectura(self, empresa: Optional[dict], empresa_id: UUID, usuario_actual: dict):
         if not empresa:
              logger.warning(f"[VALIDACIÓN] Empresa no encontrada: {empresa_id}")
              raise AppError(
@@ -120,13 +136,10 @@ class ServicioEmpresas:
                  description="La empresa solicitada no existe."
              )
         
-        logger.debug(f"[DEBUG] Raw Repository Data for {empresa_id}: {empresa}")
         ctx = self._get_context(usuario_actual)
         
         if ctx["is_superadmin"]:
-            logger.info(f"[ÉXITO] Empresa obtenida - ID: {empresa_id}")
-            logger.debug(f"[DEBUG] Raw Repository Data: {empresa}")
-            return empresa
+            return
         
         if ctx["is_vendedor"]:
             if str(empresa.get('vendedor_id')) != str(ctx["vendedor_id"]):
@@ -135,7 +148,7 @@ class ServicioEmpresas:
                      status_code=403, 
                      code=ErrorCodes.PERM_FORBIDDEN
                  )
-            return empresa
+            return
 
         if ctx["is_usuario"]:
              if str(empresa_id) != str(ctx["empresa_id"]):
@@ -144,7 +157,7 @@ class ServicioEmpresas:
                       status_code=403, 
                       code=ErrorCodes.PERM_FORBIDDEN
                   )
-             return empresa
+             return
              
         raise AppError(
             message=AppMessages.PERM_FORBIDDEN, 
@@ -3,10 +3,12 @@ from typing import List, Optional
 from uuid import UUID
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ..suscripciones.repository_consumo import RepositorioConsumo
 
 class RepositorioEstablecimientos:
     def __init__(self, db=Depends(get_db)):
         self.db = db
+        self.consumo = RepositorioConsumo(db=db)
 
     def crear_establecimiento(self, data: dict, empresa_id: UUID) -> Optional[dict]:
         fields = list(data.keys())
@@ -28,6 +30,8 @@ class RepositorioEstablecimientos:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            if row:
+                self.consumo.ajustar(cur, row['empresa_id'], 'establecimientos', 1)
             return dict(row) if row else None
 
     def obtener_por_id(self, id: UUID) -> Optional[dict]:
@@ -88,10 +92,13 @@ class RepositorioEstablecimientos:
             return dict(row) if row else None
 
     def eliminar_establecimiento(self, id: UUID) -> bool:
-        query = "DELETE FROM sistema_facturacion.establecimientos WHERE id = %s"
+        query = "DELETE FROM sistema_facturacion.establecimientos WHERE id = %s RETURNING empresa_id"
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(id),))
-            return cur.rowcount > 0
+            row = cur.fetchone()
+            if row:
+                self.consumo.ajustar(cur, row['empresa_id'], 'establecimientos', -1)
+            return row is not None
 
     def obtener_estadisticas(self, empresa_id: Optional[UUID] = None) -> dict:
         """Obtiene estadísticas de establecimientos"""
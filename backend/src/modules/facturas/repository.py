@@ -12,11 +12,227 @@ from fastapi import Depends
 from typing import List, Optional, Any
 from uuid import UUID
 from datetime import date, datetime
-from psycopg2.extras import Json
+from psycopg2.extras import Json, execute_values
 
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from .repository_ventas_diarias import RepositorioVentasDiarias, CAMPOS_VENTAS_DIARIAS
 from .schemas import FacturaListadoFiltros
+from ..dashboards.overview_cache import overview_cache
+from ..reportes.usuarios.R_027.declaracion_cache import declaracion_iva_cache
+from ..suscripciones.repository_consumo import RepositorioConsumo
+
+
+# Consultas y post-proceso compartidos con RepositorioFacturasAsync (repository_async.py)
+
+SQL_FACTURA_POR_ID = """
+    SELECT f.*, 
+           (SELECT fp.forma_pago_sri FROM sistema_facturacion.formas_pago fp WHERE fp.factura_id = f.id ORDER BY fp.created_at ASC LIMIT 1) as forma_pago_sri,
+           (SELECT fp.plazo FROM sistema_facturacion.formas_pago fp WHERE fp.factura_id = f.id ORDER BY fp.created_at ASC LIMIT 1) as plazo,
+           (SELECT fp.unidad_tiempo FROM sistema_facturacion.formas_pago fp WHERE fp.factura_id = f.id ORDER BY fp.created_at ASC LIMIT 1) as unidad_tiempo,
+           COALESCE(cc.saldo_pendiente, f.total) as saldo_pendiente,
+           c.razon_social as cliente_nombre, 
+           c.identificacion as cliente_identificacion,
+           c.tipo_identificacion as cliente_tipo_identificacion,
+           c.email as cliente_email,
+           c.direccion as cliente_direccion,
+           c.telefono as cliente_telefono,
+           e.razon_social as emisor_nombre,
+           e.nombre_comercial as emisor_nombre_comercial,
+           e.ruc as emisor_ruc,
+           e.direccion as emisor_direccion,
+           e.email as emisor_email,
+           e.tipo_contribuyente as emisor_tipo,
+           e.tipo_persona as emisor_tipo_persona,
+           e.obligado_contabilidad as emisor_obligado,
+           e.logo_url as emisor_logo,
+           es.codigo as establecimiento_codigo,
+           es.nombre as establecimiento_nombre,
+           es.direccion as establecimiento_direccion,
+           pe.codigo as punto_emision_codigo,
+           pe.nombre as punto_emision_nombre
+    FROM sistema_facturacion.facturas f
+    LEFT JOIN sistema_facturacion.clientes c ON f.cliente_id = c.id
+    LEFT JOIN sistema_facturacion.empresas e ON f.empresa_id = e.id
+    LEFT JOIN sistema_facturacion.cuentas_cobrar cc ON f.id = cc.factura_id
+    LEFT JOIN sistema_facturacion.establecimientos es ON f.establecimiento_id = es.id
+    LEFT JOIN sistema_facturacion.puntos_emision pe ON f.punto_emision_id = pe.id
+    WHERE f.id = %s
+"""
+
+
+def filtros_listado(
+    empresa_id: Optional[UUID],
+    usuario_id: Optional[UUID],
+    filtros: Optional[FacturaListadoFiltros],
+    cursor: Optional[tuple] = None
+) -> tuple:
+    """
+    Condiciones WHERE (sobre el alias f) compartidas por el listado y su conteo.
+    `cursor` (created_at, id) agrega la condición keyset de la página siguiente.
+    """
+    condiciones = []
+    params = []
+    
+    # Filtro por empresa
+    if empresa_id:
+        condiciones.append("f.empresa_id = %s")
+        params.append(str(empresa_id))
+    
+    # Filtro por usuario (solo_propias)
+    if usuario_id:
+        condiciones.append("f.usuario_id = %s")
+        params.append(str(usuario_id))
+
+    # Excluir siempre las facturas plantilla de programaciones recurrentes (BORRADORs internos)
+    condiciones.append("NOT (f.origen = 'FACTURACION_PROGRAMADA' AND f.estado = 'BORRADOR')")
+    
+    # Filtros adicionales
+    if filtros:
+        if filtros.estado:
+            condiciones.append("f.estado = %s")
+            params.append(filtros.estado)
+        
+        if filtros.estado_pago:
+            condiciones.append("f.estado_pago = %s")
+            params.append(filtros.estado_pago)
+        
+        if filtros.fecha_desde:
+            condiciones.append("f.fecha_emision >= %s")
+            params.append(filtros.fecha_desde)
+        
+        if filtros.fecha_hasta:
+            condiciones.append("f.fecha_emision <= %s")
+            params.append(filtros.fecha_hasta)
+        
+        if filtros.cliente_id:
+            condiciones.append("f.cliente_id = %s")
+            params.append(str(filtros.cliente_id))
+        
+        if filtros.establecimiento_id:
+            condiciones.append("f.establecimiento_id = %s")
+            params.append(str(filtros.establecimiento_id))
+        
+        if filtros.punto_emision_id:
+            condiciones.append("f.punto_emision_id = %s")
+            params.append(str(filtros.punto_emision_id))
+
+    if cursor:
+        condiciones.append("(f.created_at, f.id) < (%s, %s)")
+        params.extend([cursor[0], str(cursor[1])])
+
+    return " AND ".join(condiciones), params
+
+
+def sql_listado_facturas(where: str) -> str:
+    """Página del listado: filtra y pagina en la subconsulta antes de los JOINs."""
+    # La primera forma de pago sale de un único LATERAL (antes: 3 subconsultas por fila)
+    return f"""
+    SELECT f.*, 
+           fp.forma_pago_sri,
+           fp.plazo,
+           fp.unidad_tiempo,
+           COALESCE(cc.saldo_pendiente, f.total) as saldo_pendiente,
+           c.razon_social as cliente_nombre, 
+           c.identificacion as cliente_identificacion,
+           c.tipo_identificacion as cliente_tipo_identificacion,
+           c.email as cliente_email,
+           c.direccion as cliente_direccion,
+           c.telefono as cliente_telefono,
+           e.razon_social as emisor_nombre,
+           e.nombre_comercial as emisor_nombre_comercial,
+           e.ruc as emisor_ruc,
+           e.direccion as emisor_direccion,
+           e.email as emisor_email,
+           e.tipo_contribuyente as emisor_tipo,
+           e.tipo_persona as emisor_tipo_persona,
+           e.obligado_contabilidad as emisor_obligado,
+           e.logo_url as emisor_logo,
+           es.codigo as establecimiento_codigo,
+           es.nombre as establecimiento_nombre,
+           es.direccion as establecimiento_direccion,
+           pe.codigo as punto_emision_codigo,
+           pe.nombre as punto_emision_nombre
+    FROM (
+        SELECT f.*
+        FROM sistema_facturacion.facturas f
+        WHERE {where}
+        ORDER BY f.created_at DESC, f.id DESC
+        LIMIT %s OFFSET %s
+    ) f
+    LEFT JOIN LATERAL (
+        SELECT fp.forma_pago_sri, fp.plazo, fp.unidad_tiempo
+        FROM sistema_facturacion.formas_pago fp
+        WHERE fp.factura_id = f.id
+        ORDER BY fp.created_at ASC
+        LIMIT 1
+    ) fp ON TRUE
+    LEFT JOIN sistema_facturacion.clientes c ON f.cliente_id = c.id
+    LEFT JOIN sistema_facturacion.empresas e ON f.empresa_id = e.id
+    LEFT JOIN sistema_facturacion.cuentas_cobrar cc ON f.id = cc.factura_id
+    LEFT JOIN sistema_facturacion.establecimientos es ON f.establecimiento_id = es.id
+    LEFT JOIN sistema_facturacion.puntos_emision pe ON f.punto_emision_id = pe.id
+    ORDER BY f.created_at DESC, f.id DESC
+"""
+
+
+def sql_conteo_listado(where: str, estimado: bool) -> str:
+    """
+    Conteo del listado. Con `estimado` no recorre la tabla: el planificador
+    (EXPLAIN) da las filas estimadas, suficiente para paginadores en tenants grandes.
+    """
+    query = f"SELECT 1 FROM sistema_facturacion.facturas f WHERE {where}"
+    if estimado:
+        return f"EXPLAIN (FORMAT JSON) {query}"
+    return f"SELECT COUNT(*) AS total FROM ({query}) t"
+
+
+def leer_conteo_listado(row: dict, estimado: bool) -> int:
+    if estimado:
+        return int(row['QUERY PLAN'][0]['Plan']['Plan Rows'])
+    return row['total']
+
+
+def completar_snapshots(data: dict) -> dict:
+    """Si un snapshot está vacío, lo poblamos con datos del JOIN para el frontend."""
+    if not data.get('snapshot_cliente'):
+        data['snapshot_cliente'] = {
+            'razon_social': data.get('cliente_nombre'),
+            'identificacion': data.get('cliente_identificacion'),
+            'numero_identificacion': data.get('cliente_identificacion'), # Alias para frontend
+            'tipo_identificacion': data.get('cliente_tipo_identificacion') or 'CEDULA', # Fallback seguro
+            'email': data.get('cliente_email'),
+            'direccion': data.get('cliente_direccion'),
+            'telefono': data.get('cliente_telefono') or ''
+        }
+    
+    if not data.get('snapshot_empresa'):
+        data['snapshot_empresa'] = {
+            'razon_social': data.get('emisor_nombre'),
+            'nombre_comercial': data.get('emisor_nombre_comercial'),
+            'ruc': data.get('emisor_ruc'),
+            'direccion': data.get('emisor_direccion'),
+            'email': data.get('emisor_email'),
+            'tipo_persona': data.get('emisor_tipo_persona') or 'NATURAL',
+            'tipo_contribuyente': data.get('emisor_tipo') or 'REGIMEN_GENERAL',
+            'obligado_contabilidad': data.get('emisor_obligado') or False,
+            'logo_url': data.get('emisor_logo')
+        }
+
+    if not data.get('snapshot_establecimiento'):
+        data['snapshot_establecimiento'] = {
+            'codigo': data.get('establecimiento_codigo') or '001',
+            'nombre': data.get('establecimiento_nombre') or 'Establecimiento Principal',
+            'direccion': data.get('establecimiento_direccion') or data.get('emisor_direccion', '')
+        }
+
+    if not data.get('snapshot_punto_emision'):
+        data['snapshot_punto_emision'] = {
+            'codigo': data.get('punto_emision_codigo') or '001',
+            'nombre': data.get('punto_emision_nombre') or 'Caja Principal'
+        }
+
+    return data
 
 
 class RepositorioFacturas:
@@ -35,6 +251,9 @@ class RepositorioFacturas:
     
     def __init__(self, db=Depends(get_db)):
         self.db = db
+        # Agregado diario y consumo del plan: se mantienen en la misma transacción de cada escritura
+        self.ventas_diarias = RepositorioVentasDiarias(db=db)
+        self.consumo = RepositorioConsumo(db=db)
     
     def _json_serial(self, obj):
         """JSON serializer for objects not serializable by default json code"""
@@ -58,12 +277,14 @@ class RepositorioFacturas:
         """Prepara todos los valores del dict para inserción."""
         return {k: self._prepare_value(k, v) for k, v in data.items()}
 
-    def crear_factura(self, data: dict) -> Optional[dict]:
+    def crear_factura(self, data: dict, cur=None) -> Optional[dict]:
         """
         Crea una nueva factura con snapshots JSONB.
         
         Args:
             data: Dict con los campos de la factura incluyendo snapshots
+            cur: Cursor de una transacción en curso. Si se pasa, no se hace
+                 commit y se retorna la fila insertada (sin los JOINs de obtener_por_id).
             
         Returns:
             Dict con la factura creada o None si falla
@@ -78,97 +299,31 @@ class RepositorioFacturas:
             VALUES ({', '.join(placeholders)})
             RETURNING *
         """
+        def _insertar(cursor) -> Optional[dict]:
+            cursor.execute(query, tuple(values))
+            row = cursor.fetchone()
+            if row:
+                self.ventas_diarias.aplicar_cambio(cursor, None, row)
+                self.consumo.aplicar_factura(cursor, None, row)
+                overview_cache.notificar_empresa(cursor, row['empresa_id'])
+                declaracion_iva_cache.notificar_documento(cursor, row['empresa_id'], row['fecha_emision'])
+            return dict(row) if row else None
+
+        if cur:
+            return _insertar(cur)
+
         with db_transaction(self.db) as cur:
-            cur.execute(query, tuple(values))
-            row = cur.fetchone()
-            if not row:
-                return None
-            return self.obtener_por_id(row['id'])
+            row = _insertar(cur)
+        return self.obtener_por_id(row['id']) if row else None
 
     def obtener_por_id(self, id: UUID) -> Optional[dict]:
         """
         Obtiene una factura por ID incluyendo snapshots o datos del cliente via JOIN.
         """
-        query = """
-            SELECT f.*, 
-                   (SELECT fp.forma_pago_sri FROM sistema_facturacion.formas_pago fp WHERE fp.factura_id = f.id ORDER BY fp.created_at ASC LIMIT 1) as forma_pago_sri,
-                   (SELECT fp.plazo FROM sistema_facturacion.formas_pago fp WHERE fp.factura_id = f.id ORDER BY fp.created_at ASC LIMIT 1) as plazo,
-                   (SELECT fp.unidad_tiempo FROM sistema_facturacion.formas_pago fp WHERE fp.factura_id = f.id ORDER BY fp.created_at ASC LIMIT 1) as unidad_tiempo,
-                   COALESCE(cc.saldo_pendiente, f.total) as saldo_pendiente,
-                   c.razon_social as cliente_nombre, 
-                   c.identificacion as cliente_identificacion,
-                   c.tipo_identificacion as cliente_tipo_identificacion,
-                   c.email as cliente_email,
-                   c.direccion as cliente_direccion,
-                   c.telefono as cliente_telefono,
-                   e.razon_social as emisor_nombre,
-                   e.nombre_comercial as emisor_nombre_comercial,
-                   e.ruc as emisor_ruc,
-                   e.direccion as emisor_direccion,
-                   e.email as emisor_email,
-                   e.tipo_contribuyente as emisor_tipo,
-                   e.tipo_persona as emisor_tipo_persona,
-                   e.obligado_contabilidad as emisor_obligado,
-                   e.logo_url as emisor_logo,
-                   es.codigo as establecimiento_codigo,
-                   es.nombre as establecimiento_nombre,
-                   es.direccion as establecimiento_direccion,
-                   pe.codigo as punto_emision_codigo,
-                   pe.nombre as punto_emision_nombre
-            FROM sistema_facturacion.facturas f
-            LEFT JOIN sistema_facturacion.clientes c ON f.cliente_id = c.id
-            LEFT JOIN sistema_facturacion.empresas e ON f.empresa_id = e.id
-            LEFT JOIN sistema_facturacion.cuentas_cobrar cc ON f.id = cc.factura_id
-            LEFT JOIN sistema_facturacion.establecimientos es ON f.establecimiento_id = es.id
-            LEFT JOIN sistema_facturacion.puntos_emision pe ON f.punto_emision_id = pe.id
-            WHERE f.id = %s
-        """
         with self.db.cursor() as cur:
-            cur.execute(query, (str(id),))
+            cur.execute(SQL_FACTURA_POR_ID, (str(id),))
             row = cur.fetchone()
-            if not row:
-                return None
-            
-            data = dict(row)
-            # Si el snapshot está vacío, lo poblamos con datos del JOIN para el frontend
-            if not data.get('snapshot_cliente'):
-                data['snapshot_cliente'] = {
-                    'razon_social': data.get('cliente_nombre'),
-                    'identificacion': data.get('cliente_identificacion'),
-                    'numero_identificacion': data.get('cliente_identificacion'), # Alias para frontend
-                    'tipo_identificacion': data.get('cliente_tipo_identificacion') or 'CEDULA', # Fallback seguro
-                    'email': data.get('cliente_email'),
-                    'direccion': data.get('cliente_direccion'),
-                    'telefono': data.get('cliente_telefono') or ''
-                }
-            
-            if not data.get('snapshot_empresa'):
-                data['snapshot_empresa'] = {
-                    'razon_social': data.get('emisor_nombre'),
-                    'nombre_comercial': data.get('emisor_nombre_comercial'),
-                    'ruc': data.get('emisor_ruc'),
-                    'direccion': data.get('emisor_direccion'),
-                    'email': data.get('emisor_email'),
-                    'tipo_persona': data.get('emisor_tipo_persona') or 'NATURAL',
-                    'tipo_contribuyente': data.get('emisor_tipo') or 'REGIMEN_GENERAL',
-                    'obligado_contabilidad': data.get('emisor_obligado') or False,
-                    'logo_url': data.get('emisor_logo')
-                }
-
-            if not data.get('snapshot_establecimiento'):
-                data['snapshot_establecimiento'] = {
-                    'codigo': data.get('establecimiento_codigo') or '001',
-                    'nombre': data.get('establecimiento_nombre') or 'Establecimiento Principal',
-                    'direccion': data.get('establecimiento_direccion') or data.get('emisor_direccion', '')
-                }
-
-            if not data.get('snapshot_punto_emision'):
-                data['snapshot_punto_emision'] = {
-                    'codigo': data.get('punto_emision_codigo') or '001',
-                    'nombre': data.get('punto_emision_nombre') or 'Caja Principal'
-                }
-
-            return data
+            return completar_snapshots(dict(row)) if row else None
 
     def obtener_id_plantilla_por_programacion(self, programacion_id: UUID) -> Optional[str]:
         """Busca el ID de la factura BORRADOR vinculada a una programación."""
@@ -189,7 +344,8 @@ class RepositorioFacturas:
         usuario_id: Optional[UUID] = None,
         filtros: Optional[FacturaListadoFiltros] = None,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[tuple] = None
     ) -> List[dict]:
         """
         Lista facturas con filtros opcionales.
@@ -199,136 +355,21 @@ class RepositorioFacturas:
             usuario_id: Filtrar por usuario (para solo_propias)
             filtros: Filtros adicionales (estado, fechas, etc.)
             limit: Máximo de resultados
-            offset: Offset para paginación
+            offset: Offset para paginación (se ignora si hay cursor)
+            cursor: (created_at, id) de la última fila de la página anterior.
+                    Paginación keyset: la consulta arranca en el índice
+                    (empresa_id, created_at, id) en lugar de descartar filas.
             
         Returns:
             Lista de facturas
         """
-        query = """
-            SELECT f.*, 
-                   (SELECT fp.forma_pago_sri FROM sistema_facturacion.formas_pago fp WHERE fp.factura_id = f.id ORDER BY fp.created_at ASC LIMIT 1) as forma_pago_sri,
-                   (SELECT fp.plazo FROM sistema_facturacion.formas_pago fp WHERE fp.factura_id = f.id ORDER BY fp.created_at ASC LIMIT 1) as plazo,
-                   (SELECT fp.unidad_tiempo FROM sistema_facturacion.formas_pago fp WHERE fp.factura_id = f.id ORDER BY fp.created_at ASC LIMIT 1) as unidad_tiempo,
-                   COALESCE(cc.saldo_pendiente, f.total) as saldo_pendiente,
-                   c.razon_social as cliente_nombre, 
-                   c.identificacion as cliente_identificacion,
-                   c.tipo_identificacion as cliente_tipo_identificacion,
-                   c.email as cliente_email,
-                   c.direccion as cliente_direccion,
-                   c.telefono as cliente_telefono,
-                   e.razon_social as emisor_nombre,
-                   e.nombre_comercial as emisor_nombre_comercial,
-                   e.ruc as emisor_ruc,
-                   e.direccion as emisor_direccion,
-                   e.email as emisor_email,
-                   e.tipo_contribuyente as emisor_tipo,
-                   e.tipo_persona as emisor_tipo_persona,
-                   e.obligado_contabilidad as emisor_obligado,
-                   e.logo_url as emisor_logo,
-                   es.codigo as establecimiento_codigo,
-                   es.nombre as establecimiento_nombre,
-                   es.direccion as establecimiento_direccion,
-                   pe.codigo as punto_emision_codigo,
-                   pe.nombre as punto_emision_nombre
-            FROM sistema_facturacion.facturas f
-            LEFT JOIN sistema_facturacion.clientes c ON f.cliente_id = c.id
-            LEFT JOIN sistema_facturacion.empresas e ON f.empresa_id = e.id
-            LEFT JOIN sistema_facturacion.cuentas_cobrar cc ON f.id = cc.factura_id
-            LEFT JOIN sistema_facturacion.establecimientos es ON f.establecimiento_id = es.id
-            LEFT JOIN sistema_facturacion.puntos_emision pe ON f.punto_emision_id = pe.id
-            WHERE 1=1
-        """
-        params = []
-        
-        # Filtro por empresa
-        if empresa_id:
-            query += " AND f.empresa_id = %s"
-            params.append(str(empresa_id))
-        
-        # Filtro por usuario (solo_propias)
-        if usuario_id:
-            query += " AND f.usuario_id = %s"
-            params.append(str(usuario_id))
-
-        # Excluir siempre las facturas plantilla de programaciones recurrentes (BORRADORs internos)
-        query += " AND NOT (f.origen = 'FACTURACION_PROGRAMADA' AND f.estado = 'BORRADOR')"
-        
-        # Filtros adicionales
-        if filtros:
-            if filtros.estado:
-                query += " AND estado = %s"
-                params.append(filtros.estado)
-            
-            if filtros.estado_pago:
-                query += " AND estado_pago = %s"
-                params.append(filtros.estado_pago)
-            
-            if filtros.fecha_desde:
-                query += " AND fecha_emision >= %s"
-                params.append(filtros.fecha_desde)
-            
-            if filtros.fecha_hasta:
-                query += " AND fecha_emision <= %s"
-                params.append(filtros.fecha_hasta)
-            
-            if filtros.cliente_id:
-                query += " AND f.cliente_id = %s"
-                params.append(str(filtros.cliente_id))
-            
-            if filtros.establecimiento_id:
-                query += " AND f.establecimiento_id = %s"
-                params.append(str(filtros.establecimiento_id))
-            
-            if filtros.punto_emision_id:
-                query += " AND f.punto_emision_id = %s"
-                params.append(str(filtros.punto_emision_id))
-        
-        query += " ORDER BY f.created_at DESC LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
+        where, params = filtros_listado(empresa_id, usuario_id, filtros, cursor)
+        params.extend([limit, 0 if cursor else offset])
         
         with self.db.cursor() as cur:
-            cur.execute(query, tuple(params))
-            rows = [dict(row) for row in cur.fetchall()]
-            
+            cur.execute(sql_listado_facturas(where), tuple(params))
             # Post-procesamiento para inyectar datos del cliente si falta el snapshot
-            for r in rows:
-                if not r.get('snapshot_cliente'):
-                    r['snapshot_cliente'] = {
-                        'razon_social': r.get('cliente_nombre'),
-                        'identificacion': r.get('cliente_identificacion'),
-                        'numero_identificacion': r.get('cliente_identificacion'), # Alias para frontend
-                        'tipo_identificacion': r.get('cliente_tipo_identificacion') or 'CEDULA',
-                        'email': r.get('cliente_email'),
-                        'direccion': r.get('cliente_direccion'),
-                        'telefono': r.get('cliente_telefono') or ''
-                    }
-                
-                if not r.get('snapshot_empresa'):
-                    r['snapshot_empresa'] = {
-                        'razon_social': r.get('emisor_nombre'),
-                        'nombre_comercial': r.get('emisor_nombre_comercial'),
-                        'ruc': r.get('emisor_ruc'),
-                        'direccion': r.get('emisor_direccion'),
-                        'email': r.get('emisor_email'),
-                        'tipo_persona': r.get('emisor_tipo_persona') or 'NATURAL',
-                        'tipo_contribuyente': r.get('emisor_tipo') or 'REGIMEN_GENERAL',
-                        'obligado_contabilidad': r.get('emisor_obligado') or False,
-                        'logo_url': r.get('emisor_logo')
-                    }
-                    
-                if not r.get('snapshot_establecimiento'):
-                    r['snapshot_establecimiento'] = {
-                        'codigo': r.get('establecimiento_codigo') or '001',
-                        'nombre': r.get('establecimiento_nombre') or 'Establecimiento Principal',
-                        'direccion': r.get('establecimiento_direccion') or r.get('emisor_direccion', '')
-                    }
-
-                if not r.get('snapshot_punto_emision'):
-                    r['snapshot_punto_emision'] = {
-                        'codigo': r.get('punto_emision_codigo') or '001',
-                        'nombre': r.get('punto_emision_nombre') or 'Caja Principal'
-                    }
-            return rows
+            return [completar_snapshots(dict(row)) for row in cur.fetchall()]
 
     def actualizar_factura(self, id: UUID, data: dict, cur=None) -> Optional[dict]:
         """
@@ -360,22 +401,97 @@ class RepositorioFacturas:
             RETURNING *
         """
         
-        if cur:
-            cur.execute(query, tuple(values))
-            row = cur.fetchone()
+        afecta_ventas = any(k in CAMPOS_VENTAS_DIARIAS for k in prepared)
+
+        def _actualizar(cursor) -> Optional[dict]:
+            anterior = None
+            if afecta_ventas:
+                # Fila previa (bloqueada) para calcular el delta de ventas_diarias
+                cursor.execute(
+                    f"SELECT {', '.join(CAMPOS_VENTAS_DIARIAS)} FROM sistema_facturacion.facturas WHERE id = %s FOR UPDATE",
+                    (str(id),)
+                )
+                anterior = cursor.fetchone()
+            cursor.execute(query, tuple(values))
+            row = cursor.fetchone()
+            if row and anterior:
+                self.ventas_diarias.aplicar_cambio(cursor, anterior, row)
+                self.consumo.aplicar_factura(cursor, anterior, row)
+            if row:
+                overview_cache.notificar_empresa(cursor, row['empresa_id'])
+                declaracion_iva_cache.notificar_documento(
+                    cursor, row['empresa_id'], row['fecha_emision'], *([anterior['fecha_emision']] if anterior else [])
+                )
             return dict(row) if row else None
+
+        if cur:
+            return _actualizar(cur)
             
         with db_transaction(self.db) as cur_new:
-            cur_new.execute(query, tuple(values))
-            row = cur_new.fetchone()
-            return dict(row) if row else None
+            return _actualizar(cur_new)
             
+    def actualizar_estados_sri_lote(self, cambios: List[dict], cur) -> List[dict]:
+        """
+        Aplica en un solo UPDATE las respuestas del SRI a facturas EN_PROCESO.
+
+        Cada cambio trae id, clave_acceso, estado y, si fue autorizada,
+        numero_autorizacion/fecha_autorizacion (la fecha de emisión se sincroniza
+        como en la emisión). Las facturas que ya salieron de EN_PROCESO o cambiaron
+        de clave se ignoran. Mantiene ventas_diarias y consumo igual que
+        `actualizar_factura`; debe llamarse con el cursor de la transacción.
+        """
+        if not cambios:
+            return []
+
+        cur.execute(
+            f"""
+            SELECT id, {', '.join(CAMPOS_VENTAS_DIARIAS)} FROM sistema_facturacion.facturas
+            WHERE id = ANY(%s::uuid[]) AND estado = 'EN_PROCESO'
+            ORDER BY id
+            FOR UPDATE
+            """,
+            ([str(c['id']) for c in cambios],)
+        )
+        anteriores = {str(r['id']): r for r in cur.fetchall()}
+        if not anteriores:
+            return []
+
+        valores = [
+            (str(c['id']), c['clave_acceso'], c['estado'], c.get('numero_autorizacion'), c.get('fecha_autorizacion'))
+            for c in cambios if str(c['id']) in anteriores
+        ]
+        query = """
+            UPDATE sistema_facturacion.facturas f
+            SET estado = v.estado,
+                numero_autorizacion = COALESCE(v.numero_autorizacion, f.numero_autorizacion),
+                fecha_autorizacion = COALESCE(v.fecha_autorizacion::timestamptz, f.fecha_autorizacion),
+                fecha_emision = COALESCE(v.fecha_autorizacion::timestamptz, f.fecha_emision),
+                updated_at = NOW()
+            FROM (VALUES %s) AS v(id, clave_acceso, estado, numero_autorizacion, fecha_autorizacion)
+            WHERE f.id = v.id::uuid AND f.clave_acceso = v.clave_acceso AND f.estado = 'EN_PROCESO'
+            RETURNING f.*
+        """
+        filas = [dict(r) for r in execute_values(cur, query, valores, fetch=True)]
+        for fila in filas:
+            anterior = anteriores[str(fila['id'])]
+            self.ventas_diarias.aplicar_cambio(cur, anterior, fila)
+            self.consumo.aplicar_factura(cur, anterior, fila)
+            overview_cache.notificar_empresa(cur, fila['empresa_id'])
+            declaracion_iva_cache.notificar_documento(cur, fila['empresa_id'], fila['fecha_emision'], anterior['fecha_emision'])
+        return filas
+
     def eliminar_factura(self, id: UUID) -> bool:
         """Elimina una factura (solo BORRADOR según validación del service)."""
-        query = "DELETE FROM sistema_facturacion.facturas WHERE id = %s"
+        query = f"DELETE FROM sistema_facturacion.facturas WHERE id = %s RETURNING {', '.join(CAMPOS_VENTAS_DIARIAS)}"
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(id),))
-            return cur.rowcount > 0
+            row = cur.fetchone()
+            if row:
+                self.ventas_diarias.aplicar_cambio(cur, row, None)
+                self.consumo.aplicar_factura(cur, row, None)
+                overview_cache.notificar_empresa(cur, row['empresa_id'])
+                declaracion_iva_cache.notificar_documento(cur, row['empresa_id'], row['fecha_emision'])
+            return row is not None
 
     def contar_facturas(
         self,
@@ -398,6 +514,25 @@ class RepositorioFacturas:
             cur.execute(query, tuple(params))
             return cur.fetchone()[0]
 
+    def contar_listado(
+        self,
+        empresa_id: Optional[UUID] = None,
+        usuario_id: Optional[UUID] = None,
+        filtros: Optional[FacturaListadoFiltros] = None,
+        estimado: bool = False
+    ) -> int:
+        """
+        Total de facturas que cumplen los filtros del listado.
+
+        Con `estimado=True` no recorre la tabla: toma las filas estimadas por
+        el planificador (EXPLAIN), suficiente para paginadores en tenants grandes.
+        """
+        where, params = filtros_listado(empresa_id, usuario_id, filtros)
+
+        with self.db.cursor() as cur:
+            cur.execute(sql_conteo_listado(where, estimado), tuple(params))
+            return leer_conteo_listado(cur.fetchone(), estimado)
+
     # =========================================================
     # DETALLES DE FACTURA
     # =========================================================
@@ -419,6 +554,39 @@ class RepositorioFacturas:
             row = cur.fetchone()
             return dict(row) if row else None
 
+    def crear_detalles_lote(self, detalles: List[dict], cur=None, page_size: int = 500) -> List[dict]:
+        """
+        Inserta varios detalles con INSERT multi-fila (execute_values).
+        created_at se asigna con clock_timestamp() por fila para conservar el
+        orden de las líneas (listar_detalles ordena por created_at).
+        """
+        if not detalles:
+            return []
+
+        # Agrupar por conjunto de columnas (normalmente todas las filas comparten el mismo)
+        grupos = {}
+        for d in detalles:
+            prepared = self._prepare_data(d)
+            grupos.setdefault(tuple(prepared.keys()), []).append(tuple(prepared.values()))
+
+        def _insertar(cursor) -> List[dict]:
+            guardados = []
+            for fields, filas in grupos.items():
+                query = f"""
+                    INSERT INTO sistema_facturacion.facturas_detalle ({', '.join(fields)}, created_at)
+                    VALUES %s
+                    RETURNING *
+                """
+                template = f"({', '.join(['%s'] * len(fields))}, clock_timestamp())"
+                rows = execute_values(cursor, query, filas, template=template, page_size=page_size, fetch=True)
+                guardados.extend(dict(r) for r in rows)
+            return guardados
+
+        if cur:
+            return _insertar(cur)
+        with db_transaction(self.db) as cur_new:
+            return _insertar(cur_new)
+
     def listar_detalles(self, factura_id: UUID) -> List[dict]:
         """Lista los detalles de una factura."""
         query = "SELECT * FROM sistema_facturacion.facturas_detalle WHERE factura_id = %s ORDER BY created_at"
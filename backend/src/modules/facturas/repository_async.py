@@ -0,0 +1,56 @@
+"""
+Lecturas de facturas sobre el pool asíncrono (psycopg 3).
+
+Detalle, listado y conteo con el mismo SQL y post-proceso que
+`RepositorioFacturas`; las escrituras siguen en el repositorio síncrono.
+"""
+
+from typing import List, Optional
+from uuid import UUID
+
+from .repository import (
+    SQL_FACTURA_POR_ID, filtros_listado, sql_listado_facturas,
+    sql_conteo_listado, leer_conteo_listado, completar_snapshots
+)
+from .schemas import FacturaListadoFiltros
+
+
+class RepositorioFacturasAsync:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def obtener_por_id(self, id: UUID) -> Optional[dict]:
+        async with self.conn.cursor() as cur:
+            await cur.execute(SQL_FACTURA_POR_ID, (str(id),))
+            row = await cur.fetchone()
+            return completar_snapshots(dict(row)) if row else None
+
+    async def listar_facturas(
+        self,
+        empresa_id: Optional[UUID] = None,
+        usuario_id: Optional[UUID] = None,
+        filtros: Optional[FacturaListadoFiltros] = None,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[tuple] = None
+    ) -> List[dict]:
+        """Ver `RepositorioFacturas.listar_facturas` (paginación keyset con `cursor`)."""
+        where, params = filtros_listado(empresa_id, usuario_id, filtros, cursor)
+        params.extend([limit, 0 if cursor else offset])
+
+        async with self.conn.cursor() as cur:
+            await cur.execute(sql_listado_facturas(where), tuple(params))
+            return [completar_snapshots(dict(row)) for row in await cur.fetchall()]
+
+    async def contar_listado(
+        self,
+        empresa_id: Optional[UUID] = None,
+        usuario_id: Optional[UUID] = None,
+        filtros: Optional[FacturaListadoFiltros] = None,
+        estimado: bool = False
+    ) -> int:
+        where, params = filtros_listado(empresa_id, usuario_id, filtros)
+
+        async with self.conn.cursor() as cur:
+            await cur.execute(sql_conteo_listado(where, estimado), tuple(params))
+            return leer_conteo_listado(await cur.fetchone(), estimado)
@@ -7,12 +7,14 @@ from psycopg2.extras import Json
 
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ..suscripciones.repository_consumo import RepositorioConsumo
 
 class RepositorioProgramacion:
     """Repositorio para facturación programada (recurrente)."""
     
     def __init__(self, db=Depends(get_db)):
         self.db = db
+        self.consumo = RepositorioConsumo(db=db)
 
     def _prepare_data(self, data: dict) -> dict:
         prepared = {}
@@ -39,6 +41,8 @@ class RepositorioProgramacion:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            if row:
+                self.consumo.aplicar_programacion(cur, None, row)
             return dict(row) if row else None
 
     def obtener_por_id(self, id: UUID) -> Optional[dict]:
@@ -92,15 +96,28 @@ class RepositorioProgramacion:
             RETURNING *
         """
         with db_transaction(self.db) as cur:
+            anterior = None
+            if 'activo' in prepared:
+                # Estado previo (bloqueado) para ajustar el consumo del plan
+                cur.execute(
+                    "SELECT empresa_id, activo, created_at FROM sistema_facturacion.facturacion_programada WHERE id = %s FOR UPDATE",
+                    (str(id),)
+                )
+                anterior = cur.fetchone()
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            if row and anterior:
+                self.consumo.aplicar_programacion(cur, anterior, row)
             return dict(row) if row else None
 
     def eliminar(self, id: UUID) -> bool:
-        query = "DELETE FROM sistema_facturacion.facturacion_programada WHERE id = %s"
+        query = "DELETE FROM sistema_facturacion.facturacion_programada WHERE id = %s RETURNING empresa_id, activo, created_at"
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(id),))
-            return cur.rowcount > 0
+            row = cur.fetchone()
+            if row:
+                self.consumo.aplicar_programacion(cur, row, None)
+            return row is not None
 
     def obtener_pendientes_emision(self) -> List[dict]:
         """Obtiene programaciones que deben ejecutarse hoy o en el pasado, con info de cliente."""
@@ -134,3 +151,92 @@ class RepositorioProgramacion:
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(id), limit, offset))
             return [dict(row) for row in cur.fetchall()]
+
+    # --- Corridas de facturación recurrente (checkpoints) ---
+
+    def intentar_bloqueo_corrida(self) -> bool:
+        """
+        Lock de sesión no bloqueante: una sola corrida a la vez entre workers
+        (cron del ciclo diario y POST /ejecutar-masivo). Usar una conexión dedicada.
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute("SELECT pg_try_advisory_lock(hashtext('facturacion_recurrente:corrida')) AS ok")
+            return bool(cur.fetchone()['ok'])
+
+    def liberar_bloqueo_corrida(self):
+        with db_transaction(self.db) as cur:
+            cur.execute("SELECT pg_advisory_unlock(hashtext('facturacion_recurrente:corrida'))")
+
+    def iniciar_o_retomar_ejecucion(self, concurrencia: int, total: int, worker: str) -> dict:
+        """
+        Retorna la corrida EN_CURSO de hoy cuyo dueño ya no existe (su sesión de
+        Postgres terminó: el proceso se cayó) o crea una nueva. La corrida queda a
+        nombre de la sesión actual, que debe ser la que tiene el lock de corrida.
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute("""
+                SELECT * FROM sistema_facturacion.ejecuciones_facturacion_recurrente e
+                WHERE fecha_programada = CURRENT_DATE AND estado = 'EN_CURSO'
+                AND (pid_sesion IS NULL OR NOT EXISTS (
+                    SELECT 1 FROM pg_stat_activity a WHERE a.pid = e.pid_sesion
+                ))
+                ORDER BY iniciado_at DESC
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            """)
+            row = cur.fetchone()
+            if row:
+                cur.execute("""
+                    UPDATE sistema_facturacion.ejecuciones_facturacion_recurrente
+                    SET concurrencia = %s, total_programaciones = GREATEST(total_programaciones, %s),
+                        worker = %s, pid_sesion = pg_backend_pid()
+                    WHERE id = %s
+                    RETURNING *
+                """, (concurrencia, total, worker, str(row['id'])))
+                return {**dict(cur.fetchone()), "retomada": True}
+
+            cur.execute("""
+                INSERT INTO sistema_facturacion.ejecuciones_facturacion_recurrente
+                (concurrencia, total_programaciones, worker, pid_sesion)
+                VALUES (%s, %s, %s, pg_backend_pid())
+                RETURNING *
+            """, (concurrencia, total, worker))
+            return {**dict(cur.fetchone()), "retomada": False}
+
+    def listar_items_procesados(self, ejecucion_id: UUID) -> set:
+        """Programaciones ya emitidas en la corrida; las fallidas se reintentan al retomar."""
+        query = """
+            SELECT facturacion_programada_id FROM sistema_facturacion.ejecuciones_facturacion_recurrente_items
+            WHERE ejecucion_id = %s AND exitosa = TRUE
+        """
+        with self.db.cursor() as cur:
+            cur.execute(query, (str(ejecucion_id),))
+            return {str(row['facturacion_programada_id']) for row in cur.fetchall()}
+
+    def registrar_item_ejecucion(self, ejecucion_id: UUID, prog: dict, exitosa: bool,
+                                 duracion_ms: int, tiempos: dict, error: Optional[str] = None):
+        query = """
+            INSERT INTO sistema_facturacion.ejecuciones_facturacion_recurrente_items
+            (ejecucion_id, facturacion_programada_id, empresa_id, exitosa, duracion_ms, tiempos_etapas, error)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (ejecucion_id, facturacion_programada_id) DO UPDATE
+            SET exitosa = EXCLUDED.exitosa,
+                duracion_ms = EXCLUDED.duracion_ms,
+                tiempos_etapas = EXCLUDED.tiempos_etapas,
+                error = EXCLUDED.error,
+                procesado_at = NOW()
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (
+                str(ejecucion_id), str(prog['id']), str(prog['empresa_id']),
+                exitosa, duracion_ms, Json(tiempos), error
+            ))
+
+    def finalizar_ejecucion(self, ejecucion_id: UUID, estado: str, resumen: dict):
+        query = """
+            UPDATE sistema_facturacion.ejecuciones_facturacion_recurrente
+            SET estado = %s, resumen = %s, finalizado_at = NOW()
+            WHERE id = %s
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (estado, Json(resumen), str(ejecucion_id)))
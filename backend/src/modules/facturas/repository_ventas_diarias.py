@@ -0,0 +1,84 @@
+from decimal import Decimal
+from fastapi import Depends
+from typing import Optional
+from uuid import UUID
+
+from ...database.session import get_db
+from ...database.transaction import db_transaction
+
+# Columnas de facturas que alimentan el agregado: si un UPDATE no toca
+# ninguna, ventas_diarias no cambia
+CAMPOS_VENTAS_DIARIAS = ('empresa_id', 'usuario_id', 'fecha_emision', 'estado', 'total_sin_impuestos', 'iva', 'total')
+DIMENSIONES = ('empresa_id', 'usuario_id', 'fecha_emision', 'estado')
+
+
+class RepositorioVentasDiarias:
+    """
+    Agregado diario de facturas (empresa × día × estado × usuario).
+
+    Se actualiza por deltas con el cursor de la transacción que modifica la
+    factura: restar la fila anterior y sumar la nueva.
+    """
+
+    def __init__(self, db=Depends(get_db)):
+        self.db = db
+
+    def _upsert(self, cur, factura: dict, signo: int, base: Optional[dict] = None):
+        """Suma (signo=1) o resta (signo=-1) la factura; `base` se descuenta del mismo bucket."""
+        base = base or {}
+
+        def delta(campo):
+            return signo * (Decimal(str(factura.get(campo) or 0)) - Decimal(str(base.get(campo) or 0)))
+
+        num = 0 if base else signo
+        cur.execute("""
+            INSERT INTO sistema_facturacion.ventas_diarias AS v
+                (empresa_id, fecha, estado, usuario_id, num_facturas, subtotal, iva, total)
+            VALUES (%s, (%s::timestamptz)::date, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (empresa_id, fecha, estado, usuario_id) DO UPDATE SET
+                num_facturas = v.num_facturas + EXCLUDED.num_facturas,
+                subtotal = v.subtotal + EXCLUDED.subtotal,
+                iva = v.iva + EXCLUDED.iva,
+                total = v.total + EXCLUDED.total,
+                updated_at = NOW()
+        """, (
+            str(factura['empresa_id']), factura['fecha_emision'], factura['estado'], str(factura['usuario_id']),
+            num, delta('total_sin_impuestos'), delta('iva'), delta('total')
+        ))
+
+    def aplicar_cambio(self, cur, anterior: Optional[dict], nueva: Optional[dict]):
+        """
+        Refleja en el agregado el paso de `anterior` a `nueva` (None = no existe).
+        Debe ejecutarse con el cursor de la transacción que escribe la factura.
+        """
+        if anterior and nueva and all(anterior.get(c) == nueva.get(c) for c in DIMENSIONES):
+            # Mismo bucket: solo cambian importes
+            if any(anterior.get(c) != nueva.get(c) for c in CAMPOS_VENTAS_DIARIAS):
+                self._upsert(cur, nueva, 1, base=anterior)
+            return
+        if anterior:
+            self._upsert(cur, anterior, -1)
+        if nueva:
+            self._upsert(cur, nueva, 1)
+
+    def reconstruir(self, empresa_id: Optional[UUID] = None) -> int:
+        """
+        Recalcula el agregado desde `facturas` (todas las empresas o una).
+        Bloquea escrituras de facturas mientras dura para no perder deltas.
+        """
+        filtro = "WHERE empresa_id = %s" if empresa_id else ""
+        params = (str(empresa_id),) if empresa_id else ()
+
+        with db_transaction(self.db) as cur:
+            cur.execute("LOCK TABLE sistema_facturacion.facturas IN SHARE MODE")
+            cur.execute(f"DELETE FROM sistema_facturacion.ventas_diarias {filtro}", params)
+            cur.execute(f"""
+                INSERT INTO sistema_facturacion.ventas_diarias
+                    (empresa_id, fecha, estado, usuario_id, num_facturas, subtotal, iva, total)
+                SELECT empresa_id, fecha_emision::date, estado, usuario_id,
+                       COUNT(*), SUM(total_sin_impuestos), SUM(iva), SUM(total)
+                FROM sistema_facturacion.facturas
+                {filtro}
+                GROUP BY empresa_id, fecha_emision::date, estado, usuario_id
+            """, params)
+            return cur.rowcount
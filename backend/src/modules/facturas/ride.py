@@ -0,0 +1,38 @@
+"""
+Generación anticipada del RIDE al autorizar una factura.
+
+Cuando el SRI autoriza, el PDF se genera en segundo plano y queda en el cache
+de RIDEs (utils/ride_cache.py); la primera descarga ya no paga el render.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .repository import RepositorioFacturas
+from ...database.session import conexion_pool
+from ...utils.pdf_generator import crear_ride_factura
+from ...utils.ride_cache import ride_cache
+
+logger = logging.getLogger("facturacion_api")
+
+# Un solo hilo: la generación no compite con las descargas por el pool de PDF
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ride-cache")
+
+
+def precalentar_ride(factura_id):
+    """Programa la generación del RIDE de una factura recién autorizada."""
+    if ride_cache.habilitado:
+        _executor.submit(_generar_ride, factura_id)
+
+
+def _generar_ride(factura_id):
+    try:
+        with conexion_pool() as conn:
+            repo = RepositorioFacturas(db=conn)
+            factura = repo.obtener_por_id(factura_id)
+            if not factura or ride_cache.obtener(factura) is not None:
+                return
+            factura['detalles'] = repo.listar_detalles(factura_id)
+        crear_ride_factura(factura)
+    except Exception as e:
+        logger.warning(f"RIDE cache: no se pudo precalentar la factura {factura_id}: {str(e)}")
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, Query, status
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Response, status
+from typing import List, Literal, Optional
 from uuid import UUID
 from datetime import date
 
@@ -12,12 +12,24 @@ from ..schemas import (
     FacturaListadoFiltros
 )
 from ..services.service_factura import ServicioFactura
+from ..services.service_factura_async import ServicioFacturaAsync
 from ...autenticacion.routes import requerir_permiso
 from ....constants.permissions import PermissionCodes
 from ....utils.response import success_response
+from ....utils.paginacion import HEADER_SIGUIENTE_CURSOR, HEADER_TOTAL, HEADER_TOTAL_ESTIMADO
 
 router = APIRouter()
 
+
+def _responder_pagina(response: Response, pagina: dict) -> list:
+    """Expone cursor y total en headers para no cambiar el body (lista de facturas)."""
+    if pagina["siguiente_cursor"]:
+        response.headers[HEADER_SIGUIENTE_CURSOR] = pagina["siguiente_cursor"]
+    if pagina["total"] is not None:
+        response.headers[HEADER_TOTAL] = str(pagina["total"])
+        response.headers[HEADER_TOTAL_ESTIMADO] = "true" if pagina["total_estimado"] else "false"
+    return pagina["facturas"]
+
 @router.post("/", response_model=FacturaLectura, status_code=status.HTTP_201_CREATED)
 def crear_factura(
     datos: FacturaCreacion,
@@ -46,9 +58,12 @@ def crear_factura(
     return result
 
 @router.get("/", response_model=List[FacturaLectura])
-def listar_facturas(
+async def listar_facturas(
+    response: Response,
     limit: int = Query(100, ge=1, le=500, description="Máximo de resultados"),
     offset: int = Query(0, ge=0, description="Offset para paginación"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (header X-Next-Cursor); reemplaza a offset"),
+    conteo: Optional[Literal['exacto', 'estimado']] = Query(None, description="Incluir total en X-Total-Count"),
     empresa_id: Optional[UUID] = Query(None, description="Filtrar por empresa (solo SUPERADMIN)"),
     estado: Optional[str] = Query(None, description="Filtrar por estado: BORRADOR|AUTORIZADA|ANULADA"),
     estado_pago: Optional[str] = Query(None, description="Filtrar por estado pago: PENDIENTE|PAGADO|PARCIAL|VENCIDO"),
@@ -57,7 +72,7 @@ def listar_facturas(
     cliente_id: Optional[UUID] = Query(None, description="Filtrar por cliente"),
     establecimiento_id: Optional[UUID] = Query(None, description="Filtrar por establecimiento"),
     usuario: dict = Depends(requerir_permiso([PermissionCodes.FACTURAS_VER_TODAS, PermissionCodes.FACTURAS_VER_PROPIAS])),
-    servicio: ServicioFactura = Depends()
+    servicio: ServicioFacturaAsync = Depends()
 ):
     """
     Lista todas las facturas de la empresa.
@@ -65,6 +80,9 @@ def listar_facturas(
     **Requiere permiso:** FACTURAS_VER_TODAS
     
     SUPERADMIN puede filtrar por empresa_id.
+
+    Paginación: enviar en `cursor` el valor del header `X-Next-Cursor` de la
+    respuesta anterior (costo constante en páginas profundas).
     """
     filtros = FacturaListadoFiltros(
         estado=estado,
@@ -75,25 +93,31 @@ def listar_facturas(
         establecimiento_id=establecimiento_id
     ) if any([estado, estado_pago, fecha_desde, fecha_hasta, cliente_id, establecimiento_id]) else None
     
-    return servicio.listar_facturas(
+    pagina = await servicio.listar_facturas_paginado(
         usuario_actual=usuario,
         empresa_id=empresa_id,
         filtros=filtros,
         solo_propias=False,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        conteo=conteo
     )
+    return _responder_pagina(response, pagina)
 
 @router.get("/mis-facturas", response_model=List[FacturaLectura])
-def listar_mis_facturas(
+async def listar_mis_facturas(
+    response: Response,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    conteo: Optional[Literal['exacto', 'estimado']] = Query(None),
     estado: Optional[str] = Query(None),
     estado_pago: Optional[str] = Query(None),
     fecha_desde: Optional[date] = Query(None),
     fecha_hasta: Optional[date] = Query(None),
     usuario: dict = Depends(requerir_permiso(PermissionCodes.FACTURAS_VER_PROPIAS)),
-    servicio: ServicioFactura = Depends()
+    servicio: ServicioFacturaAsync = Depends()
 ):
     """
     Lista solo las facturas creadas por el usuario actual.
@@ -108,26 +132,29 @@ def listar_mis_facturas(
         solo_propias=True
     ) if any([estado, estado_pago, fecha_desde, fecha_hasta]) else None
     
-    return servicio.listar_facturas(
+    pagina = await servicio.listar_facturas_paginado(
         usuario_actual=usuario,
         filtros=filtros,
         solo_propias=True,
         limit=limit,
-        offset=offset
+        offset=offset,
+        cursor=cursor,
+        conteo=conteo
     )
+    return _responder_pagina(response, pagina)
 
 @router.get("/{id}", response_model=FacturaLectura)
-def obtener_factura(
+async def obtener_factura(
     id: UUID,
     usuario: dict = Depends(requerir_permiso([PermissionCodes.FACTURAS_VER_TODAS, PermissionCodes.FACTURAS_VER_PROPIAS, PermissionCodes.FACTURA_PROGRAMADA_VER, PermissionCodes.FACTURA_PROGRAMADA_VER_PROPIAS])),
-    servicio: ServicioFactura = Depends()
+    servicio: ServicioFacturaAsync = Depends()
 ):
     """
     Obtiene una factura por ID con todos sus snapshots.
     
     **Requiere permiso:** FACTURAS_VER_TODAS o FACTURAS_VER_PROPIAS
     """
-    return servicio.obtener_factura(id, usuario)
+    return await servicio.obtener_factura(id, usuario)
 
 @router.put("/{id}", response_model=FacturaLectura)
 def actualizar_factura(
@@ -10,6 +10,7 @@ from ..schemas_programacion import (
     FacturacionProgramadaUnificada
 )
 from ..services.service_recurrentes import ServicioRecurrentes
+from ..services.recurring_runner import EjecutorFacturacionRecurrente
 from ...autenticacion.routes import requerir_permiso
 from ....constants.permissions import PermissionCodes
 from ....utils.response import success_response, error_response
@@ -80,14 +81,16 @@ def eliminar_programacion(
 
 @router.post("/ejecutar-masivo")
 def ejecutar_emisiones_masivas(
-    usuario: dict = Depends(requerir_permiso(PermissionCodes.FACTURA_PROGRAMADA_EDITAR)),
-    servicio: ServicioRecurrentes = Depends()
+    usuario: dict = Depends(requerir_permiso(PermissionCodes.FACTURA_PROGRAMADA_EDITAR))
 ):
     """
     Dispara el proceso de generación de facturas pendientes.
     Útil para ser llamado por un Cron Job o trigger externo.
     """
-    resultado = servicio.recurrentes.procesar_emisiones_automaticas()
+    resultado = EjecutorFacturacionRecurrente().ejecutar()
+    if resultado.get("omitida"):
+        from ....errors.app_error import AppError
+        raise AppError("Ya hay una corrida de facturación recurrente en curso", 409, "RECURRENTE_EN_CURSO")
     return success_response(resultado, "Proceso de emisiones automáticas completado")
 
 @router.post("/{id}/ejecutar")
@@ -6,7 +6,6 @@ from ..services.service_autorizacion import ServicioAutorizacion
 from ..services.service_factura import ServicioFactura
 from ...autenticacion.routes import requerir_permiso
 from ....constants.permissions import PermissionCodes
-from ....utils import pdf_generator
 
 # Incluir sub-routers
 router = APIRouter()
@@ -63,17 +62,14 @@ def descargar_pdf(
     
     **Requiere permiso:** FACTURAS_DESCARGAR_PDF
     """
-    # 1. Obtener datos completos (Factura + Detalles)
-    factura = servicio.obtener_detalle_completo(id, usuario)
-    
-    # 2. Generar el binario del PDF usando el utilitario
-    pdf_buffer = pdf_generator.crear_ride_factura(factura)
+    # 1. Factura + PDF (desde el cache de RIDEs si ya está autorizada y generado)
+    factura, pdf_bytes = servicio.generar_ride(id, usuario)
     
     # 3. Retornar el archivo binario
     filename = f"Factura-{factura.get('numero_factura') or str(id)[:8]}.pdf"
     
     return Response(
-        content=pdf_buffer.getvalue(),
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
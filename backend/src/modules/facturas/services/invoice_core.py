@@ -5,10 +5,11 @@ Maneja el CRUD básico y la integridad de los snapshots.
 
 from uuid import UUID
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Optional, List, Callable
 from fastapi import Depends
 
 from ..repository import RepositorioFacturas
+from ....database.transaction import db_transaction
 from ..schemas import FacturaCreacion, FacturaActualizacion, FacturaListadoFiltros
 from ...clientes.services import ServicioClientes
 from ...establecimientos.service import ServicioEstablecimientos
@@ -18,6 +19,9 @@ from ...empresas.services import ServicioEmpresas
 from src.constants.enums import AuthKeys
 from src.errors.app_error import AppError
 
+# Código de IVA SRI -> tarifa % (Sincronizado con constants.py)
+MAPEO_TARIFAS_IVA = {'0': 0.0, '2': 12.0, '3': 14.0, '4': 15.0, '5': 5.0, '6': 0.0, '7': 0.0, '8': 8.0, '10': 13.0}
+
 class ServicioFacturaCore:
     def __init__(
         self, 
@@ -35,8 +39,20 @@ class ServicioFacturaCore:
         self.punto_emision_repo = punto_emision_repo
         self.empresa_service = empresa_service
 
-    def crear_borrador(self, datos: FacturaCreacion, usuario_actual: dict, snapshots_logic: dict):
-        """Lógica para crear la factura en base de datos con sus snapshots."""
+    def crear_borrador(
+        self,
+        datos: FacturaCreacion,
+        usuario_actual: dict,
+        snapshots_logic: dict,
+        al_crear: Optional[Callable] = None
+    ):
+        """
+        Lógica para crear la factura en base de datos con sus snapshots.
+
+        `al_crear(cur, factura, pago_data)` se ejecuta dentro de la misma
+        transacción (p. ej. forma de pago y cuenta por cobrar). Sin callback,
+        el pago inicial se retorna en `_pago_inicial` para que lo guarde el llamador.
+        """
         # Se asume que las validaciones de negocio ya se hicieron en el orquestador
         payload = datos.model_dump()
         
@@ -83,7 +99,9 @@ class ServicioFacturaCore:
 
         # ===================================================================
         # BLINDAJE: RECALCULAR CABECERA DESDE DETALLES ANTES DEL INSERT
-        # Esto previene errores de CHECK CONSTRAINT por inconsistencia del frontend
+        # Esto previene errores de CHECK CONSTRAINT por inconsistencia del frontend.
+        # En la misma pasada se arman las filas de detalle: los totales quedan
+        # calculados en memoria y no hace falta recalcular_totales() tras insertar.
         # ===================================================================
         s_sin_iva = 0
         s_con_iva = 0
@@ -91,18 +109,21 @@ class ServicioFacturaCore:
         s_exento = 0
         t_iva = 0
         t_descuento = 0
+        filas_detalle = []
 
         for d in detalles_datos:
-            d_dict = d if isinstance(d, dict) else d.model_dump()
-            cant = float(d_dict.get('cantidad', 0))
-            prec = float(d_dict.get('precio_unitario', 0))
-            desc = float(d_dict.get('descuento', 0))
+            det_payload = d if isinstance(d, dict) else d.model_dump()
+            # Quitar IDs si vienen del frontend para evitar conflictos de insert
+            det_payload.pop('id', None)
+
+            cant = float(det_payload.get('cantidad', 0))
+            prec = float(det_payload.get('precio_unitario', 0))
+            desc = float(det_payload.get('descuento', 0))
             sub_neto = round((cant * prec) - desc, 2)
             
-            t_iva_item = str(d_dict.get('tipo_iva', '0')).strip()
+            t_iva_item = str(det_payload.get('tipo_iva', '0')).strip()
             # Mapeo de porcentajes (Sincronizado con constants.py)
-            mapping = {'0': 0.0, '2': 12.0, '3': 14.0, '4': 15.0, '5': 5.0, '6': 0.0, '7': 0.0, '8': 8.0, '10': 13.0}
-            rate = mapping.get(t_iva_item, 0.0)
+            rate = MAPEO_TARIFAS_IVA.get(t_iva_item, 0.0)
             val_iva = round(sub_neto * (rate / 100.0), 2)
 
             if t_iva_item in ['2', '3', '4', '5', '8', '10']: s_con_iva += sub_neto
@@ -114,6 +135,13 @@ class ServicioFacturaCore:
             t_iva += val_iva
             t_descuento += desc
 
+            det_payload['subtotal'] = sub_neto
+            det_payload['base_imponible'] = sub_neto
+            det_payload['tarifa_iva'] = rate
+            det_payload['codigo_impuesto'] = '2' # 2=IVA 
+            det_payload['valor_iva'] = val_iva
+            filas_detalle.append(det_payload)
+
         prop = float(payload.get('propina', 0))
         ret_iva = float(payload.get('retencion_iva', 0))
         ret_renta = float(payload.get('retencion_renta', 0))
@@ -135,50 +163,26 @@ class ServicioFacturaCore:
             "estado_pago": datos.estado_pago or 'PENDIENTE',
             **snapshots_logic
         })
+        pago_data['valor'] = total_calc
         
-        # 3. Crear cabecera de la factura
-        nueva = self.repo.crear_factura(payload)
-        if not nueva:
-            raise AppError("Error al crear la factura", 500, "DB_ERROR")
-            
-        # 4. Guardar los detalles (productos) uno a uno
-        factura_id = nueva['id']
-        detalles_guardados = []
-        for d in detalles_datos:
-            det_payload = d if isinstance(d, dict) else d.model_dump()
-            det_payload['factura_id'] = str(factura_id)
-            
-            # Quitar IDs si vienen del frontend para evitar conflictos de insert
-            det_payload.pop('id', None)
+        # 3. Cabecera + detalles (INSERT multi-fila) + pasos del orquestador en UNA transacción
+        with db_transaction(self.repo.db) as cur:
+            nueva = self.repo.crear_factura(payload, cur=cur)
+            if not nueva:
+                raise AppError("Error al crear la factura", 500, "DB_ERROR")
 
-            # Asegurar cálculos básicos
-            cantidad = float(det_payload.get('cantidad', 1))
-            precio = float(det_payload.get('precio_unitario', 0))
-            descuento = float(det_payload.get('descuento', 0))
-            subtotal_linea = round((cantidad * precio) - descuento, 2)
-            
-            det_payload['subtotal'] = subtotal_linea
-            det_payload['base_imponible'] = subtotal_linea
-            
-            # Mapeo exacto SRI: Código -> Tarifa
-            t_iva = str(det_payload.get('tipo_iva', '0'))
-            mapping = {'0': 0.0, '2': 12.0, '3': 14.0, '4': 15.0, '5': 5.0, '6': 0.0, '7': 0.0, '8': 8.0, '10': 13.0}
-            rate_percent = mapping.get(t_iva, 0.0)
-            
-            det_payload['tarifa_iva'] = rate_percent
-            det_payload['codigo_impuesto'] = '2' # 2=IVA 
-            det_payload['valor_iva'] = round(subtotal_linea * (rate_percent / 100.0), 2)
-            
-            det_guardado = self.repo.crear_detalle(det_payload)
-            if det_guardado:
-                detalles_guardados.append(det_guardado)
+            factura_id = nueva['id']
+            for det in filas_detalle:
+                det['factura_id'] = str(factura_id)
+            detalles_guardados = self.repo.crear_detalles_lote(filas_detalle, cur=cur)
 
-        # 5. RECALCULO CRÍTICO: Sincronizar cabecera con productos reales
-        self.recalcular_totales(factura_id)
-        
-        # Obtener la factura actualizada con los totales reales
+            if al_crear:
+                al_crear(cur, nueva, pago_data)
+
+        # Una sola lectura final (con los JOINs que espera el frontend)
         factura_final = self.obtener_factura(factura_id)
-        factura_final['_pago_inicial'] = pago_data
+        if not al_crear:
+            factura_final['_pago_inicial'] = pago_data
         factura_final['detalles'] = detalles_guardados
         return factura_final
 
@@ -0,0 +1,267 @@
+"""
+Ejecución paralela de la facturación recurrente.
+
+Reparte las programaciones pendientes en un pool de hilos con un límite global
+de concurrencia y un tope por empresa (turnos round-robin entre empresas para
+que un tenant con miles de programaciones no acapare el pool). Cada programación
+se procesa con su propia conexión del pool y deja un checkpoint en
+`ejecuciones_facturacion_recurrente_items`; si el proceso se cae, la siguiente
+corrida del día retoma la misma ejecución, omite lo ya emitido y reintenta lo
+que falló.
+
+Solo una corrida avanza a la vez: el ejecutor toma un advisory lock de sesión
+en una conexión dedicada (se libera aunque el proceso muera) y la corrida queda
+a nombre de esa sesión, de modo que solo se retoman corridas de dueños caídos.
+"""
+
+import os
+import time
+import socket
+import logging
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional
+
+from ..repository_programacion import RepositorioProgramacion
+from .recurring_service import ServicioRecurringBilling
+from ....config.env import env
+from ....database.session import conexion_pool, crear_conexion_directa
+
+logger = logging.getLogger("facturacion_api")
+
+
+def construir_servicio_recurrente(conn) -> ServicioRecurringBilling:
+    """Arma ServicioRecurringBilling (y su grafo de servicios) sobre una conexión."""
+    from ..repository import RepositorioFacturas
+    from .invoice_core import ServicioFacturaCore
+    from .service_factura import ServicioFactura
+    from .service_autorizacion import ServicioAutorizacion
+    from .sri_service import ServicioSRIFacturas
+    from ...empresas.repositories import RepositorioEmpresas
+    from ...empresas.services import ServicioEmpresas
+    from ...clientes.repository import RepositorioClientes
+    from ...clientes.services import ServicioClientes
+    from ...usuarios.repositories import RepositorioUsuarios
+    from ...puntos_emision.repository import RepositorioPuntosEmision
+    from ...puntos_emision.service import ServicioPuntosEmision
+    from ...establecimientos.repository import RepositorioEstablecimientos
+    from ...establecimientos.service import ServicioEstablecimientos
+    from ...formas_pago.repository import RepositorioFormasPago
+    from ...cuentas_cobrar.repository import RepositorioCuentasCobrar
+    from ...pagos_factura.repository import RepositorioPagosFactura
+    from ...sri.repository import RepositorioSRI
+    from ...sri.client import ClienteSRI
+    from ...sri.xml_service import ServicioSRIXML
+    from ...sri.service import ServicioSRI
+    from ...logs.repository import RepositorioLogs
+    from ...logs.service import ServicioLogs
+
+    # Repositorios base
+    repo_prog = RepositorioProgramacion(db=conn)
+    repo_emp = RepositorioEmpresas(db=conn)
+    repo_cli = RepositorioClientes(db=conn)
+    repo_user = RepositorioUsuarios(db=conn)
+    repo_fact = RepositorioFacturas(db=conn)
+    repo_forma = RepositorioFormasPago(db=conn)
+    repo_cc = RepositorioCuentasCobrar(db=conn)
+    repo_pago = RepositorioPagosFactura(db=conn)
+    repo_pe = RepositorioPuntosEmision(db=conn)
+    repo_est = RepositorioEstablecimientos(db=conn)
+    repo_sri = RepositorioSRI(db=conn)
+    repo_logs = RepositorioLogs(db=conn)
+
+    # Servicios intermedios
+    s_est = ServicioEstablecimientos(repo=repo_est)
+    s_cli = ServicioClientes(repo=repo_cli)
+    s_emp = ServicioEmpresas(repo=repo_emp)
+    s_pe = ServicioPuntosEmision(repo=repo_pe, establecimiento_service=s_est)
+    s_logs = ServicioLogs(repo=repo_logs)
+
+    # Core de facturas
+    core_factura = ServicioFacturaCore(
+        repo=repo_fact,
+        cliente_service=s_cli,
+        establecimiento_service=s_est,
+        punto_emision_service=s_pe,
+        punto_emision_repo=repo_pe,
+        empresa_service=s_emp
+    )
+
+    service_factura = ServicioFactura(
+        core=core_factura,
+        usuario_repo=repo_user,
+        formas_pago_repo=repo_forma,
+        cuentas_cobrar_repo=repo_cc,
+        pagos_repo=repo_pago
+    )
+
+    # SRI
+    sri_core = ServicioSRI(
+        repo=repo_sri,
+        factura_repo=repo_fact,
+        empresa_repo=repo_emp,
+        cliente_repo=repo_cli,
+        log_repo=repo_logs,
+        formas_pago_repo=repo_forma,
+        client_sri=ClienteSRI(),
+        xml_service=ServicioSRIXML(),
+        logs_service=s_logs
+    )
+    sri_facturas = ServicioSRIFacturas(repo=repo_fact, sri_core=sri_core)
+
+    service_autorizacion = ServicioAutorizacion(
+        core=core_factura,
+        sri_facturacion=sri_facturas,
+        usuario_repo=repo_user,
+        cuentas_cobrar_repo=repo_cc
+    )
+
+    return ServicioRecurringBilling(
+        repo_prog=repo_prog,
+        service_factura=service_factura,
+        service_autorizacion=service_autorizacion,
+        repo_pe=repo_pe,
+        repo_usuarios=repo_user
+    )
+
+
+class EjecutorFacturacionRecurrente:
+    def __init__(self, concurrencia: Optional[int] = None, max_por_empresa: Optional[int] = None):
+        self.concurrencia = max(1, concurrencia or env.RECURRENTE_CONCURRENCIA)
+        self.max_por_empresa = max(1, max_por_empresa or env.RECURRENTE_MAX_POR_EMPRESA)
+
+    def ejecutar(self) -> dict:
+        """
+        Procesa todas las programaciones pendientes y retorna el resumen de la corrida.
+        Si otra corrida está en curso en cualquier worker retorna `omitida` sin procesar.
+        """
+        inicio = time.perf_counter()
+        # Conexión dedicada: el lock de sesión se libera aunque el proceso muera
+        conn = crear_conexion_directa()
+        try:
+            repo = RepositorioProgramacion(db=conn)
+            if not repo.intentar_bloqueo_corrida():
+                logger.info("FACTURACION_RECURRENTE: otra corrida en curso, se omite.")
+                return {"procesadas": 0, "exitosas": 0, "fallidas": 0, "omitida": True}
+            try:
+                return self._ejecutar_corrida(repo, inicio)
+            finally:
+                repo.liberar_bloqueo_corrida()
+        finally:
+            conn.close()
+
+    def _ejecutar_corrida(self, repo: RepositorioProgramacion, inicio: float) -> dict:
+        pendientes = repo.obtener_pendientes_emision()
+        if not pendientes:
+            return {"procesadas": 0, "exitosas": 0, "fallidas": 0}
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        ejecucion = repo.iniciar_o_retomar_ejecucion(self.concurrencia, len(pendientes), worker)
+        ya_procesadas = repo.listar_items_procesados(ejecucion['id'])
+
+        por_procesar = [p for p in pendientes if str(p['id']) not in ya_procesadas]
+        logger.info(
+            f"FACTURACION_RECURRENTE: ejecución {ejecucion['id']} "
+            f"({'retomada' if ejecucion['retomada'] else 'nueva'}) con {len(por_procesar)} programaciones "
+            f"(omitidas por checkpoint: {len(pendientes) - len(por_procesar)}), concurrencia={self.concurrencia}"
+        )
+
+        resultados = self._procesar_en_paralelo(ejecucion['id'], por_procesar)
+        resumen = self._resumir(ejecucion, resultados, len(pendientes) - len(por_procesar), inicio)
+        repo.finalizar_ejecucion(ejecucion['id'], 'COMPLETADA', resumen)
+        return resumen
+
+    def _procesar_en_paralelo(self, ejecucion_id, programaciones: list) -> list:
+        # Colas por empresa, atendidas por turnos
+        colas: "OrderedDict[str, deque]" = OrderedDict()
+        for prog in programaciones:
+            colas.setdefault(str(prog['empresa_id']), deque()).append(prog)
+        turno = deque(colas.keys())
+        activas = Counter()
+        resultados = []
+
+        with ThreadPoolExecutor(max_workers=self.concurrencia, thread_name_prefix="recurrente") as executor:
+            en_curso = {}
+            while turno or en_curso:
+                while len(en_curso) < self.concurrencia:
+                    prog = self._siguiente(turno, colas, activas)
+                    if prog is None:
+                        break
+                    activas[str(prog['empresa_id'])] += 1
+                    en_curso[executor.submit(self._procesar_item, ejecucion_id, prog)] = prog
+
+                hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in hechos:
+                    prog = en_curso.pop(futuro)
+                    activas[str(prog['empresa_id'])] -= 1
+                    resultados.append(futuro.result())
+        return resultados
+
+    def _siguiente(self, turno: deque, colas: dict, activas: Counter) -> Optional[dict]:
+        """Siguiente programación de la primera empresa en turno que no haya llegado a su tope."""
+        for _ in range(len(turno)):
+            empresa_id = turno.popleft()
+            if activas[empresa_id] >= self.max_por_empresa:
+                turno.append(empresa_id)
+                continue
+            prog = colas[empresa_id].popleft()
+            if colas[empresa_id]:
+                turno.append(empresa_id)
+            return prog
+        return None
+
+    def _procesar_item(self, ejecucion_id, prog: dict) -> dict:
+        metricas = {}
+        inicio = time.perf_counter()
+        exitosa = False
+        with conexion_pool() as conn:
+            try:
+                servicio = construir_servicio_recurrente(conn)
+                exitosa = servicio._ejecutar_ciclo_emision_unitario(prog, metricas)
+            except Exception as e:
+                logger.error(f"FACTURACION_RECURRENTE: Error procesando {prog['id']}: {str(e)}")
+                metricas["error"] = str(e)
+            duracion_ms = int((time.perf_counter() - inicio) * 1000)
+
+            try:
+                conn.rollback()
+                RepositorioProgramacion(db=conn).registrar_item_ejecucion(
+                    ejecucion_id, prog, exitosa, duracion_ms, metricas.get("tiempos", {}), metricas.get("error")
+                )
+            except Exception as e:
+                logger.error(f"FACTURACION_RECURRENTE: No se pudo registrar checkpoint de {prog['id']}: {str(e)}")
+
+        return {
+            "empresa_id": str(prog['empresa_id']),
+            "exitosa": exitosa,
+            "duracion_ms": duracion_ms,
+            "tiempos": metricas.get("tiempos", {}),
+        }
+
+    def _resumir(self, ejecucion: dict, resultados: list, omitidas: int, inicio: float) -> dict:
+        etapas = {}
+        for r in resultados:
+            for etapa, ms in r["tiempos"].items():
+                e = etapas.setdefault(etapa, {"total_ms": 0, "max_ms": 0, "items": 0})
+                e["total_ms"] += ms
+                e["max_ms"] = max(e["max_ms"], ms)
+                e["items"] += 1
+        for e in etapas.values():
+            e["promedio_ms"] = round(e["total_ms"] / e["items"], 1)
+
+        exitosas = sum(1 for r in resultados if r["exitosa"])
+        duraciones = [r["duracion_ms"] for r in resultados]
+        return {
+            "ejecucion_id": str(ejecucion['id']),
+            "retomada": ejecucion['retomada'],
+            "procesadas": len(resultados),
+            "exitosas": exitosas,
+            "fallidas": len(resultados) - exitosas,
+            "omitidas_checkpoint": omitidas,
+            "empresas": len({r["empresa_id"] for r in resultados}),
+            "concurrencia": self.concurrencia,
+            "max_por_empresa": self.max_por_empresa,
+            "duracion_total_ms": int((time.perf_counter() - inicio) * 1000),
+            "duracion_item_promedio_ms": round(sum(duraciones) / len(duraciones), 1) if duraciones else 0,
+            "duracion_item_max_ms": max(duraciones) if duraciones else 0,
+            "etapas": etapas,
+        }
@@ -1,5 +1,7 @@
+import time
 import logging
 import calendar
+from contextlib import contextmanager
 from uuid import UUID
 from datetime import date, datetime
 from typing import List, Optional, Any
@@ -20,6 +22,18 @@ from ....errors.app_error import AppError
 
 logger = logging.getLogger("facturacion_api")
 
+
+@contextmanager
+def _medir_etapa(metricas: Optional[dict], etapa: str):
+    """Acumula en `metricas["tiempos"][etapa]` los milisegundos de la etapa (si se piden métricas)."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metricas is not None:
+            tiempos = metricas.setdefault("tiempos", {})
+            tiempos[etapa] = tiempos.get(etapa, 0) + int((time.perf_counter() - inicio) * 1000)
+
 class ServicioRecurringBilling:
     def __init__(
         self,
@@ -197,8 +211,11 @@ class ServicioRecurringBilling:
         exitosa = self._ejecutar_ciclo_emision_unitario(prog)
         return {"exitosa": exitosa}
 
-    def _ejecutar_ciclo_emision_unitario(self, prog: dict) -> bool:
-        """Lógica central para emitir una factura desde una regla de programación."""
+    def _ejecutar_ciclo_emision_unitario(self, prog: dict, metricas: Optional[dict] = None) -> bool:
+        """
+        Lógica central para emitir una factura desde una regla de programación.
+        Si se pasa `metricas`, se registran ahí los tiempos por etapa y el error (si lo hubo).
+        """
         try:
             # 1. Idempotencia: Verificar si ya se procesó hoy para esta programación
             from ..repository import RepositorioFacturas
@@ -215,7 +232,7 @@ class ServicioRecurringBilling:
                 LIMIT 1
             """
             factura_hoy = None
-            with repo_factura.db.cursor() as cur:
+            with _medir_etapa(metricas, "idempotencia"), repo_factura.db.cursor() as cur:
                 cur.execute(query_idempotencia, (str(prog['id']),))
                 factura_hoy = cur.fetchone()
 
@@ -235,17 +252,20 @@ class ServicioRecurringBilling:
                     "permisos": [],
                     "usuario_facturacion_id": str(prog['usuario_id'])
                 }
-                resultado_sri = self.service_autorizacion.emitir_sri(factura_hoy_id, usuario_context)
-                self.registrar_ejecucion(prog['id'], exitosa=True, frecuencia=prog['tipo_frecuencia'], dia=prog['dia_emision'])
+                with _medir_etapa(metricas, "emision_sri"):
+                    resultado_sri = self.service_autorizacion.emitir_sri(factura_hoy_id, usuario_context)
+                with _medir_etapa(metricas, "registro"):
+                    self.registrar_ejecucion(prog['id'], exitosa=True, frecuencia=prog['tipo_frecuencia'], dia=prog['dia_emision'])
                 return True
 
             # 2. Buscar la Factura Plantilla (BORRADOR amarrado a esta programación)
-            plantilla_id = repo_factura.obtener_id_plantilla_por_programacion(prog['id'])
-            
-            if not plantilla_id:
-                raise Exception(f"No se encontró una factura plantilla (BORRADOR) para la programación {prog['id']}")
+            with _medir_etapa(metricas, "plantilla"):
+                plantilla_id = repo_factura.obtener_id_plantilla_por_programacion(prog['id'])
+                
+                if not plantilla_id:
+                    raise Exception(f"No se encontró una factura plantilla (BORRADOR) para la programación {prog['id']}")
 
-            plantilla = self.service_factura.obtener_detalle_completo(plantilla_id, {"empresa_id": prog['empresa_id'], AuthKeys.IS_SUPERADMIN: True})
+                plantilla = self.service_factura.obtener_detalle_completo(plantilla_id, {"empresa_id": prog['empresa_id'], AuthKeys.IS_SUPERADMIN: True})
             if not plantilla:
                 raise Exception(f"Error al cargar detalle de plantilla {plantilla_id}")
 
@@ -321,22 +341,25 @@ class ServicioRecurringBilling:
             )
 
             # 4. Crear factura (BORRADOR)
-            nueva_factura = self.service_factura.crear_factura(datos_factura, usuario_context)
+            with _medir_etapa(metricas, "crear_factura"):
+                nueva_factura = self.service_factura.crear_factura(datos_factura, usuario_context)
 
             # 5. Emitir al SRI — asigna secuencial, firma XML y autoriza
             usuario_context_sri = {
                 **usuario_context,
                 "usuario_facturacion_id": str(prog['usuario_id'])
             }
-            resultado_sri = self.service_autorizacion.emitir_sri(nueva_factura['id'], usuario_context_sri)
+            with _medir_etapa(metricas, "emision_sri"):
+                resultado_sri = self.service_autorizacion.emitir_sri(nueva_factura['id'], usuario_context_sri)
             
             # 6. Actualizar Programación (Cierre de Ciclo)
-            self.registrar_ejecucion(
-                prog['id'], 
-                exitosa=True, 
-                frecuencia=prog['tipo_frecuencia'], 
-                dia=prog['dia_emision']
-            )
+            with _medir_etapa(metricas, "registro"):
+                self.registrar_ejecucion(
+                    prog['id'], 
+                    exitosa=True, 
+                    frecuencia=prog['tipo_frecuencia'], 
+                    dia=prog['dia_emision']
+                )
             return True
 
         except Exception as e:
@@ -357,7 +380,10 @@ class ServicioRecurringBilling:
                 self.repo_prog.db.commit()
             except: pass
 
-            self.registrar_ejecucion(prog['id'], exitosa=False)
+            with _medir_etapa(metricas, "registro"):
+                self.registrar_ejecucion(prog['id'], exitosa=False)
+            if metricas is not None:
+                metricas["error"] = str(e)
             return False
 
     def registrar_ejecucion(self, id: UUID, exitosa: bool, frecuencia: str = None, dia: int = None):
@@ -6,12 +6,38 @@ from . import ServicioFacturaCore
 from ..schemas import FacturaCreacion, FacturaActualizacion, FacturaAnulacion, FacturaListadoFiltros
 from ....constants.enums import AuthKeys
 from ....errors.app_error import AppError
+from ....utils.paginacion import decodificar_cursor, cursor_siguiente
+from ....utils import pdf_generator
+from ....utils.ride_cache import ride_cache
 from ...usuarios.repositories import RepositorioUsuarios
 from .service_base import ValidacionesFactura
 from ...formas_pago.repository import RepositorioFormasPago
 from ...cuentas_cobrar.repository import RepositorioCuentasCobrar
 from ...pagos_factura.repository import RepositorioPagosFactura
 
+def alcance_listado(usuario_actual: dict, empresa_id: Optional[UUID], solo_propias: bool, internal_user_id) -> tuple:
+    """
+    (empresa_id, usuario_id) visibles en el listado. `internal_user_id` es el id
+    del usuario en la tabla `usuarios` (el que guardan las facturas).
+    """
+    from ....constants.permissions import PermissionCodes
+    is_superadmin = usuario_actual.get(AuthKeys.IS_SUPERADMIN, False)
+    target_empresa_id = empresa_id if is_superadmin else usuario_actual.get("empresa_id")
+    
+    target_usuario_id = None
+    if not is_superadmin:
+        permisos = usuario_actual.get("permisos", [])
+        
+        # Enforce "own only" if they don't have "view all"
+        if PermissionCodes.FACTURAS_VER_TODAS not in permisos:
+            solo_propias = True
+        
+        if solo_propias:
+            target_usuario_id = internal_user_id
+
+    return target_empresa_id, target_usuario_id
+
+
 class ServicioFactura:
     def __init__(
         self, 
@@ -48,7 +74,8 @@ class ServicioFactura:
         cliente = self.core.cliente_service.obtener_cliente(datos.cliente_id, usuario_actual)
         establecimiento = self.core.establecimiento_service.obtener_establecimiento(datos.establecimiento_id, usuario_actual)
         punto = self.core.punto_emision_service.obtener_punto(datos.punto_emision_id, usuario_actual)
-        empresa = self.core.empresa_service.obtener_empresa(empresa_id, usuario_actual)
+        # Solo valida existencia y acceso: el perfil cacheado evita los conteos de obtener_empresa
+        self.core.empresa_service.obtener_perfil_emisor(empresa_id, usuario_actual)
 
         datos.empresa_id = empresa_id
         datos.usuario_id = usuario_id
@@ -62,31 +89,30 @@ class ServicioFactura:
             "secuencial_punto_emision": None
         }
         
-        nueva = self.core.crear_borrador(datos, usuario_actual, payload_extra)
-        
-        if '_pago_inicial' in nueva:
-            pago_data = nueva.pop('_pago_inicial')
+        def registrar_pago_y_cartera(cur, nueva, pago_data):
+            # Forma de pago y cuenta por cobrar en la MISMA transacción que la factura
             pago_data['factura_id'] = nueva['id']
-            # Guardamos la forma de pago ligada a factura nueva 
-            self.formas_pago_repo.crear_pago(pago_data)
+            self.formas_pago_repo.crear_pago(pago_data, cur=cur)
+
+            # 3. CREAR LA CUENTA POR COBRAR AUTOMÁTICAMENTE
+            fecha_emision = nueva.get('fecha_emision')
+            fecha_vencimiento = nueva.get('fecha_vencimiento') or fecha_emision
             
-        # 3. CREAR LA CUENTA POR COBRAR AUTOMÁTICAMENTE
-        fecha_emision = nueva.get('fecha_emision')
-        fecha_vencimiento = nueva.get('fecha_vencimiento') or fecha_emision
-        
-        cuenta_data = {
-            "empresa_id": nueva['empresa_id'],
-            "factura_id": nueva['id'],
-            "cliente_id": nueva['cliente_id'],
-            "numero_documento": nueva.get('numero_factura') or 'BORRADOR',
-            "fecha_emision": fecha_emision,
-            "fecha_vencimiento": fecha_vencimiento,
-            "monto_total": nueva['total'],
-            "monto_pagado": 0,
-            "saldo_pendiente": nueva['total'],
-            "estado": "pendiente"
-        }
-        self.cuentas_cobrar_repo.crear_cuenta(cuenta_data)
+            cuenta_data = {
+                "empresa_id": nueva['empresa_id'],
+                "factura_id": nueva['id'],
+                "cliente_id": nueva['cliente_id'],
+                "numero_documento": nueva.get('numero_factura') or 'BORRADOR',
+                "fecha_emision": fecha_emision,
+                "fecha_vencimiento": fecha_vencimiento,
+                "monto_total": nueva['total'],
+                "monto_pagado": 0,
+                "saldo_pendiente": nueva['total'],
+                "estado": "pendiente"
+            }
+            self.cuentas_cobrar_repo.crear_cuenta(cuenta_data, cur=cur)
+
+        nueva = self.core.crear_borrador(datos, usuario_actual, payload_extra, al_crear=registrar_pago_y_cartera)
             
         return nueva
 
@@ -97,34 +123,64 @@ class ServicioFactura:
                 usuario_actual['usuario_facturacion_id'] = u_fact['id']
         return ValidacionesFactura.obtener_y_validar_factura(self.core, id, usuario_actual)
 
-    def listar_facturas(self, usuario_actual: dict, empresa_id: Optional[UUID] = None, filtros: Optional[FacturaListadoFiltros] = None, solo_propias: bool = False, limit: int = 100, offset: int = 0):
-        from ....constants.permissions import PermissionCodes
-        is_superadmin = usuario_actual.get(AuthKeys.IS_SUPERADMIN, False)
-        target_empresa_id = empresa_id if is_superadmin else usuario_actual.get("empresa_id")
-        
-        target_usuario_id = None
-        if not is_superadmin:
-            permisos = usuario_actual.get("permisos", [])
-            
+    def _alcance_listado(self, usuario_actual: dict, empresa_id: Optional[UUID], solo_propias: bool) -> tuple:
+        """Resuelve (empresa_id, usuario_id) que puede ver el usuario en el listado."""
+        internal_user_id = None
+        if not usuario_actual.get(AuthKeys.IS_SUPERADMIN, False):
             # Resolve internal user id for facturacion module
             usuario_fact = self.usuario_repo.obtener_por_user_id(usuario_actual['id'])
             internal_user_id = usuario_fact['id'] if usuario_fact else None
-            
-            # Enforce "own only" if they don't have "view all"
-            if PermissionCodes.FACTURAS_VER_TODAS not in permisos:
-                solo_propias = True
-            
-            if solo_propias:
-                target_usuario_id = internal_user_id
+        return alcance_listado(usuario_actual, empresa_id, solo_propias, internal_user_id)
+
+    def listar_facturas(self, usuario_actual: dict, empresa_id: Optional[UUID] = None, filtros: Optional[FacturaListadoFiltros] = None, solo_propias: bool = False, limit: int = 100, offset: int = 0):
+        return self.listar_facturas_paginado(
+            usuario_actual, empresa_id, filtros, solo_propias, limit, offset
+        )["facturas"]
+
+    def listar_facturas_paginado(
+        self,
+        usuario_actual: dict,
+        empresa_id: Optional[UUID] = None,
+        filtros: Optional[FacturaListadoFiltros] = None,
+        solo_propias: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        conteo: Optional[str] = None
+    ) -> dict:
+        """
+        Listado con paginación keyset opcional.
 
-        return self.core.repo.listar_facturas(
+        `cursor` es el `siguiente_cursor` de la página anterior (tiene prioridad
+        sobre offset). `conteo` puede ser 'exacto' o 'estimado'; sin él no se cuenta.
+        """
+        target_empresa_id, target_usuario_id = self._alcance_listado(usuario_actual, empresa_id, solo_propias)
+
+        facturas = self.core.repo.listar_facturas(
             empresa_id=target_empresa_id,
             usuario_id=target_usuario_id,
             filtros=filtros,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=decodificar_cursor(cursor)
         )
 
+        total = None
+        if conteo in ('exacto', 'estimado'):
+            total = self.core.repo.contar_listado(
+                empresa_id=target_empresa_id,
+                usuario_id=target_usuario_id,
+                filtros=filtros,
+                estimado=conteo == 'estimado'
+            )
+
+        return {
+            "facturas": facturas,
+            "siguiente_cursor": cursor_siguiente(facturas, limit),
+            "total": total,
+            "total_estimado": conteo == 'estimado'
+        }
+
     def actualizar_factura(self, id: UUID, datos: FacturaActualizacion, usuario_actual: dict):
         print(f"--- [SERVICE] actualizar_factura ID: {id} ---")
         factura = self.obtener_factura(id, usuario_actual)
@@ -246,6 +302,18 @@ class ServicioFactura:
             
         return res
 
+    def generar_ride(self, id: UUID, usuario_actual: dict) -> tuple:
+        """
+        Retorna (factura, bytes del PDF). Si el RIDE está en cache no se leen
+        los detalles ni se renderiza nada.
+        """
+        factura = self.obtener_factura(id, usuario_actual)
+        pdf_bytes = ride_cache.obtener(factura)
+        if pdf_bytes is None:
+            factura['detalles'] = self.core.repo.listar_detalles(id)
+            pdf_bytes = pdf_generator.crear_ride_factura(factura).getvalue()
+        return factura, pdf_bytes
+
     def obtener_detalle_completo(self, id: UUID, usuario_actual: dict):
         """Obtiene la factura y todos sus detalles (útil para RIDE/PDF)."""
         factura = self.obtener_factura(id, usuario_actual)
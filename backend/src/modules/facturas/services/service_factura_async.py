@@ -0,0 +1,76 @@
+"""
+Consultas de facturas (listado y detalle) para los endpoints `async def`.
+
+Mismas reglas de acceso que `ServicioFactura`. El id interno del usuario de
+facturación sale del principal (`usuario_id`, resuelto al autenticar) en lugar
+de una consulta extra por request.
+"""
+
+from uuid import UUID
+from typing import Optional
+from fastapi import Depends
+
+from ..repository_async import RepositorioFacturasAsync
+from ..schemas import FacturaListadoFiltros
+from .service_base import ValidacionesFactura
+from .service_factura import alcance_listado
+from ....constants.enums import AuthKeys
+from ....database.pool_async import get_db_async
+from ....errors.app_error import AppError
+from ....utils.paginacion import decodificar_cursor, cursor_siguiente
+
+
+class ServicioFacturaAsync:
+    def __init__(self, conn=Depends(get_db_async)):
+        self.repo = RepositorioFacturasAsync(conn)
+
+    async def obtener_factura(self, id: UUID, usuario_actual: dict) -> dict:
+        if not usuario_actual.get(AuthKeys.IS_SUPERADMIN) and usuario_actual.get('usuario_id'):
+            usuario_actual['usuario_facturacion_id'] = usuario_actual['usuario_id']
+        factura = await self.repo.obtener_por_id(id)
+        if not factura:
+            raise AppError("Factura no encontrada", 404, "FACTURA_NOT_FOUND")
+        ValidacionesFactura.validar_acceso_factura(factura, usuario_actual)
+        return factura
+
+    async def listar_facturas_paginado(
+        self,
+        usuario_actual: dict,
+        empresa_id: Optional[UUID] = None,
+        filtros: Optional[FacturaListadoFiltros] = None,
+        solo_propias: bool = False,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        conteo: Optional[str] = None
+    ) -> dict:
+        """Ver `ServicioFactura.listar_facturas_paginado`."""
+        internal_user_id = None if usuario_actual.get(AuthKeys.IS_SUPERADMIN) else usuario_actual.get('usuario_id')
+        target_empresa_id, target_usuario_id = alcance_listado(
+            usuario_actual, empresa_id, solo_propias, internal_user_id
+        )
+
+        facturas = await self.repo.listar_facturas(
+            empresa_id=target_empresa_id,
+            usuario_id=target_usuario_id,
+            filtros=filtros,
+            limit=limit,
+            offset=offset,
+            cursor=decodificar_cursor(cursor)
+        )
+
+        total = None
+        if conteo in ('exacto', 'estimado'):
+            total = await self.repo.contar_listado(
+                empresa_id=target_empresa_id,
+                usuario_id=target_usuario_id,
+                filtros=filtros,
+                estimado=conteo == 'estimado'
+            )
+
+        return {
+            "facturas": facturas,
+            "siguiente_cursor": cursor_siguiente(facturas, limit),
+            "total": total,
+            "total_estimado": conteo == 'estimado'
+        }
@@ -3,6 +3,7 @@ from typing import List, Optional
 from uuid import UUID
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ..reportes.usuarios.R_027.declaracion_cache import declaracion_iva_cache
 
 class RepositorioGastos:
     def __init__(self, db=Depends(get_db)):
@@ -26,6 +27,8 @@ class RepositorioGastos:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            if row:
+                declaracion_iva_cache.notificar_documento(cur, row['empresa_id'], row['fecha_emision'])
             return dict(row) if row else None
 
     def obtener_por_id(self, id: UUID) -> Optional[dict]:
@@ -76,15 +79,26 @@ class RepositorioGastos:
         query = f"UPDATE sistema_facturacion.gastos SET {', '.join(set_clauses)}, updated_at = NOW() WHERE id = %s RETURNING *"
         
         with db_transaction(self.db) as cur:
+            anterior = None
+            if 'fecha_emision' in data:
+                cur.execute("SELECT fecha_emision FROM sistema_facturacion.gastos WHERE id = %s FOR UPDATE", (str(id),))
+                anterior = cur.fetchone()
             cur.execute(query, tuple(clean_values))
             row = cur.fetchone()
+            if row:
+                declaracion_iva_cache.notificar_documento(
+                    cur, row['empresa_id'], row['fecha_emision'], *([anterior['fecha_emision']] if anterior else [])
+                )
             return dict(row) if row else None
 
     def eliminar_gasto(self, id: UUID) -> bool:
-        query = "DELETE FROM sistema_facturacion.gastos WHERE id = %s"
+        query = "DELETE FROM sistema_facturacion.gastos WHERE id = %s RETURNING empresa_id, fecha_emision"
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(id),))
-            return cur.rowcount > 0
+            row = cur.fetchone()
+            if row:
+                declaracion_iva_cache.notificar_documento(cur, row['empresa_id'], row['fecha_emision'])
+            return row is not None
 
     def obtener_total_gastos(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> float:
         query = """
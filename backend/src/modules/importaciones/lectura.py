@@ -0,0 +1,92 @@
+"""
+Lectura de archivos de importación (CSV o XLSX) fila a fila.
+
+Los encabezados se normalizan (minúsculas, sin tildes, `_` en lugar de
+espacios) y las filas se entregan como dict {encabezado: valor} junto con su
+número de fila en el archivo, para reportar errores que el usuario pueda ubicar.
+"""
+
+import csv
+import re
+import unicodedata
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+
+EXTENSIONES = (".csv", ".xlsx")
+# Muestra usada para detectar codificación y separador de un CSV
+_MUESTRA_CSV = 64 * 1024
+
+
+def extension_de(nombre: str) -> Optional[str]:
+    nombre = (nombre or "").lower()
+    return next((ext for ext in EXTENSIONES if nombre.endswith(ext)), None)
+
+
+def normalizar_encabezado(valor: Any) -> str:
+    texto = unicodedata.normalize("NFD", str(valor or "").strip().lower())
+    texto = "".join(c for c in texto if unicodedata.category(c) != "Mn")
+    return re.sub(r"[^a-z0-9]+", "_", texto).strip("_")
+
+
+def _formato_csv(ruta: str) -> Tuple[str, str]:
+    """Codificación (UTF-8 o la de Excel en Windows) y separador del CSV."""
+    with open(ruta, "rb") as f:
+        muestra = f.read(_MUESTRA_CSV)
+    try:
+        texto = muestra.decode("utf-8-sig")
+        codificacion = "utf-8-sig"
+    except UnicodeDecodeError as e:
+        # La muestra puede cortar un carácter multibyte al final
+        if e.start >= len(muestra) - 3:
+            texto = muestra[:e.start].decode("utf-8-sig")
+            codificacion = "utf-8-sig"
+        else:
+            texto = muestra.decode("cp1252", errors="replace")
+            codificacion = "cp1252"
+    primera = texto.splitlines()[0] if texto else ""
+    separador = max((",", ";", "\t"), key=primera.count)
+    return codificacion, separador
+
+
+def _filas_csv(ruta: str) -> Iterator[List[Any]]:
+    codificacion, separador = _formato_csv(ruta)
+    with open(ruta, newline="", encoding=codificacion) as f:
+        yield from csv.reader(f, delimiter=separador)
+
+
+def _filas_xlsx(ruta: str) -> Iterator[List[Any]]:
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def contar_filas(ruta: str, extension: str) -> Optional[int]:
+    """Filas de datos (sin encabezado) para reportar el avance; None si no se conoce."""
+    if extension == ".xlsx":
+        wb = load_workbook(ruta, read_only=True, data_only=True)
+        try:
+            maximo = wb.active.max_row
+        finally:
+            wb.close()
+        return max(maximo - 1, 0) if maximo else None
+    return max(sum(1 for _ in _filas_csv(ruta)) - 1, 0)
+
+
+def leer_filas(ruta: str, extension: str) -> Tuple[List[str], Iterator[Tuple[int, Dict[str, Any]]]]:
+    """
+    Retorna los encabezados normalizados y un iterador de (número de fila, fila).
+    Las filas completamente vacías se saltan.
+    """
+    filas = _filas_xlsx(ruta) if extension == ".xlsx" else _filas_csv(ruta)
+    encabezados = [normalizar_encabezado(h) for h in next(filas, [])]
+
+    def iterar():
+        for numero, valores in enumerate(filas, start=2):
+            if not any(v not in (None, "") for v in valores):
+                continue
+            yield numero, dict(zip(encabezados, valores))
+
+    return encabezados, iterar()
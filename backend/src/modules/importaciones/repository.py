@@ -0,0 +1,229 @@
+"""
+Repositorio de importaciones masivas (tabla importaciones_masivas) y carga
+por lotes en clientes/productos.
+
+Cada lote se copia con `COPY ... FROM STDIN` a una tabla temporal y desde ahí
+se fusiona con la tabla destino en dos sentencias por conjunto (UPDATE de las
+existentes si se pidió, INSERT ... ON CONFLICT DO NOTHING de las nuevas). El
+avance de la importación se actualiza en la misma transacción que el lote.
+"""
+
+import csv
+import io
+import json
+from fastapi import Depends
+from typing import Iterable, List, Optional, Set
+from uuid import UUID
+
+from ...database.session import get_db
+from ...database.transaction import db_transaction
+from .validacion import TIPO_CLIENTES, TIPO_PRODUCTOS, CAMPO_CLAVE
+
+CAMPOS_ESTADO = """
+    id, empresa_id, usuario_id, tipo, archivo_nombre, actualizar_existentes, estado,
+    total_filas, filas_procesadas, insertadas, actualizadas, omitidas, con_error,
+    errores, ultimo_error, created_at, updated_at, iniciado_at, finalizado_at
+"""
+
+# Columnas de la tabla temporal (mismo orden que el COPY) y su tipo
+COLUMNAS_STAGING = {
+    TIPO_CLIENTES: [
+        ("identificacion", "TEXT"), ("tipo_identificacion", "TEXT"), ("razon_social", "TEXT"),
+        ("nombre_comercial", "TEXT"), ("email", "TEXT"), ("telefono", "TEXT"),
+        ("direccion", "TEXT"), ("ciudad", "TEXT"), ("provincia", "TEXT"),
+        ("dias_credito", "INT"), ("limite_credito", "NUMERIC(12,2)"), ("activo", "BOOLEAN"),
+    ],
+    TIPO_PRODUCTOS: [
+        ("codigo", "TEXT"), ("nombre", "TEXT"), ("descripcion", "TEXT"),
+        ("precio", "NUMERIC(12,4)"), ("costo", "NUMERIC(12,4)"),
+        ("stock_actual", "NUMERIC(12,3)"), ("stock_minimo", "NUMERIC(12,3)"),
+        ("tipo_iva", "TEXT"), ("porcentaje_iva", "NUMERIC(5,2)"),
+        ("maneja_inventario", "BOOLEAN"), ("tipo", "TEXT"), ("unidad_medida", "TEXT"),
+        ("activo", "BOOLEAN"),
+    ],
+}
+
+TABLA_DESTINO = {TIPO_CLIENTES: "clientes", TIPO_PRODUCTOS: "productos"}
+
+# Valor al insertar cuando el archivo no trae la columna (mismos defaults de la tabla)
+DEFAULTS_INSERCION = {
+    "dias_credito": "0", "limite_credito": "0", "activo": "TRUE",
+    "costo": "0", "stock_actual": "0", "stock_minimo": "0", "maneja_inventario": "TRUE",
+}
+
+
+def _csv_copy(filas: Iterable[dict], columnas: List[str]) -> io.StringIO:
+    """Lote en formato CSV para COPY; None queda como campo vacío (NULL)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for fila in filas:
+        writer.writerow([fila.get(c) for c in columnas])
+    buffer.seek(0)
+    return buffer
+
+
+class RepositorioImportaciones:
+    def __init__(self, db=Depends(get_db)):
+        self.db = db
+
+    def crear(self, empresa_id: UUID, usuario_id: Optional[UUID], tipo: str, archivo_nombre: str, actualizar_existentes: bool) -> dict:
+        query = f"""
+            INSERT INTO sistema_facturacion.importaciones_masivas
+                (empresa_id, usuario_id, tipo, archivo_nombre, actualizar_existentes)
+            VALUES (%s, %s, %s, %s, %s)
+            RETURNING {CAMPOS_ESTADO}
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (
+                str(empresa_id), str(usuario_id) if usuario_id else None,
+                tipo, archivo_nombre, actualizar_existentes
+            ))
+            return dict(cur.fetchone())
+
+    def obtener(self, importacion_id: UUID) -> Optional[dict]:
+        query = f"SELECT {CAMPOS_ESTADO} FROM sistema_facturacion.importaciones_masivas WHERE id = %s"
+        with self.db.cursor() as cur:
+            cur.execute(query, (str(importacion_id),))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def listar(self, empresa_id: UUID, limite: int = 20) -> List[dict]:
+        # Sin el detalle de errores: el listado solo muestra el resumen
+        query = f"""
+            SELECT {CAMPOS_ESTADO.replace('errores,', '')}
+            FROM sistema_facturacion.importaciones_masivas
+            WHERE empresa_id = %s
+            ORDER BY created_at DESC
+            LIMIT %s
+        """
+        with self.db.cursor() as cur:
+            cur.execute(query, (str(empresa_id), limite))
+            return [dict(row) for row in cur.fetchall()]
+
+    def iniciar(self, importacion_id: UUID, total_filas: Optional[int]) -> bool:
+        """Pasa de PENDIENTE a PROCESANDO; False si otro proceso ya la tomó."""
+        query = """
+            UPDATE sistema_facturacion.importaciones_masivas
+            SET estado = 'PROCESANDO', total_filas = %s, iniciado_at = NOW(), updated_at = NOW()
+            WHERE id = %s AND estado = 'PENDIENTE'
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (total_filas, str(importacion_id)))
+            return cur.rowcount == 1
+
+    def finalizar(self, importacion_id: UUID, estado: str, total_filas: Optional[int] = None, error: Optional[str] = None):
+        query = """
+            UPDATE sistema_facturacion.importaciones_masivas
+            SET estado = %s,
+                total_filas = COALESCE(%s, total_filas),
+                ultimo_error = %s,
+                finalizado_at = NOW(),
+                updated_at = NOW()
+            WHERE id = %s
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (estado, total_filas, error, str(importacion_id)))
+
+    def marcar_abandonadas(self, minutos: int) -> int:
+        """Falla las importaciones sin avance reciente (proceso reiniciado a mitad de la carga)."""
+        query = """
+            UPDATE sistema_facturacion.importaciones_masivas
+            SET estado = 'FALLIDO',
+                ultimo_error = 'Importación interrumpida; las filas ya cargadas se conservan',
+                finalizado_at = NOW(),
+                updated_at = NOW()
+            WHERE estado IN ('PENDIENTE', 'PROCESANDO')
+              AND updated_at < NOW() - make_interval(mins => %s)
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (minutos,))
+            return cur.rowcount
+
+    def claves_existentes(self, tipo: str, empresa_id: UUID, claves: List[str]) -> Set[str]:
+        """Claves del lote que ya existen en la empresa, en una sola consulta."""
+        if not claves:
+            return set()
+        campo = CAMPO_CLAVE[tipo]
+        query = f"""
+            SELECT {campo} AS clave FROM sistema_facturacion.{TABLA_DESTINO[tipo]}
+            WHERE empresa_id = %s AND {campo} = ANY(%s)
+        """
+        with self.db.cursor() as cur:
+            cur.execute(query, (str(empresa_id), claves))
+            return {row['clave'] for row in cur.fetchall()}
+
+    def cargar_lote(
+        self,
+        importacion_id: UUID,
+        tipo: str,
+        empresa_id: UUID,
+        filas: List[dict],
+        actualizar_existentes: bool,
+        procesadas: int,
+        omitidas: int,
+        con_error: int,
+        errores: List[dict]
+    ) -> dict:
+        """
+        Copia el lote a staging, lo fusiona con la tabla destino y suma el
+        avance a la importación, todo en una transacción.
+        """
+        columnas = [c for c, _ in COLUMNAS_STAGING[tipo]]
+        campo = CAMPO_CLAVE[tipo]
+        destino = f"sistema_facturacion.{TABLA_DESTINO[tipo]}"
+        actualizables = [c for c in columnas if c != campo]
+
+        insertadas = actualizadas = 0
+        with db_transaction(self.db) as cur:
+            if filas:
+                cur.execute(f"""
+                    CREATE TEMP TABLE IF NOT EXISTS _importacion_staging_{tipo.lower()} (
+                        {', '.join(f'{c} {t}' for c, t in COLUMNAS_STAGING[tipo])}
+                    ) ON COMMIT DROP
+                """)
+                cur.copy_expert(
+                    f"COPY _importacion_staging_{tipo.lower()} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)",
+                    _csv_copy(filas, columnas)
+                )
+
+                if actualizar_existentes:
+                    # Solo se pisan los campos que el archivo trae con valor
+                    cur.execute(f"""
+                        UPDATE {destino} d
+                        SET {', '.join(f'{c} = COALESCE(s.{c}, d.{c})' for c in actualizables)},
+                            updated_at = NOW()
+                        FROM _importacion_staging_{tipo.lower()} s
+                        WHERE d.empresa_id = %s AND d.{campo} = s.{campo}
+                    """, (str(empresa_id),))
+                    actualizadas = cur.rowcount
+
+                valores = [
+                    f"COALESCE(s.{c}, {DEFAULTS_INSERCION[c]})" if c in DEFAULTS_INSERCION else f"s.{c}"
+                    for c in columnas
+                ]
+                cur.execute(f"""
+                    INSERT INTO {destino} (empresa_id, {', '.join(columnas)})
+                    SELECT %s, {', '.join(valores)}
+                    FROM _importacion_staging_{tipo.lower()} s
+                    ON CONFLICT (empresa_id, {campo}) DO NOTHING
+                """, (str(empresa_id),))
+                insertadas = cur.rowcount
+
+            # Filas que ya existían (o que otro proceso insertó entre tanto) y no se actualizaron
+            omitidas += len(filas) - insertadas - actualizadas
+            cur.execute(f"""
+                UPDATE sistema_facturacion.importaciones_masivas
+                SET filas_procesadas = filas_procesadas + %s,
+                    insertadas = insertadas + %s,
+                    actualizadas = actualizadas + %s,
+                    omitidas = omitidas + %s,
+                    con_error = con_error + %s,
+                    errores = errores || %s::jsonb,
+                    updated_at = NOW()
+                WHERE id = %s
+                RETURNING {CAMPOS_ESTADO}
+            """, (
+                procesadas, insertadas, actualizadas, omitidas, con_error,
+                json.dumps(errores, default=str), str(importacion_id)
+            ))
+            return dict(cur.fetchone())
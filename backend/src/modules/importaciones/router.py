@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, File, Form, Query, UploadFile, status
+from typing import Optional
+from uuid import UUID
+
+from .service import ServicioImportaciones
+from .validacion import TIPO_CLIENTES, TIPO_PRODUCTOS
+from ..autenticacion.routes import requerir_permiso
+from ...constants.permissions import PermissionCodes
+from ...utils.response_schemas import RespuestaBase
+
+router = APIRouter()
+
+
+@router.post("/clientes", status_code=status.HTTP_202_ACCEPTED, response_model=RespuestaBase)
+def importar_clientes(
+    archivo: UploadFile = File(...),
+    actualizar_existentes: bool = Form(False),
+    empresa_id: Optional[UUID] = Form(None),
+    usuario: dict = Depends(requerir_permiso(PermissionCodes.CLIENTES_CREAR)),
+    servicio: ServicioImportaciones = Depends()
+):
+    """Encola la importación de clientes (CSV/XLSX) y responde con el id para consultar el avance."""
+    res = servicio.encolar(TIPO_CLIENTES, archivo.filename, archivo.file, usuario, empresa_id, actualizar_existentes)
+    return RespuestaBase(mensaje="Importación encolada", detalles=res)
+
+
+@router.post("/productos", status_code=status.HTTP_202_ACCEPTED, response_model=RespuestaBase)
+def importar_productos(
+    archivo: UploadFile = File(...),
+    actualizar_existentes: bool = Form(False),
+    empresa_id: Optional[UUID] = Form(None),
+    usuario: dict = Depends(requerir_permiso(PermissionCodes.PRODUCTOS_CREAR)),
+    servicio: ServicioImportaciones = Depends()
+):
+    """Encola la importación de productos (CSV/XLSX) y responde con el id para consultar el avance."""
+    res = servicio.encolar(TIPO_PRODUCTOS, archivo.filename, archivo.file, usuario, empresa_id, actualizar_existentes)
+    return RespuestaBase(mensaje="Importación encolada", detalles=res)
+
+
+@router.get("/", response_model=RespuestaBase)
+def listar_importaciones(
+    empresa_id: Optional[UUID] = None,
+    limite: int = Query(default=20, ge=1, le=100),
+    usuario: dict = Depends(requerir_permiso([PermissionCodes.CLIENTES_CREAR, PermissionCodes.PRODUCTOS_CREAR])),
+    servicio: ServicioImportaciones = Depends()
+):
+    res = servicio.listar(usuario, empresa_id, limite)
+    return RespuestaBase(detalles=res)
+
+
+@router.get("/{importacion_id}", response_model=RespuestaBase)
+def obtener_estado_importacion(
+    importacion_id: UUID,
+    usuario: dict = Depends(requerir_permiso([PermissionCodes.CLIENTES_CREAR, PermissionCodes.PRODUCTOS_CREAR])),
+    servicio: ServicioImportaciones = Depends()
+):
+    """Avance, totales y errores por fila de una importación."""
+    res = servicio.obtener_estado(importacion_id, usuario)
+    return RespuestaBase(detalles=res)
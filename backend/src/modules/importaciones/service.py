@@ -0,0 +1,229 @@
+"""
+Importación masiva de clientes y productos desde CSV/XLSX.
+
+El endpoint guarda el archivo, registra la importación y responde 202; un hilo
+del pool de este módulo la procesa por lotes de `IMPORTACION_LOTE` filas:
+
+1. Validación del lote por columna (identificaciones en una sola pasada).
+2. Duplicados dentro del archivo (clave ya vista en un lote anterior) y
+   contra la base con una consulta por lote (`= ANY(...)`).
+3. COPY del lote a una tabla temporal y merge con clientes/productos.
+
+Cada lote se confirma por separado junto con el avance, que se consulta con
+`GET /importaciones/{id}`.
+"""
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import BinaryIO, Optional
+from uuid import UUID, uuid4
+
+from fastapi import Depends
+
+from .lectura import extension_de, contar_filas, leer_filas
+from .repository import RepositorioImportaciones
+from .validacion import (
+    TIPO_CLIENTES, TIPO_PRODUCTOS, CAMPO_CLAVE,
+    mapear_columnas, validar_clientes, validar_productos
+)
+from ...config.env import env
+from ...constants.enums import AuthKeys
+from ...constants.permissions import PermissionCodes
+from ...database.session import conexion_pool
+from ...errors.app_error import AppError
+
+logger = logging.getLogger("facturacion_api")
+
+# Importaciones simultáneas por proceso; cada una usa su propia conexión del pool
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, env.IMPORTACION_HILOS),
+    thread_name_prefix="importacion"
+)
+
+# Sin avance en este tiempo, una importación PENDIENTE/PROCESANDO se da por interrumpida
+MINUTOS_ABANDONO = 30
+
+
+class ServicioImportaciones:
+    def __init__(self, repo: RepositorioImportaciones = Depends()):
+        self.repo = repo
+
+    def _empresa_objetivo(self, usuario_actual: dict, empresa_id: Optional[UUID]) -> UUID:
+        if usuario_actual.get(AuthKeys.IS_SUPERADMIN):
+            if not empresa_id:
+                raise AppError("Superadmins deben especificar empresa_id", 400, "VAL_ERROR")
+            return empresa_id
+        if not usuario_actual.get("empresa_id"):
+            raise AppError("Usuario no asociado a una empresa", 400, "VAL_ERROR")
+        return usuario_actual["empresa_id"]
+
+    def _validar_acceso(self, importacion: dict, usuario_actual: dict):
+        if usuario_actual.get(AuthKeys.IS_SUPERADMIN):
+            return
+        if str(importacion['empresa_id']) != str(usuario_actual.get('empresa_id')):
+            raise AppError("No tiene permiso sobre esta importación", 403, "FORBIDDEN")
+
+    def encolar(
+        self,
+        tipo: str,
+        archivo_nombre: str,
+        archivo: BinaryIO,
+        usuario_actual: dict,
+        empresa_id: Optional[UUID] = None,
+        actualizar_existentes: bool = False
+    ) -> dict:
+        extension = extension_de(archivo_nombre)
+        if not extension:
+            raise AppError("Formato no soportado: suba un archivo .csv o .xlsx", 400, "IMPORTACION_FORMATO")
+        empresa = self._empresa_objetivo(usuario_actual, empresa_id)
+
+        ruta = _guardar_archivo(archivo, extension)
+        try:
+            importacion = self.repo.crear(empresa, usuario_actual.get('id'), tipo, archivo_nombre, actualizar_existentes)
+        except Exception:
+            os.remove(ruta)
+            raise
+
+        incluir_costo = tipo != TIPO_PRODUCTOS or _puede_ver_costos(usuario_actual)
+        _executor.submit(procesar_importacion, importacion['id'], ruta, extension, incluir_costo)
+        logger.info(f"[IMPORTACION] {tipo} encolada - ID: {importacion['id']} - Archivo: {archivo_nombre}")
+        return importacion
+
+    def obtener_estado(self, importacion_id: UUID, usuario_actual: dict) -> dict:
+        importacion = self.repo.obtener(importacion_id)
+        if not importacion:
+            raise AppError("Importación no encontrada", 404, "IMPORTACION_NOT_FOUND")
+        self._validar_acceso(importacion, usuario_actual)
+        return importacion
+
+    def listar(self, usuario_actual: dict, empresa_id: Optional[UUID] = None, limite: int = 20) -> list:
+        return self.repo.listar(self._empresa_objetivo(usuario_actual, empresa_id), limite)
+
+
+def _puede_ver_costos(usuario_actual: dict) -> bool:
+    if usuario_actual.get(AuthKeys.IS_SUPERADMIN):
+        return True
+    return PermissionCodes.PRODUCTOS_VER_COSTOS in usuario_actual.get("permisos", [])
+
+
+def _guardar_archivo(archivo: BinaryIO, extension: str) -> str:
+    """Copia el upload a IMPORTACION_DIR respetando el tamaño máximo."""
+    os.makedirs(env.IMPORTACION_DIR, exist_ok=True)
+    ruta = os.path.join(env.IMPORTACION_DIR, f"{uuid4().hex}{extension}")
+    maximo = env.IMPORTACION_MAX_MB * 1024 * 1024
+    escritos = 0
+    with open(ruta, "wb") as destino:
+        while True:
+            bloque = archivo.read(1024 * 1024)
+            if not bloque:
+                break
+            escritos += len(bloque)
+            if escritos > maximo:
+                destino.close()
+                os.remove(ruta)
+                raise AppError(f"El archivo supera el máximo de {env.IMPORTACION_MAX_MB} MB", 413, "IMPORTACION_TAMANO")
+            destino.write(bloque)
+    return ruta
+
+
+def _lotes(iterable, tamano: int):
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def procesar_importacion(importacion_id: UUID, ruta: str, extension: str, incluir_costo: bool = True):
+    """Procesa una importación completa. Corre en el pool de hilos del módulo."""
+    try:
+        with conexion_pool() as conn:
+            repo = RepositorioImportaciones(db=conn)
+            try:
+                _procesar(repo, importacion_id, ruta, extension, incluir_costo)
+            except Exception as e:
+                logger.error(f"[IMPORTACION] Error procesando {importacion_id}: {str(e)}")
+                conn.rollback()
+                repo.finalizar(importacion_id, 'FALLIDO', error=str(e)[:500])
+    except Exception as e:
+        logger.error(f"[IMPORTACION] No se pudo registrar el fallo de {importacion_id}: {str(e)}")
+    finally:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
+def _procesar(repo: RepositorioImportaciones, importacion_id: UUID, ruta: str, extension: str, incluir_costo: bool):
+    importacion = repo.obtener(importacion_id)
+    if not importacion or not repo.iniciar(importacion_id, contar_filas(ruta, extension)):
+        return
+
+    tipo = importacion['tipo']
+    empresa_id = importacion['empresa_id']
+    actualizar = importacion['actualizar_existentes']
+    campo = CAMPO_CLAVE[tipo]
+
+    encabezados, filas = leer_filas(ruta, extension)
+    columnas, faltantes = mapear_columnas(encabezados, tipo)
+    if faltantes:
+        repo.finalizar(importacion_id, 'FALLIDO', total_filas=0, error=f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+        return
+
+    vistas = {}  # clave -> primera fila del archivo donde aparece
+    errores_guardados = 0
+    procesadas = 0
+    for lote in _lotes(filas, env.IMPORTACION_LOTE):
+        if tipo == TIPO_CLIENTES:
+            validas, errores = validar_clientes(lote, columnas)
+        else:
+            validas, errores = validar_productos(lote, columnas, incluir_costo)
+
+        unicas = []
+        for fila in validas:
+            clave = fila[campo]
+            if clave in vistas:
+                errores.append({
+                    "fila": fila['_fila'], "campo": campo, "valor": clave,
+                    "mensaje": f"Repetido en el archivo (fila {vistas[clave]})"
+                })
+                continue
+            vistas[clave] = fila['_fila']
+            unicas.append(fila)
+
+        omitidas = 0
+        if not actualizar:
+            existentes = repo.claves_existentes(tipo, empresa_id, [f[campo] for f in unicas])
+            if existentes:
+                omitidas = sum(1 for f in unicas if f[campo] in existentes)
+                unicas = [f for f in unicas if f[campo] not in existentes]
+
+        errores.sort(key=lambda e: e['fila'])
+        cupo = max(env.IMPORTACION_MAX_ERRORES - errores_guardados, 0)
+        estado = repo.cargar_lote(
+            importacion_id, tipo, empresa_id, unicas, actualizar,
+            procesadas=len(lote),
+            omitidas=omitidas,
+            con_error=len({e['fila'] for e in errores}),
+            errores=errores[:cupo]
+        )
+        errores_guardados += min(len(errores), cupo)
+        procesadas += len(lote)
+        logger.info(
+            f"[IMPORTACION] {importacion_id}: {procesadas} filas procesadas "
+            f"({estado['insertadas']} nuevas, {estado['actualizadas']} actualizadas, {estado['con_error']} con error)"
+        )
+
+    repo.finalizar(importacion_id, 'COMPLETADO', total_filas=procesadas)
+
+
+def recuperar_importaciones_abandonadas():
+    """Al iniciar el proceso: marca como fallidas las importaciones que quedaron a medias."""
+    try:
+        with conexion_pool() as conn:
+            cantidad = RepositorioImportaciones(db=conn).marcar_abandonadas(MINUTOS_ABANDONO)
+        if cantidad:
+            logger.warning(f"[IMPORTACION] {cantidad} importaciones interrumpidas marcadas como FALLIDO")
+    except Exception as e:
+        logger.error(f"[IMPORTACION] No se pudieron revisar importaciones abandonadas: {str(e)}")
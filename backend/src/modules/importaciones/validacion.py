@@ -0,0 +1,277 @@
+"""
+Validación por lote de filas importadas.
+
+Se trabaja por columna sobre todo el lote: la identificación de los clientes
+se valida con `validar_identificaciones` en una sola pasada y el resto de los
+campos se convierte a los tipos de la tabla destino. Cada fila válida sale como
+dict con las columnas de staging (ver `repository.COLUMNAS_STAGING`) más
+`_fila`; cada problema sale como error {fila, campo, valor, mensaje}.
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ...constants.sri_constants import SRI_TARIFAS_IVA
+from ...utils.validators import validar_identificaciones
+
+TIPO_CLIENTES = "CLIENTES"
+TIPO_PRODUCTOS = "PRODUCTOS"
+
+# Campo destino -> encabezados aceptados (ya normalizados)
+ALIAS_COLUMNAS = {
+    TIPO_CLIENTES: {
+        "identificacion": ("identificacion", "ruc", "cedula", "ruc_cedula", "documento", "numero_identificacion"),
+        "tipo_identificacion": ("tipo_identificacion", "tipo_documento"),
+        "razon_social": ("razon_social", "nombre", "nombres", "cliente"),
+        "nombre_comercial": ("nombre_comercial",),
+        "email": ("email", "correo", "correo_electronico"),
+        "telefono": ("telefono", "celular"),
+        "direccion": ("direccion",),
+        "ciudad": ("ciudad",),
+        "provincia": ("provincia",),
+        "dias_credito": ("dias_credito", "plazo"),
+        "limite_credito": ("limite_credito", "cupo"),
+        "activo": ("activo",),
+    },
+    TIPO_PRODUCTOS: {
+        "codigo": ("codigo", "codigo_principal", "sku"),
+        "nombre": ("nombre", "producto"),
+        "descripcion": ("descripcion",),
+        "precio": ("precio", "precio_unitario", "pvp"),
+        "costo": ("costo",),
+        "stock_actual": ("stock_actual", "stock"),
+        "stock_minimo": ("stock_minimo",),
+        "tipo_iva": ("tipo_iva", "iva", "codigo_iva"),
+        "maneja_inventario": ("maneja_inventario", "inventario"),
+        "tipo": ("tipo",),
+        "unidad_medida": ("unidad_medida", "unidad"),
+        "activo": ("activo",),
+    },
+}
+
+COLUMNAS_OBLIGATORIAS = {
+    TIPO_CLIENTES: ("identificacion", "razon_social"),
+    TIPO_PRODUCTOS: ("codigo", "nombre", "precio", "tipo_iva"),
+}
+
+# Clave de negocio (única por empresa) de cada tipo
+CAMPO_CLAVE = {TIPO_CLIENTES: "identificacion", TIPO_PRODUCTOS: "codigo"}
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_VERDADEROS = {"si", "sí", "s", "true", "1", "x", "activo", "yes"}
+_FALSOS = {"no", "n", "false", "0", "inactivo"}
+# Tarifa expresada como porcentaje (15, "15%") -> código SRI; los códigos se aceptan tal cual
+_IVA_POR_PORCENTAJE = {"15": "4", "12": "2", "14": "3", "13": "10"}
+_IVA_POR_TEXTO = {"exento": "7", "no_objeto": "6", "no objeto": "6"}
+
+
+class ErrorCampo(ValueError):
+    pass
+
+
+def mapear_columnas(encabezados: Sequence[str], tipo: str) -> Tuple[Dict[str, str], List[str]]:
+    """Campo destino -> encabezado del archivo, y las columnas obligatorias que faltan."""
+    presentes = set(encabezados)
+    columnas = {}
+    for campo, alias in ALIAS_COLUMNAS[tipo].items():
+        encontrado = next((a for a in alias if a in presentes), None)
+        if encontrado:
+            columnas[campo] = encontrado
+    faltantes = [c for c in COLUMNAS_OBLIGATORIAS[tipo] if c not in columnas]
+    return columnas, faltantes
+
+
+def _texto(valor: Any) -> Optional[str]:
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    texto = str(valor).strip()
+    return texto or None
+
+
+def _decimal(valor: Any) -> Optional[Decimal]:
+    texto = _texto(valor)
+    if texto is None:
+        return None
+    texto = texto.replace("$", "").replace(" ", "")
+    if "," in texto and "." not in texto:
+        texto = texto.replace(",", ".")
+    else:
+        texto = texto.replace(",", "")
+    try:
+        numero = Decimal(texto)
+    except InvalidOperation:
+        raise ErrorCampo("No es un número válido")
+    if not numero.is_finite() or numero < 0:
+        raise ErrorCampo("Debe ser un número mayor o igual a 0")
+    return numero
+
+
+def _entero(valor: Any) -> Optional[int]:
+    numero = _decimal(valor)
+    if numero is None:
+        return None
+    if numero != numero.to_integral_value():
+        raise ErrorCampo("Debe ser un número entero")
+    return int(numero)
+
+
+def _booleano(valor: Any) -> Optional[bool]:
+    if isinstance(valor, bool):
+        return valor
+    texto = _texto(valor)
+    if texto is None:
+        return None
+    texto = texto.lower()
+    if texto in _VERDADEROS:
+        return True
+    if texto in _FALSOS:
+        return False
+    raise ErrorCampo("Use Sí/No")
+
+
+def _identificacion(valor: Any) -> Optional[str]:
+    texto = _texto(valor)
+    # Excel guarda las cédulas como número y pierde el 0 de las provincias 01-09
+    if texto and texto.isdigit() and len(texto) in (9, 12):
+        texto = "0" + texto
+    return texto
+
+
+def _tipo_identificacion(identificacion: str) -> str:
+    if identificacion in ("9999999999", "9999999999999"):
+        return "07"
+    if identificacion.isdigit() and len(identificacion) == 13:
+        return "04"
+    if identificacion.isdigit() and len(identificacion) == 10:
+        return "05"
+    return "06"
+
+
+def _tipo_iva(valor: Any) -> str:
+    texto = _texto(valor)
+    if texto is None:
+        raise ErrorCampo("Campo obligatorio")
+    texto = texto.lower().rstrip("%").strip()
+    if texto.endswith(".0"):
+        texto = texto[:-2]
+    codigo = _IVA_POR_PORCENTAJE.get(texto) or _IVA_POR_TEXTO.get(texto) or texto
+    if codigo not in SRI_TARIFAS_IVA:
+        raise ErrorCampo("Tarifa de IVA no reconocida (use el código SRI o el porcentaje)")
+    return codigo
+
+
+def _error(fila: int, campo: str, valor: Any, mensaje: str) -> dict:
+    return {"fila": fila, "campo": campo, "valor": _texto(valor), "mensaje": mensaje}
+
+
+def _convertir(fila_num: int, origen: dict, columnas: Dict[str, str], conversores: dict, errores: List[dict]) -> Optional[dict]:
+    """Aplica los conversores a una fila; None si algún campo tiene error."""
+    destino = {"_fila": fila_num}
+    valida = True
+    for campo, conversor in conversores.items():
+        valor = origen.get(columnas[campo]) if campo in columnas else None
+        try:
+            destino[campo] = conversor(valor)
+        except ErrorCampo as e:
+            errores.append(_error(fila_num, campo, valor, str(e)))
+            valida = False
+    return destino if valida else None
+
+
+def _obligatorio(campo: str, destino: dict, fila_num: int, errores: List[dict]) -> bool:
+    if destino.get(campo) is None:
+        errores.append(_error(fila_num, campo, None, "Campo obligatorio"))
+        return False
+    return True
+
+
+_CONVERSORES_CLIENTES = {
+    "tipo_identificacion": _texto,
+    "razon_social": _texto,
+    "nombre_comercial": _texto,
+    "email": _texto,
+    "telefono": _texto,
+    "direccion": _texto,
+    "ciudad": _texto,
+    "provincia": _texto,
+    "dias_credito": _entero,
+    "limite_credito": _decimal,
+    "activo": _booleano,
+}
+
+
+def validar_clientes(lote: Sequence[Tuple[int, dict]], columnas: Dict[str, str]) -> Tuple[List[dict], List[dict]]:
+    errores: List[dict] = []
+    identificaciones = [_identificacion(origen.get(columnas["identificacion"])) for _, origen in lote]
+    validas_id = validar_identificaciones(i or "" for i in identificaciones)
+
+    validas = []
+    for (fila_num, origen), identificacion, id_valida in zip(lote, identificaciones, validas_id):
+        destino = _convertir(fila_num, origen, columnas, _CONVERSORES_CLIENTES, errores)
+        if not identificacion:
+            errores.append(_error(fila_num, "identificacion", None, "Campo obligatorio"))
+            continue
+        if not id_valida:
+            errores.append(_error(fila_num, "identificacion", identificacion, "Identificación no válida según el SRI"))
+            continue
+        if destino is None or not _obligatorio("razon_social", destino, fila_num, errores):
+            continue
+
+        tipo = destino["tipo_identificacion"] or _tipo_identificacion(identificacion)
+        if tipo not in ("04", "05", "06", "07", "08"):
+            errores.append(_error(fila_num, "tipo_identificacion", tipo, "Use 04 (RUC), 05 (Cédula), 06 (Pasaporte), 07 o 08"))
+            continue
+        if (tipo == "04" and len(identificacion) != 13) or (tipo == "05" and len(identificacion) != 10):
+            errores.append(_error(fila_num, "tipo_identificacion", tipo, "No coincide con la longitud de la identificación"))
+            continue
+        if destino["email"] and not _EMAIL.match(destino["email"]):
+            errores.append(_error(fila_num, "email", destino["email"], "Correo electrónico no válido"))
+            continue
+
+        destino["identificacion"] = identificacion
+        destino["tipo_identificacion"] = tipo
+        validas.append(destino)
+    return validas, errores
+
+
+_CONVERSORES_PRODUCTOS = {
+    "codigo": _texto,
+    "nombre": _texto,
+    "descripcion": _texto,
+    "precio": _decimal,
+    "costo": _decimal,
+    "stock_actual": _decimal,
+    "stock_minimo": _decimal,
+    "tipo_iva": _tipo_iva,
+    "maneja_inventario": _booleano,
+    "tipo": lambda v: (_texto(v) or "").upper() or None,
+    "unidad_medida": _texto,
+    "activo": _booleano,
+}
+
+
+def validar_productos(
+    lote: Sequence[Tuple[int, dict]],
+    columnas: Dict[str, str],
+    incluir_costo: bool = True
+) -> Tuple[List[dict], List[dict]]:
+    errores: List[dict] = []
+    validas = []
+    for fila_num, origen in lote:
+        destino = _convertir(fila_num, origen, columnas, _CONVERSORES_PRODUCTOS, errores)
+        if destino is None:
+            continue
+        if not all([_obligatorio(c, destino, fila_num, errores) for c in ("codigo", "nombre", "precio")]):
+            continue
+        if destino["tipo"] and destino["tipo"] not in ("BIEN", "SERVICIO"):
+            errores.append(_error(fila_num, "tipo", destino["tipo"], "Use BIEN o SERVICIO"))
+            continue
+        if not incluir_costo:
+            # Igual que en la creación individual: sin permiso de costos no se asigna costo
+            destino["costo"] = None
+        destino["porcentaje_iva"] = Decimal(SRI_TARIFAS_IVA[destino["tipo_iva"]])
+        validas.append(destino)
+    return validas, errores
@@ -1,8 +1,9 @@
 from fastapi import Depends
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from uuid import UUID
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ...database.cursores import FilaVista, iterar_consulta
 
 class RepositorioLogs:
     def __init__(self, db=Depends(get_db)):
@@ -117,13 +118,15 @@ class RepositorioLogs:
             cur.execute(query, tuple(params))
             return [dict(row) for row in cur.fetchall()]
 
-    def obtener_auditoria_exportar(self, filters: dict = None) -> List[dict]:
+    def iterar_auditoria_exportar(self, filters: dict = None, limite: Optional[int] = None, itersize: Optional[int] = None) -> Iterator[FilaVista]:
+        """Recorre la auditoría para exportación con un cursor de servidor (`itersize` filas por viaje)."""
         query, params = self._construir_query_auditoria(filters)
-        query += " ORDER BY created_at DESC LIMIT 5000"
+        query += " ORDER BY created_at DESC"
+        if limite:
+            query += " LIMIT %s"
+            params.append(limite)
 
-        with self.db.cursor() as cur:
-            cur.execute(query, tuple(params))
-            return [dict(row) for row in cur.fetchall()]
+        return iterar_consulta(self.db, query, tuple(params), itersize, nombre="exportar_auditoria")
 
     def registrar_evento(self, user_id: UUID, evento: str, detail: str = None, ip: str = None, ua: str = None, origen: str = 'SISTEMA'):
         query = """
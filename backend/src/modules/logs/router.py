@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from typing import List
 from uuid import UUID
 
 from .service import ServicioLogs
 from .schemas import LogEmisionLectura, LogEmisionCreacion, LogAuditoriaLectura
 from ..autenticacion.routes import obtener_usuario_actual, requerir_superadmin
+from ...utils.excel_generator import MEDIA_TYPE_CSV, MEDIA_TYPE_EXCEL
 
 router = APIRouter()
 
@@ -58,6 +59,7 @@ def exportar_auditoria(
     evento: str = None,
     fecha_inicio: str = None,
     fecha_fin: str = None,
+    formato: str = Query(default="excel", pattern="^(excel|csv)$"),
     admin: dict = Depends(requerir_superadmin),
     servicio: ServicioLogs = Depends()
 ):
@@ -71,11 +73,12 @@ def exportar_auditoria(
         "fecha_fin": fecha_fin
     }
     
-    file_stream = servicio.exportar_auditoria(filters)
-    filename = f"auditoria_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    chunks = servicio.exportar_auditoria(filters, formato)
+    extension, media_type = ("csv", MEDIA_TYPE_CSV) if formato == 'csv' else ("xlsx", MEDIA_TYPE_EXCEL)
+    filename = f"auditoria_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
     
     return StreamingResponse(
-        file_stream,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        chunks,
+        media_type=media_type,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
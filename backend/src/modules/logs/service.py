@@ -1,12 +1,21 @@
 from fastapi import Depends
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any
 from uuid import UUID
-from datetime import datetime
 
 from .repository import RepositorioLogs
 from .schemas import LogEmisionCreacion
 from ...errors.app_error import AppError
-from ...utils.excel_generator import generate_excel_report
+from ...database.session import conexion_pool
+from ...utils.excel_generator import FILAS_MAX_EXCEL, stream_report
+
+
+def _iterar_auditoria_exportar(filters: dict, limite) -> Iterator[dict]:
+    """
+    Filas a exportar con una conexión propia del pool: la respuesta se
+    transmite después de que FastAPI liberó la conexión del request.
+    """
+    with conexion_pool() as conn:
+        yield from RepositorioLogs(db=conn).iterar_auditoria_exportar(filters, limite)
 
 class ServicioLogs:
     def __init__(self, repo: RepositorioLogs = Depends()):
@@ -26,22 +35,13 @@ class ServicioLogs:
     def listar_auditoria(self, filters: dict = None, limit: int = 100, offset: int = 0):
         return self.repo.listar_auditoria(filters, limit, offset)
 
-    def exportar_auditoria(self, filters: dict = None):
-        data = self.repo.obtener_auditoria_exportar(filters)
-        
+    def exportar_auditoria(self, filters: dict = None, formato: str = 'excel') -> Iterator[bytes]:
         headers = ["Fecha", "Módulo", "Actor", "Email", "Evento", "Detalle", "IP"]
         keys = ["created_at", "modulo", "actor_nombre", "actor_email", "evento", "motivo", "ip_address"]
-        
-        # Mapear datos y formatear fecha
-        formatted_data = []
-        for row in data:
-            item = row.copy()
-            if item.get('created_at'):
-                if isinstance(item['created_at'], datetime):
-                    item['created_at'] = item['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            formatted_data.append(item)
-            
-        return generate_excel_report("Reporte de Auditoria", headers, formatted_data, keys)
+        # Una hoja de Excel admite ~1M filas; el CSV no tiene límite
+        limite = FILAS_MAX_EXCEL - 3 if formato != 'csv' else None
+        filas = _iterar_auditoria_exportar(filters, limite)
+        return stream_report(formato, "Reporte de Auditoria", headers, filas, keys)
 
     def registrar_evento(self, user_id: UUID, evento: str, detail: str = None, ip: str = None, ua: str = None, origen: str = 'SISTEMA'):
         return self.repo.registrar_evento(user_id, evento, detail, ip, ua, origen)
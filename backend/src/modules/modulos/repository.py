@@ -4,12 +4,16 @@ from uuid import UUID
 from datetime import date
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ...database.cache_referencia import cache_referencia, MODULOS
 
 class RepositorioModulos:
     def __init__(self, db=Depends(get_db)):
         self.db = db
 
     def listar_todos(self) -> List[dict]:
+        return cache_referencia.obtener_o_cargar(MODULOS, "todos", self._cargar_todos)
+
+    def _cargar_todos(self) -> List[dict]:
         with self.db.cursor() as cur:
             cur.execute("SELECT * FROM sistema_facturacion.modulo ORDER BY orden ASC")
             return [dict(row) for row in cur.fetchall()]
@@ -34,6 +38,7 @@ class RepositorioModulos:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            cache_referencia.notificar_cambio(cur, MODULOS)
             return dict(row) if row else None
 
     def actualizar(self, id: UUID, data: dict) -> Optional[dict]:
@@ -44,6 +49,8 @@ class RepositorioModulos:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            if row:
+                cache_referencia.notificar_cambio(cur, MODULOS)
             return dict(row) if row else None
             
     # --- Modulo Plan ---
@@ -56,9 +63,14 @@ class RepositorioModulos:
         """
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(plan_id), str(modulo_id), incluido))
-            return cur.fetchone()
+            row = cur.fetchone()
+            cache_referencia.notificar_cambio(cur, MODULOS)
+            return row
 
     def listar_por_plan(self, plan_id: UUID) -> List[dict]:
+        return cache_referencia.obtener_o_cargar(MODULOS, ("plan", str(plan_id)), lambda: self._cargar_por_plan(plan_id))
+
+    def _cargar_por_plan(self, plan_id: UUID) -> List[dict]:
         query = """
             SELECT mp.*, m.nombre as modulo_nombre, m.codigo as modulo_codigo
             FROM sistema_facturacion.modulo_plan mp
@@ -3,9 +3,14 @@ from uuid import UUID
 from datetime import date, datetime
 from typing import List, Optional, Any
 from fastapi import Depends
+from psycopg2.extras import execute_values
 
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ..reportes.usuarios.R_027.declaracion_cache import declaracion_iva_cache
+
+# Campos que alimentan los casilleros 402/412 del Formulario 104
+CAMPOS_DECLARACION_IVA = ('estado_sri', 'fecha_emision', 'subtotal_15_iva', 'iva_total', 'factura_id')
 
 class RepositorioNotasCredito:
     """
@@ -34,6 +39,13 @@ class RepositorioNotasCredito:
     # NOTA DE CRÉDITO (CABECERA)
     # =========================================================
 
+    def _invalidar_declaracion(self, cur, nota: dict, *fechas_anteriores):
+        """Descarta del cache de R_027 (en todos los workers) los períodos de la empresa que contienen la nota."""
+        cur.execute("SELECT empresa_id FROM sistema_facturacion.facturas WHERE id = %s", (str(nota['factura_id']),))
+        factura = cur.fetchone()
+        if factura:
+            declaracion_iva_cache.notificar_documento(cur, factura['empresa_id'], nota['fecha_emision'], *fechas_anteriores)
+
     def crear_nota_credito(self, data: dict) -> Optional[dict]:
         """Crea el encabezado de una nota de crédito."""
         prepared = self._prepare_data(data)
@@ -49,6 +61,8 @@ class RepositorioNotasCredito:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            if row:
+                self._invalidar_declaracion(cur, row)
             return self.obtener_por_id(row['id']) if row else None
 
     def obtener_por_id(self, id: UUID) -> Optional[dict]:
@@ -115,11 +129,45 @@ class RepositorioNotasCredito:
             WHERE id = %s 
             RETURNING *
         """
+        afecta_declaracion = any(k in CAMPOS_DECLARACION_IVA for k in prepared)
         with db_transaction(self.db) as cur:
+            anterior = None
+            if 'fecha_emision' in prepared:
+                cur.execute("SELECT fecha_emision FROM sistema_facturacion.notas_credito WHERE id = %s FOR UPDATE", (str(id),))
+                anterior = cur.fetchone()
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            if row and afecta_declaracion:
+                self._invalidar_declaracion(cur, row, *([anterior['fecha_emision']] if anterior else []))
             return dict(row) if row else None
 
+    def actualizar_estados_sri_lote(self, cambios: List[dict], cur) -> List[dict]:
+        """
+        Aplica en un solo UPDATE las respuestas del SRI a notas PENDIENTE/RECIBIDO
+        (id, clave_acceso, estado_sri, numero_autorizacion). Debe llamarse con el
+        cursor de la transacción.
+        """
+        if not cambios:
+            return []
+        valores = [
+            (str(c['id']), c['clave_acceso'], c['estado_sri'], c.get('numero_autorizacion'))
+            for c in cambios
+        ]
+        query = """
+            UPDATE sistema_facturacion.notas_credito nc
+            SET estado_sri = v.estado_sri,
+                numero_autorizacion = COALESCE(v.numero_autorizacion, nc.numero_autorizacion),
+                updated_at = NOW()
+            FROM (VALUES %s) AS v(id, clave_acceso, estado_sri, numero_autorizacion)
+            WHERE nc.id = v.id::uuid AND nc.clave_acceso = v.clave_acceso
+              AND nc.estado_sri IN ('PENDIENTE', 'RECIBIDO')
+            RETURNING nc.*, (SELECT f.empresa_id FROM sistema_facturacion.facturas f WHERE f.id = nc.factura_id) AS empresa_id
+        """
+        filas = [dict(r) for r in execute_values(cur, query, valores, fetch=True)]
+        for fila in filas:
+            declaracion_iva_cache.notificar_documento(cur, fila['empresa_id'], fila['fecha_emision'])
+        return filas
+
     # =========================================================
     # DETALLE DE NOTA DE CRÉDITO
     # =========================================================
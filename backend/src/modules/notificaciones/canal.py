@@ -0,0 +1,128 @@
+"""
+Canal de notificaciones en tiempo real (LISTEN/NOTIFY → SSE).
+
+Los repositorios emiten un `pg_notify` en la misma transacción que crea una
+notificación o cambia el conteo de no leídas; Postgres lo entrega al hacer
+commit, en cualquier worker. Cada proceso corre una tarea en el event loop con
+`LISTEN` sobre una conexión psycopg 3 dedicada y reparte los eventos a las
+colas de los streams abiertos del usuario destinatario. Un stream no ocupa
+conexión de base mientras espera.
+
+Si la escucha se cae, al reconectar se envía `resincronizar` a todos los streams
+(pudieron perderse eventos) para que el cliente vuelva a pedir el conteo.
+"""
+
+import json
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+from psycopg import AsyncConnection, sql
+
+from ...config.env import env
+from ...database.pool_async import conninfo_async
+
+logger = logging.getLogger("facturacion_api")
+
+REINTENTO_SEGUNDOS = 5.0
+# Eventos pendientes por stream; un cliente que no lee pierde los más viejos
+MAX_EVENTOS_COLA = 100
+
+
+class CanalNotificaciones:
+    def __init__(self, canal: str):
+        self.canal = canal
+        self._suscriptores: Dict[str, Set[asyncio.Queue]] = {}
+        self._tarea: Optional[asyncio.Task] = None
+        self.escuchando = False
+        self._eventos = 0
+        self._descartados = 0
+
+    @property
+    def activo(self) -> bool:
+        return self._tarea is not None and not self._tarea.done()
+
+    def iniciar(self):
+        """Arranca la escucha (hook de arranque; requiere el event loop)."""
+        if not self.activo:
+            self._tarea = asyncio.create_task(self._bucle(), name="canal-notificaciones")
+
+    async def detener(self):
+        if self._tarea:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+            self._tarea = None
+
+    @asynccontextmanager
+    async def suscribir(self, user_id) -> AsyncIterator[asyncio.Queue]:
+        """Cola de eventos del usuario mientras dure el bloque (un stream abierto)."""
+        cola: asyncio.Queue = asyncio.Queue(maxsize=MAX_EVENTOS_COLA)
+        clave = str(user_id)
+        self._suscriptores.setdefault(clave, set()).add(cola)
+        try:
+            yield cola
+        finally:
+            colas = self._suscriptores.get(clave)
+            if colas is not None:
+                colas.discard(cola)
+                if not colas:
+                    self._suscriptores.pop(clave, None)
+
+    def _entregar(self, cola: asyncio.Queue, evento: dict):
+        if cola.full():
+            cola.get_nowait()
+            self._descartados += 1
+        cola.put_nowait(evento)
+
+    def publicar(self, payload: str):
+        try:
+            evento = json.loads(payload)
+        except ValueError:
+            logger.warning(f"[NOTIFICACIONES] Payload inválido en '{self.canal}'")
+            return
+        self._eventos += 1
+        for cola in self._suscriptores.get(evento.get("user_id"), ()):
+            self._entregar(cola, evento)
+
+    def _resincronizar(self):
+        for colas in self._suscriptores.values():
+            for cola in colas:
+                self._entregar(cola, {"tipo": "resincronizar"})
+
+    async def _bucle(self):
+        primera = True
+        while True:
+            try:
+                async with await AsyncConnection.connect(conninfo_async(), autocommit=True) as conn:
+                    await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.canal)))
+                    self.escuchando = True
+                    if not primera:
+                        self._resincronizar()
+                    logger.info(f"[NOTIFICACIONES] Escuchando el canal '{self.canal}'")
+                    async for notificacion in conn.notifies():
+                        self.publicar(notificacion.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[NOTIFICACIONES] Escucha interrumpida: {str(e)}")
+            finally:
+                self.escuchando = False
+            primera = False
+            await asyncio.sleep(REINTENTO_SEGUNDOS)
+
+    def estadisticas(self) -> dict:
+        return {
+            "escuchando": self.escuchando,
+            "usuarios_conectados": len(self._suscriptores),
+            "streams_abiertos": sum(len(c) for c in self._suscriptores.values()),
+            "eventos_recibidos": self._eventos,
+            "eventos_descartados": self._descartados,
+        }
+
+
+# Instancia global por proceso
+canal_notificaciones = CanalNotificaciones(canal=env.NOTIFICACIONES_CANAL)
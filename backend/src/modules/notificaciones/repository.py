@@ -1,57 +1,182 @@
 import json
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from uuid import UUID
 from fastapi import Depends
+from psycopg2.extras import execute_values
+from ...config.env import env
 from ...database.session import get_db
 from ...database.transaction import db_transaction
 
+# Columnas que recibe cada notificación al crearse
+COLUMNAS_CREACION = ("user_id", "titulo", "mensaje", "tipo", "prioridad", "metadata")
+
+# pg_notify acepta hasta 8000 bytes; por encima se envía solo el id
+MAX_PAYLOAD_NOTIFY = 7500
+
+# Consultas compartidas con RepositorioNotificacionesAsync (repository_async.py)
+def sql_listar_por_usuario(solo_no_leidas: bool, con_cursor: bool = False) -> str:
+    query = "SELECT * FROM sistema_facturacion.notificaciones WHERE user_id = %s"
+    if solo_no_leidas:
+        query += " AND leido = false"
+    if con_cursor:
+        query += " AND (created_at, id) < (%s, %s)"
+    return query + " ORDER BY created_at DESC, id DESC LIMIT %s"
+
+def params_listado(user_id: UUID, limit: int, cursor: Optional[tuple] = None) -> tuple:
+    """Parámetros de `sql_listar_por_usuario`; `cursor` es (created_at, id) de la última fila leída."""
+    if cursor:
+        return (str(user_id), cursor[0], str(cursor[1]), limit)
+    return (str(user_id), limit)
+
+# Marca la notificación y devuelve si ya estaba leída (solo entonces no se descuenta)
+SQL_MARCAR_LEIDA = """
+    UPDATE sistema_facturacion.notificaciones n
+    SET leido = true, leido_at = NOW()
+    FROM (
+        SELECT id, leido FROM sistema_facturacion.notificaciones
+        WHERE id = %s AND user_id = %s
+        FOR UPDATE
+    ) previa
+    WHERE n.id = previa.id
+    RETURNING n.*, previa.leido AS estaba_leida
+"""
+
+SQL_MARCAR_TODAS_LEIDAS = "UPDATE sistema_facturacion.notificaciones SET leido = true, leido_at = NOW() WHERE user_id = %s AND leido = false"
+
+SQL_DESCONTAR_NO_LEIDAS = """
+    UPDATE sistema_facturacion.notificaciones_conteo
+    SET no_leidas = GREATEST(no_leidas - %s, 0), updated_at = NOW()
+    WHERE user_id = %s
+    RETURNING no_leidas
+"""
+
+SQL_CONTAR_NO_LEIDAS = "SELECT no_leidas FROM sistema_facturacion.notificaciones_conteo WHERE user_id = %s"
+
+# Un incremento por destinatario, en orden de user_id para no cruzar bloqueos entre lotes
+SQL_SUMAR_NO_LEIDAS = """
+    INSERT INTO sistema_facturacion.notificaciones_conteo (user_id, no_leidas)
+    SELECT u, COUNT(*) FROM unnest(%s::uuid[]) AS u GROUP BY u ORDER BY u
+    ON CONFLICT (user_id) DO UPDATE SET
+        no_leidas = notificaciones_conteo.no_leidas + EXCLUDED.no_leidas,
+        updated_at = NOW()
+    RETURNING user_id, no_leidas
+"""
+
+SQL_NOTIFICAR = "SELECT pg_notify(%s, evento) FROM unnest(%s::text[]) AS evento"
+
+def evento_conteo(user_id, no_leidas: int) -> str:
+    """Payload de NOTIFY con el nuevo conteo de no leídas de un usuario."""
+    return json.dumps({"tipo": "conteo", "user_id": str(user_id), "no_leidas": no_leidas})
+
+def evento_notificacion(row: dict, no_leidas: int) -> str:
+    """Payload de NOTIFY de una notificación nueva (solo el id si no cabe en pg_notify)."""
+    evento = {"tipo": "notificacion", "user_id": str(row['user_id']), "no_leidas": no_leidas, "notificacion": row}
+    payload = json.dumps(evento, default=str)
+    if len(payload.encode()) > MAX_PAYLOAD_NOTIFY:
+        evento["notificacion"] = {"id": str(row['id'])}
+        payload = json.dumps(evento)
+    return payload
+
+def fila_marcada(row) -> Tuple[Optional[dict], bool]:
+    """(notificación, descontar) a partir de la fila de SQL_MARCAR_LEIDA."""
+    if not row:
+        return None, False
+    data = dict(row)
+    return data, not data.pop('estaba_leida')
+
 class RepositorioNotificaciones:
     def __init__(self, db=Depends(get_db)):
         self.db = db
 
     def crear(self, data: dict) -> Optional[dict]:
         """Crear una notificación"""
-        fields = list(data.keys())
-        values = list(data.values())
+        filas = self.crear_lote([data])
+        return filas[0] if filas else None
+
+    def crear_lote(self, notificaciones: List[dict]) -> List[dict]:
+        """
+        Crea varias notificaciones en una sola transacción: INSERT multi-fila,
+        un incremento del contador por destinatario y un NOTIFY por notificación,
+        que Postgres entrega al hacer commit.
+        """
+        if not notificaciones:
+            return []
         # Serialize dicts to JSON strings for psycopg2
-        processed_values = [json.dumps(v) if isinstance(v, dict) else v for v in values]
-        placeholders = ["%s"] * len(fields)
-        query = f"INSERT INTO sistema_facturacion.notificaciones ({', '.join(fields)}) VALUES ({', '.join(placeholders)}) RETURNING *"
+        valores = [
+            tuple(json.dumps(v) if isinstance(v, dict) else v for v in (n.get(c) for c in COLUMNAS_CREACION))
+            for n in notificaciones
+        ]
+        query = f"INSERT INTO sistema_facturacion.notificaciones ({', '.join(COLUMNAS_CREACION)}) VALUES %s RETURNING *"
         with db_transaction(self.db) as cur:
-            cur.execute(query, tuple(processed_values))
-            row = cur.fetchone()
-            return dict(row) if row else None
-
-    def listar_por_usuario(self, user_id: UUID, solo_no_leidas: bool = False) -> List[dict]:
-        """Listar notificaciones de un usuario"""
-        query = "SELECT * FROM sistema_facturacion.notificaciones WHERE user_id = %s"
-        if solo_no_leidas:
-            query += " AND leido = false"
-        query += " ORDER BY created_at DESC"
+            filas = [dict(r) for r in execute_values(cur, query, valores, fetch=True)]
+            cur.execute(SQL_SUMAR_NO_LEIDAS, ([str(f['user_id']) for f in filas],))
+            conteos = {str(r['user_id']): r['no_leidas'] for r in cur.fetchall()}
+            eventos = [evento_notificacion(f, conteos[str(f['user_id'])]) for f in filas]
+            cur.execute(SQL_NOTIFICAR, (env.NOTIFICACIONES_CANAL, eventos))
+            return filas
 
+    def listar_por_usuario(
+        self,
+        user_id: UUID,
+        solo_no_leidas: bool = False,
+        limit: int = 50,
+        cursor: Optional[tuple] = None
+    ) -> List[dict]:
+        """Listar notificaciones de un usuario, de la más reciente a la más antigua (keyset con `cursor`)"""
         with self.db.cursor() as cur:
-            cur.execute(query, (str(user_id),))
+            cur.execute(sql_listar_por_usuario(solo_no_leidas, bool(cursor)), params_listado(user_id, limit, cursor))
             return [dict(row) for row in cur.fetchall()]
 
     def marcar_como_leida(self, id: UUID, user_id: UUID) -> Optional[dict]:
         """Marcar notificación como leída"""
-        query = "UPDATE sistema_facturacion.notificaciones SET leido = true, leido_at = NOW() WHERE id = %s AND user_id = %s RETURNING *"
         with db_transaction(self.db) as cur:
-            cur.execute(query, (str(id), str(user_id)))
-            row = cur.fetchone()
-            return dict(row) if row else None
+            cur.execute(SQL_MARCAR_LEIDA, (str(id), str(user_id)))
+            data, descontar = fila_marcada(cur.fetchone())
+            if descontar:
+                cur.execute(SQL_DESCONTAR_NO_LEIDAS, (1, str(user_id)))
+                row = cur.fetchone()
+                if row:
+                    cur.execute(SQL_NOTIFICAR, (env.NOTIFICACIONES_CANAL, [evento_conteo(user_id, row['no_leidas'])]))
+            return data
 
     def marcar_todas_leidas(self, user_id: UUID) -> bool:
         """Marcar todas las notificaciones como leídas"""
-        query = "UPDATE sistema_facturacion.notificaciones SET leido = true, leido_at = NOW() WHERE user_id = %s"
         with db_transaction(self.db) as cur:
-            cur.execute(query, (str(user_id),))
+            cur.execute(SQL_MARCAR_TODAS_LEIDAS, (str(user_id),))
+            if cur.rowcount:
+                cur.execute(SQL_DESCONTAR_NO_LEIDAS, (cur.rowcount, str(user_id)))
+                row = cur.fetchone()
+                if row:
+                    cur.execute(SQL_NOTIFICAR, (env.NOTIFICACIONES_CANAL, [evento_conteo(user_id, row['no_leidas'])]))
             return True
 
     def contar_no_leidas(self, user_id: UUID) -> int:
-        """Contar notificaciones no leídas"""
-        query = "SELECT COUNT(*) as count FROM sistema_facturacion.notificaciones WHERE user_id = %s AND leido = false"
+        """Contar notificaciones no leídas (contador mantenido, sin COUNT)"""
         with self.db.cursor() as cur:
-            cur.execute(query, (str(user_id),))
+            cur.execute(SQL_CONTAR_NO_LEIDAS, (str(user_id),))
             row = cur.fetchone()
-            return row['count'] if row else 0
+            return row['no_leidas'] if row else 0
+
+    def conciliar_conteos(self) -> int:
+        """Recalcula `notificaciones_conteo` desde las notificaciones y retorna cuántos usuarios se corrigieron."""
+        with db_transaction(self.db) as cur:
+            cur.execute("""
+                INSERT INTO sistema_facturacion.notificaciones_conteo (user_id, no_leidas)
+                SELECT user_id, COUNT(*) FROM sistema_facturacion.notificaciones
+                WHERE leido = false
+                GROUP BY user_id
+                ON CONFLICT (user_id) DO UPDATE SET
+                    no_leidas = EXCLUDED.no_leidas,
+                    updated_at = NOW()
+                WHERE notificaciones_conteo.no_leidas <> EXCLUDED.no_leidas
+            """)
+            corregidos = cur.rowcount
+            cur.execute("""
+                UPDATE sistema_facturacion.notificaciones_conteo c
+                SET no_leidas = 0, updated_at = NOW()
+                WHERE c.no_leidas <> 0 AND NOT EXISTS (
+                    SELECT 1 FROM sistema_facturacion.notificaciones n
+                    WHERE n.user_id = c.user_id AND n.leido = false
+                )
+            """)
+            return corregidos + cur.rowcount
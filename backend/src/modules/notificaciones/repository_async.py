@@ -0,0 +1,57 @@
+"""
+Lecturas y marcas de lectura de notificaciones sobre el pool asíncrono.
+La creación sigue en `RepositorioNotificaciones` (la usan servicios síncronos).
+"""
+
+from typing import List, Optional
+from uuid import UUID
+
+from ...config.env import env
+from ...database.transaction import transaccion_async
+from .repository import (
+    sql_listar_por_usuario, params_listado, fila_marcada, evento_conteo,
+    SQL_MARCAR_LEIDA, SQL_MARCAR_TODAS_LEIDAS, SQL_DESCONTAR_NO_LEIDAS, SQL_CONTAR_NO_LEIDAS, SQL_NOTIFICAR
+)
+
+
+class RepositorioNotificacionesAsync:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def listar_por_usuario(
+        self,
+        user_id: UUID,
+        solo_no_leidas: bool = False,
+        limit: int = 50,
+        cursor: Optional[tuple] = None
+    ) -> List[dict]:
+        async with self.conn.cursor() as cur:
+            await cur.execute(sql_listar_por_usuario(solo_no_leidas, bool(cursor)), params_listado(user_id, limit, cursor))
+            return [dict(row) for row in await cur.fetchall()]
+
+    async def _descontar(self, cur, cantidad: int, user_id: UUID):
+        await cur.execute(SQL_DESCONTAR_NO_LEIDAS, (cantidad, str(user_id)))
+        row = await cur.fetchone()
+        if row:
+            await cur.execute(SQL_NOTIFICAR, (env.NOTIFICACIONES_CANAL, [evento_conteo(user_id, row['no_leidas'])]))
+
+    async def marcar_como_leida(self, id: UUID, user_id: UUID) -> Optional[dict]:
+        async with transaccion_async(self.conn) as cur:
+            await cur.execute(SQL_MARCAR_LEIDA, (str(id), str(user_id)))
+            data, descontar = fila_marcada(await cur.fetchone())
+            if descontar:
+                await self._descontar(cur, 1, user_id)
+            return data
+
+    async def marcar_todas_leidas(self, user_id: UUID) -> bool:
+        async with transaccion_async(self.conn) as cur:
+            await cur.execute(SQL_MARCAR_TODAS_LEIDAS, (str(user_id),))
+            if cur.rowcount:
+                await self._descontar(cur, cur.rowcount, user_id)
+            return True
+
+    async def contar_no_leidas(self, user_id: UUID) -> int:
+        async with self.conn.cursor() as cur:
+            await cur.execute(SQL_CONTAR_NO_LEIDAS, (str(user_id),))
+            row = await cur.fetchone()
+            return row['no_leidas'] if row else 0
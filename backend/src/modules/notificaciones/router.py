@@ -1,43 +1,72 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from uuid import UUID
 
-from .services import ServicioNotificaciones
+from .services_async import ServicioNotificacionesAsync, eventos_usuario
 from .schemas import NotificacionLectura
 from ..autenticacion.dependencies import get_current_user
+from ...utils.paginacion import HEADER_SIGUIENTE_CURSOR
 
 router = APIRouter()
 
 @router.get("/", response_model=List[NotificacionLectura])
-def listar_notificaciones(
+async def listar_notificaciones(
+    response: Response,
     solo_no_leidas: bool = Query(False),
+    limit: int = Query(50, ge=1, le=200, description="Máximo de resultados"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (header X-Next-Cursor)"),
     current_user: dict = Depends(get_current_user),
-    service: ServicioNotificaciones = Depends()
+    service: ServicioNotificacionesAsync = Depends()
 ):
-    """Obtener historial de notificaciones del usuario actual"""
-    return service.obtener_notificaciones(current_user['id'], solo_no_leidas)
+    """
+    Obtener historial de notificaciones del usuario actual, de la más reciente a la más antigua.
+
+    Paginación: enviar en `cursor` el valor del header `X-Next-Cursor` de la respuesta anterior.
+    """
+    pagina = await service.obtener_notificaciones_paginado(current_user['id'], solo_no_leidas, limit, cursor)
+    if pagina["siguiente_cursor"]:
+        response.headers[HEADER_SIGUIENTE_CURSOR] = pagina["siguiente_cursor"]
+    return pagina["notificaciones"]
+
+@router.get("/stream")
+async def stream_notificaciones(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Server-Sent Events con las notificaciones nuevas y el conteo de no leídas
+    (eventos `conteo`, `notificacion` y `resincronizar`). Reemplaza el polling
+    de `/conteo-no-leidas`; requiere el header Authorization, así que el cliente
+    debe consumirlo con fetch en lugar de EventSource.
+    """
+    return StreamingResponse(
+        eventos_usuario(current_user['id'], request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/conteo-no-leidas")
-def obtener_conteo(
+async def obtener_conteo(
     current_user: dict = Depends(get_current_user),
-    service: ServicioNotificaciones = Depends()
+    service: ServicioNotificacionesAsync = Depends()
 ):
     """Obtener el número de notificaciones sin leer"""
-    return {"count": service.obtener_conteo_no_leidas(current_user['id'])}
+    return {"count": await service.obtener_conteo_no_leidas(current_user['id'])}
 
 @router.patch("/{notificacion_id}/marcar-leida", response_model=Optional[NotificacionLectura])
-def marcar_como_leida(
+async def marcar_como_leida(
     notificacion_id: UUID,
     current_user: dict = Depends(get_current_user),
-    service: ServicioNotificaciones = Depends()
+    service: ServicioNotificacionesAsync = Depends()
 ):
     """Marcar una notificación específica como leída"""
-    return service.marcar_como_leida(notificacion_id, current_user['id'])
+    return await service.marcar_como_leida(notificacion_id, current_user['id'])
 
 @router.patch("/marcar-todas-leidas")
-def marcar_todas_como_leidas(
+async def marcar_todas_como_leidas(
     current_user: dict = Depends(get_current_user),
-    service: ServicioNotificaciones = Depends()
+    service: ServicioNotificacionesAsync = Depends()
 ):
     """Marcar todas las notificaciones del usuario como leídas"""
-    return {"success": service.marcar_todas_como_leidas(current_user['id'])}
+    return {"success": await service.marcar_todas_como_leidas(current_user['id'])}
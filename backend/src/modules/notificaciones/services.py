@@ -11,8 +11,12 @@ class ServicioNotificaciones:
     def crear_notificacion(self, data: NotificacionCreate) -> Optional[dict]:
         return self.repo.crear(data.model_dump())
 
-    def obtener_notificaciones(self, user_id: UUID, solo_no_leidas: bool = False) -> List[dict]:
-        return self.repo.listar_por_usuario(user_id, solo_no_leidas)
+    def crear_notificaciones(self, datos: List[NotificacionCreate]) -> List[dict]:
+        """Varios destinatarios en un INSERT y un commit (un evento push por notificación)."""
+        return self.repo.crear_lote([d.model_dump() for d in datos])
+
+    def obtener_notificaciones(self, user_id: UUID, solo_no_leidas: bool = False, limit: int = 50) -> List[dict]:
+        return self.repo.listar_por_usuario(user_id, solo_no_leidas, limit)
 
     def marcar_como_leida(self, id: UUID, user_id: UUID) -> Optional[dict]:
         return self.repo.marcar_como_leida(id, user_id)
@@ -0,0 +1,63 @@
+import json
+import asyncio
+from fastapi import Depends, Request
+from typing import AsyncIterator, Optional
+from uuid import UUID
+
+from ...config.env import env
+from ...database.pool_async import get_db_async, conexion_pool_async
+from ...utils.paginacion import decodificar_cursor, cursor_siguiente
+from .canal import canal_notificaciones
+from .repository_async import RepositorioNotificacionesAsync
+
+class ServicioNotificacionesAsync:
+    """Variante de `ServicioNotificaciones` para los endpoints `async def` (pool asíncrono)."""
+
+    def __init__(self, conn=Depends(get_db_async)):
+        self.repo = RepositorioNotificacionesAsync(conn)
+
+    async def obtener_notificaciones_paginado(
+        self,
+        user_id: UUID,
+        solo_no_leidas: bool = False,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> dict:
+        notificaciones = await self.repo.listar_por_usuario(user_id, solo_no_leidas, limit, decodificar_cursor(cursor))
+        return {"notificaciones": notificaciones, "siguiente_cursor": cursor_siguiente(notificaciones, limit)}
+
+    async def marcar_como_leida(self, id: UUID, user_id: UUID) -> Optional[dict]:
+        return await self.repo.marcar_como_leida(id, user_id)
+
+    async def marcar_todas_como_leidas(self, user_id: UUID) -> bool:
+        return await self.repo.marcar_todas_leidas(user_id)
+
+    async def obtener_conteo_no_leidas(self, user_id: UUID) -> int:
+        return await self.repo.contar_no_leidas(user_id)
+
+
+def evento_sse(tipo: str, datos: dict) -> str:
+    return f"event: {tipo}\ndata: {json.dumps(datos, default=str)}\n\n"
+
+
+async def eventos_usuario(user_id: UUID, request: Request) -> AsyncIterator[str]:
+    """
+    Stream SSE del usuario: primero el conteo actual de no leídas y luego cada
+    evento del canal (`notificacion`, `conteo`, `resincronizar`). Envía un
+    comentario de keep-alive cada NOTIFICACIONES_PING_SEGUNDOS sin eventos.
+    """
+    # Suscrito antes de leer el conteo: lo que llegue entretanto queda en la cola
+    async with canal_notificaciones.suscribir(user_id) as cola:
+        async with conexion_pool_async() as conn:
+            no_leidas = await RepositorioNotificacionesAsync(conn).contar_no_leidas(user_id)
+        yield evento_sse("conteo", {"no_leidas": no_leidas})
+
+        while not await request.is_disconnected():
+            try:
+                evento = await asyncio.wait_for(cola.get(), timeout=env.NOTIFICACIONES_PING_SEGUNDOS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            # El mismo evento llega a todas las pestañas del usuario: no se modifica
+            datos = {k: v for k, v in evento.items() if k not in ("tipo", "user_id")}
+            yield evento_sse(evento["tipo"], datos)
@@ -3,6 +3,7 @@ from typing import List, Optional
 from uuid import UUID
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ...database.cursores import iterar_consulta
 
 class RepositorioProductos:
     def __init__(self, db=Depends(get_db)):
@@ -183,6 +184,5 @@ class RepositorioProductos:
              params.append(fecha_fin)
              
         query += " ORDER BY fecha_movimiento ASC"
-        with self.db.cursor() as cur:
-            cur.execute(query, tuple(params))
-            return [dict(row) for row in cur.fetchall()]
+        # Cursor de servidor: una sola copia (dict) por movimiento en memoria
+        return [dict(fila) for fila in iterar_consulta(self.db, query, tuple(params), nombre="kardex_producto")]
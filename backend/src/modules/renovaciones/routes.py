@@ -12,7 +12,7 @@ from ..autenticacion.dependencies import get_current_user, requerir_superadmin
 router = APIRouter()
 
 @router.post("/", response_model=SolicitudRenovacionLectura)
-async def solicitar_renovacion(
+def solicitar_renovacion(
     data: SolicitudRenovacionCreate,
     current_user: dict = Depends(get_current_user),
     service: ServicioRenovaciones = Depends()
@@ -29,7 +29,7 @@ async def solicitar_renovacion(
     return service.solicitar_renovacion(user_id, data)
 
 @router.get("/", response_model=List[SolicitudRenovacionLectura])
-async def listar_solicitudes(
+def listar_solicitudes(
     historial: bool = False,
     current_user: dict = Depends(get_current_user),
     service: ServicioRenovaciones = Depends()
@@ -38,7 +38,7 @@ async def listar_solicitudes(
     return service.listar_solicitudes(current_user, historial)
 
 @router.patch("/{id}/procesar", response_model=SolicitudRenovacionLectura)
-async def procesar_solicitud(
+def procesar_solicitud(
     id: UUID,
     data: SolicitudRenovacionProcess,
     current_user: dict = Depends(requerir_superadmin),
@@ -77,12 +77,14 @@ class ServicioRenovaciones:
         }
         nueva_solicitud = self.repo.crear_solicitud(sol_data)
         
-        # 5. Notificar a Superadmins
+        # 5-7. Notificar a superadmins, administradores de la empresa y al vendedor
+        # (un solo INSERT y commit para todos los destinatarios)
+        notificaciones = []
         admin_user_ids = self.repo.listar_user_ids_superadmins()
         tipo_label = "Renovación" if sol_data['tipo'] == 'RENOVACION' else "Cambio de Plan (Upgrade)"
         tipo_notif = sol_data['tipo'] # Ahora que el DB lo acepta, usamos el tipo real
         for admin_id in admin_user_ids:
-            self.notif_service.crear_notificacion(NotificacionCreate(
+            notificaciones.append(NotificacionCreate(
                 user_id=admin_id,
                 titulo=f"Nueva {tipo_label} de Vendedor",
                 mensaje=f"Un vendedor ha solicitado {tipo_label.lower()} para la empresa '{nueva_solicitud.get('empresa_nombre', 'Cliente')}'. Por favor revisa los detalles.",
@@ -91,10 +93,10 @@ class ServicioRenovaciones:
                 metadata={"solicitud_id": str(nueva_solicitud['id'])}
             ))
 
-        # 6. Notificar a Administradores de la Empresa
+        # Administradores de la Empresa
         empresa_admins = self.repo.listar_user_ids_admins_empresa(empresa_id)
         for emp_admin_id in empresa_admins:
-            self.notif_service.crear_notificacion(NotificacionCreate(
+            notificaciones.append(NotificacionCreate(
                 user_id=emp_admin_id,
                 titulo=f"Solicitud de {tipo_label} Iniciada",
                 mensaje=f"Se ha iniciado una solicitud de {tipo_label.lower()} para tu empresa. Estamos procesando tu pedido.",
@@ -103,8 +105,8 @@ class ServicioRenovaciones:
                 metadata={"solicitud_id": str(nueva_solicitud['id'])}
             ))
 
-        # 7. Notificar al Vendedor (Autonotificación)
-        self.notif_service.crear_notificacion(NotificacionCreate(
+        # Vendedor (Autonotificación)
+        notificaciones.append(NotificacionCreate(
             user_id=vendor_user_id,
             titulo="Solicitud Enviada",
             mensaje=f"Has enviado correctamente una solicitud de renovación para la empresa '{nueva_solicitud['empresa_nombre']}'.",
@@ -112,6 +114,7 @@ class ServicioRenovaciones:
             prioridad="BAJA",
             metadata={"solicitud_id": str(nueva_solicitud['id'])}
         ))
+        self.notif_service.crear_notificaciones(notificaciones)
 
         return nueva_solicitud
 
@@ -134,6 +137,8 @@ class ServicioRenovaciones:
             "fecha_procesamiento": datetime.now()
         }
         
+        # Notificaciones del resultado: un solo INSERT y commit al final
+        notificaciones = []
         if data.estado == 'ACEPTADA':
             # --- Lógica de Renovación ---
             plan = self.repo_suscripciones.obtener_plan_por_id(solicitud['plan_id'])
@@ -215,7 +220,7 @@ class ServicioRenovaciones:
             admin_ids = self.repo.listar_user_ids_admins_empresa(empresa_id)
             for admin_user_id in admin_ids:
                 mensaje_empresa = f"Tu renovación al plan {plan['nombre']} ha sido aprobada." if solicitud['tipo'] == 'RENOVACION' else f"Tu cambio de plan al plan {plan['nombre']} ha sido aprobado. ¡Disfruta de tus nuevas capacidades!"
-                self.notif_service.crear_notificacion(NotificacionCreate(
+                notificaciones.append(NotificacionCreate(
                     user_id=admin_user_id,
                     titulo=f"{tipo_label_notif} Exitosa",
                     mensaje=mensaje_empresa,
@@ -228,7 +233,7 @@ class ServicioRenovaciones:
             if solicitud['vendedor_id']:
                 vendedor_info = self.repo.obtener_vendedor_por_empresa(empresa_id)
                 if vendedor_info:
-                    self.notif_service.crear_notificacion(NotificacionCreate(
+                    notificaciones.append(NotificacionCreate(
                         user_id=vendedor_info['user_id'],
                         titulo=f"{tipo_label_notif} Aprobada",
                         mensaje=f"La {tipo_label_notif.lower()} de la empresa '{solicitud['empresa_nombre']}' ha sido aprobada.",
@@ -240,7 +245,7 @@ class ServicioRenovaciones:
             # Notificar a Superadmins (Visibilidad para todos)
             superadmin_ids = self.repo.listar_user_ids_superadmins()
             for sa_id in superadmin_ids:
-                self.notif_service.crear_notificacion(NotificacionCreate(
+                notificaciones.append(NotificacionCreate(
                     user_id=sa_id,
                     titulo=f"{tipo_label_notif} Procesada",
                     mensaje=f"Se ha aprobado la {tipo_label_notif.lower()} de la empresa '{solicitud['empresa_nombre']}'.",
@@ -253,7 +258,7 @@ class ServicioRenovaciones:
             # Si es RECHAZADA, notificar a los administradores de la empresa
             admin_ids = self.repo.listar_user_ids_admins_empresa(empresa_id)
             for admin_user_id in admin_ids:
-                self.notif_service.crear_notificacion(NotificacionCreate(
+                notificaciones.append(NotificacionCreate(
                     user_id=admin_user_id,
                     titulo="Solicitud de Renovación Rechazada",
                     mensaje=f"Tu solicitud de renovación ha sido rechazada. Motivo: {data.motivo_rechazo}",
@@ -266,7 +271,7 @@ class ServicioRenovaciones:
             if solicitud['vendedor_id']:
                 vendedor_info = self.repo.obtener_vendedor_por_empresa(empresa_id)
                 if vendedor_info:
-                    self.notif_service.crear_notificacion(NotificacionCreate(
+                    notificaciones.append(NotificacionCreate(
                         user_id=vendedor_info['user_id'],
                         titulo="Renovación Rechazada",
                         mensaje=f"La solicitud de renovación para '{solicitud['empresa_nombre']}' ha sido rechazada. Motivo: {data.motivo_rechazo}",
@@ -278,7 +283,7 @@ class ServicioRenovaciones:
             # Notificar a Superadmins (Visibilidad para todos)
             superadmin_ids = self.repo.listar_user_ids_superadmins()
             for sa_id in superadmin_ids:
-                self.notif_service.crear_notificacion(NotificacionCreate(
+                notificaciones.append(NotificacionCreate(
                     user_id=sa_id,
                     titulo="Renovación Rechazada",
                     mensaje=f"Se ha rechazado la solicitud de renovación de '{solicitud['empresa_nombre']}'.",
@@ -287,6 +292,7 @@ class ServicioRenovaciones:
                     metadata={"solicitud_id": str(solicitud_id)}
                 ))
 
+        self.notif_service.crear_notificaciones(notificaciones)
         return self.repo.actualizar_estado(solicitud_id, update_data)
 
     def listar_solicitudes(self, usuario: dict, ver_historial: bool = False) -> List[dict]:
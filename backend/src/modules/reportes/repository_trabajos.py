@@ -0,0 +1,172 @@
+"""
+Repositorio de trabajos de generación de reportes (tabla trabajos_reporte).
+
+Los pedidos idénticos en curso se deduplican con el índice único parcial
+sobre `huella`, igual que la cola de emisión SRI hace con la factura.
+"""
+
+import json
+from fastapi import Depends
+from typing import List, Optional, Set, Tuple
+from uuid import UUID
+
+from ...database.session import get_db
+from ...database.transaction import db_transaction
+
+ESTADOS_ACTIVOS = ('PENDIENTE', 'PROCESANDO')
+
+CAMPOS_ESTADO = """
+    id, empresa_id, vendedor_id, usuario_id, nombre, tipo, formato, parametros,
+    estado, progreso, url_descarga, tamano_bytes, ultimo_error, expira_at,
+    created_at, updated_at, iniciado_at, finalizado_at
+"""
+
+
+class RepositorioTrabajosReporte:
+    def __init__(self, db=Depends(get_db)):
+        self.db = db
+
+    def encolar(self, datos: dict) -> Tuple[dict, bool]:
+        """
+        Inserta el trabajo y retorna (trabajo, creado). Si ya hay uno en curso
+        con la misma huella, retorna ese con creado=False.
+        """
+        query = f"""
+            INSERT INTO sistema_facturacion.trabajos_reporte
+                (empresa_id, vendedor_id, usuario_id, nombre, tipo, formato, parametros, huella)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (huella) WHERE estado IN {ESTADOS_ACTIVOS} DO NOTHING
+            RETURNING {CAMPOS_ESTADO}
+        """
+        opcional = lambda v: str(v) if v else None
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (
+                opcional(datos.get('empresa_id')), opcional(datos.get('vendedor_id')),
+                opcional(datos.get('usuario_id')), datos['nombre'], datos['tipo'],
+                datos['formato'], json.dumps(datos.get('parametros') or {}, default=str),
+                datos['huella']
+            ))
+            row = cur.fetchone()
+            if row:
+                return dict(row), True
+
+        query = f"""
+            SELECT {CAMPOS_ESTADO} FROM sistema_facturacion.trabajos_reporte
+            WHERE huella = %s AND estado IN {ESTADOS_ACTIVOS}
+        """
+        with self.db.cursor() as cur:
+            cur.execute(query, (datos['huella'],))
+            row = cur.fetchone()
+        if row:
+            return dict(row), False
+        # Terminó entre el INSERT y la lectura: se encola de nuevo
+        return self.encolar(datos)
+
+    def obtener(self, trabajo_id: UUID) -> Optional[dict]:
+        query = f"SELECT {CAMPOS_ESTADO}, archivo FROM sistema_facturacion.trabajos_reporte WHERE id = %s"
+        with self.db.cursor() as cur:
+            cur.execute(query, (str(trabajo_id),))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def listar(self, empresa_id: Optional[UUID] = None, vendedor_id: Optional[UUID] = None, limite: int = 100) -> List[dict]:
+        query = f"SELECT {CAMPOS_ESTADO} FROM sistema_facturacion.trabajos_reporte"
+        params = []
+        if vendedor_id:
+            query += " WHERE vendedor_id = %s"
+            params.append(str(vendedor_id))
+        elif empresa_id:
+            query += " WHERE empresa_id = %s"
+            params.append(str(empresa_id))
+        query += " ORDER BY created_at DESC LIMIT %s"
+        params.append(limite)
+        with self.db.cursor() as cur:
+            cur.execute(query, tuple(params))
+            return [dict(row) for row in cur.fetchall()]
+
+    def iniciar(self, trabajo_id: UUID) -> bool:
+        """Pasa de PENDIENTE a PROCESANDO; False si ya lo tomó otro worker."""
+        query = """
+            UPDATE sistema_facturacion.trabajos_reporte
+            SET estado = 'PROCESANDO', progreso = 10, iniciado_at = NOW(), updated_at = NOW()
+            WHERE id = %s AND estado = 'PENDIENTE'
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (str(trabajo_id),))
+            return cur.rowcount == 1
+
+    def actualizar_progreso(self, trabajo_id: UUID, progreso: int):
+        query = """
+            UPDATE sistema_facturacion.trabajos_reporte
+            SET progreso = %s, updated_at = NOW()
+            WHERE id = %s AND estado = 'PROCESANDO'
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (progreso, str(trabajo_id)))
+
+    def completar(self, trabajo_id: UUID, archivo: str, url_descarga: str, tamano_bytes: int, ttl_horas: int):
+        query = """
+            UPDATE sistema_facturacion.trabajos_reporte
+            SET estado = 'COMPLETADO', progreso = 100,
+                archivo = %s, url_descarga = %s, tamano_bytes = %s,
+                expira_at = NOW() + make_interval(hours => %s),
+                finalizado_at = NOW(), updated_at = NOW()
+            WHERE id = %s
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (archivo, url_descarga, tamano_bytes, ttl_horas, str(trabajo_id)))
+
+    def fallar(self, trabajo_id: UUID, error: str, ttl_horas: int):
+        query = """
+            UPDATE sistema_facturacion.trabajos_reporte
+            SET estado = 'FALLIDO', ultimo_error = %s,
+                expira_at = NOW() + make_interval(hours => %s),
+                finalizado_at = NOW(), updated_at = NOW()
+            WHERE id = %s
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (error, ttl_horas, str(trabajo_id)))
+
+    def eliminar(self, trabajo_id: UUID) -> Optional[dict]:
+        """Borra el registro y retorna el archivo asociado (si lo había)."""
+        query = """
+            DELETE FROM sistema_facturacion.trabajos_reporte
+            WHERE id = %s
+            RETURNING id, archivo
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (str(trabajo_id),))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def purgar_expirados(self) -> List[str]:
+        """Borra los trabajos vencidos y retorna sus archivos."""
+        query = """
+            DELETE FROM sistema_facturacion.trabajos_reporte
+            WHERE expira_at < NOW()
+            RETURNING archivo
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query)
+            return [row['archivo'] for row in cur.fetchall() if row['archivo']]
+
+    def marcar_abandonados(self, minutos: int, ttl_horas: int) -> int:
+        """Falla los trabajos sin avance reciente (proceso reiniciado a mitad del render)."""
+        query = f"""
+            UPDATE sistema_facturacion.trabajos_reporte
+            SET estado = 'FALLIDO',
+                ultimo_error = 'Generación interrumpida; vuelva a solicitar el reporte',
+                expira_at = NOW() + make_interval(hours => %s),
+                finalizado_at = NOW(), updated_at = NOW()
+            WHERE estado IN {ESTADOS_ACTIVOS}
+              AND updated_at < NOW() - make_interval(mins => %s)
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (ttl_horas, minutos))
+            return cur.rowcount
+
+    def archivos_vigentes(self) -> Set[str]:
+        query = "SELECT archivo FROM sistema_facturacion.trabajos_reporte WHERE archivo IS NOT NULL"
+        with self.db.cursor() as cur:
+            cur.execute(query)
+            return {row['archivo'] for row in cur.fetchall()}
@@ -4,6 +4,7 @@ from datetime import datetime
 from uuid import UUID
 
 from .service import ServicioReportes
+from .trabajos import ServicioTrabajosReporte
 from .schemas import (
     ReporteLectura, ReporteCreacion
 )
@@ -11,6 +12,7 @@ from ..autenticacion.routes import obtener_usuario_actual, requerir_permiso, req
 from ...constants.permissions import PermissionCodes
 from ...constants.enums import AuthKeys
 from ...errors.app_error import AppError
+from ...utils.excel_generator import MEDIA_TYPE_CSV, MEDIA_TYPE_EXCEL
 
 router = APIRouter()
 
@@ -20,30 +22,40 @@ def _require_admin_empresa(usuario_actual: dict):
     if rol_codigo != "ADMIN_EMPRESA":
         raise AppError("Acceso restringido: solo administradores de empresa pueden ver este reporte.", 403)
 
+def _respuesta_archivo(trabajo: dict):
+    from fastapi.responses import FileResponse
+
+    media_types = {"pdf": "application/pdf", "csv": MEDIA_TYPE_CSV, "excel": MEDIA_TYPE_EXCEL}
+    return FileResponse(
+        path=trabajo["ruta"],
+        media_type=media_types[trabajo["formato"]],
+        filename=trabajo["archivo"]
+    )
+
 # --- RUTAS GENERALES (USUARIO EMPRESA) ---
 
 @router.get("/", response_model=List[ReporteLectura])
 def listar_reportes_usuario(
     usuario: dict = Depends(requerir_permiso(PermissionCodes.REPORTES_VER)),
-    servicio: ServicioReportes = Depends()
+    servicio: ServicioTrabajosReporte = Depends()
 ):
     """Lista todos los reportes generados por la empresa"""
-    return servicio.listar_reportes(usuario)
+    return servicio.listar(usuario)
 
-@router.post("/", response_model=ReporteLectura, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=ReporteLectura, status_code=status.HTTP_202_ACCEPTED)
 def generar_reporte_usuario(
     datos: ReporteCreacion,
     usuario: dict = Depends(requerir_permiso(PermissionCodes.REPORTES_EXPORTAR)),
-    servicio: ServicioReportes = Depends()
+    servicio: ServicioTrabajosReporte = Depends()
 ):
-    """Genera un nuevo reporte (Exportación)"""
-    return servicio.crear_reporte(datos, usuario)
+    """Encola la generación de un reporte; el avance se consulta con GET /{id}."""
+    return servicio.encolar(datos.tipo, datos.formato, datos.parametros, usuario, datos.nombre, datos.empresa_id)
 
 # Mover /exportar antes de /{id} para evitar conflicto con UUID
 @router.get("/exportar")
 def exportar_reporte_ventas(
     tipo: str,
-    formato: str, # 'pdf' o 'excel'
+    formato: str, # 'pdf', 'excel' o 'csv'
     fecha_inicio: Optional[str] = None,
     fecha_fin: Optional[str] = None,
     anio: Optional[int] = None,
@@ -80,8 +92,11 @@ def exportar_reporte_ventas(
     if formato == 'pdf':
         media_type = "application/pdf"
         filename += ".pdf"
+    elif formato == 'csv':
+        media_type = MEDIA_TYPE_CSV
+        filename += ".csv"
     else:
-        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        media_type = MEDIA_TYPE_EXCEL
         filename += ".xlsx"
 
     return StreamingResponse(
@@ -94,19 +109,28 @@ def exportar_reporte_ventas(
 def obtener_reporte_usuario(
     id: UUID,
     usuario: dict = Depends(requerir_permiso(PermissionCodes.REPORTES_VER)),
-    servicio: ServicioReportes = Depends()
+    servicio: ServicioTrabajosReporte = Depends()
 ):
-    """Obtiene el detalle de un reporte específico"""
-    return servicio.obtener_reporte(id, usuario)
+    """Estado, avance y enlace de descarga de un reporte"""
+    return servicio.obtener_estado(id, usuario)
+
+@router.get("/{id}/descargar")
+def descargar_reporte_usuario(
+    id: UUID,
+    usuario: dict = Depends(requerir_permiso(PermissionCodes.REPORTES_VER)),
+    servicio: ServicioTrabajosReporte = Depends()
+):
+    """Descarga el archivo de un reporte completado y vigente"""
+    return _respuesta_archivo(servicio.ruta_archivo(id, usuario))
 
 @router.delete("/{id}")
 def eliminar_reporte_usuario(
     id: UUID,
     usuario: dict = Depends(requerir_permiso(PermissionCodes.REPORTES_EXPORTAR)),
-    servicio: ServicioReportes = Depends()
+    servicio: ServicioTrabajosReporte = Depends()
 ):
-    """Elimina un reporte generado"""
-    servicio.eliminar_reporte(id, usuario)
+    """Elimina un reporte generado y su archivo"""
+    servicio.eliminar(id, usuario)
     return {"message": "Reporte eliminado correctamente"}
 
 # --- RUTAS MODULARIZADAS ---
@@ -6,6 +6,7 @@ from uuid import UUID
 class ReporteBase(BaseModel):
     nombre: str
     tipo: str # 'VENTAS', 'GASTOS', etc.
+    formato: str = 'pdf' # 'pdf', 'excel' o 'csv'
     parametros: Optional[Dict[str, Any]] = None
     url_descarga: Optional[str] = None
     estado: str = 'PENDIENTE'
@@ -17,7 +18,12 @@ class ReporteCreacion(ReporteBase):
 class ReporteLectura(ReporteBase):
     id: UUID
     empresa_id: Optional[UUID] = None
+    vendedor_id: Optional[UUID] = None
     usuario_id: Optional[UUID] = None
+    progreso: int = 0
+    tamano_bytes: Optional[int] = None
+    ultimo_error: Optional[str] = None
+    expira_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -1,9 +1,6 @@
 from fastapi import Depends
 from uuid import UUID
 from typing import List, Optional
-import csv
-import os
-import uuid
 from datetime import datetime, timedelta, date
 
 from .repository import RepositorioReportes
@@ -22,7 +19,7 @@ from .schemas import ReporteCreacion
 from ...constants.enums import AuthKeys
 from ...errors.app_error import AppError
 from ...utils.pdf_generator import render_to_pdf, inyectar_footer_contexto
-from ...utils.excel_generator import generate_excel_report
+from ...utils.excel_generator import stream_report
 
 class ServicioReportes:
     def __init__(
@@ -53,126 +50,51 @@ class ServicioReportes:
         self.svc_vendedor_reportes = svc_vendedor_reportes
         self.repo_empresas = repo_empresas
 
-    def crear_reporte(self, datos: ReporteCreacion, usuario_actual: dict):
-        is_superadmin = usuario_actual.get(AuthKeys.IS_SUPERADMIN)
-        is_vendedor = usuario_actual.get(AuthKeys.IS_VENDEDOR)
-        target_empresa_id = datos.empresa_id or usuario_actual.get('empresa_id')
-        target_usuario_id = datos.usuario_id or usuario_actual.get('id')
-        
-        datos_dict = datos.model_dump()
-        datos_dict['usuario_id'] = target_usuario_id
-
-        # Flujo de generación modular para Vendedor (Genera PDF)
-        if is_vendedor:
-            vendedor_id = usuario_actual.get('internal_vendedor_id')
-            vendedor_nombre = f"{usuario_actual.get('nombres', '')} {usuario_actual.get('apellidos', '')}"
-            if not vendedor_id: raise AppError("No autorizado como vendedor", 403)
-            
-            parametros = datos.parametros or {}
-
-            if datos.tipo == 'MIS_EMPRESAS':
-                filename = self.svc_vendedor_reportes.generar_reporte_mis_empresas(str(vendedor_id), vendedor_nombre, parametros)
-            elif datos.tipo == 'COMISIONES_MES':
-                filename = self.svc_vendedor_reportes.generar_reporte_mis_comisiones(str(vendedor_id), vendedor_nombre, parametros)
-            else:
-                # Otros reportes de vendedor si existieran
-                raise AppError(f"Tipo de reporte no soportado para vendedor: {datos.tipo}", 400)
-            
-            datos_dict['url_descarga'] = f"/static/reportes/{filename}"
-            datos_dict['estado'] = 'COMPLETADO'
-            datos_dict['empresa_id'] = target_empresa_id
-            
-            # Devolver objeto en memoria
-            datos_dict['id'] = uuid.uuid4()
-            datos_dict['created_at'] = datetime.now()
-            datos_dict['updated_at'] = datetime.now()
-            return datos_dict
-        elif is_superadmin:
-            parametros = datos.parametros or {}
-            fecha_inicio = parametros.get('fecha_inicio')
-            fecha_fin = parametros.get('fecha_fin')
-            
-            if datos.tipo == 'INGRESOS_FINANCIEROS':
-                estado = parametros.get('estado')
-                ingresos = self.repo.obtener_ingresos_financieros(fecha_inicio, fecha_fin, estado)
-                
-                context = inyectar_footer_contexto({
-                    "data": ingresos,
-                    "params": parametros,
-                    "now": datetime.now().strftime('%Y-%m-%d %H:%M')
-                })
-                
-                pdf_stream = render_to_pdf("reports/superadmin/ingresos_financieros.html", context)
-                filename = f"reporte_ingresos_{uuid.uuid4().hex[:8]}.pdf"
-                filepath = os.path.join("static", "reportes", filename)
-                os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                
-                with open(filepath, "wb") as f:
-                    f.write(pdf_stream.getbuffer())
-                        
-                datos_dict['url_descarga'] = f"/static/reportes/{filename}"
-                datos_dict['estado'] = 'COMPLETADO'
-            
-            elif datos.tipo == 'COMISIONES_PAGOS':
-                vendedor_id_param = parametros.get('vendedor_id')
-                comisiones = self.repo.obtener_comisiones_pagos(vendedor_id_param, fecha_inicio, fecha_fin)
-                
-                context = inyectar_footer_contexto({
-                    "data": comisiones,
-                    "params": parametros,
-                    "now": datetime.now().strftime('%Y-%m-%d %H:%M')
-                })
-                
-                pdf_stream = render_to_pdf("reports/superadmin/pagos_comisiones.html", context)
-                filename = f"reporte_pagos_comisiones_{uuid.uuid4().hex[:8]}.pdf"
-                filepath = os.path.join("static", "reportes", filename)
-                os.makedirs(os.path.dirname(filepath), exist_ok=True)
-                
-                with open(filepath, "wb") as f:
-                    f.write(pdf_stream.getbuffer())
-                        
-                datos_dict['url_descarga'] = f"/static/reportes/{filename}"
-                datos_dict['estado'] = 'COMPLETADO'
-            
-            else:
-                if not target_empresa_id: raise AppError("Contexto de empresa requerido", 400, "REPORTE_CONTEXT_MISSING")
-
-            if target_empresa_id:
-                datos_dict['empresa_id'] = target_empresa_id
-                
-            datos_dict['id'] = uuid.uuid4()
-            datos_dict['created_at'] = datetime.now()
-            datos_dict['updated_at'] = datetime.now()
-            return datos_dict
-        else:
-            if not target_empresa_id: raise AppError("Contexto de empresa requerido", 400, "REPORTE_CONTEXT_MISSING")
-            datos_dict['empresa_id'] = target_empresa_id
-            datos_dict['id'] = uuid.uuid4()
-            datos_dict['created_at'] = datetime.now()
-            datos_dict['updated_at'] = datetime.now()
-            return datos_dict
+    def renderizar_trabajo(self, trabajo: dict):
+        """
+        Genera el archivo de un trabajo de reporte (ver trabajos.py): un BytesIO
+        para PDF o un iterador de bloques para Excel/CSV.
+        """
+        tipo = trabajo['tipo']
+        parametros = trabajo.get('parametros') or {}
+
+        # Flujo modular para Vendedor (PDF)
+        if trabajo.get('vendedor_id'):
+            vendedor_id = str(trabajo['vendedor_id'])
+            vendedor_nombre = parametros.get('_vendedor_nombre', '')
+            if tipo == 'MIS_EMPRESAS':
+                return self.svc_vendedor_reportes.generar_reporte_mis_empresas(vendedor_id, vendedor_nombre, parametros)
+            if tipo == 'COMISIONES_MES':
+                return self.svc_vendedor_reportes.generar_reporte_mis_comisiones(vendedor_id, vendedor_nombre, parametros)
+            raise AppError(f"Tipo de reporte no soportado para vendedor: {tipo}", 400)
+
+        if tipo == 'INGRESOS_FINANCIEROS':
+            ingresos = self.repo.obtener_ingresos_financieros(
+                parametros.get('fecha_inicio'), parametros.get('fecha_fin'), parametros.get('estado')
+            )
+            context = inyectar_footer_contexto({
+                "data": ingresos,
+                "params": parametros,
+                "now": datetime.now().strftime('%Y-%m-%d %H:%M')
+            })
+            return render_to_pdf("reports/superadmin/ingresos_financieros.html", context)
+
+        if tipo == 'COMISIONES_PAGOS':
+            comisiones = self.repo.obtener_comisiones_pagos(
+                parametros.get('vendedor_id'), parametros.get('fecha_inicio'), parametros.get('fecha_fin')
+            )
+            context = inyectar_footer_contexto({
+                "data": comisiones,
+                "params": parametros,
+                "now": datetime.now().strftime('%Y-%m-%d %H:%M')
+            })
+            return render_to_pdf("reports/superadmin/pagos_comisiones.html", context)
+
+        return self.exportar_reporte(trabajo['empresa_id'], tipo, trabajo['formato'], parametros)
 
     def obtener_metricas_vendedor(self, usuario_actual: dict):
         return self.svc_dashboard_vendedor.obtener_metricas(usuario_actual)
 
-    def listar_reportes(self, usuario_actual: dict):
-        empresa_id = None if usuario_actual.get(AuthKeys.IS_SUPERADMIN) else usuario_actual.get('empresa_id')
-        return self.repo.listar(empresa_id)
-
-    def obtener_reporte(self, id: UUID, usuario_actual: dict):
-        reporte = self.repo.obtener_por_id(id)
-        if not reporte: raise AppError("Reporte no encontrado", 404, "REPORTE_NOT_FOUND")
-        
-        if not usuario_actual.get(AuthKeys.IS_SUPERADMIN) and str(reporte['empresa_id']) != str(usuario_actual.get('empresa_id')):
-            raise AppError("No autorizado", 403, "AUTH_FORBIDDEN")
-            
-        return reporte
-
-    def eliminar_reporte(self, id: UUID, usuario_actual: dict):
-        if not usuario_actual.get(AuthKeys.IS_SUPERADMIN):
-            raise AppError("Solo superadmin puede eliminar reportes", 403, "AUTH_FORBIDDEN")
-        return self.repo.eliminar(id)
-
     def obtener_datos_preview(self, datos: ReporteCreacion, usuario_actual: dict):
         is_superadmin = usuario_actual.get(AuthKeys.IS_SUPERADMIN)
         vendedor_id_actual = usuario_actual.get(AuthKeys.INTERNAL_VENDEDOR_ID)
@@ -383,7 +305,7 @@ class ServicioReportes:
                 return render_to_pdf("reports/usuarios/reporte-r001.html", context)
             else:
                 headers = ["Usuario", "Facturas", "Total Ventas", "Ticket Promedio", "Anuladas", "Devoluciones"]
-                return generate_excel_report("Ventas Generales R-001", headers, data["ventas_por_usuario"], ["usuario", "facturas", "total_ventas", "ticket_promedio", "anuladas", "devoluciones"])
+                return stream_report(formato, "Ventas Generales R-001", headers, data["ventas_por_usuario"], ["usuario", "facturas", "total_ventas", "ticket_promedio", "anuladas", "devoluciones"])
 
         elif tipo == 'VENTAS_MENSUALES':
             anio = int(params.get('anio', datetime.now().year))
@@ -400,7 +322,7 @@ class ServicioReportes:
                 return render_to_pdf("reports/usuarios/base_tabla.html", context)
             else:
                 headers = ["Mes", "Facturas", "Subtotal", "IVA", "Total"]
-                return generate_excel_report(f"Ventas Mensuales {anio}", headers, data, ["mes", "facturas", "subtotal", "iva", "total"])
+                return stream_report(formato, f"Ventas Mensuales {anio}", headers, data, ["mes", "facturas", "subtotal", "iva", "total"])
 
         elif tipo == 'VENTAS_USUARIOS':
             data = self.obtener_ventas_por_usuario(empresa_id, params)['detalles']
@@ -416,7 +338,7 @@ class ServicioReportes:
                 return render_to_pdf("reports/usuarios/base_tabla.html", context)
             else:
                 headers = ["Usuario", "Facturas", "Total Ventas", "Ticket Promedio"]
-                return generate_excel_report("Ventas por Usuario", headers, data, ["usuario", "facturas", "total_ventas", "ticket_promedio"])
+                return stream_report(formato, "Ventas por Usuario", headers, data, ["usuario", "facturas", "total_ventas", "ticket_promedio"])
 
         elif tipo == 'FACTURAS_ANULADAS':
             data = self.obtener_facturas_anuladas(empresa_id, params)
@@ -433,7 +355,7 @@ class ServicioReportes:
             else:
                 headers = ["Número", "Fecha Emisión", "Cliente", "Total", "Usuario Anuló", "Motivo", "Fecha Anulación"]
                 keys = ["numero_factura", "fecha_emision", "cliente", "total", "usuario_anulo", "motivo", "fecha_anulacion"]
-                return generate_excel_report("Facturas Anuladas", headers, data, keys)
+                return stream_report(formato, "Facturas Anuladas", headers, data, keys)
 
         elif tipo == 'FACTURAS_RECHAZADAS':
             data = self.obtener_facturas_rechazadas_sri(empresa_id, params)
@@ -450,7 +372,7 @@ class ServicioReportes:
             else:
                 headers = ["Número", "Cliente", "Fecha Intento", "Mensaje SRI", "Estado"]
                 keys = ["numero_factura", "cliente", "fecha_intento", "mensaje_sri", "estado_actual"]
-                return generate_excel_report("Rechazos SRI", headers, data, keys)
+                return stream_report(formato, "Rechazos SRI", headers, data, keys)
 
         # --- EXPORTACIÓN DE REPORTES FINANCIEROS (R-026 a R-028, R-008) ---
 
@@ -474,7 +396,7 @@ class ServicioReportes:
             else:
                 headers = ["N° Factura", "Cliente", "Fecha", "Total", "Estado"]
                 keys = ["numero_factura", "cliente", "fecha", "total", "estado"]
-                return generate_excel_report(f"Mis Facturas Recientes - {data['empleado']}", headers, data["facturas_recientes"], keys)
+                return stream_report(formato, f"Mis Facturas Recientes - {data['empleado']}", headers, data["facturas_recientes"], keys)
 
         elif tipo in ['FINANCIERO_IVA', 'FINANCIERO_RESUMEN', 'FINANCIERO_CARTERA']:
             empresa = self.repo_empresas.obtener_por_id(empresa_id)
@@ -3,6 +3,7 @@ from typing import Optional, List
 from uuid import UUID
 from datetime import date
 from .....database.session import get_db
+from ....suscripciones.repository_consumo import RepositorioConsumo, SQL_PORCENTAJE_USO
 
 class RepositorioR033:
     def __init__(self, db=Depends(get_db)):
@@ -11,50 +12,25 @@ class RepositorioR033:
     def obtener_uso_sistema_por_empresa(self, fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None) -> list:
         fi = fecha_inicio or date(date.today().year, date.today().month, 1).isoformat()
         ff = fecha_fin or date.today().isoformat()
-        query = """
+        query = f"""
             SELECT
                 COALESCE(e.nombre_comercial, e.razon_social) as empresa,
                 
-                -- Usuarios actuales (Activos/Reales)
-                (SELECT COUNT(*) FROM sistema_facturacion.usuarios u_cnt 
-                 WHERE u_cnt.empresa_id = e.id) as usuarios_activos,
+                -- Usuarios actuales (contador de consumo_suscripciones; sin suscripción se cuentan)
+                COALESCE(c.usuarios, (SELECT COUNT(*) FROM sistema_facturacion.usuarios u_cnt 
+                 WHERE u_cnt.empresa_id = e.id)) as usuarios_activos,
                 
                 -- Límite del Plan
                 p.max_usuarios as total_usuarios,
                 
-                -- Facturas en el periodo
-                COALESCE((
-                    SELECT COUNT(f.id)
-                    FROM sistema_facturacion.facturas f
-                    WHERE f.empresa_id = e.id
-                      AND f.fecha_emision >= s.fecha_inicio
-                      AND (s.fecha_fin IS NULL OR f.fecha_emision <= s.fecha_fin)
-                      AND f.estado != 'ANULADA'
-                ), 0) as facturas_mes,
+                -- Facturas en el periodo de la suscripción
+                COALESCE(c.facturas, 0) as facturas_mes,
                 
                 -- Límite de Facturas
                 p.max_facturas_mes,
                 
                 -- Porcentaje de uso (Snapshot vs Límites del Plan)
-                ROUND(GREATEST(
-                    -- Porcentaje Facturas
-                    CASE WHEN p.max_facturas_mes > 0 THEN 
-                        (COALESCE((SELECT COUNT(f2.id) FROM sistema_facturacion.facturas f2 WHERE f2.empresa_id = e.id AND f2.fecha_emision >= s.fecha_inicio AND (s.fecha_fin IS NULL OR f2.fecha_emision <= s.fecha_fin) AND f2.estado != 'ANULADA'), 0)::numeric / p.max_facturas_mes * 100)
-                    ELSE 0 END,
-                    -- Porcentaje Usuarios
-                    CASE WHEN p.max_usuarios > 0 THEN 
-                        ((SELECT COUNT(*) FROM sistema_facturacion.usuarios u2 WHERE u2.empresa_id = e.id)::numeric / p.max_usuarios * 100)
-                    ELSE 0 END,
-                    -- Porcentaje Establecimientos
-                    CASE WHEN p.max_establecimientos > 0 THEN 
-                        ((SELECT COUNT(*) FROM sistema_facturacion.establecimientos est2 WHERE est2.empresa_id = e.id)::numeric / p.max_establecimientos * 100)
-                    ELSE 0 END,
-                    -- Porcentaje Programaciones
-                    CASE WHEN p.max_programaciones > 0 THEN 
-                        ((SELECT COUNT(*) FROM sistema_facturacion.facturacion_programada fp2 WHERE fp2.empresa_id = e.id AND fp2.activo = TRUE 
-                          AND fp2.created_at >= s.fecha_inicio AND (s.fecha_fin IS NULL OR fp2.created_at <= s.fecha_fin))::numeric / p.max_programaciones * 100)
-                    ELSE 0 END
-                ), 1) as porcentaje_uso,
+                {SQL_PORCENTAJE_USO} as porcentaje_uso,
 
                 -- Módulos usados
                 (
@@ -77,8 +53,11 @@ class RepositorioR033:
             FROM sistema_facturacion.empresas e
             LEFT JOIN sistema_facturacion.suscripciones s ON s.empresa_id = e.id 
             LEFT JOIN sistema_facturacion.planes p ON p.id = s.plan_id
+            LEFT JOIN sistema_facturacion.consumo_suscripciones c ON c.empresa_id = s.empresa_id
             ORDER BY porcentaje_uso DESC NULLS LAST
         """
+        # Recalcula solo las empresas cuyo periodo cambió desde la última escritura
+        RepositorioConsumo(db=self.db).sincronizar()
         with self.db.cursor() as cur:
             cur.execute(query)
             return [dict(row) for row in cur.fetchall()]
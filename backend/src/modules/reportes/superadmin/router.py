@@ -9,7 +9,7 @@ from .schemas import (
     ReporteUsoSistemaSuperadmin
 )
 from ..schemas import ReporteLectura, ReporteCreacion
-from ..service import ServicioReportes # Importamos el servicio principal para métodos compartidos como listar/eliminar
+from ..trabajos import ServicioTrabajosReporte # Trabajos de reporte compartidos (listar/generar/eliminar)
 from ...autenticacion.routes import requerir_superadmin
 
 router = APIRouter()
@@ -17,25 +17,25 @@ router = APIRouter()
 @router.get("/", response_model=List[ReporteLectura])
 def listar_reportes_superadmin(
     usuario: dict = Depends(requerir_superadmin),
-    servicio: ServicioReportes = Depends()
+    servicio: ServicioTrabajosReporte = Depends()
 ):
-    return servicio.listar_reportes(usuario)
+    return servicio.listar(usuario)
 
-@router.post("/", response_model=ReporteLectura, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=ReporteLectura, status_code=status.HTTP_202_ACCEPTED)
 def generar_reporte_superadmin(
     datos: ReporteCreacion,
     usuario: dict = Depends(requerir_superadmin),
-    servicio: ServicioReportes = Depends()
+    servicio: ServicioTrabajosReporte = Depends()
 ):
-    return servicio.crear_reporte(datos, usuario)
+    return servicio.encolar(datos.tipo, datos.formato, datos.parametros, usuario, datos.nombre, datos.empresa_id)
 
 @router.delete("/{id}")
 def eliminar_reporte_superadmin(
     id: UUID,
     usuario: dict = Depends(requerir_superadmin),
-    servicio: ServicioReportes = Depends()
+    servicio: ServicioTrabajosReporte = Depends()
 ):
-    servicio.eliminar_reporte(id, usuario)
+    servicio.eliminar(id, usuario)
     return {"message": "Reporte eliminado correctamente"}
 
 # =========================================================
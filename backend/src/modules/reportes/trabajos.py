@@ -0,0 +1,276 @@
+"""
+Generación asíncrona de reportes.
+
+El endpoint registra el trabajo en `trabajos_reporte` y responde 202; un pool
+de `REPORTES_HILOS` hilos lo renderiza con su propia conexión del pool y deja
+el archivo en static/reportes hasta `expira_at` (luego lo borra el job
+`purga_reportes`).
+
+- Pedidos idénticos en curso (mismo ámbito, tipo, formato y parámetros)
+  devuelven el trabajo existente en lugar de renderizar dos veces.
+- Los renders simultáneos están acotados por el tamaño del pool, y los trabajos
+  en cola por `REPORTES_COLA_MAX`: sobre ese tope se responde 503, de modo que un
+  pico de reportes no consume las conexiones ni la CPU de la facturación.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from uuid import UUID, uuid4
+
+from fastapi import Depends
+
+from .repository_trabajos import RepositorioTrabajosReporte
+from ...config.env import env
+from ...constants.enums import AuthKeys
+from ...database.session import conexion_pool
+from ...errors.app_error import AppError
+
+logger = logging.getLogger("facturacion_api")
+
+DIRECTORIO_REPORTES = os.path.join("static", "reportes")
+EXTENSIONES = {"pdf": "pdf", "excel": "xlsx", "csv": "csv"}
+
+TIPOS_VENDEDOR = {'MIS_EMPRESAS', 'COMISIONES_MES'}
+TIPOS_SUPERADMIN = {
+    'INGRESOS_FINANCIEROS', 'COMISIONES_PAGOS',
+    'SUPERADMIN_GLOBAL', 'SUPERADMIN_COMISIONES', 'SUPERADMIN_USO'
+}
+TIPOS_EMPRESA = {
+    'VENTAS_GENERAL', 'VENTAS_MENSUALES', 'VENTAS_USUARIOS', 'FACTURAS_ANULADAS',
+    'FACTURAS_RECHAZADAS', 'MIS_VENTAS', 'FINANCIERO_IVA', 'FINANCIERO_RESUMEN',
+    'FINANCIERO_CARTERA'
+}
+# Tipos que solo tienen plantilla PDF
+TIPOS_SOLO_PDF = TIPOS_VENDEDOR | TIPOS_SUPERADMIN | {'FINANCIERO_IVA', 'FINANCIERO_RESUMEN', 'FINANCIERO_CARTERA'}
+
+# Sin avance en este tiempo, un trabajo en curso se da por interrumpido
+MINUTOS_ABANDONO = 30
+
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, env.REPORTES_HILOS),
+    thread_name_prefix="reportes"
+)
+# Trabajos en cola o en render en este proceso
+_cupo = threading.BoundedSemaphore(max(1, env.REPORTES_COLA_MAX))
+
+
+def _huella(ambito: str, tipo: str, formato: str, parametros: Dict[str, Any]) -> str:
+    contenido = json.dumps([ambito, tipo, formato, parametros], sort_keys=True, default=str)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def _limpiar_parametros(parametros: Optional[dict]) -> dict:
+    return {k: (str(v) if isinstance(v, UUID) else v) for k, v in (parametros or {}).items() if v not in (None, "")}
+
+
+class ServicioTrabajosReporte:
+    def __init__(self, repo: RepositorioTrabajosReporte = Depends()):
+        self.repo = repo
+
+    def _validar_acceso(self, trabajo: dict, usuario_actual: dict):
+        if usuario_actual.get(AuthKeys.IS_SUPERADMIN):
+            return
+        if usuario_actual.get(AuthKeys.IS_VENDEDOR):
+            propio = str(trabajo.get('vendedor_id')) == str(usuario_actual.get(AuthKeys.INTERNAL_VENDEDOR_ID))
+        else:
+            propio = str(trabajo.get('empresa_id')) == str(usuario_actual.get('empresa_id'))
+        if not propio:
+            raise AppError("No autorizado", 403, "AUTH_FORBIDDEN")
+
+    def encolar(
+        self,
+        tipo: str,
+        formato: str,
+        parametros: Optional[dict],
+        usuario_actual: dict,
+        nombre: Optional[str] = None,
+        empresa_id: Optional[UUID] = None
+    ) -> dict:
+        if formato not in EXTENSIONES:
+            raise AppError("Formato no soportado: use pdf, excel o csv", 400, "REPORTE_FORMATO")
+        if tipo in TIPOS_SOLO_PDF and formato != 'pdf':
+            raise AppError("Este reporte solo se genera en PDF", 400, "REPORTE_FORMATO")
+
+        parametros = _limpiar_parametros(parametros)
+        datos = {"tipo": tipo, "formato": formato, "nombre": nombre or tipo, "usuario_id": usuario_actual.get('id')}
+
+        if usuario_actual.get(AuthKeys.IS_VENDEDOR):
+            vendedor_id = usuario_actual.get(AuthKeys.INTERNAL_VENDEDOR_ID)
+            if not vendedor_id: raise AppError("No autorizado como vendedor", 403)
+            if tipo not in TIPOS_VENDEDOR:
+                raise AppError(f"Tipo de reporte no soportado para vendedor: {tipo}", 400)
+            parametros['_vendedor_nombre'] = f"{usuario_actual.get('nombres', '')} {usuario_actual.get('apellidos', '')}"
+            datos['vendedor_id'] = vendedor_id
+            ambito = f"vendedor:{vendedor_id}"
+        elif tipo in TIPOS_SUPERADMIN:
+            if not usuario_actual.get(AuthKeys.IS_SUPERADMIN):
+                raise AppError("Reporte exclusivo de superadmin", 403, "AUTH_FORBIDDEN")
+            ambito = "global"
+        elif tipo in TIPOS_EMPRESA:
+            target = empresa_id if usuario_actual.get(AuthKeys.IS_SUPERADMIN) else usuario_actual.get('empresa_id')
+            if not target: raise AppError("Contexto de empresa requerido", 400, "REPORTE_CONTEXT_MISSING")
+            if tipo == 'MIS_VENTAS':
+                # El reporte es del usuario del token, no de un parámetro
+                parametros['_token_usuario_id'] = str(usuario_actual.get('usuario_id') or usuario_actual.get('id'))
+            datos['empresa_id'] = target
+            ambito = f"empresa:{target}"
+        else:
+            raise AppError(f"Tipo de reporte no soportado: {tipo}", 400, "REPORTE_TIPO")
+
+        datos['parametros'] = parametros
+        datos['huella'] = _huella(ambito, tipo, formato, parametros)
+
+        if not _cupo.acquire(blocking=False):
+            raise AppError("Hay demasiados reportes en generación; intente en unos minutos", 503, "REPORTES_SATURADO")
+        try:
+            trabajo, creado = self.repo.encolar(datos)
+        except Exception:
+            _cupo.release()
+            raise
+        if not creado:
+            # Pedido idéntico ya en curso: se devuelve ese trabajo
+            _cupo.release()
+            return trabajo
+
+        _executor.submit(procesar_trabajo, trabajo['id'])
+        logger.info(f"[REPORTES] Trabajo {trabajo['id']} encolado ({tipo}/{formato}, {ambito})")
+        return trabajo
+
+    def obtener_estado(self, trabajo_id: UUID, usuario_actual: dict) -> dict:
+        trabajo = self.repo.obtener(trabajo_id)
+        if not trabajo: raise AppError("Reporte no encontrado", 404, "REPORTE_NOT_FOUND")
+        self._validar_acceso(trabajo, usuario_actual)
+        trabajo.pop('archivo', None)
+        return trabajo
+
+    def ruta_archivo(self, trabajo_id: UUID, usuario_actual: dict) -> dict:
+        """Trabajo completado y vigente con la ruta de su archivo, para descargarlo."""
+        trabajo = self.repo.obtener(trabajo_id)
+        if not trabajo: raise AppError("Reporte no encontrado", 404, "REPORTE_NOT_FOUND")
+        self._validar_acceso(trabajo, usuario_actual)
+        if trabajo['estado'] != 'COMPLETADO':
+            raise AppError("El reporte aún no está listo", 409, "REPORTE_NO_LISTO")
+        ruta = os.path.join(DIRECTORIO_REPORTES, trabajo['archivo'] or "")
+        if not trabajo['archivo'] or not os.path.exists(ruta):
+            raise AppError("El archivo del reporte expiró; vuelva a generarlo", 410, "REPORTE_EXPIRADO")
+        return {**trabajo, "ruta": ruta}
+
+    def listar(self, usuario_actual: dict) -> list:
+        if usuario_actual.get(AuthKeys.IS_VENDEDOR):
+            return self.repo.listar(vendedor_id=usuario_actual.get(AuthKeys.INTERNAL_VENDEDOR_ID))
+        empresa_id = None if usuario_actual.get(AuthKeys.IS_SUPERADMIN) else usuario_actual.get('empresa_id')
+        return self.repo.listar(empresa_id=empresa_id)
+
+    def eliminar(self, trabajo_id: UUID, usuario_actual: dict):
+        trabajo = self.repo.obtener(trabajo_id)
+        if not trabajo: raise AppError("Reporte no encontrado", 404, "REPORTE_NOT_FOUND")
+        self._validar_acceso(trabajo, usuario_actual)
+        eliminado = self.repo.eliminar(trabajo_id)
+        if eliminado and eliminado.get('archivo'):
+            _borrar_archivo(eliminado['archivo'])
+        return bool(eliminado)
+
+
+def _borrar_archivo(archivo: str):
+    try:
+        os.remove(os.path.join(DIRECTORIO_REPORTES, os.path.basename(archivo)))
+    except FileNotFoundError:
+        pass
+
+
+def _construir_servicio_reportes(conn):
+    """Arma ServicioReportes con repositorios atados a la conexión del trabajo."""
+    from .service import ServicioReportes
+    from .repository import RepositorioReportes
+    from .superadmin.superadmin_reportes_service import SuperAdminReportesService
+    from .superadmin.R_031.repository import RepositorioR031
+    from .superadmin.R_032.repository import RepositorioR032
+    from .superadmin.R_033.service import ServicioR033
+    from .superadmin.R_033.repository import RepositorioR033
+    from .vendedores.R_031.repository import RepositorioR031Vendedor
+    from .vendedores.R_032.repository import RepositorioR032Vendedor
+    from .vendedores.dashboard.service import ServicioDashboardVendedor
+    from .vendedores.dashboard.repository import RepositorioDashboardVendedor
+    from .vendedores.vendedor_reportes_service import VendedorReportesService
+    from .usuarios.R_001.service import ServicioR001
+    from .usuarios.R_001.repository import RepositorioR001
+    from .usuarios.R_027.service import ServicioR027
+    from .usuarios.R_027.repository import RepositorioR027
+    from .usuarios.R_028.service import ServicioR028
+    from .usuarios.R_028.repository import RepositorioR028
+    from .usuarios.R_008.service import ServicioR008
+    from .usuarios.R_008.repository import RepositorioR008
+    from .usuarios.R_001_Empleados.service import ServicioR001Empleados
+    from .usuarios.R_001_Empleados.repository import RepositorioR001Empleados
+    from ..gastos.gasto_repository import RepositorioGastos
+    from ..empresas.repositories import RepositorioEmpresas
+
+    repo_v_r031 = RepositorioR031Vendedor(db=conn)
+    repo_v_r032 = RepositorioR032Vendedor(db=conn)
+    return ServicioReportes(
+        repo=RepositorioReportes(db=conn),
+        svc_superadmin=SuperAdminReportesService(
+            repo_r031=RepositorioR031(db=conn),
+            repo_r032=RepositorioR032(db=conn),
+            svc_r033=ServicioR033(repo=RepositorioR033(db=conn))
+        ),
+        repo_v_r031=repo_v_r031,
+        repo_v_r032=repo_v_r032,
+        svc_r001=ServicioR001(repo=RepositorioR001(db=conn)),
+        svc_r027=ServicioR027(repo=RepositorioR027(db=conn)),
+        svc_r028=ServicioR028(repo=RepositorioR028(db=conn), repo_gastos=RepositorioGastos(db=conn)),
+        svc_r008=ServicioR008(repo=RepositorioR008(db=conn)),
+        svc_r001_empleados=ServicioR001Empleados(repo=RepositorioR001Empleados(db=conn)),
+        svc_dashboard_vendedor=ServicioDashboardVendedor(repo=RepositorioDashboardVendedor(db=conn)),
+        svc_vendedor_reportes=VendedorReportesService(repo_r031=repo_v_r031, repo_r032=repo_v_r032),
+        repo_empresas=RepositorioEmpresas(db=conn)
+    )
+
+
+def _escribir(contenido, ruta: str) -> int:
+    """Escribe un BytesIO o un iterador de bloques; el archivo aparece completo o no aparece."""
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "wb") as f:
+        if hasattr(contenido, "getbuffer"):
+            f.write(contenido.getbuffer())
+        else:
+            for bloque in contenido:
+                f.write(bloque)
+    os.replace(temporal, ruta)
+    return os.path.getsize(ruta)
+
+
+def procesar_trabajo(trabajo_id: UUID):
+    """Renderiza un trabajo de reporte. Corre en el pool de hilos del módulo."""
+    try:
+        with conexion_pool() as conn:
+            repo = RepositorioTrabajosReporte(db=conn)
+            if not repo.iniciar(trabajo_id):
+                return
+            trabajo = repo.obtener(trabajo_id)
+            archivo = f"{trabajo['tipo'].lower()}_{uuid4().hex}.{EXTENSIONES[trabajo['formato']]}"
+            ruta = os.path.join(DIRECTORIO_REPORTES, archivo)
+            try:
+                contenido = _construir_servicio_reportes(conn).renderizar_trabajo(trabajo)
+                repo.actualizar_progreso(trabajo_id, 60)
+                os.makedirs(DIRECTORIO_REPORTES, exist_ok=True)
+                tamano = _escribir(contenido, ruta)
+                repo.completar(trabajo_id, archivo, f"/static/reportes/{archivo}", tamano, env.REPORTES_TTL_HORAS)
+                logger.info(f"[REPORTES] Trabajo {trabajo_id} completado ({tamano} bytes)")
+            except Exception as e:
+                logger.error(f"[REPORTES] Error generando {trabajo_id}: {str(e)}")
+                conn.rollback()
+                for resto in (ruta, f"{ruta}.tmp"):
+                    if os.path.exists(resto):
+                        os.remove(resto)
+                mensaje = e.message if isinstance(e, AppError) else "Error interno generando el reporte"
+                repo.fallar(trabajo_id, mensaje, env.REPORTES_TTL_HORAS)
+    except Exception as e:
+        logger.error(f"[REPORTES] No se pudo procesar el trabajo {trabajo_id}: {str(e)}")
+    finally:
+        _cupo.release()
@@ -0,0 +1,133 @@
+"""
+Cache de totales de la declaración de IVA (Formulario 104) por período.
+
+Guarda, por (empresa_id, fecha_inicio, fecha_fin), los totales que arma
+`RepositorioR027.obtener_totales_periodo`. Los repositorios de facturas,
+notas de crédito y gastos llaman a `notificar_documento` con el cursor de la
+transacción que escribe y la fecha del documento: solo se descartan los
+períodos que la contienen, de modo que cerrar un mes no invalida los meses ya
+declarados. La invalidación viaja por el canal de `cache_referencia` a todos
+los workers y sin escucha no se sirve desde cache.
+"""
+
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from .....config.env import env
+from .....database.cache_referencia import CacheReferencia, cache_referencia
+from .....utils.cache import CacheTTL
+
+# Prefijo de los payloads en el canal de cache_referencia
+PREFIJO = "declaracion_iva"
+
+# fecha_emision es TIMESTAMPTZ y el período se filtra en la zona de la sesión:
+# un día de margen evita conservar un período por diferencia de huso horario
+_MARGEN = timedelta(days=1)
+
+
+def _a_fecha(valor) -> Optional[date]:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    if isinstance(valor, str) and len(valor) >= 10:
+        try:
+            return date.fromisoformat(valor[:10])
+        except ValueError:
+            return None
+    return None
+
+
+class CacheDeclaracionIVA:
+    def __init__(self, ttl: float, max_entradas: int, referencia: CacheReferencia):
+        self._cache = CacheTTL(ttl=ttl, max_entradas=max_entradas, nombre="declaracion_iva")
+        self._referencia = referencia
+        # Sube con cada invalidación: unos totales calculados antes no se guardan
+        self._generacion = 0
+        self._lock = threading.Lock()
+        referencia.suscribir(PREFIJO, self)
+
+    @property
+    def habilitado(self) -> bool:
+        return self._cache.habilitado
+
+    @staticmethod
+    def _clave(empresa_id, fecha_inicio, fecha_fin):
+        return (str(empresa_id), _a_fecha(fecha_inicio), _a_fecha(fecha_fin))
+
+    def obtener(self, empresa_id, fecha_inicio, fecha_fin) -> Optional[dict]:
+        if not self._referencia.escuchando:
+            return None
+        return self._cache.obtener(self._clave(empresa_id, fecha_inicio, fecha_fin))
+
+    def generacion(self) -> int:
+        with self._lock:
+            return self._generacion
+
+    def _avanzar(self):
+        with self._lock:
+            self._generacion += 1
+
+    def guardar(self, empresa_id, fecha_inicio, fecha_fin, totales: dict, generacion: int):
+        if generacion != self.generacion():
+            return
+        self._cache.guardar(self._clave(empresa_id, fecha_inicio, fecha_fin), totales)
+
+    def invalidar_documento(self, empresa_id, *fechas) -> int:
+        """
+        Descarta los períodos de la empresa que contienen alguna de las fechas
+        (p. ej. la anterior y la nueva de un documento editado). Sin fecha
+        reconocible se descarta toda la empresa.
+        """
+        if not empresa_id:
+            return 0
+        self._avanzar()
+        eid = str(empresa_id)
+        dias = [_a_fecha(f) for f in fechas if f is not None]
+        if not dias or None in dias:
+            return self._cache.invalidar_si(lambda clave, _: clave[0] == eid)
+
+        def afectado(clave, _):
+            if clave[0] != eid:
+                return False
+            inicio, fin = clave[1], clave[2]
+            if inicio is None or fin is None:
+                return True
+            return any(inicio - _MARGEN <= d <= fin + _MARGEN for d in dias)
+
+        return self._cache.invalidar_si(afectado)
+
+    def limpiar(self):
+        self._avanzar()
+        self._cache.limpiar()
+
+    def aplicar_invalidacion(self, detalle: str):
+        """Aplica un payload del canal: '<empresa_id>', '<empresa_id>|<fecha>,...' o '*'."""
+        if detalle == "*":
+            self.limpiar()
+            return
+        empresa_id, _, fechas = detalle.partition("|")
+        self.invalidar_documento(empresa_id, *(fechas.split(",") if fechas else ()))
+
+    # Publicación a todos los workers: llamar con el cursor de la transacción que escribe
+    def notificar_documento(self, cur, empresa_id, *fechas):
+        """Publica `invalidar_documento` a todos los workers; el NOTIFY sale al confirmar la transacción."""
+        if not empresa_id:
+            return
+        dias = [_a_fecha(f) for f in fechas if f is not None]
+        detalle = str(empresa_id)
+        if dias and None not in dias:
+            detalle += "|" + ",".join(sorted({d.isoformat() for d in dias}))
+        self._referencia.publicar(cur, PREFIJO, detalle)
+
+    def estadisticas(self) -> dict:
+        return self._cache.estadisticas()
+
+
+# Instancia global por proceso
+declaracion_iva_cache = CacheDeclaracionIVA(
+    ttl=env.DECLARACION_IVA_CACHE_TTL,
+    max_entradas=env.DECLARACION_IVA_CACHE_MAX,
+    referencia=cache_referencia
+)
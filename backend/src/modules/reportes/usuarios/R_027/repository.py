@@ -1,162 +1,164 @@
 from uuid import UUID
+from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, Any
 from .....database.session import get_db
 from fastapi import Depends
 
+from .declaracion_cache import declaracion_iva_cache
+
+
+def _redondear(valor) -> float:
+    """Redondeo a 2 decimales igual al ROUND de PostgreSQL (mitad lejos de cero)."""
+    return float(Decimal(valor).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
 
 class RepositorioR027:
     def __init__(self, db=Depends(get_db)):
         self.db = db
 
     # ─────────────────────────────────────────────
-    # BLOQUE 400 — VENTAS
-    # Fuente: facturas_detalle + facturas (estado = AUTORIZADA)
+    # TOTALES DEL PERÍODO (todos los casilleros)
+    # Una pasada agrupada sobre facturas_detalle + facturas (bloque 400)
+    # y una sobre notas_credito y gastos (402/412 y bloque 500).
+    # Memoizado por (empresa, período); ver declaracion_cache.py.
     # ─────────────────────────────────────────────
 
-    def obtener_ventas_gravadas(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
+    def obtener_totales_periodo(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
         """
-        Casilleros 401/411: ventas locales con tarifa > 0 (base imponible e IVA).
-        Solo facturas AUTORIZADAS con tipo_documento = '01' (factura normal).
-        Filtra por tipo_iva = '4' Y tarifa_iva > 0 para excluir líneas código 4 con tarifa cero.
+        Totales de la declaración para el período:
+        ventas_gravadas (401/411), ventas_por_tarifa, ventas_tarifa_cero (403),
+        notas_credito (402/412), compras_gravadas (500/510) y compras_tarifa_cero (507).
+        El resultado es compartido por el cache: no modificarlo.
         """
-        query = """
-            SELECT
-                ROUND(COALESCE(SUM(fd.base_imponible), 0)::numeric, 2) AS base_imponible,
-                ROUND(COALESCE(SUM(fd.valor_iva), 0)::numeric, 2)       AS valor_iva
-            FROM sistema_facturacion.facturas_detalle fd
-            JOIN sistema_facturacion.facturas f ON fd.factura_id = f.id
-            WHERE f.empresa_id = %s
-              AND f.estado = 'AUTORIZADA'
-              AND f.tipo_documento = '01'
-              AND fd.tipo_iva = '4'
-              AND fd.tarifa_iva > 0
-              AND f.fecha_emision BETWEEN %s::timestamptz AND %s::timestamptz + interval '1 day' - interval '1 second'
-        """
-        with self.db.cursor() as cur:
-            cur.execute(query, (str(empresa_id), fecha_inicio, fecha_fin))
-            row = cur.fetchone()
-            return dict(row) if row else {"base_imponible": 0.0, "valor_iva": 0.0}
+        totales = declaracion_iva_cache.obtener(empresa_id, fecha_inicio, fecha_fin)
+        if totales is None:
+            generacion = declaracion_iva_cache.generacion()
+            totales = self._calcular_totales(empresa_id, fecha_inicio, fecha_fin)
+            declaracion_iva_cache.guardar(empresa_id, fecha_inicio, fecha_fin, totales, generacion)
+        return totales
 
-    def obtener_ventas_por_tarifa(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
-        """Desglose de base imponible e IVA por cada tarifa (5, 8, 12, 15, etc.)."""
-        query = """
+    def _calcular_totales(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
+        params = {"empresa_id": str(empresa_id), "inicio": fecha_inicio, "fin": fecha_fin}
+
+        # Bloque 400: solo facturas AUTORIZADAS con tipo_documento = '01'.
+        # tipo_iva = '4' con tarifa > 0 → 401/411 (por tarifa); tipo_iva = '0' → 403.
+        # Casillero 405 se omite — productos no tiene flag 'con_derecho_credito'.
+        query_ventas = """
             SELECT
+                fd.tipo_iva,
                 fd.tarifa_iva,
-                ROUND(COALESCE(SUM(fd.base_imponible), 0)::numeric, 2) AS base_imponible,
-                ROUND(COALESCE(SUM(fd.valor_iva), 0)::numeric, 2)       AS valor_iva
+                COALESCE(SUM(fd.base_imponible), 0) AS base_imponible,
+                COALESCE(SUM(fd.valor_iva), 0)      AS valor_iva
             FROM sistema_facturacion.facturas_detalle fd
             JOIN sistema_facturacion.facturas f ON fd.factura_id = f.id
-            WHERE f.empresa_id = %s
+            WHERE f.empresa_id = %(empresa_id)s
               AND f.estado = 'AUTORIZADA'
               AND f.tipo_documento = '01'
-              AND fd.tipo_iva = '4'
-              AND fd.tarifa_iva > 0
-              AND f.fecha_emision BETWEEN %s::timestamptz AND %s::timestamptz + interval '1 day' - interval '1 second'
-            GROUP BY fd.tarifa_iva
-            ORDER BY fd.tarifa_iva DESC
+              AND fd.tipo_iva IN ('0', '4')
+              AND f.fecha_emision BETWEEN %(inicio)s::timestamptz AND %(fin)s::timestamptz + interval '1 day' - interval '1 second'
+            GROUP BY fd.tipo_iva, fd.tarifa_iva
         """
-        with self.db.cursor() as cur:
-            cur.execute(query, (str(empresa_id), fecha_inicio, fecha_fin))
-            rows = cur.fetchall()
-            result: Dict[str, Any] = {}
-            for row in rows:
-                tarifa = int(row['tarifa_iva'])
-                result[str(tarifa)] = {
-                    "base_imponible": float(row['base_imponible']),
-                    "valor_iva":      float(row['valor_iva']),
-                }
-            return result
 
-    def obtener_ventas_tarifa_cero(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> float:
-        """
-        Casillero 403: ventas tarifa 0% (base imponible).
-        Filtra por tipo_iva = '0' para capturar exactamente las líneas exentas/0%.
-        Casillero 405 se omite — productos no tiene flag 'con_derecho_credito'.
-        """
-        query = """
+        # 402/412: notas de crédito AUTORIZADAS, en el mes de emisión de la nota
+        # (subtotal_15_iva → base, iva_total → IVA).
+        # Bloque 500 desde gastos (no hay XML de compras): tipo_iva != '0' → 500/510
+        # (todos con derecho a crédito; 509/519 se omite), tipo_iva = '0' → 507.
+        query_nc_compras = """
+            WITH nc AS (
+                SELECT
+                    COALESCE(SUM(nc.subtotal_15_iva), 0) AS base_imponible,
+                    COALESCE(SUM(nc.iva_total), 0)       AS valor_iva
+                FROM sistema_facturacion.notas_credito nc
+                JOIN sistema_facturacion.facturas f ON nc.factura_id = f.id
+                WHERE f.empresa_id = %(empresa_id)s
+                  AND nc.estado_sri = 'AUTORIZADO'
+                  AND nc.fecha_emision BETWEEN %(inicio)s::timestamptz AND %(fin)s::timestamptz + interval '1 day' - interval '1 second'
+            ),
+            compras AS (
+                SELECT
+                    COALESCE(SUM(subtotal) FILTER (WHERE tipo_iva != '0'), 0)         AS base_imponible,
+                    COALESCE(SUM(total - subtotal) FILTER (WHERE tipo_iva != '0'), 0) AS valor_iva,
+                    COALESCE(SUM(subtotal) FILTER (WHERE tipo_iva = '0'), 0)          AS base_tarifa_cero
+                FROM sistema_facturacion.gastos
+                WHERE empresa_id = %(empresa_id)s
+                  AND deleted_at IS NULL
+                  AND fecha_emision BETWEEN %(inicio)s AND %(fin)s
+            )
             SELECT
-                ROUND(COALESCE(SUM(fd.base_imponible), 0)::numeric, 2) AS base_imponible
-            FROM sistema_facturacion.facturas_detalle fd
-            JOIN sistema_facturacion.facturas f ON fd.factura_id = f.id
-            WHERE f.empresa_id = %s
-              AND f.estado = 'AUTORIZADA'
-              AND f.tipo_documento = '01'
-              AND fd.tipo_iva = '0'
-              AND f.fecha_emision BETWEEN %s::timestamptz AND %s::timestamptz + interval '1 day' - interval '1 second'
+                nc.base_imponible       AS nc_base_imponible,
+                nc.valor_iva            AS nc_valor_iva,
+                compras.base_imponible  AS compras_base_imponible,
+                compras.valor_iva       AS compras_valor_iva,
+                compras.base_tarifa_cero AS compras_base_tarifa_cero
+            FROM nc, compras
         """
-        with self.db.cursor() as cur:
-            cur.execute(query, (str(empresa_id), fecha_inicio, fecha_fin))
-            row = cur.fetchone()
-            return float(row['base_imponible']) if row else 0.0
 
-    def obtener_notas_credito_emitidas(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
-        """
-        Casilleros 402/412: notas de crédito AUTORIZADAS emitidas en el período.
-        Fuente: tabla notas_credito (estado_sri = 'AUTORIZADO'), no facturas.
-        Se reportan en el mes de emisión de la nota, no de la factura original.
-        subtotal_15_iva → base imponible (402); iva_total → IVA (412).
-        """
-        query = """
-            SELECT
-                ROUND(COALESCE(SUM(nc.subtotal_15_iva), 0)::numeric, 2) AS base_imponible,
-                ROUND(COALESCE(SUM(nc.iva_total), 0)::numeric, 2)        AS valor_iva
-            FROM sistema_facturacion.notas_credito nc
-            JOIN sistema_facturacion.facturas f ON nc.factura_id = f.id
-            WHERE f.empresa_id = %s
-              AND nc.estado_sri = 'AUTORIZADO'
-              AND nc.fecha_emision BETWEEN %s::timestamptz AND %s::timestamptz + interval '1 day' - interval '1 second'
-        """
         with self.db.cursor() as cur:
-            cur.execute(query, (str(empresa_id), fecha_inicio, fecha_fin))
-            row = cur.fetchone()
-            return dict(row) if row else {"base_imponible": 0.0, "valor_iva": 0.0}
+            cur.execute(query_ventas, params)
+            filas_ventas = cur.fetchall()
+            cur.execute(query_nc_compras, params)
+            otros = cur.fetchone()
+
+        gravada_base = gravada_iva = cero_base = Decimal(0)
+        por_tarifa: Dict[str, Dict[str, Decimal]] = {}
+        for row in filas_ventas:
+            if row['tipo_iva'] == '0':
+                cero_base += row['base_imponible']
+            elif row['tarifa_iva'] is not None and row['tarifa_iva'] > 0:
+                gravada_base += row['base_imponible']
+                gravada_iva += row['valor_iva']
+                tarifa = por_tarifa.setdefault(str(int(row['tarifa_iva'])), {"base_imponible": Decimal(0), "valor_iva": Decimal(0)})
+                tarifa["base_imponible"] += row['base_imponible']
+                tarifa["valor_iva"] += row['valor_iva']
+
+        return {
+            "ventas_gravadas": {"base_imponible": _redondear(gravada_base), "valor_iva": _redondear(gravada_iva)},
+            # Desglose por tarifa (5, 8, 12, 15, etc.), de mayor a menor
+            "ventas_por_tarifa": {
+                t: {"base_imponible": _redondear(v["base_imponible"]), "valor_iva": _redondear(v["valor_iva"])}
+                for t, v in sorted(por_tarifa.items(), key=lambda x: int(x[0]), reverse=True)
+            },
+            "ventas_tarifa_cero": _redondear(cero_base),
+            "notas_credito": {
+                "base_imponible": _redondear(otros['nc_base_imponible'] if otros else 0),
+                "valor_iva": _redondear(otros['nc_valor_iva'] if otros else 0),
+            },
+            "compras_gravadas": {
+                "base_imponible": _redondear(otros['compras_base_imponible'] if otros else 0),
+                "valor_iva": _redondear(otros['compras_valor_iva'] if otros else 0),
+            },
+            "compras_tarifa_cero": _redondear(otros['compras_base_tarifa_cero'] if otros else 0),
+        }
 
     # ─────────────────────────────────────────────
-    # BLOQUE 500 — COMPRAS (desde módulo de Gastos)
-    # Fuente: sistema_facturacion.gastos
-    # iva = porcentaje (ej. 15.00), subtotal = base imponible
-    # No hay XML de compras; gastos manuales.
+    # BLOQUE 400 — VENTAS / BLOQUE 500 — COMPRAS
+    # Vistas por casillero sobre los totales del período
     # ─────────────────────────────────────────────
 
+    def obtener_ventas_gravadas(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
+        """Casilleros 401/411: ventas locales con tarifa > 0 (base imponible e IVA)."""
+        return dict(self.obtener_totales_periodo(empresa_id, fecha_inicio, fecha_fin)["ventas_gravadas"])
+
+    def obtener_ventas_por_tarifa(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
+        """Desglose de base imponible e IVA por cada tarifa (5, 8, 12, 15, etc.)."""
+        por_tarifa = self.obtener_totales_periodo(empresa_id, fecha_inicio, fecha_fin)["ventas_por_tarifa"]
+        return {t: dict(v) for t, v in por_tarifa.items()}
+
+    def obtener_ventas_tarifa_cero(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> float:
+        """Casillero 403: ventas tarifa 0% (base imponible)."""
+        return self.obtener_totales_periodo(empresa_id, fecha_inicio, fecha_fin)["ventas_tarifa_cero"]
+
+    def obtener_notas_credito_emitidas(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
+        """Casilleros 402/412: notas de crédito AUTORIZADAS emitidas en el período."""
+        return dict(self.obtener_totales_periodo(empresa_id, fecha_inicio, fecha_fin)["notas_credito"])
+
     def obtener_compras_gravadas(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
-        """
-        Casillero 500/510: compras con IVA > 0 (base imponible e IVA pagado).
-        Con derecho a crédito tributario (todos los gastos gravados, por defecto).
-        Casillero 509/519 (sin derecho) se omite — no existe clasificación en la tabla.
-        """
-        query = """
-            SELECT
-                ROUND(COALESCE(SUM(subtotal), 0)::numeric, 2)                              AS base_imponible,
-                ROUND(COALESCE(SUM(total - subtotal), 0)::numeric, 2)                      AS valor_iva
-            FROM sistema_facturacion.gastos
-            WHERE empresa_id = %s
-              AND tipo_iva != '0'
-              AND deleted_at IS NULL
-              AND fecha_emision BETWEEN %s AND %s
-        """
-        with self.db.cursor() as cur:
-            cur.execute(query, (str(empresa_id), fecha_inicio, fecha_fin))
-            row = cur.fetchone()
-            return dict(row) if row else {"base_imponible": 0.0, "valor_iva": 0.0}
+        """Casillero 500/510: compras con IVA > 0 (base imponible e IVA pagado)."""
+        return dict(self.obtener_totales_periodo(empresa_id, fecha_inicio, fecha_fin)["compras_gravadas"])
 
     def obtener_compras_tarifa_cero(self, empresa_id: UUID, fecha_inicio: str, fecha_fin: str) -> float:
-        """
-        Casillero 507: compras tarifa 0% (gastos con iva = 0).
-        Incluye compras a negocios RIMPE/populares.
-        """
-        query = """
-            SELECT
-                ROUND(COALESCE(SUM(subtotal), 0)::numeric, 2) AS base_imponible
-            FROM sistema_facturacion.gastos
-            WHERE empresa_id = %s
-              AND tipo_iva = '0'
-              AND deleted_at IS NULL
-              AND fecha_emision BETWEEN %s AND %s
-        """
-        with self.db.cursor() as cur:
-            cur.execute(query, (str(empresa_id), fecha_inicio, fecha_fin))
-            row = cur.fetchone()
-            return float(row['base_imponible']) if row else 0.0
+        """Casillero 507: compras tarifa 0% (gastos con iva = 0)."""
+        return self.obtener_totales_periodo(empresa_id, fecha_inicio, fecha_fin)["compras_tarifa_cero"]
 
     # ─────────────────────────────────────────────
     # DRILL-DOWN — detalle por casillero
@@ -91,14 +91,18 @@ class ServicioR027:
         prev_inicio = (d1 - timedelta(days=delta_dias)).strftime('%Y-%m-%d')
         prev_fin    = (d1 - timedelta(days=1)).strftime('%Y-%m-%d')
 
+        # Todos los casilleros del período en una pasada (memoizado por período)
+        totales      = self.repo.obtener_totales_periodo(empresa_id, fecha_inicio, fecha_fin)
+        totales_prev = self.repo.obtener_totales_periodo(empresa_id, prev_inicio, prev_fin)
+
         # ── BLOQUE 400: VENTAS ──────────────────────────────────────────
-        ventas_grav       = self.repo.obtener_ventas_gravadas(empresa_id, fecha_inicio, fecha_fin)
-        ventas_0          = self.repo.obtener_ventas_tarifa_cero(empresa_id, fecha_inicio, fecha_fin)
-        nc_emitidas       = self.repo.obtener_notas_credito_emitidas(empresa_id, fecha_inicio, fecha_fin)
-        ventas_por_tarifa = self.repo.obtener_ventas_por_tarifa(empresa_id, fecha_inicio, fecha_fin)
+        ventas_grav       = totales['ventas_gravadas']
+        ventas_0          = totales['ventas_tarifa_cero']
+        nc_emitidas       = totales['notas_credito']
+        ventas_por_tarifa = totales['ventas_por_tarifa']
 
         # Período anterior — para factor comparativo
-        ventas_grav_prev = self.repo.obtener_ventas_gravadas(empresa_id, prev_inicio, prev_fin)
+        ventas_grav_prev = totales_prev['ventas_gravadas']
 
         # Casillero 401 (bruto antes de NC) / 411
         c401_bruto = round(float(ventas_grav['base_imponible']), 2)
@@ -134,8 +138,8 @@ class ServicioR027:
         c563_prev       = 1.0 if c401_bruto_prev == 0 else 1.0
 
         # ── BLOQUE 500: COMPRAS (desde gastos) ─────────────────────────
-        compras_grav = self.repo.obtener_compras_gravadas(empresa_id, fecha_inicio, fecha_fin)
-        compras_0    = self.repo.obtener_compras_tarifa_cero(empresa_id, fecha_inicio, fecha_fin)
+        compras_grav = totales['compras_gravadas']
+        compras_0    = totales['compras_tarifa_cero']
 
         # Casillero 500/510
         c500 = round(float(compras_grav['base_imponible']), 2)
@@ -3,6 +3,7 @@ from typing import Optional, List, Dict, Any
 from uuid import UUID
 from datetime import date, timedelta, datetime
 from .....database.session import get_db
+from ....suscripciones.repository_consumo import RepositorioConsumo, SQL_PORCENTAJE_USO
 
 class RepositorioR031Vendedor:
     def __init__(self, db=Depends(get_db)):
@@ -101,64 +102,43 @@ class RepositorioR031Vendedor:
             return data
 
     def obtener_detalle_empresas(self, vendedor_id: UUID, fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None) -> List[dict]:
-        query = """
+        query = f"""
 SELECT
                 e.id,
                 COALESCE(e.nombre_comercial, e.razon_social) as empresa,
                 p.nombre as plan,
                 p.max_facturas_mes, p.max_usuarios, p.max_establecimientos, p.max_programaciones,
                 
-                -- Facturas (Actual / Cupo)
-                (SELECT COUNT(f.id) FROM sistema_facturacion.facturas f
-                 WHERE f.empresa_id = e.id AND f.estado != 'ANULADA'
-                   AND f.fecha_emision >= s.fecha_inicio 
-                   AND (s.fecha_fin IS NULL OR f.fecha_emision <= s.fecha_fin)) as facturas_actuales,
-                
-                -- Usuarios (Total Absoluto / Cupo)
-                (SELECT COUNT(*) FROM sistema_facturacion.usuarios 
-                 WHERE empresa_id = e.id) as usuarios_actuales,
-                
-                -- Establecimientos (Actual / Cupo)
-                (SELECT COUNT(*) FROM sistema_facturacion.establecimientos 
-                 WHERE empresa_id = e.id) as establecimientos_actuales,
-                
-                -- Programaciones (Dentro de suscripción / Cupo)
-                (SELECT COUNT(*) FROM sistema_facturacion.facturacion_programada 
-                 WHERE empresa_id = e.id AND activo = TRUE
-                   AND created_at >= s.fecha_inicio 
-                   AND (s.fecha_fin IS NULL OR created_at <= s.fecha_fin)) as programadas_actuales,
+                -- Consumo actual (contadores de consumo_suscripciones) / Cupo
+                COALESCE(c.facturas, 0) as facturas_actuales,
+                COALESCE(c.usuarios, 0) as usuarios_actuales,
+                COALESCE(c.establecimientos, 0) as establecimientos_actuales,
+                COALESCE(c.programaciones, 0) as programadas_actuales,
                 
                 -- Cálculo unificado de Porcentaje de Uso (SQL)
-                ROUND(GREATEST(
-                    CASE WHEN p.max_facturas_mes > 0 THEN 
-                        ((SELECT COUNT(f2.id) FROM sistema_facturacion.facturas f2 WHERE f2.empresa_id = e.id AND f2.estado != 'ANULADA' AND f2.fecha_emision >= s.fecha_inicio AND (s.fecha_fin IS NULL OR f2.fecha_emision <= s.fecha_fin))::numeric / p.max_facturas_mes * 100)
-                    ELSE 0 END,
-                    CASE WHEN p.max_usuarios > 0 THEN 
-                        ((SELECT COUNT(*) FROM sistema_facturacion.usuarios u2 WHERE u2.empresa_id = e.id)::numeric / p.max_usuarios * 100)
-                    ELSE 0 END,
-                    CASE WHEN p.max_establecimientos > 0 THEN 
-                        ((SELECT COUNT(*) FROM sistema_facturacion.establecimientos est2 WHERE est2.empresa_id = e.id)::numeric / p.max_establecimientos * 100)
-                    ELSE 0 END,
-                    CASE WHEN p.max_programaciones > 0 THEN 
-                        ((SELECT COUNT(*) FROM sistema_facturacion.facturacion_programada fp2 WHERE fp2.empresa_id = e.id AND fp2.activo = TRUE AND fp2.created_at >= s.fecha_inicio AND (s.fecha_fin IS NULL OR fp2.created_at <= s.fecha_fin))::numeric / p.max_programaciones * 100)
-                    ELSE 0 END
-                ), 1) as porcentaje_uso,
-
-                (SELECT u.nombres || ' ' || u.apellidos FROM sistema_facturacion.usuarios u 
-                 JOIN sistema_facturacion.users us ON u.user_id = us.id 
-                 WHERE u.empresa_id = e.id ORDER BY us.created_at ASC LIMIT 1) as admin_nombre,
-                (SELECT us.created_at FROM sistema_facturacion.usuarios u 
-                 JOIN sistema_facturacion.users us ON u.user_id = us.id 
-                 WHERE u.empresa_id = e.id ORDER BY us.created_at ASC LIMIT 1) as admin_fecha_creacion,
+                {SQL_PORCENTAJE_USO} as porcentaje_uso,
+
+                adm.admin_nombre,
+                adm.admin_fecha_creacion,
                 s.fecha_fin as prox_vencimiento,
                 s.estado,
                 e.created_at as fecha_registro
             FROM sistema_facturacion.empresas e
             JOIN sistema_facturacion.suscripciones s ON s.empresa_id = e.id AND s.estado = 'ACTIVA'
             JOIN sistema_facturacion.planes p ON p.id = s.plan_id
+            LEFT JOIN sistema_facturacion.consumo_suscripciones c ON c.empresa_id = e.id
+            -- Primer usuario creado de la empresa (una sola búsqueda para nombre y fecha)
+            LEFT JOIN LATERAL (
+                SELECT u.nombres || ' ' || u.apellidos as admin_nombre, us.created_at as admin_fecha_creacion
+                FROM sistema_facturacion.usuarios u
+                JOIN sistema_facturacion.users us ON u.user_id = us.id
+                WHERE u.empresa_id = e.id ORDER BY us.created_at ASC LIMIT 1
+            ) adm ON TRUE
             WHERE e.vendedor_id = %s
             ORDER BY s.fecha_fin ASC
         """
+        # Recalcula solo las empresas cuyo periodo cambió desde la última escritura
+        RepositorioConsumo(db=self.db).sincronizar(vendedor_id=vendedor_id)
         with self.db.cursor() as cur:
             cur.execute(query, (vendedor_id,))
             rows = [dict(row) for row in cur.fetchall()]
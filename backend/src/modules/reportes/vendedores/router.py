@@ -4,6 +4,7 @@ from uuid import UUID
 import os
 
 from ..service import ServicioReportes
+from ..trabajos import ServicioTrabajosReporte
 from ..schemas import ReporteLectura, ReporteCreacion
 from .schemas import (
     MetricasVendedorLectura,
@@ -28,28 +29,37 @@ def obtener_metricas_vendedor(
 @router.get("", response_model=List[ReporteLectura])
 def listar_reportes_vendedor(
     usuario: dict = Depends(obtener_usuario_actual),
-    servicio: ServicioReportes = Depends()
+    servicio: ServicioTrabajosReporte = Depends()
 ):
     """Lista los reportes generados por el vendedor"""
-    return servicio.listar_reportes(usuario)
+    return servicio.listar(usuario)
 
-@router.post("", response_model=ReporteLectura, status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=ReporteLectura, status_code=status.HTTP_202_ACCEPTED)
 def generar_reporte_vendedor(
     datos: ReporteCreacion,
     usuario: dict = Depends(obtener_usuario_actual),
-    servicio: ServicioReportes = Depends()
+    servicio: ServicioTrabajosReporte = Depends()
 ):
-    """Genera un nuevo reporte para el vendedor (PDF)"""
-    return servicio.crear_reporte(datos, usuario)
+    """Encola un reporte del vendedor (PDF); el avance se consulta con GET /trabajos/{id}."""
+    return servicio.encolar(datos.tipo, 'pdf', datos.parametros, usuario, datos.nombre)
+
+@router.get("/trabajos/{id}", response_model=ReporteLectura)
+def obtener_reporte_vendedor(
+    id: UUID,
+    usuario: dict = Depends(obtener_usuario_actual),
+    servicio: ServicioTrabajosReporte = Depends()
+):
+    """Estado, avance y enlace de descarga de un reporte del vendedor"""
+    return servicio.obtener_estado(id, usuario)
 
 @router.delete("/{id}")
 def eliminar_reporte_vendedor(
     id: UUID,
     usuario: dict = Depends(obtener_usuario_actual),
-    servicio: ServicioReportes = Depends()
+    servicio: ServicioTrabajosReporte = Depends()
 ):
     """Elimina un reporte generado por el vendedor"""
-    servicio.eliminar_reporte(id, usuario)
+    servicio.eliminar(id, usuario)
     return {"message": "Reporte eliminado correctamente"}
 
 @router.get("/mis-empresas", response_model=ReporteEmpresasVendedor)
@@ -1,5 +1,4 @@
-import os
-import uuid
+from io import BytesIO
 from datetime import datetime
 from typing import Optional, Dict, Any
 from fastapi import Depends
@@ -17,7 +16,7 @@ class VendedorReportesService:
         self.repo_r031 = repo_r031
         self.repo_r032 = repo_r032
 
-    def generar_reporte_mis_empresas(self, vendedor_id: str, vendedor_nombre: str, params: Dict[str, Any]) -> str:
+    def generar_reporte_mis_empresas(self, vendedor_id: str, vendedor_nombre: str, params: Dict[str, Any]) -> BytesIO:
         """Genera el PDF del reporte R-031: Mis Empresas"""
         fecha_inicio = params.get('fecha_inicio')
         fecha_fin = params.get('fecha_fin')
@@ -42,10 +41,9 @@ class VendedorReportesService:
         
         inyectar_footer_contexto(context)
         
-        pdf_stream = render_to_pdf("reports/vendedores/reporte-r031.html", context)
-        return self._guardar_pdf(pdf_stream, "mis_empresas")
+        return render_to_pdf("reports/vendedores/reporte-r031.html", context)
 
-    def generar_reporte_mis_comisiones(self, vendedor_id: str, vendedor_nombre: str, params: Dict[str, Any]) -> str:
+    def generar_reporte_mis_comisiones(self, vendedor_id: str, vendedor_nombre: str, params: Dict[str, Any]) -> BytesIO:
         """Genera el PDF del reporte R-032: Mis Comisiones"""
         fecha_inicio = params.get('fecha_inicio')
         fecha_fin = params.get('fecha_fin')
@@ -76,15 +74,4 @@ class VendedorReportesService:
         
         inyectar_footer_contexto(context)
         
-        pdf_stream = render_to_pdf("reports/vendedores/reporte-r032.html", context)
-        return self._guardar_pdf(pdf_stream, "mis_comisiones")
-
-    def _guardar_pdf(self, pdf_stream, prefix: str) -> str:
-        filename = f"{prefix}_{uuid.uuid4().hex[:8]}.pdf"
-        filepath = os.path.join("static", "reportes", filename)
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        with open(filepath, "wb") as f:
-            f.write(pdf_stream.getbuffer())
-            
-        return filename
+        return render_to_pdf("reports/vendedores/reporte-r032.html", context)
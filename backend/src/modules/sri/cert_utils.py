@@ -11,6 +11,13 @@ class ExtractorCertificadoSRI:
         self.p12_data = p12_data
         self.password = password.encode() if isinstance(password, str) else password
         self.certificado = None
+
+    @classmethod
+    def desde_certificado(cls, certificado: x509.Certificate) -> "ExtractorCertificadoSRI":
+        """Crea el extractor sobre un certificado ya cargado (evita volver a parsear el .p12)."""
+        extractor = cls(b"", b"")
+        extractor.certificado = certificado
+        return extractor
         
     def _cargar(self):
         if not self.certificado:
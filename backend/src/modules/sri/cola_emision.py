@@ -0,0 +1,255 @@
+"""
+Emisión asíncrona de facturas al SRI.
+
+El endpoint encola la factura (202 + id de trabajo) y los workers de este
+módulo la procesan en dos etapas persistidas en `cola_emision_sri`:
+
+1. RECEPCION: firma y envío a Recepción (`ServicioSRI.fase_recepcion`).
+2. AUTORIZACION: consulta de autorización reprogramada con backoff exponencial
+   mientras el SRI responda EN PROCESO / NO_ENCONTRADO / errores de conectividad,
+   sin ocupar un hilo durante la espera.
+
+Cada trabajo usa su propia conexión del pool y los workers se coordinan con
+`FOR UPDATE SKIP LOCKED`, por lo que pueden correr en varios procesos.
+"""
+
+import os
+import time
+import socket
+import logging
+import threading
+from datetime import datetime
+from fastapi import Depends
+from typing import List, Optional
+from uuid import UUID
+
+from .repository_cola import RepositorioColaEmision
+from .constants import FacturaEstado, SRIEstadoRespuesta, SRI_TIME_SLEEP_AUTORIZACION
+from ...config.env import env
+from ...database.session import conexion_pool
+from ...errors.app_error import AppError
+from ..facturas.repository import RepositorioFacturas
+
+logger = logging.getLogger("facturacion_api")
+
+# Respuestas de Autorización que ameritan volver a consultar más tarde
+ESTADOS_REINTENTABLES = {
+    SRIEstadoRespuesta.EN_PROCESO,
+    SRIEstadoRespuesta.NO_ENCONTRADO,
+    SRIEstadoRespuesta.ERROR_TIMEOUT,
+    SRIEstadoRespuesta.ERROR_CONEXION,
+    "DESCONOCIDO",
+}
+
+# Intentos máximos de la etapa de recepción (reclamos tras caída de un worker)
+MAX_INTENTOS_RECEPCION = 3
+
+
+class ServicioColaEmision:
+    def __init__(
+        self,
+        repo: RepositorioColaEmision = Depends(),
+        factura_repo: RepositorioFacturas = Depends()
+    ):
+        self.repo = repo
+        self.factura_repo = factura_repo
+
+    def _validar_acceso(self, registro_empresa_id, usuario_actual: dict):
+        if usuario_actual.get('is_superadmin'):
+            return
+        if str(registro_empresa_id) != str(usuario_actual.get('empresa_id')):
+            raise AppError("No tiene permiso sobre esta factura", 403, "FORBIDDEN")
+
+    def encolar(self, factura_id: UUID, usuario_actual: dict) -> dict:
+        factura = self.factura_repo.obtener_por_id(factura_id)
+        if not factura: raise AppError("Factura no encontrada", 404, "FACTURA_NOT_FOUND")
+        self._validar_acceso(factura['empresa_id'], usuario_actual)
+
+        activo = self.repo.obtener_activo_por_factura(factura_id)
+        if activo:
+            return activo
+
+        if factura['estado'] in [FacturaEstado.EN_PROCESO, FacturaEstado.AUTORIZADA]:
+            raise AppError("La factura ya está siendo procesada o fue emitida.", 409, "FACTURA_LOCKED")
+
+        trabajo = self.repo.encolar(
+            factura_id,
+            factura['empresa_id'],
+            usuario_actual.get('id'),
+            {
+                "ip": usuario_actual.get("ip", "desconocida"),
+                "user_agent": usuario_actual.get("user_agent", "desconocido"),
+                "version_app": usuario_actual.get("version_app", "1.0.0")
+            }
+        )
+        worker_emision.notificar()
+        return trabajo
+
+    def obtener_estado(self, job_id: UUID, usuario_actual: dict) -> dict:
+        trabajo = self.repo.obtener(job_id)
+        if not trabajo: raise AppError("Trabajo de emisión no encontrado", 404, "EMISION_NOT_FOUND")
+        self._validar_acceso(trabajo['empresa_id'], usuario_actual)
+        return trabajo
+
+
+def _construir_servicio_sri(conn):
+    """Arma ServicioSRI con repositorios atados a la conexión del trabajo."""
+    from .service import ServicioSRI
+    from .repository import RepositorioSRI
+    from .client import ClienteSRI
+    from .xml_service import ServicioSRIXML
+    from ..empresas.repositories import RepositorioEmpresas
+    from ..clientes.repository import RepositorioClientes
+    from ..logs.repository import RepositorioLogs
+    from ..logs.service import ServicioLogs
+    from ..formas_pago.repository import RepositorioFormasPago
+
+    repo_logs = RepositorioLogs(db=conn)
+    return ServicioSRI(
+        repo=RepositorioSRI(db=conn),
+        factura_repo=RepositorioFacturas(db=conn),
+        empresa_repo=RepositorioEmpresas(db=conn),
+        cliente_repo=RepositorioClientes(db=conn),
+        log_repo=repo_logs,
+        formas_pago_repo=RepositorioFormasPago(db=conn),
+        client_sri=ClienteSRI(),
+        xml_service=ServicioSRIXML(),
+        logs_service=ServicioLogs(repo=repo_logs)
+    )
+
+
+class WorkerEmisionSRI:
+    """Pool de hilos que consume la cola de emisión SRI."""
+
+    def __init__(self):
+        self._hilos: List[threading.Thread] = []
+        self._detener = threading.Event()
+        self._despertar = threading.Event()
+        self._prefijo = f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def activo(self) -> bool:
+        return any(h.is_alive() for h in self._hilos)
+
+    def iniciar(self, cantidad: Optional[int] = None):
+        cantidad = env.SRI_COLA_WORKERS if cantidad is None else cantidad
+        if cantidad <= 0 or self.activo:
+            return
+        self._detener.clear()
+        self._hilos = [
+            threading.Thread(target=self._bucle, args=(f"{self._prefijo}:{i}",), name=f"sri-cola-{i}", daemon=True)
+            for i in range(cantidad)
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+        logger.info(f"[SRI-COLA] {cantidad} workers de emisión iniciados")
+
+    def detener(self, timeout: float = 10.0):
+        self._detener.set()
+        self._despertar.set()
+        for hilo in self._hilos:
+            hilo.join(timeout=timeout)
+        self._hilos = []
+
+    def notificar(self):
+        """Despierta a los workers ociosos (nuevo trabajo encolado en este proceso)."""
+        self._despertar.set()
+
+    def _bucle(self, worker_id: str):
+        while not self._detener.is_set():
+            try:
+                procesado = self.procesar_siguiente(worker_id)
+            except Exception as e:
+                logger.error(f"[SRI-COLA] Error en worker {worker_id}: {str(e)}")
+                procesado = False
+            if not procesado:
+                self._despertar.wait(env.SRI_COLA_POLL_SEGUNDOS)
+                self._despertar.clear()
+
+    def procesar_siguiente(self, worker_id: str) -> bool:
+        """Reclama y procesa un trabajo. Retorna False si la cola estaba vacía."""
+        with conexion_pool() as conn:
+            repo = RepositorioColaEmision(db=conn)
+            trabajo = repo.reclamar_siguiente(worker_id, env.SRI_COLA_LEASE_SEGUNDOS)
+            if not trabajo:
+                return False
+
+            servicio = _construir_servicio_sri(conn)
+            if trabajo['etapa'] == 'RECEPCION':
+                self._etapa_recepcion(trabajo, repo, servicio)
+            else:
+                self._etapa_autorizacion(trabajo, repo, servicio)
+            return True
+
+    def _etapa_recepcion(self, trabajo: dict, repo: RepositorioColaEmision, servicio):
+        if trabajo['intentos'] > MAX_INTENTOS_RECEPCION:
+            repo.finalizar(trabajo['id'], 'FALLIDO', error="Se agotaron los intentos de recepción")
+            servicio.factura_repo.actualizar_factura(trabajo['factura_id'], {"estado": FacturaEstado.ERROR_TECNICO})
+            return
+
+        usuario = {"id": trabajo['usuario_id'], **(trabajo.get('client_info') or {})}
+        ctx = None
+        try:
+            # Un reintento tras la caída de un worker encuentra la factura ya bloqueada por este trabajo
+            ctx = servicio.preparar_emision(trabajo['factura_id'], usuario, force_reemission=trabajo['intentos'] > 1)
+            res_rec = servicio.fase_recepcion(ctx)
+            if res_rec is not None:
+                repo.finalizar(trabajo['id'], 'COMPLETADO', estado_sri=res_rec.get('estado'), resultado=_resumen(res_rec))
+                return
+            repo.pasar_a_autorizacion(trabajo['id'], ctx, SRI_TIME_SLEEP_AUTORIZACION)
+        except Exception as e:
+            logger.error(f"[SRI-COLA] Falla en recepción de factura {trabajo['factura_id']}: {str(e)}")
+            repo.db.rollback()
+            if ctx is not None:
+                _registrar_error(repo, servicio, ctx, e)
+            repo.finalizar(trabajo['id'], 'FALLIDO', error=str(e))
+
+    def _etapa_autorizacion(self, trabajo: dict, repo: RepositorioColaEmision, servicio):
+        inicio = trabajo.get('inicio_emision')
+        ctx = {
+            "factura_id": trabajo['factura_id'],
+            "facturacion_programada_id": trabajo.get('facturacion_programada_id'),
+            "usuario_id": trabajo.get('usuario_id'),
+            "ambiente": trabajo['ambiente'],
+            "clave": trabajo['clave_acceso'],
+            "xml_firmado": (trabajo.get('xml_firmado') or '').encode('utf-8'),
+            "ya_en_procesamiento": trabajo['ya_en_procesamiento'],
+            "intento_num": trabajo.get('intento_emision') or 1,
+            "client_info": trabajo.get('client_info') or {},
+            "start_time": inicio.timestamp() if isinstance(inicio, datetime) else time.time(),
+        }
+        try:
+            res_aut = servicio.client_sri.autorizar_comprobante(ctx['clave'], ctx['ambiente'])
+            estado_aut = res_aut.get('estado')
+            consultas = trabajo['consultas_autorizacion']
+            if estado_aut in ESTADOS_REINTENTABLES and consultas + 1 < env.SRI_COLA_MAX_CONSULTAS:
+                espera = min(env.SRI_COLA_BACKOFF_BASE * (2 ** consultas), env.SRI_COLA_BACKOFF_MAX)
+                repo.reprogramar_consulta(trabajo['id'], espera, estado_aut)
+                return
+
+            # Respuesta definitiva (o consultas agotadas): se registra como en la emisión síncrona
+            servicio.fase_autorizacion(ctx, res_aut)
+            repo.finalizar(trabajo['id'], 'COMPLETADO', estado_sri=estado_aut, resultado=_resumen(res_aut))
+        except Exception as e:
+            logger.error(f"[SRI-COLA] Falla en autorización de factura {trabajo['factura_id']}: {str(e)}")
+            repo.db.rollback()
+            _registrar_error(repo, servicio, ctx, e)
+            repo.finalizar(trabajo['id'], 'FALLIDO', error=str(e))
+
+
+def _registrar_error(repo: RepositorioColaEmision, servicio, ctx: dict, e: Exception):
+    """Registra el error de emisión sin impedir que el trabajo se finalice."""
+    try:
+        servicio.registrar_error_emision(ctx, e)
+    except Exception as err:
+        logger.error(f"[SRI-COLA] No se pudo registrar el error de la factura {ctx['factura_id']}: {str(err)}")
+        repo.db.rollback()
+
+
+def _resumen(respuesta: dict) -> dict:
+    """Respuesta del SRI sin el XML crudo (ya queda en logs_emision)."""
+    return {k: v for k, v in respuesta.items() if k != 'xml_respuesta_raw'}
+
+
+# Instancia global por proceso
+worker_emision = WorkerEmisionSRI()
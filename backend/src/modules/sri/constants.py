@@ -66,6 +66,24 @@ class FacturaEstado:
     ANULADA = 'ANULADA'
     ERROR_TECNICO = 'ERROR_TECNICO'
 
+class NotaCreditoEstadoSRI:
+    """Estados de la nota de crédito en el sistema local (columna estado_sri)."""
+    PENDIENTE = 'PENDIENTE'
+    RECIBIDO = 'RECIBIDO'
+    AUTORIZADO = 'AUTORIZADO'
+    RECHAZADO = 'RECHAZADO'
+    DEVUELTA = 'DEVUELTA'
+    ANULADA = 'ANULADA'
+
+# Respuesta definitiva de Autorización -> estado_sri de la nota de crédito
+# (cualquier otra respuesta la deja RECIBIDO, pendiente de consulta)
+NC_ESTADO_POR_RESPUESTA = {
+    SRIEstadoRespuesta.AUTORIZADO: NotaCreditoEstadoSRI.AUTORIZADO,
+    SRIEstadoRespuesta.DEVUELTA: NotaCreditoEstadoSRI.DEVUELTA,
+    SRIEstadoRespuesta.DEVUELTO: NotaCreditoEstadoSRI.DEVUELTA,
+    SRIEstadoRespuesta.NO_AUTORIZADO: NotaCreditoEstadoSRI.RECHAZADO,
+}
+
 # Configuración de Cliente
 SRI_TIMEOUT_SECONDS = 30
 SRI_TIME_SLEEP_AUTORIZACION = 3
@@ -11,7 +11,7 @@ from ..client import ClienteSRI
 from .xml_service import ServicioSRIXMLNotaCredito
 from ..constants import (
     SRIAmbiente, SRITipoEmision, SRIEstadoRespuesta, SRIErrorCodes, 
-    LogEstado, FacturaEstado
+    LogEstado, FacturaEstado, NotaCreditoEstadoSRI, NC_ESTADO_POR_RESPUESTA
 )
 from ....utils.crypto import CryptoService
 from ....config.env import env
@@ -21,9 +21,11 @@ from ....errors.app_error import AppError
 from ...notas_credito.repository import RepositorioNotasCredito
 from ...facturas.repository import RepositorioFacturas
 from ...empresas.repositories import RepositorioEmpresas
+from ...empresas.perfil_emisor_cache import obtener_perfil_emisor
 from ...clientes.repository import RepositorioClientes
 from ...usuarios.repositories import RepositorioUsuarios
 from ..signer import XMLSigner
+from ..signer_cache import obtener_signer_empresa
 
 logger = logging.getLogger("facturacion_api")
 
@@ -56,16 +58,7 @@ class ServicioSRINotaCredito:
         self.crypto = CryptoService(env.CERT_MASTER_KEY)
 
     def obtener_signer(self, empresa_id: UUID) -> XMLSigner:
-        config = self.repo.obtener_config(empresa_id, incluir_binarios=True)
-        if not config or config['estado'] != 'ACTIVO':
-            raise AppError("Firma electrónica no activa o inválida", 400, "SRI_CONFIG_INCOMPLETE")
-        
-        try:
-            p12 = self.crypto.decrypt(bytes(config['certificado_digital']))
-            passw = self.crypto.decrypt_to_str(bytes(config['clave_certificado']))
-            return XMLSigner(p12, passw)
-        except Exception:
-            raise AppError("Error de seguridad al acceder a la firma", 500, "CRYPTO_ERROR")
+        return obtener_signer_empresa(self.repo, self.crypto, empresa_id)
 
     def _resolver_usuario_id_perfil(self, usuario_actual: dict) -> UUID:
         """
@@ -90,7 +83,7 @@ class ServicioSRINotaCredito:
         if not nc: raise AppError("Nota de Crédito no encontrada", 404, "NC_NOT_FOUND")
         
         factura = self.factura_repo.obtener_por_id(nc['factura_id'])
-        empresa = self.empresa_repo.obtener_por_id(factura['empresa_id'])
+        empresa = obtener_perfil_emisor(self.empresa_repo, factura['empresa_id'])
         cliente = self.cliente_repo.obtener_por_id(factura['cliente_id'])
         detalles_nc = self.nc_repo.listar_detalles(nc_id)
         
@@ -219,7 +212,8 @@ class ServicioSRINotaCredito:
 
         update_nc = {
             "clave_acceso": clave,
-            "estado_sri": estado_aut.upper() if estado_aut != "DEVUELTA" else "DEVUELTO",
+            # Sin respuesta definitiva queda RECIBIDO y el reconciliador SRI la sigue consultando
+            "estado_sri": NC_ESTADO_POR_RESPUESTA.get(estado_aut, NotaCreditoEstadoSRI.RECIBIDO),
             "numero_autorizacion": res_aut.get('numeroAutorizacion')
         }
         self.nc_repo.actualizar_nota_credito(nc_id, update_nc)
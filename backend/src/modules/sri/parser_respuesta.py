@@ -0,0 +1,104 @@
+"""
+Lectura de las respuestas SOAP del SRI (Recepción y Autorización).
+
+Una sola pasada con `lxml.etree.iterparse` sobre los bytes de la respuesta:
+estado, datos de autorización y mensajes se recogen al cerrar cada elemento,
+sin construir el texto decodificado ni recorrer el árbol varias veces. El
+comprobante autorizado (CDATA con el XML completo) se libera apenas se cierra.
+"""
+
+from io import BytesIO
+from typing import List, Tuple
+
+from lxml import etree
+
+from .constants import SRIEstadoRespuesta
+
+# Elementos hoja que se copian tal cual; si se repiten gana el último
+CAMPOS = {'estado', 'numeroAutorizacion', 'fechaAutorizacion', 'claveAccesoConsultada', 'numeroComprobantes'}
+
+# Mensajes de texto simple (SOAP Fault o mensaje directo)
+MENSAJES_SIMPLES = {'mensaje', 'faultstring', 'message'}
+
+
+def _local(tag) -> str:
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def _mensaje_compuesto(elem, codigos: List[str], mensajes: List[str]):
+    identificador = texto = info_adicional = None
+    for hijo in elem:
+        nombre = _local(hijo.tag).lower()
+        if 'identificador' in nombre: identificador = hijo.text
+        elif 'mensaje' in nombre: texto = hijo.text
+        elif 'informacionadicional' in nombre: info_adicional = hijo.text
+
+    if identificador: codigos.append(identificador)
+
+    completo = (texto or "") + (f" ({info_adicional})" if info_adicional else "")
+    if completo: mensajes.append(completo)
+
+
+def parsear_respuesta_sri(contenido: bytes) -> Tuple[dict, List[str], List[str]]:
+    """Retorna (campos, codigos, mensajes). Propaga `etree.XMLSyntaxError`."""
+    campos = {}
+    codigos: List[str] = []
+    mensajes: List[str] = []
+
+    eventos = etree.iterparse(
+        BytesIO(contenido), events=('end',), resolve_entities=False, no_network=True, huge_tree=True
+    )
+    for _, elem in eventos:
+        tag = _local(elem.tag)
+        if tag in CAMPOS:
+            campos[tag] = elem.text
+        elif tag == 'mensaje' and len(elem):
+            _mensaje_compuesto(elem, codigos, mensajes)
+            elem.clear()
+        elif tag in MENSAJES_SIMPLES and elem.text:
+            padre = elem.getparent()
+            # Los hijos de un mensaje compuesto se leen al cerrar el padre
+            if (padre is None or _local(padre.tag) != 'mensaje') and elem.text not in mensajes:
+                mensajes.append(elem.text)
+        elif tag == 'comprobante':
+            elem.clear()
+
+    return campos, codigos, mensajes
+
+
+def parsear_recepcion(contenido: bytes) -> dict:
+    try:
+        campos, codigos, mensajes = parsear_respuesta_sri(contenido)
+    except Exception as e:
+        return {"estado": SRIEstadoRespuesta.ERROR_PARSING, "mensaje": f"Error parseando respuesta SRI: {str(e)}", "mensajes": [str(e)], "codigos": []}
+
+    estado = campos.get('estado', "DESCONOCIDO")
+    return {
+        "estado": estado,
+        "mensajes": mensajes,
+        "mensaje": "; ".join(mensajes) if mensajes else ("Sin detalles" if estado != "DESCONOCIDO" else "Error de comunicación o respuesta inesperada"),
+        "codigos": codigos
+    }
+
+
+def parsear_autorizacion(contenido: bytes) -> dict:
+    try:
+        campos, codigos, mensajes = parsear_respuesta_sri(contenido)
+        numero_comprobantes = int(campos.get('numeroComprobantes') or 0)
+    except Exception as e:
+        return {"estado": SRIEstadoRespuesta.ERROR_PARSING, "mensajes": [f"Error de parseo: {str(e)}"], "codigos": []}
+
+    estado = campos.get('estado', "DESCONOCIDO")
+    # Si no hay comprobantes y no vino estado, es un "No encontrado"
+    if numero_comprobantes == 0 and estado == "DESCONOCIDO":
+        estado = SRIEstadoRespuesta.NO_ENCONTRADO
+
+    return {
+        "estado": estado,
+        "numeroAutorizacion": campos.get('numeroAutorizacion'),
+        "fechaAutorizacion": campos.get('fechaAutorizacion'),
+        "claveAccesoConsultada": campos.get('claveAccesoConsultada'),
+        "numeroComprobantes": numero_comprobantes,
+        "mensajes": mensajes,
+        "codigos": codigos
+    }
@@ -0,0 +1,251 @@
+"""
+Reconciliador de comprobantes pendientes en el SRI.
+
+Facturas EN_PROCESO y notas de crédito RECIBIDO con clave de acceso quedan
+esperando la autorización cuando el SRI no respondió a tiempo. En vez de que
+cada usuario pulse "Consultar SRI" (una llamada SOAP por documento y usuario),
+un hilo por proceso recorre `reconciliacion_sri` en ciclos:
+
+1. Siembra los pendientes nuevos y reclama un lote vencido (`SKIP LOCKED`,
+   por lo que varios procesos se reparten los documentos).
+2. Consulta la autorización del lote en paralelo, con un cliente SRI de
+   conexiones keep-alive acotadas a `SRI_RECONCILIADOR_HILOS`, sin retener
+   conexiones de base durante la espera.
+3. Aplica los resultados en una transacción con sentencias multi-fila:
+   estados de facturas/notas, autorizaciones, logs de consulta y el backoff
+   exponencial de los que siguen pendientes, con la latencia de cada consulta.
+
+Un NO_ENCONTRADO no dispara reemisión: se vuelve a consultar con backoff y,
+agotadas las consultas, la factura pasa a ERROR_TECNICO para que se pueda
+emitir otra vez desde la cola.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from .client import ClienteSRI
+from .constants import SRIAmbiente, SRIEstadoRespuesta, FacturaEstado, LogEstado, NC_ESTADO_POR_RESPUESTA
+from .repository_reconciliacion import RepositorioReconciliacionSRI, FACTURA, NOTA_CREDITO
+from ...config.env import env
+from ...database.session import conexion_pool
+from ...database.transaction import db_transaction
+from ..facturas.repository import RepositorioFacturas
+from ..facturas.ride import precalentar_ride
+from ..notas_credito.repository import RepositorioNotasCredito
+
+logger = logging.getLogger("facturacion_api")
+
+# Estado local de cada tipo de documento según la respuesta definitiva del SRI
+ESTADOS_FINALES = {
+    FACTURA: {
+        SRIEstadoRespuesta.AUTORIZADO: FacturaEstado.AUTORIZADA,
+        SRIEstadoRespuesta.DEVUELTA: FacturaEstado.DEVUELTA,
+        SRIEstadoRespuesta.DEVUELTO: FacturaEstado.DEVUELTA,
+        SRIEstadoRespuesta.NO_AUTORIZADO: FacturaEstado.NO_AUTORIZADA,
+    },
+    NOTA_CREDITO: NC_ESTADO_POR_RESPUESTA,
+}
+
+# Margen del bloqueo de un lote: cubre las consultas con sus reintentos HTTP
+LEASE_SEGUNDOS = 300
+
+CLIENT_INFO = {"origen": "reconciliador_sri"}
+
+
+def calcular_espera(consultas: int) -> float:
+    """Backoff exponencial por documento según las consultas ya hechas."""
+    return min(env.SRI_RECONCILIADOR_BACKOFF_BASE * (2 ** consultas), env.SRI_RECONCILIADOR_BACKOFF_MAX)
+
+
+def _mensajes(respuesta: dict) -> List[dict]:
+    codigos = respuesta.get('codigos') or []
+    return [
+        {"codigo": codigos[i] if i < len(codigos) else None, "mensaje": msg, "tipo": "ERROR"}
+        for i, msg in enumerate(respuesta.get('mensajes') or [])
+    ]
+
+
+def _percentil(valores: List[int], p: float) -> int:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+class ReconciliadorSRI:
+    """Hilo por proceso que reconcilia los comprobantes pendientes por lotes."""
+
+    def __init__(self):
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cliente: Optional[ClienteSRI] = None
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        hilos = env.SRI_RECONCILIADOR_HILOS
+        if hilos <= 0 or self.activo:
+            return
+        self._detener.clear()
+        self._executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="sri-reconciliador")
+        self._cliente = ClienteSRI.con_pool(hilos)
+        self._hilo = threading.Thread(target=self._bucle, name="sri-reconciliador", daemon=True)
+        self._hilo.start()
+        logger.info(f"[SRI-RECONCILIADOR] Iniciado con {hilos} consultas simultáneas")
+
+    def detener(self, timeout: float = 10.0):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout=timeout)
+            self._hilo = None
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                procesados = self.ejecutar_ciclo()
+            except Exception as e:
+                logger.error(f"[SRI-RECONCILIADOR] Error en ciclo: {str(e)}")
+                procesados = 0
+            # Lote lleno: probablemente hay más vencidos, se sigue sin pausa
+            if procesados < env.SRI_RECONCILIADOR_LOTE:
+                self._detener.wait(env.SRI_RECONCILIADOR_INTERVALO_SEGUNDOS)
+
+    def ejecutar_ciclo(self) -> int:
+        """Siembra, consulta y aplica un lote. Retorna cuántos documentos consultó."""
+        with conexion_pool() as conn:
+            repo = RepositorioReconciliacionSRI(db=conn)
+            repo.sembrar(env.SRI_RECONCILIADOR_GRACIA_SEGUNDOS)
+            lote = repo.reclamar_lote(env.SRI_RECONCILIADOR_LOTE, LEASE_SEGUNDOS)
+        if not lote:
+            return 0
+
+        resultados = list(self._executor.map(self._consultar, lote))
+
+        with conexion_pool() as conn:
+            autorizadas = self._aplicar(conn, resultados)
+        for factura_id in autorizadas:
+            precalentar_ride(factura_id)
+
+        latencias = [latencia for _, _, latencia in resultados]
+        logger.info(
+            f"[SRI-RECONCILIADOR] {len(lote)} consultas - {len(autorizadas)} facturas autorizadas - "
+            f"latencia p50 {_percentil(latencias, 0.5)} ms, p95 {_percentil(latencias, 0.95)} ms, máx {max(latencias)} ms"
+        )
+        return len(lote)
+
+    def _consultar(self, documento: dict) -> Tuple[dict, dict, int]:
+        # Mismo ambiente forzado que la emisión y la consulta manual
+        inicio = time.perf_counter()
+        try:
+            respuesta = self._cliente.autorizar_comprobante(documento['clave_acceso'], SRIAmbiente.PRUEBAS)
+        except Exception as e:
+            respuesta = {"estado": SRIEstadoRespuesta.ERROR_CONEXION, "mensajes": [str(e)], "codigos": []}
+        return documento, respuesta, int((time.perf_counter() - inicio) * 1000)
+
+    def _aplicar(self, conn, resultados: List[Tuple[dict, dict, int]]) -> List:
+        """Escribe todos los resultados del lote en una transacción. Retorna las facturas autorizadas."""
+        repo = RepositorioReconciliacionSRI(db=conn)
+        cambios = {FACTURA: [], NOTA_CREDITO: []}
+        logs = {FACTURA: [], NOTA_CREDITO: []}
+        autorizaciones = {FACTURA: [], NOTA_CREDITO: []}
+        resueltos, pendientes = [], []
+
+        for documento, respuesta, latencia in resultados:
+            tipo = documento['tipo_documento']
+            estado_sri = respuesta.get('estado') or 'DESCONOCIDO'
+            estado_local = ESTADOS_FINALES[tipo].get(estado_sri)
+            consultas = documento['consultas'] + 1
+
+            if estado_local is None:
+                if consultas < env.SRI_RECONCILIADOR_MAX_CONSULTAS:
+                    pendientes.append({
+                        **documento, "estado": 'PENDIENTE', "espera": calcular_espera(consultas - 1),
+                        "estado_sri": estado_sri, "latencia_ms": latencia
+                    })
+                    continue
+                if tipo == FACTURA and estado_sri == SRIEstadoRespuesta.NO_ENCONTRADO:
+                    # El SRI nunca registró la recepción: se libera para volver a emitir
+                    estado_local = FacturaEstado.ERROR_TECNICO
+                else:
+                    pendientes.append({
+                        **documento, "estado": 'AGOTADO', "espera": 0,
+                        "estado_sri": estado_sri, "latencia_ms": latencia
+                    })
+                    logger.warning(
+                        f"[SRI-RECONCILIADOR] {tipo} {documento['documento_id']} sin respuesta definitiva "
+                        f"tras {consultas} consultas (último estado: {estado_sri})"
+                    )
+                    continue
+
+            autorizado = estado_sri == SRIEstadoRespuesta.AUTORIZADO
+            cambio = {
+                "id": documento['documento_id'],
+                "clave_acceso": documento['clave_acceso'],
+                "numero_autorizacion": respuesta.get('numeroAutorizacion') if autorizado else None,
+            }
+            if tipo == FACTURA:
+                cambio["estado"] = estado_local
+                cambio["fecha_autorizacion"] = respuesta.get('fechaAutorizacion') if autorizado else None
+            else:
+                cambio["estado_sri"] = estado_local
+            cambios[tipo].append(cambio)
+            resueltos.append(documento)
+
+            log_estado = LogEstado.EXITOSO if autorizado else (
+                LogEstado.ERROR_SISTEMA if estado_local == FacturaEstado.ERROR_TECNICO else LogEstado.ERROR_VALIDACION
+            )
+            mensajes = _mensajes(respuesta)
+            if not mensajes and estado_local == FacturaEstado.ERROR_TECNICO:
+                mensajes = [{
+                    "codigo": "SRI_404",
+                    "mensaje": f"El SRI no registra el comprobante tras {consultas} consultas; puede emitirse nuevamente.",
+                    "tipo": "ERROR"
+                }]
+            if documento.get('usuario_id'):
+                logs[tipo].append({
+                    "documento_id": documento['documento_id'],
+                    "usuario_id": documento['usuario_id'],
+                    "ambiente": int(SRIAmbiente.PRUEBAS),
+                    "clave_acceso": documento['clave_acceso'],
+                    "estado": log_estado,
+                    "sri_estado_raw": estado_sri,
+                    "fase_falla": None if autorizado else "AUTORIZACION_CONSULTA",
+                    "duracion_ms": latencia,
+                    "mensajes": mensajes,
+                    "client_info": {**CLIENT_INFO, "consultas": consultas},
+                    "xml_respuesta": respuesta.get('xml_respuesta_raw'),
+                })
+            if autorizado and respuesta.get('numeroAutorizacion') and respuesta.get('fechaAutorizacion'):
+                autorizaciones[tipo].append({
+                    "documento_id": documento['documento_id'],
+                    "numero_autorizacion": respuesta['numeroAutorizacion'],
+                    "fecha_autorizacion": respuesta['fechaAutorizacion'],
+                    "mensajes": respuesta.get('mensajes') or [],
+                    "xml_respuesta": respuesta.get('xml_respuesta_raw'),
+                })
+
+        with db_transaction(conn) as cur:
+            facturas = RepositorioFacturas(db=conn).actualizar_estados_sri_lote(cambios[FACTURA], cur)
+            notas = RepositorioNotasCredito(db=conn).actualizar_estados_sri_lote(cambios[NOTA_CREDITO], cur)
+            # Logs y autorizaciones solo de los documentos que realmente cambiaron en este lote
+            aplicados = {FACTURA: {str(f['id']) for f in facturas}, NOTA_CREDITO: {str(n['id']) for n in notas}}
+            for tipo in (FACTURA, NOTA_CREDITO):
+                repo.registrar_logs(cur, tipo, [l for l in logs[tipo] if str(l['documento_id']) in aplicados[tipo]])
+                repo.registrar_autorizaciones(
+                    cur, tipo, [a for a in autorizaciones[tipo] if str(a['documento_id']) in aplicados[tipo]]
+                )
+            repo.reprogramar_lote(cur, pendientes)
+            repo.eliminar_lote(cur, resueltos)
+
+        return [f['id'] for f in facturas if f['estado'] == FacturaEstado.AUTORIZADA]
+
+
+# Instancia global por proceso
+reconciliador_sri = ReconciliadorSRI()
@@ -4,6 +4,7 @@ from uuid import UUID
 from ...database.session import get_db
 from ...database.transaction import db_transaction
 from psycopg2.extras import RealDictCursor
+from ..empresas.perfil_emisor_cache import perfil_emisor_cache
 
 class RepositorioSRI:
     def __init__(self, db=Depends(get_db)):
@@ -41,6 +42,9 @@ class RepositorioSRI:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            # Ambiente, estado y vencimiento de la firma forman parte del perfil del emisor
+            if row:
+                perfil_emisor_cache.notificar_empresa(cur, row['empresa_id'])
             return dict(row) if row else None
 
     def actualizar_config(self, id: UUID, data: dict) -> Optional[dict]:
@@ -54,6 +58,8 @@ class RepositorioSRI:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            if row:
+                perfil_emisor_cache.notificar_empresa(cur, row['empresa_id'])
             return dict(row) if row else None
 
     def obtener_stats_certificados(self) -> dict:
@@ -0,0 +1,176 @@
+"""
+Repositorio de la cola durable de emisión SRI (tabla cola_emision_sri).
+
+Los workers toman trabajos con `FOR UPDATE SKIP LOCKED`, de modo que varios
+hilos/procesos pueden consumir la cola en paralelo sin bloquearse entre sí.
+"""
+
+import json
+from fastapi import Depends
+from typing import Optional
+from uuid import UUID
+
+from ...database.session import get_db
+from ...database.transaction import db_transaction
+
+ESTADOS_ACTIVOS = ('PENDIENTE', 'PROCESANDO', 'ESPERANDO_AUTORIZACION')
+
+# Columnas expuestas en consultas de estado (sin el XML firmado)
+CAMPOS_ESTADO = """
+    id, factura_id, empresa_id, usuario_id, estado, etapa, intentos,
+    consultas_autorizacion, proximo_intento_at, clave_acceso, estado_sri,
+    resultado, ultimo_error, created_at, updated_at, finalizado_at
+"""
+
+
+class RepositorioColaEmision:
+    def __init__(self, db=Depends(get_db)):
+        self.db = db
+
+    def encolar(self, factura_id: UUID, empresa_id: UUID, usuario_id: Optional[UUID], client_info: dict) -> dict:
+        """
+        Inserta un trabajo de emisión. Si la factura ya tiene uno activo,
+        retorna el existente (deduplicación por índice único parcial).
+        """
+        query = f"""
+            INSERT INTO sistema_facturacion.cola_emision_sri (factura_id, empresa_id, usuario_id, client_info)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (factura_id) WHERE estado IN {ESTADOS_ACTIVOS} DO NOTHING
+            RETURNING {CAMPOS_ESTADO}
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (
+                str(factura_id), str(empresa_id),
+                str(usuario_id) if usuario_id else None,
+                json.dumps(client_info or {})
+            ))
+            row = cur.fetchone()
+            if row:
+                return dict(row)
+        return self.obtener_activo_por_factura(factura_id)
+
+    def obtener(self, job_id: UUID) -> Optional[dict]:
+        query = f"SELECT {CAMPOS_ESTADO} FROM sistema_facturacion.cola_emision_sri WHERE id = %s"
+        with self.db.cursor() as cur:
+            cur.execute(query, (str(job_id),))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def obtener_activo_por_factura(self, factura_id: UUID) -> Optional[dict]:
+        query = f"""
+            SELECT {CAMPOS_ESTADO} FROM sistema_facturacion.cola_emision_sri
+            WHERE factura_id = %s AND estado IN {ESTADOS_ACTIVOS}
+        """
+        with self.db.cursor() as cur:
+            cur.execute(query, (str(factura_id),))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def obtener_ultimo_por_factura(self, factura_id: UUID) -> Optional[dict]:
+        query = f"""
+            SELECT {CAMPOS_ESTADO} FROM sistema_facturacion.cola_emision_sri
+            WHERE factura_id = %s
+            ORDER BY created_at DESC LIMIT 1
+        """
+        with self.db.cursor() as cur:
+            cur.execute(query, (str(factura_id),))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def reclamar_siguiente(self, worker_id: str, lease_segundos: int) -> Optional[dict]:
+        """
+        Toma el siguiente trabajo listo (o uno abandonado cuyo lease expiró)
+        y lo marca PROCESANDO para este worker.
+        """
+        query = """
+            UPDATE sistema_facturacion.cola_emision_sri j
+            SET estado = 'PROCESANDO',
+                worker_id = %s,
+                intentos = j.intentos + 1,
+                bloqueado_hasta = NOW() + make_interval(secs => %s),
+                updated_at = NOW()
+            WHERE j.id = (
+                SELECT id FROM sistema_facturacion.cola_emision_sri
+                WHERE (estado IN ('PENDIENTE', 'ESPERANDO_AUTORIZACION') AND proximo_intento_at <= NOW())
+                   OR (estado = 'PROCESANDO' AND bloqueado_hasta < NOW())
+                ORDER BY proximo_intento_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING j.*
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (worker_id, lease_segundos))
+            row = cur.fetchone()
+            return dict(row) if row else None
+
+    def pasar_a_autorizacion(self, job_id: UUID, ctx: dict, espera_segundos: float):
+        """Persiste el contexto de la recepción y agenda la primera consulta de autorización."""
+        query = """
+            UPDATE sistema_facturacion.cola_emision_sri
+            SET estado = 'ESPERANDO_AUTORIZACION',
+                etapa = 'AUTORIZACION',
+                ambiente = %s,
+                clave_acceso = %s,
+                xml_firmado = %s,
+                ya_en_procesamiento = %s,
+                intento_emision = %s,
+                facturacion_programada_id = %s,
+                client_info = %s,
+                inicio_emision = to_timestamp(%s),
+                proximo_intento_at = NOW() + make_interval(secs => %s),
+                bloqueado_hasta = NULL,
+                worker_id = NULL,
+                updated_at = NOW()
+            WHERE id = %s
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (
+                ctx['ambiente'],
+                ctx['clave'],
+                ctx['xml_firmado'].decode('utf-8', errors='ignore'),
+                ctx['ya_en_procesamiento'],
+                ctx['intento_num'],
+                str(ctx['facturacion_programada_id']) if ctx.get('facturacion_programada_id') else None,
+                json.dumps(ctx['client_info']),
+                ctx['start_time'],
+                espera_segundos,
+                str(job_id)
+            ))
+
+    def reprogramar_consulta(self, job_id: UUID, espera_segundos: float, estado_sri: str):
+        """Agenda una nueva consulta de autorización (backoff) liberando el lease."""
+        query = """
+            UPDATE sistema_facturacion.cola_emision_sri
+            SET estado = 'ESPERANDO_AUTORIZACION',
+                consultas_autorizacion = consultas_autorizacion + 1,
+                estado_sri = %s,
+                proximo_intento_at = NOW() + make_interval(secs => %s),
+                bloqueado_hasta = NULL,
+                worker_id = NULL,
+                updated_at = NOW()
+            WHERE id = %s
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (estado_sri, espera_segundos, str(job_id)))
+
+    def finalizar(self, job_id: UUID, estado: str, estado_sri: Optional[str] = None,
+                  resultado: Optional[dict] = None, error: Optional[str] = None):
+        query = """
+            UPDATE sistema_facturacion.cola_emision_sri
+            SET estado = %s,
+                estado_sri = COALESCE(%s, estado_sri),
+                resultado = %s,
+                ultimo_error = %s,
+                xml_firmado = NULL,
+                bloqueado_hasta = NULL,
+                finalizado_at = NOW(),
+                updated_at = NOW()
+            WHERE id = %s
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (
+                estado, estado_sri,
+                json.dumps(resultado, default=str) if resultado is not None else None,
+                error, str(job_id)
+            ))
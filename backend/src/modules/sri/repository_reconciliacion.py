@@ -0,0 +1,194 @@
+"""
+Repositorio del reconciliador de comprobantes pendientes en el SRI
+(tabla reconciliacion_sri).
+
+Las facturas EN_PROCESO y las notas de crédito RECIBIDO con clave de acceso se
+siembran aquí; el reconciliador reclama lotes con `FOR UPDATE SKIP LOCKED` y
+escribe los resultados de cada lote con sentencias multi-fila (execute_values).
+"""
+
+from fastapi import Depends
+from psycopg2.extras import Json, execute_values
+from typing import List
+
+from ...database.session import get_db
+from ...database.transaction import db_transaction
+from .repository_cola import ESTADOS_ACTIVOS as ESTADOS_COLA_ACTIVOS
+from .constants import NotaCreditoEstadoSRI
+
+FACTURA = 'FACTURA'
+NOTA_CREDITO = 'NOTA_CREDITO'
+
+# Estados locales que significan "enviado, esperando la autorización"
+ESTADOS_NC_PENDIENTES = (NotaCreditoEstadoSRI.PENDIENTE, NotaCreditoEstadoSRI.RECIBIDO)
+
+
+class RepositorioReconciliacionSRI:
+    def __init__(self, db=Depends(get_db)):
+        self.db = db
+
+    def sembrar(self, gracia_segundos: int) -> int:
+        """
+        Registra los comprobantes pendientes que aún no se siguen y descarta las
+        filas de documentos que ya salieron de ese estado (consulta manual,
+        reemisión con otra clave, anulación). Retorna cuántos se agregaron.
+
+        Las facturas con un trabajo activo en la cola de emisión quedan fuera:
+        esa cola ya consulta su autorización.
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(f"""
+                DELETE FROM sistema_facturacion.reconciliacion_sri r
+                WHERE r.tipo_documento = '{FACTURA}'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM sistema_facturacion.facturas f
+                      WHERE f.id = r.documento_id AND f.estado = 'EN_PROCESO'
+                        AND f.clave_acceso = r.clave_acceso
+                  )
+            """)
+            cur.execute(f"""
+                DELETE FROM sistema_facturacion.reconciliacion_sri r
+                WHERE r.tipo_documento = '{NOTA_CREDITO}'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM sistema_facturacion.notas_credito nc
+                      WHERE nc.id = r.documento_id AND nc.estado_sri IN {ESTADOS_NC_PENDIENTES}
+                        AND nc.clave_acceso = r.clave_acceso
+                  )
+            """)
+
+            cur.execute(f"""
+                INSERT INTO sistema_facturacion.reconciliacion_sri
+                    (tipo_documento, documento_id, empresa_id, usuario_id, clave_acceso)
+                SELECT '{FACTURA}', f.id, f.empresa_id, f.usuario_id, f.clave_acceso
+                FROM sistema_facturacion.facturas f
+                WHERE f.estado = 'EN_PROCESO'
+                  AND f.clave_acceso IS NOT NULL
+                  AND f.updated_at < NOW() - make_interval(secs => %s)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM sistema_facturacion.cola_emision_sri c
+                      WHERE c.factura_id = f.id AND c.estado IN {ESTADOS_COLA_ACTIVOS}
+                  )
+                ON CONFLICT (tipo_documento, documento_id) DO NOTHING
+            """, (gracia_segundos,))
+            agregados = cur.rowcount
+
+            cur.execute(f"""
+                INSERT INTO sistema_facturacion.reconciliacion_sri
+                    (tipo_documento, documento_id, empresa_id, usuario_id, clave_acceso)
+                SELECT '{NOTA_CREDITO}', nc.id, f.empresa_id, f.usuario_id, nc.clave_acceso
+                FROM sistema_facturacion.notas_credito nc
+                JOIN sistema_facturacion.facturas f ON f.id = nc.factura_id
+                WHERE nc.estado_sri IN {ESTADOS_NC_PENDIENTES}
+                  AND nc.clave_acceso IS NOT NULL
+                  AND nc.updated_at < NOW() - make_interval(secs => %s)
+                ON CONFLICT (tipo_documento, documento_id) DO NOTHING
+            """, (gracia_segundos,))
+            return agregados + cur.rowcount
+
+    def reclamar_lote(self, limite: int, lease_segundos: int) -> List[dict]:
+        """Toma hasta `limite` documentos cuya próxima consulta ya venció."""
+        query = """
+            UPDATE sistema_facturacion.reconciliacion_sri r
+            SET bloqueado_hasta = NOW() + make_interval(secs => %s),
+                updated_at = NOW()
+            WHERE (r.tipo_documento, r.documento_id) IN (
+                SELECT tipo_documento, documento_id FROM sistema_facturacion.reconciliacion_sri
+                WHERE estado = 'PENDIENTE'
+                  AND proximo_intento_at <= NOW()
+                  AND (bloqueado_hasta IS NULL OR bloqueado_hasta < NOW())
+                ORDER BY proximo_intento_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT %s
+            )
+            RETURNING r.*
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (lease_segundos, limite))
+            return [dict(row) for row in cur.fetchall()]
+
+    def reprogramar_lote(self, cur, consultas: List[dict]):
+        """
+        Registra la consulta (estado SRI y latencia) de los documentos que siguen
+        pendientes y agenda la siguiente; estado AGOTADO detiene las consultas.
+        """
+        if not consultas:
+            return
+        valores = [
+            (c['tipo_documento'], str(c['documento_id']), c['estado'], c['espera'], c['estado_sri'], c['latencia_ms'])
+            for c in consultas
+        ]
+        execute_values(cur, """
+            UPDATE sistema_facturacion.reconciliacion_sri r
+            SET estado = v.estado,
+                consultas = r.consultas + 1,
+                proximo_intento_at = NOW() + make_interval(secs => v.espera::float8),
+                bloqueado_hasta = NULL,
+                ultimo_estado_sri = v.estado_sri,
+                ultima_latencia_ms = v.latencia_ms::int,
+                latencia_total_ms = r.latencia_total_ms + v.latencia_ms::int,
+                ultima_consulta_at = NOW(),
+                updated_at = NOW()
+            FROM (VALUES %s) AS v(tipo_documento, documento_id, estado, espera, estado_sri, latencia_ms)
+            WHERE r.tipo_documento = v.tipo_documento AND r.documento_id = v.documento_id::uuid
+        """, valores)
+
+    def eliminar_lote(self, cur, documentos: List[dict]):
+        """Quita del seguimiento los documentos que ya tienen respuesta definitiva."""
+        if not documentos:
+            return
+        execute_values(cur, """
+            DELETE FROM sistema_facturacion.reconciliacion_sri r
+            USING (VALUES %s) AS v(tipo_documento, documento_id)
+            WHERE r.tipo_documento = v.tipo_documento AND r.documento_id = v.documento_id::uuid
+        """, [(d['tipo_documento'], str(d['documento_id'])) for d in documentos])
+
+    def registrar_logs(self, cur, tipo_documento: str, logs: List[dict]):
+        """Un registro de consulta por documento resuelto, en un solo INSERT."""
+        if not logs:
+            return
+        tabla, columna = (
+            ('log_emision_facturas', 'factura_id') if tipo_documento == FACTURA
+            else ('log_emision_notas_credito', 'nota_credito_id')
+        )
+        valores = [
+            (
+                str(l['documento_id']), str(l['usuario_id']), l['ambiente'], l['clave_acceso'],
+                l['estado'], l['sri_estado_raw'], l['fase_falla'], l['duracion_ms'],
+                Json(l['mensajes']), Json(l['client_info']), l.get('xml_respuesta')
+            )
+            for l in logs
+        ]
+        execute_values(cur, f"""
+            INSERT INTO sistema_facturacion.{tabla}
+                ({columna}, usuario_id, ambiente, clave_acceso, estado, sri_estado_raw, fase_falla,
+                 duracion_ms, mensajes, client_info, xml_respuesta, tipo_intento, intento_numero)
+            VALUES %s
+        """, valores, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'CONSULTA', 0)")
+
+    def registrar_autorizaciones(self, cur, tipo_documento: str, autorizaciones: List[dict]):
+        """Guarda número y fecha de autorización de los documentos autorizados."""
+        if not autorizaciones:
+            return
+        tabla, columna = (
+            ('autorizaciones_sri', 'factura_id') if tipo_documento == FACTURA
+            else ('autorizaciones_sri_notas_credito', 'nota_credito_id')
+        )
+        valores = [
+            (
+                str(a['documento_id']), a['numero_autorizacion'], a['fecha_autorizacion'],
+                Json(a['mensajes']), a.get('xml_respuesta')
+            )
+            for a in autorizaciones
+        ]
+        execute_values(cur, f"""
+            INSERT INTO sistema_facturacion.{tabla}
+                ({columna}, numero_autorizacion, fecha_autorizacion, estado, mensajes, xml_respuesta)
+            VALUES %s
+            ON CONFLICT ({columna}) DO UPDATE SET
+                numero_autorizacion = EXCLUDED.numero_autorizacion,
+                fecha_autorizacion = EXCLUDED.fecha_autorizacion,
+                estado = EXCLUDED.estado,
+                mensajes = EXCLUDED.mensajes,
+                xml_respuesta = EXCLUDED.xml_respuesta,
+                updated_at = NOW()
+        """, valores, template="(%s, %s, %s::timestamptz, 'AUTORIZADO', %s, %s)")
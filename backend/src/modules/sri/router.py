@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, status, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
 from uuid import UUID
 from typing import List, Optional
 
 from .service import ServicioSRI
+from .cola_emision import ServicioColaEmision
 from .schemas import ConfigSRILectura, ConfigSRIActualizacion, ConfigSRIActualizacionParametros, AutorizacionSRILectura
 from ..autenticacion.routes import obtener_usuario_actual, requerir_permiso, requerir_superadmin
 from ...constants.permissions import PermissionCodes
@@ -29,7 +31,8 @@ async def configurar_sri(
          return RespuestaBase(ok=False, mensaje="No se pudo determinar la empresa", codigo="ID_MISSING", status_code=400)
     
     content = await file.read()
-    res = servicio.guardar_certificado(target_id, content, password, ambiente, tipo_emision)
+    # Repositorio psycopg2 y cifrado del certificado: fuera del event loop
+    res = await run_in_threadpool(servicio.guardar_certificado, target_id, content, password, ambiente, tipo_emision)
     return RespuestaBase(detalles=res)
 
 @router.patch("/configuracion/parametros", response_model=RespuestaBase[ConfigSRILectura])
@@ -67,6 +70,39 @@ def enviar_factura(
     return RespuestaBase(detalles=res)
 
 
+@router.post("/facturas/{id}/encolar", status_code=status.HTTP_202_ACCEPTED, response_model=RespuestaBase)
+def encolar_factura(
+    id: UUID,
+    request: Request,
+    usuario: dict = Depends(requerir_permiso(PermissionCodes.FACTURAS_ENVIAR_SRI)),
+    servicio: ServicioColaEmision = Depends()
+):
+    """Encola la emisión al SRI y responde de inmediato con el id del trabajo."""
+    x_forwarded_for = request.headers.get("x-forwarded-for")
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(",")[0].strip()
+    else:
+        ip = request.client.host if request.client else "desconocida"
+
+    usuario['ip'] = ip
+    usuario['user_agent'] = request.headers.get("user-agent", "desconocido")
+    usuario['version_app'] = request.headers.get("x-app-version", "1.0.0")
+
+    res = servicio.encolar(id, usuario)
+    return RespuestaBase(mensaje="Emisión encolada", detalles=res)
+
+
+@router.get("/emisiones/{job_id}", response_model=RespuestaBase)
+def obtener_estado_emision(
+    job_id: UUID,
+    usuario: dict = Depends(requerir_permiso(PermissionCodes.FACTURAS_ENVIAR_SRI)),
+    servicio: ServicioColaEmision = Depends()
+):
+    """Estado de un trabajo de emisión encolado."""
+    res = servicio.obtener_estado(job_id, usuario)
+    return RespuestaBase(detalles=res)
+
+
 @router.get("/facturas/{id}/consultar", response_model=RespuestaBase)
 def consultar_factura(
     id: UUID,
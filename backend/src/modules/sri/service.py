@@ -12,6 +12,7 @@ from .repository import RepositorioSRI
 from .client import ClienteSRI
 from .xml_service import ServicioSRIXML
 from .signer import XMLSigner
+from .signer_cache import signer_cache, obtener_signer_empresa
 from .cert_utils import ExtractorCertificadoSRI
 from .schemas import ConfigSRICreacion, ConfigSRIActualizacion, ConfigSRIActualizacionParametros
 from .constants import (
@@ -28,7 +29,9 @@ logger = logging.getLogger("facturacion_api")
 
 # Other modules repos
 from ..facturas.repository import RepositorioFacturas
+from ..facturas.ride import precalentar_ride
 from ..empresas.repositories import RepositorioEmpresas
+from ..empresas.perfil_emisor_cache import obtener_perfil_emisor
 from ..clientes.repository import RepositorioClientes
 from ..logs.repository import RepositorioLogs
 from ..formas_pago.repository import RepositorioFormasPago
@@ -113,6 +116,8 @@ class ServicioSRI:
             res = self.repo.actualizar_config(existing['id'], data)
         else:
             res = self.repo.crear_config(data)
+        # El signer cacheado corresponde al certificado anterior (el perfil se notifica en el repositorio)
+        signer_cache.invalidar_empresa(empresa_id)
             
         self.logs_service.registrar_evento(
             user_id=None, 
@@ -134,18 +139,29 @@ class ServicioSRI:
         return self.repo.actualizar_config(existing['id'], data)
 
     def obtener_signer(self, empresa_id: UUID) -> XMLSigner:
-        config = self.repo.obtener_config(empresa_id, incluir_binarios=True)
-        if not config or config['estado'] != 'ACTIVO':
-            raise AppError("Firma electrónica no activa o inválida", 400, "SRI_CONFIG_INCOMPLETE")
-        
+        return obtener_signer_empresa(self.repo, self.crypto, empresa_id)
+
+    def enviar_factura(self, factura_id: UUID, usuario_actual: dict, force_reemission: bool = False):
+        """Emisión síncrona: recepción, espera fija y consulta de autorización en el mismo request."""
+        ctx = self.preparar_emision(factura_id, usuario_actual, force_reemission)
         try:
-            p12 = self.crypto.decrypt(bytes(config['certificado_digital']))
-            passw = self.crypto.decrypt_to_str(bytes(config['clave_certificado']))
-            return XMLSigner(p12, passw)
+            res_rec = self.fase_recepcion(ctx)
+            if res_rec is not None:
+                return res_rec
+
+            # 3. PROCESAR AUTORIZACIÓN
+            time.sleep(SRI_TIME_SLEEP_AUTORIZACION)
+            res_aut = self.client_sri.autorizar_comprobante(ctx['clave'], ctx['ambiente'])
+            return self.fase_autorizacion(ctx, res_aut)
         except Exception as e:
-            raise AppError("Error de seguridad al acceder a la firma", 500, "CRYPTO_ERROR")
+            self.registrar_error_emision(ctx, e)
+            raise e
 
-    def enviar_factura(self, factura_id: UUID, usuario_actual: dict, force_reemission: bool = False):
+    def preparar_emision(self, factura_id: UUID, usuario_actual: dict, force_reemission: bool = False) -> dict:
+        """
+        Valida y bloquea la factura (EN_PROCESO) y arma el contexto de emisión.
+        El contexto es compartido por la emisión síncrona y la cola de emisión.
+        """
         factura = self.factura_repo.obtener_por_id(factura_id)
         if not factura: raise AppError("Factura no encontrada", 404, "FACTURA_NOT_FOUND")
         
@@ -156,7 +172,7 @@ class ServicioSRI:
         # Bloquear inmediatamente
         self.factura_repo.actualizar_factura(factura_id, {"estado": FacturaEstado.EN_PROCESO})
         
-        empresa = self.empresa_repo.obtener_por_id(factura['empresa_id'])
+        empresa = obtener_perfil_emisor(self.empresa_repo, factura['empresa_id'])
         cliente = self.cliente_repo.obtener_por_id(factura['cliente_id'])
         detalles = self.factura_repo.listar_detalles(factura_id)
         formas_pago = self.formas_pago_repo.listar_por_factura(factura_id)
@@ -174,24 +190,50 @@ class ServicioSRI:
         ambiente = SRIAmbiente.PRUEBAS 
         logger.info(f"[SRI-DEV] Forzando ambiente {ambiente} (DB decía: {ambiente_db}) para factura {factura_id}")
         
-        signer = None
         # Identificar el intento actual (conteo básico para logs)
         historial = self.factura_repo.listar_logs_emision(factura_id)
-        intento_num = len(historial) + 1
         
-        # Metadata para logs
-        start_time = time.time()
-        client_info = {
-            "ip": usuario_actual.get("ip", "desconocida"),
-            "user_agent": usuario_actual.get("user_agent", "desconocido"),
-            "version_app": usuario_actual.get("version_app", "1.0.0")
+        return {
+            "factura_id": factura_id,
+            "factura": factura,
+            "empresa": empresa,
+            "cliente": cliente,
+            "detalles": detalles,
+            "formas_pago": formas_pago,
+            "facturacion_programada_id": factura.get('facturacion_programada_id'),
+            "usuario_id": usuario_actual.get('id'),
+            "ambiente": ambiente,
+            "tipo_emision": tipo_emision,
+            "force_reemission": force_reemission,
+            "intento_num": len(historial) + 1,
+            # Metadata para logs
+            "start_time": time.time(),
+            "client_info": {
+                "ip": usuario_actual.get("ip", "desconocida"),
+                "user_agent": usuario_actual.get("user_agent", "desconocido"),
+                "version_app": usuario_actual.get("version_app", "1.0.0")
+            },
+            "clave": None,
+            "xml_firmado": None,
+            "ya_en_procesamiento": False
         }
 
+    def fase_recepcion(self, ctx: dict) -> Optional[dict]:
+        """
+        Firma el XML y lo envía a Recepción del SRI.
+        Retorna la respuesta de recepción si el comprobante fue DEVUELTO (fin de la emisión),
+        o None si debe continuar con la consulta de autorización.
+        """
+        factura_id = ctx['factura_id']
+        factura = ctx['factura']
+        signer = None
         try:
             signer = self.obtener_signer(factura['empresa_id'])
-            signer.verify_ruc(empresa['ruc'])
+            signer.verify_ruc(ctx['empresa']['ruc'])
             
-            xml_str = self.xml_service.generar_xml_factura(factura, cliente, empresa, detalles, formas_pago, ambiente, tipo_emision)
+            xml_str = self.xml_service.generar_xml_factura(
+                factura, ctx['cliente'], ctx['empresa'], ctx['detalles'], ctx['formas_pago'], ctx['ambiente'], ctx['tipo_emision']
+            )
             
             # 2. EXTRAER CLAVE DE ACCESO
             clave_match = re.search(r'<claveAcceso>(.*?)</claveAcceso>', xml_str)
@@ -199,208 +241,211 @@ class ServicioSRI:
             
             if not clave:
                 raise AppError("No se pudo extraer la clave de acceso del XML", 500, "SRI_KEY_ERROR")
+            ctx['clave'] = clave
 
             xml_firmado = signer.sign_xml(xml_str.encode('utf-8'))
+            ctx['xml_firmado'] = xml_firmado
             xml_b64 = base64.b64encode(xml_firmado).decode('utf-8')
-            
-            # Variable para controlar si el SRI ya lo tiene
-            ya_en_procesamiento = False
-            
-            # Verificar estado local antes de enviar
-            # Si ya tenemos la misma clave registrada y está en proceso o emitida, no reenviamos a recepción
-            # A menos que sea una RE-EMISIÓN FORZADA (Rescue)
-            if not force_reemission and factura.get('clave_acceso') == clave and factura.get('estado') in [FacturaEstado.EN_PROCESO, FacturaEstado.AUTORIZADA]:
-                print(f"--- [SRI] Factura ya registrada localmente con clave {clave}. Saltando envío (Recepción). ---")
-                ya_en_procesamiento = True
-            else:
-                # 1. ENVIAR RECEPCIÓN (Solo si no parece estar procesándose ya)
-                res_rec = self.client_sri.validar_comprobante(xml_b64, ambiente)
-                
-                # CASO ESPECIAL SRI: Error 70 - Clave de acceso en procesamiento o Error 45 - Secuencial ya registrado
-                msg_rec = str(res_rec.get('mensaje', ''))
-                cods_rec = res_rec.get('codigos', [])
-                
-                # Reportado como en procesamiento (70) o ya registrado (45)
-                ya_en_procesamiento = (
-                    SRIErrorCodes.TXT_EN_PROCESAMIENTO in msg_rec.upper() or 
-                    SRIErrorCodes.CLAVE_EN_PROCESAMIENTO in msg_rec or
-                    '45' in cods_rec or
-                    'SECUENCIAL REGISTRADO' in msg_rec.upper()
-                )
-                
-                # CASO TIMEOUT/CONEXIÓN: Si dio timeout o se cortó la conexión, es posible que el SRI sí lo haya recibido.
-                if res_rec['estado'] in [SRIEstadoRespuesta.ERROR_TIMEOUT, SRIEstadoRespuesta.ERROR_CONEXION]:
-                    print(f"--- [SRI] Problema de conectividad en Recepción ({res_rec['estado']}). Asumiendo posible recepción exitosa y consultando autorización. ---")
-                    ya_en_procesamiento = True
-                
-                elif res_rec['estado'] != SRIEstadoRespuesta.RECIBIDA and not ya_en_procesamiento:
-                    # Registrar fallo real en recepción -> DEVUELTA
-                    duration = int((time.time() - start_time) * 1000)
-                    mensajes_error = []
-                    for i, msg in enumerate(res_rec.get('mensajes', [])):
-                        cod = res_rec.get('codigos', [])[i] if i < len(res_rec.get('codigos', [])) else None
-                        mensajes_error.append({"codigo": cod, "mensaje": msg, "tipo": "ERROR"})
-                    
-                    if not mensajes_error and res_rec.get('mensaje'):
-                         mensajes_error.append({"codigo": None, "mensaje": res_rec.get('mensaje'), "tipo": "ERROR"})
-
-                    self.factura_repo.crear_log_emision({
-                        "factura_id": factura_id,
-                        "facturacion_programada_id": factura.get('facturacion_programada_id'),
-                        "usuario_id": usuario_actual.get('id'),
-                        "ambiente": int(SRIAmbiente.PRUEBAS),
-                        "clave_acceso": clave,
-                        "estado": LogEstado.ERROR_VALIDACION,
-                        "sri_estado_raw": res_rec['estado'],
-                        "fase_falla": "RECEPCION",
-                        "tipo_intento": "INICIAL" if intento_num == 1 else "REINTENTO",
-                        "intento_numero": intento_num,
-                        "mensajes": mensajes_error,
-                        "duracion_ms": duration,
-                        "client_info": client_info,
-                        "xml_enviado": xml_str,
-                        "xml_respuesta": res_rec.get('xml_respuesta_raw', str(res_rec))
-                    })
-                    
-                    # Marcar factura como DEVUELTA (Fase 1)
-                    self.factura_repo.actualizar_factura(factura_id, {
-                        "estado": FacturaEstado.DEVUELTA,
-                        "clave_acceso": clave
-                    })
-                    
-                    return res_rec
-                
-            # 3. PROCESAR AUTORIZACIÓN
-            time.sleep(SRI_TIME_SLEEP_AUTORIZACION)
-            
-            res_aut = self.client_sri.autorizar_comprobante(clave, ambiente)
-            estado_aut = res_aut['estado']
-            
-            # --- MANEJO INTELIGENTE LOGS ---
-            codigos_error = res_aut.get('codigos', [])
-            mensajes_aut = res_aut.get('mensajes', [])
-            
-            if estado_aut == SRIEstadoRespuesta.AUTORIZADO:
-                log_estado = LogEstado.EXITOSO
-            elif estado_aut in [SRIEstadoRespuesta.ERROR_TIMEOUT, SRIEstadoRespuesta.ERROR_CONEXION]:
-                log_estado = LogEstado.ERROR_CONECTIVIDAD
-            elif estado_aut == SRIEstadoRespuesta.EN_PROCESO or ya_en_procesamiento:
-                log_estado = LogEstado.EN_PROCESO
-            else:
-                log_estado = LogEstado.ERROR_VALIDACION
+        finally:
+            if signer:
+                signer.cleanup()
 
-            duration = int((time.time() - start_time) * 1000)
-            
-            mensajes_list = []
-            for i, msg in enumerate(mensajes_aut):
-                cod = codigos_error[i] if i < len(codigos_error) else None
-                mensajes_list.append({"codigo": cod, "mensaje": msg, "tipo": "ERROR"})
+        # Verificar estado local antes de enviar
+        # Si ya tenemos la misma clave registrada y está en proceso o emitida, no reenviamos a recepción
+        # A menos que sea una RE-EMISIÓN FORZADA (Rescue)
+        if not ctx['force_reemission'] and factura.get('clave_acceso') == clave and factura.get('estado') in [FacturaEstado.EN_PROCESO, FacturaEstado.AUTORIZADA]:
+            print(f"--- [SRI] Factura ya registrada localmente con clave {clave}. Saltando envío (Recepción). ---")
+            ctx['ya_en_procesamiento'] = True
+            return None
+
+        # 1. ENVIAR RECEPCIÓN (Solo si no parece estar procesándose ya)
+        res_rec = self.client_sri.validar_comprobante(xml_b64, ctx['ambiente'])
+        
+        # CASO ESPECIAL SRI: Error 70 - Clave de acceso en procesamiento o Error 45 - Secuencial ya registrado
+        msg_rec = str(res_rec.get('mensaje', ''))
+        cods_rec = res_rec.get('codigos', [])
+        
+        # Reportado como en procesamiento (70) o ya registrado (45)
+        ya_en_procesamiento = (
+            SRIErrorCodes.TXT_EN_PROCESAMIENTO in msg_rec.upper() or 
+            SRIErrorCodes.CLAVE_EN_PROCESAMIENTO in msg_rec or
+            '45' in cods_rec or
+            'SECUENCIAL REGISTRADO' in msg_rec.upper()
+        )
+        
+        # CASO TIMEOUT/CONEXIÓN: Si dio timeout o se cortó la conexión, es posible que el SRI sí lo haya recibido.
+        if res_rec['estado'] in [SRIEstadoRespuesta.ERROR_TIMEOUT, SRIEstadoRespuesta.ERROR_CONEXION]:
+            print(f"--- [SRI] Problema de conectividad en Recepción ({res_rec['estado']}). Asumiendo posible recepción exitosa y consultando autorización. ---")
+            ya_en_procesamiento = True
+        
+        elif res_rec['estado'] != SRIEstadoRespuesta.RECIBIDA and not ya_en_procesamiento:
+            # Registrar fallo real en recepción -> DEVUELTA
+            duration = int((time.time() - ctx['start_time']) * 1000)
+            mensajes_error = []
+            for i, msg in enumerate(res_rec.get('mensajes', [])):
+                cod = res_rec.get('codigos', [])[i] if i < len(res_rec.get('codigos', [])) else None
+                mensajes_error.append({"codigo": cod, "mensaje": msg, "tipo": "ERROR"})
             
-            if not mensajes_list:
-                if estado_aut == SRIEstadoRespuesta.ERROR_TIMEOUT:
-                    mensajes_list.append({"codigo": "TIMEOUT", "mensaje": "El SRI no respondió a tiempo la consulta de autorización.", "tipo": "INFO"})
-                elif ya_en_procesamiento:
-                    mensajes_list.append({"codigo": "70", "mensaje": "Comprobante en procesamiento en el SRI. Use el botón 'Consultar SRI' en unos minutos.", "tipo": "INFO"})
-                elif estado_aut == "NO_ENCONTRADO" or (res_aut.get('numeroComprobantes') == 0):
-                    mensajes_list.append({
-                        "codigo": "SRI_404", 
-                        "mensaje": "El SRI ha recibido el comprobante pero aún no lo ha indexado para consulta. Por favor, espere unos minutos antes de intentar consultar nuevamente.", 
-                        "tipo": "INFO"
-                    })
-                elif estado_aut == "DESCONOCIDO":
-                    mensajes_list.append({"codigo": "SISTEMA", "mensaje": "El SRI devolvió un estado desconocido o una respuesta vacía.", "tipo": "ERROR"})
+            if not mensajes_error and res_rec.get('mensaje'):
+                 mensajes_error.append({"codigo": None, "mensaje": res_rec.get('mensaje'), "tipo": "ERROR"})
 
             self.factura_repo.crear_log_emision({
                 "factura_id": factura_id,
-                "facturacion_programada_id": factura.get('facturacion_programada_id'),
-                "usuario_id": usuario_actual.get('id'),
+                "facturacion_programada_id": ctx['facturacion_programada_id'],
+                "usuario_id": ctx['usuario_id'],
                 "ambiente": int(SRIAmbiente.PRUEBAS),
                 "clave_acceso": clave,
-                "estado": log_estado,
-                "sri_estado_raw": "EN_PROCESO" if (log_estado == LogEstado.EN_PROCESO or ya_en_procesamiento) else estado_aut,
-                "fase_falla": "AUTORIZACION" if log_estado not in [LogEstado.EXITOSO, LogEstado.EN_PROCESO] else None,
-                "tipo_intento": "INICIAL" if intento_num == 1 else "REINTENTO",
-                "intento_numero": intento_num,
-                "mensajes": mensajes_list,
+                "estado": LogEstado.ERROR_VALIDACION,
+                "sri_estado_raw": res_rec['estado'],
+                "fase_falla": "RECEPCION",
+                "tipo_intento": "INICIAL" if ctx['intento_num'] == 1 else "REINTENTO",
+                "intento_numero": ctx['intento_num'],
+                "mensajes": mensajes_error,
                 "duracion_ms": duration,
-                "client_info": client_info,
-                "xml_enviado": xml_firmado.decode('utf-8', errors='ignore'),
-                "xml_respuesta": res_aut.get('xml_respuesta_raw', str(res_aut))
+                "client_info": ctx['client_info'],
+                "xml_enviado": xml_str,
+                "xml_respuesta": res_rec.get('xml_respuesta_raw', str(res_rec))
             })
-
-            # 4. GUARDAR EN TABLA DE AUTORIZACIONES (Solo RESPUESTAS VÁLIDAS)
-            es_error_tecnico = estado_aut in [SRIEstadoRespuesta.ERROR_TIMEOUT, SRIEstadoRespuesta.ERROR_CONEXION, "DESCONOCIDO", "NO_ENCONTRADO", SRIEstadoRespuesta.ERROR_PARSING]
-
-            if estado_aut in [SRIEstadoRespuesta.AUTORIZADO, SRIEstadoRespuesta.DEVUELTA, SRIEstadoRespuesta.DEVUELTO, SRIEstadoRespuesta.NO_AUTORIZADO, SRIEstadoRespuesta.EN_PROCESO]:
-                estado_db = estado_aut.upper() if estado_aut != "DEVUELTA" else "DEVUELTO"
-                
-                self.repo.crear_autorizacion({
-                    "factura_id": factura_id,
-                    "numero_autorizacion": res_aut.get('numeroAutorizacion'),
-                    "fecha_autorizacion": datetime.fromisoformat(res_aut['fechaAutorizacion']) if res_aut.get('fechaAutorizacion') else None,
-                    "estado": estado_db,
-                    "mensajes": mensajes_aut,
-                    "xml_enviado": xml_firmado.decode('utf-8', errors='ignore'),
-                    "xml_respuesta": res_aut.get('xml_respuesta_raw', str(res_aut))
-                })
             
-            # 5. ACTUALIZAR ESTADO DE LA FACTURA
-            update_fields = {"clave_acceso": clave}
+            # Marcar factura como DEVUELTA (Fase 1)
+            self.factura_repo.actualizar_factura(factura_id, {
+                "estado": FacturaEstado.DEVUELTA,
+                "clave_acceso": clave
+            })
             
-            if estado_aut == SRIEstadoRespuesta.AUTORIZADO:
-                fecha_aut_obj = None
-                if res_aut.get('fechaAutorizacion'):
-                    try:
-                        fecha_aut_obj = datetime.fromisoformat(res_aut['fechaAutorizacion'].replace('Z', '+00:00'))
-                    except:
-                        fecha_aut_obj = res_aut.get('fechaAutorizacion')
+            return res_rec
 
-                update_fields.update({
-                    "estado": FacturaEstado.AUTORIZADA,
-                    "numero_autorizacion": res_aut.get('numeroAutorizacion'),
-                    "fecha_autorizacion": fecha_aut_obj,
-                    "fecha_emision": fecha_aut_obj  # Sincronización solicitada
+        ctx['ya_en_procesamiento'] = ya_en_procesamiento
+        return None
+
+    def fase_autorizacion(self, ctx: dict, res_aut: dict) -> dict:
+        """Registra la respuesta de Autorización del SRI (logs, autorización y estado de la factura)."""
+        factura_id = ctx['factura_id']
+        clave = ctx['clave']
+        ya_en_procesamiento = ctx['ya_en_procesamiento']
+        xml_firmado = ctx['xml_firmado']
+        estado_aut = res_aut['estado']
+        
+        # --- MANEJO INTELIGENTE LOGS ---
+        codigos_error = res_aut.get('codigos', [])
+        mensajes_aut = res_aut.get('mensajes', [])
+        
+        if estado_aut == SRIEstadoRespuesta.AUTORIZADO:
+            log_estado = LogEstado.EXITOSO
+        elif estado_aut in [SRIEstadoRespuesta.ERROR_TIMEOUT, SRIEstadoRespuesta.ERROR_CONEXION]:
+            log_estado = LogEstado.ERROR_CONECTIVIDAD
+        elif estado_aut == SRIEstadoRespuesta.EN_PROCESO or ya_en_procesamiento:
+            log_estado = LogEstado.EN_PROCESO
+        else:
+            log_estado = LogEstado.ERROR_VALIDACION
+
+        duration = int((time.time() - ctx['start_time']) * 1000)
+        
+        mensajes_list = []
+        for i, msg in enumerate(mensajes_aut):
+            cod = codigos_error[i] if i < len(codigos_error) else None
+            mensajes_list.append({"codigo": cod, "mensaje": msg, "tipo": "ERROR"})
+        
+        if not mensajes_list:
+            if estado_aut == SRIEstadoRespuesta.ERROR_TIMEOUT:
+                mensajes_list.append({"codigo": "TIMEOUT", "mensaje": "El SRI no respondió a tiempo la consulta de autorización.", "tipo": "INFO"})
+            elif ya_en_procesamiento:
+                mensajes_list.append({"codigo": "70", "mensaje": "Comprobante en procesamiento en el SRI. Use el botón 'Consultar SRI' en unos minutos.", "tipo": "INFO"})
+            elif estado_aut == "NO_ENCONTRADO" or (res_aut.get('numeroComprobantes') == 0):
+                mensajes_list.append({
+                    "codigo": "SRI_404", 
+                    "mensaje": "El SRI ha recibido el comprobante pero aún no lo ha indexado para consulta. Por favor, espere unos minutos antes de intentar consultar nuevamente.", 
+                    "tipo": "INFO"
                 })
-            elif estado_aut in [SRIEstadoRespuesta.DEVUELTA, SRIEstadoRespuesta.DEVUELTO]:
-                update_fields["estado"] = FacturaEstado.DEVUELTA
-            elif estado_aut == SRIEstadoRespuesta.NO_AUTORIZADO:
-                update_fields["estado"] = FacturaEstado.NO_AUTORIZADA
-            else:
-                if ya_en_procesamiento or estado_aut == SRIEstadoRespuesta.EN_PROCESO:
-                    update_fields["estado"] = FacturaEstado.EN_PROCESO
-                elif estado_aut == "NO_ENCONTRADO":
-                    # El SRI aún no indexa el documento. Lo mantenemos en EN_PROCESO 
-                    # para que el usuario sepa que debe esperar y consultar más tarde.
-                    update_fields["estado"] = FacturaEstado.EN_PROCESO
-                else:
-                    update_fields["estado"] = FacturaEstado.ERROR_TECNICO
-            
-            self.factura_repo.actualizar_factura(factura_id, update_fields)
-            return res_aut
+            elif estado_aut == "DESCONOCIDO":
+                mensajes_list.append({"codigo": "SISTEMA", "mensaje": "El SRI devolvió un estado desconocido o una respuesta vacía.", "tipo": "ERROR"})
+
+        self.factura_repo.crear_log_emision({
+            "factura_id": factura_id,
+            "facturacion_programada_id": ctx['facturacion_programada_id'],
+            "usuario_id": ctx['usuario_id'],
+            "ambiente": int(SRIAmbiente.PRUEBAS),
+            "clave_acceso": clave,
+            "estado": log_estado,
+            "sri_estado_raw": "EN_PROCESO" if (log_estado == LogEstado.EN_PROCESO or ya_en_procesamiento) else estado_aut,
+            "fase_falla": "AUTORIZACION" if log_estado not in [LogEstado.EXITOSO, LogEstado.EN_PROCESO] else None,
+            "tipo_intento": "INICIAL" if ctx['intento_num'] == 1 else "REINTENTO",
+            "intento_numero": ctx['intento_num'],
+            "mensajes": mensajes_list,
+            "duracion_ms": duration,
+            "client_info": ctx['client_info'],
+            "xml_enviado": xml_firmado.decode('utf-8', errors='ignore'),
+            "xml_respuesta": res_aut.get('xml_respuesta_raw', str(res_aut))
+        })
+
+        # 4. GUARDAR EN TABLA DE AUTORIZACIONES (Solo RESPUESTAS VÁLIDAS)
+        if estado_aut in [SRIEstadoRespuesta.AUTORIZADO, SRIEstadoRespuesta.DEVUELTA, SRIEstadoRespuesta.DEVUELTO, SRIEstadoRespuesta.NO_AUTORIZADO, SRIEstadoRespuesta.EN_PROCESO]:
+            estado_db = estado_aut.upper() if estado_aut != "DEVUELTA" else "DEVUELTO"
             
-            return res_aut
-                
-        except Exception as e:
-            duration = int((time.time() - start_time) * 1000)
-            self.factura_repo.crear_log_emision({
+            self.repo.crear_autorizacion({
                 "factura_id": factura_id,
-                "facturacion_programada_id": factura.get('facturacion_programada_id'),
-                "usuario_id": usuario_actual.get('id'),
-                "ambiente": int(SRIAmbiente.PRUEBAS),
-                "clave_acceso": clave if 'clave' in locals() else None,
-                "estado": LogEstado.ERROR_SISTEMA,
-                "fase_falla": "SISTEMA",
-                "intento_numero": intento_num,
-                "mensajes": [{"codigo": "EXCEPCION_SISTEMA", "mensaje": str(e), "tipo": "ERROR"}],
-                "duracion_ms": duration,
-                "client_info": client_info
+                "numero_autorizacion": res_aut.get('numeroAutorizacion'),
+                "fecha_autorizacion": datetime.fromisoformat(res_aut['fechaAutorizacion']) if res_aut.get('fechaAutorizacion') else None,
+                "estado": estado_db,
+                "mensajes": mensajes_aut,
+                "xml_enviado": xml_firmado.decode('utf-8', errors='ignore'),
+                "xml_respuesta": res_aut.get('xml_respuesta_raw', str(res_aut))
             })
-            # Revertir estado a ERROR_TECNICO para permitir reintento
-            self.factura_repo.actualizar_factura(factura_id, {"estado": FacturaEstado.ERROR_TECNICO})
-            raise e
-        finally:
-            if signer:
-                signer.cleanup()
+        
+        # 5. ACTUALIZAR ESTADO DE LA FACTURA
+        update_fields = {"clave_acceso": clave}
+        
+        if estado_aut == SRIEstadoRespuesta.AUTORIZADO:
+            fecha_aut_obj = None
+            if res_aut.get('fechaAutorizacion'):
+                try:
+                    fecha_aut_obj = datetime.fromisoformat(res_aut['fechaAutorizacion'].replace('Z', '+00:00'))
+                except:
+                    fecha_aut_obj = res_aut.get('fechaAutorizacion')
+
+            update_fields.update({
+                "estado": FacturaEstado.AUTORIZADA,
+                "numero_autorizacion": res_aut.get('numeroAutorizacion'),
+                "fecha_autorizacion": fecha_aut_obj,
+                "fecha_emision": fecha_aut_obj  # Sincronización solicitada
+            })
+        elif estado_aut in [SRIEstadoRespuesta.DEVUELTA, SRIEstadoRespuesta.DEVUELTO]:
+            update_fields["estado"] = FacturaEstado.DEVUELTA
+        elif estado_aut == SRIEstadoRespuesta.NO_AUTORIZADO:
+            update_fields["estado"] = FacturaEstado.NO_AUTORIZADA
+        else:
+            if ya_en_procesamiento or estado_aut == SRIEstadoRespuesta.EN_PROCESO:
+                update_fields["estado"] = FacturaEstado.EN_PROCESO
+            elif estado_aut == "NO_ENCONTRADO":
+                # El SRI aún no indexa el documento. Lo mantenemos en EN_PROCESO 
+                # para que el usuario sepa que debe esperar y consultar más tarde.
+                update_fields["estado"] = FacturaEstado.EN_PROCESO
+            else:
+                update_fields["estado"] = FacturaEstado.ERROR_TECNICO
+        
+        self.factura_repo.actualizar_factura(factura_id, update_fields)
+        if update_fields.get("estado") == FacturaEstado.AUTORIZADA:
+            precalentar_ride(factura_id)
+        return res_aut
+
+    def registrar_error_emision(self, ctx: dict, e: Exception):
+        """Registra una excepción de sistema durante la emisión y libera la factura para reintento."""
+        duration = int((time.time() - ctx['start_time']) * 1000)
+        self.factura_repo.crear_log_emision({
+            "factura_id": ctx['factura_id'],
+            "facturacion_programada_id": ctx['facturacion_programada_id'],
+            "usuario_id": ctx['usuario_id'],
+            "ambiente": int(SRIAmbiente.PRUEBAS),
+            "clave_acceso": ctx.get('clave'),
+            "estado": LogEstado.ERROR_SISTEMA,
+            "fase_falla": "SISTEMA",
+            "intento_numero": ctx['intento_num'],
+            "mensajes": [{"codigo": "EXCEPCION_SISTEMA", "mensaje": str(e), "tipo": "ERROR"}],
+            "duracion_ms": duration,
+            "client_info": ctx['client_info']
+        })
+        # Revertir estado a ERROR_TECNICO para permitir reintento
+        self.factura_repo.actualizar_factura(ctx['factura_id'], {"estado": FacturaEstado.ERROR_TECNICO})
 
     def consultar_estado_sri(self, factura_id: UUID, usuario_actual: dict):
         """
@@ -492,16 +537,14 @@ class ServicioSRI:
                     "fecha_autorizacion": fecha_aut_obj,
                     "fecha_emision": fecha_aut_obj # Sincronización solicitada
                 })
+                precalentar_ride(factura_id)
             elif estado_aut in [SRIEstadoRespuesta.DEVUELTA, SRIEstadoRespuesta.DEVUELTO]:
                 self.factura_repo.actualizar_factura(factura_id, {"estado": FacturaEstado.DEVUELTA})
             elif estado_aut == SRIEstadoRespuesta.NO_AUTORIZADO:
                 self.factura_repo.actualizar_factura(factura_id, {"estado": FacturaEstado.NO_AUTORIZADA})
-            elif estado_aut in ["NO_ENCONTRADO", SRIEstadoRespuesta.NO_ENCONTRADO]:
-                 # RESCATE ACTIVO: Si no se encuentra en consulta, intentamos una re-emisión forzada
-                 # Esto soluciona casos donde la recepción fue un falso positivo o se perdió el paquete.
-                 print(f"--- [SRI] No encontrado en consulta para {factura_id}. Iniciando re-emisión de rescate... ---")
-                 return self.enviar_factura(factura_id, usuario_actual, force_reemission=True)
-            
+            # NO_ENCONTRADO / EN PROCESO: la factura sigue EN_PROCESO y el reconciliador SRI
+            # la vuelve a consultar con backoff; si el SRI nunca la registra, la libera para reemitir.
+
             return res_aut
 
         except Exception as e:
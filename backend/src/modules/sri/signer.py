@@ -20,7 +20,11 @@ class XMLSigner:
         self._key = None
         self._cert = None
         self._additional_certs = []
+        self._ruc_extraido = None
+        # Los signers compartidos (cache por empresa) no se limpian tras cada uso
+        self.compartido = False
         self._load_credentials()
+        self._precalcular_datos_certificado()
 
     def _load_credentials(self):
         try:
@@ -35,6 +39,18 @@ class XMLSigner:
         except Exception as e:
             raise ValueError(f"Error al cargar credenciales .p12: {str(e)}")
 
+    def _precalcular_datos_certificado(self):
+        """Datos del certificado que son constantes en cada firma."""
+        cert_der = self._cert.public_bytes(encoding=serialization.Encoding.DER)
+        self._cert_digest_b64 = base64.b64encode(hashlib.sha256(cert_der).digest()).decode()
+        self._serial_number = self._cert.serial_number
+        self._issuer_name = self._cert.issuer.rfc4514_string()
+        self._cadena_pem = [self._clean_pem(self._cert)] + [self._clean_pem(ac) for ac in self._additional_certs]
+
+    @property
+    def serial(self) -> str:
+        return str(self._serial_number)
+
     def check_validity(self, check_only: bool = False):
         """
         Verifica la validez temporal del certificado.
@@ -61,13 +77,15 @@ class XMLSigner:
         Usa lógica extendida de ExtractorCertificadoSRI para buscar en Subject y Extensiones.
         """
         # 1. Usar el Extractor para obtener todos los metadatos posibles de forma robusta
-        try:
-            extractor = ExtractorCertificadoSRI(self.p12_data, self.p12_password)
-            meta = extractor.extraer_metadatos()
-            found_ruc = meta.get('ruc')
-        except Exception as e:
-            print(f"SRI Signer Warning: Fallo al extraer metadatos extendidos: {e}")
-            found_ruc = None
+        # (sobre el certificado ya cargado; el resultado se memoriza)
+        if self._ruc_extraido is None:
+            try:
+                meta = ExtractorCertificadoSRI.desde_certificado(self._cert).extraer_metadatos()
+                self._ruc_extraido = meta.get('ruc') or ""
+            except Exception as e:
+                print(f"SRI Signer Warning: Fallo al extraer metadatos extendidos: {e}")
+                self._ruc_extraido = ""
+        found_ruc = self._ruc_extraido or None
 
         # 2. Comparación directa con el RUC extraído
         if found_ruc == expected_ruc:
@@ -125,10 +143,9 @@ class XMLSigner:
             ds = self.NAMESPACES['ds']
             nsmap = {'ds': ds, 'etsi': etsi}
             
-            cert_der = self._cert.public_bytes(encoding=serialization.Encoding.DER)
-            cert_digest_b64 = base64.b64encode(hashlib.sha256(cert_der).digest()).decode()
-            serial_number = self._cert.serial_number
-            issuer_name = self._cert.issuer.rfc4514_string() 
+            cert_digest_b64 = self._cert_digest_b64
+            serial_number = self._serial_number
+            issuer_name = self._issuer_name
             
             # ... (Resto de la firma igual) ... 
 
@@ -176,9 +193,8 @@ class XMLSigner:
             
             key_info = etree.SubElement(signature, f"{{{ds}}}KeyInfo", Id=key_info_id)
             x509_data = etree.SubElement(key_info, f"{{{ds}}}X509Data")
-            etree.SubElement(x509_data, f"{{{ds}}}X509Certificate").text = self._clean_pem(self._cert)
-            for ac in self._additional_certs:
-                 etree.SubElement(x509_data, f"{{{ds}}}X509Certificate").text = self._clean_pem(ac)
+            for pem_limpio in self._cadena_pem:
+                 etree.SubElement(x509_data, f"{{{ds}}}X509Certificate").text = pem_limpio
 
             object_node = etree.SubElement(signature, f"{{{ds}}}Object", Id=f"SignatureObject-{uuid4()}")
             object_node.append(qualifying_props)
@@ -193,6 +209,8 @@ class XMLSigner:
         return "".join([l for l in pem.split('\n') if '-----' not in l and l.strip()])
 
     def cleanup(self):
+        if self.compartido:
+            return
         self.p12_data = None
         self.p12_password = None
         self._key = None
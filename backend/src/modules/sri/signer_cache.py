@@ -0,0 +1,88 @@
+"""
+Cache de firmadores (XMLSigner) por empresa.
+
+Descifrar el certificado y parsear el PKCS#12 es el paso más costoso de cada
+emisión. Aquí se conserva el signer ya cargado (clave, certificado y datos
+precalculados para la firma) por empresa, versionado por el serial y el
+`updated_at` de `configuraciones_sri`: cualquier cambio de la configuración
+produce un miss y reemplaza la entrada anterior.
+
+`ServicioSRI.guardar_certificado` invalida explícitamente la empresa.
+"""
+
+from typing import Optional, Tuple
+
+from .signer import XMLSigner
+from ...config.env import env
+from ...errors.app_error import AppError
+from ...utils.cache import CacheTTL
+
+
+class CacheSigners:
+    def __init__(self, ttl: float, max_entradas: int):
+        self._cache = CacheTTL(ttl=ttl, max_entradas=max_entradas, nombre="signers_sri")
+
+    @staticmethod
+    def version_config(config: dict) -> Tuple[str, str]:
+        return (str(config.get('cert_serial')), str(config.get('updated_at')))
+
+    def obtener(self, empresa_id, version: Tuple[str, str]) -> Optional[XMLSigner]:
+        entrada = self._cache.obtener(str(empresa_id))
+        if entrada is None:
+            return None
+        version_cache, signer = entrada
+        if version_cache != version:
+            self._cache.invalidar(str(empresa_id))
+            return None
+        return signer
+
+    def guardar(self, empresa_id, version: Tuple[str, str], signer: XMLSigner):
+        if not self._cache.habilitado:
+            return
+        signer.compartido = True
+        # El signer cacheado ya no necesita el .p12 ni su clave en memoria
+        signer.p12_data = None
+        signer.p12_password = None
+        self._cache.guardar(str(empresa_id), (version, signer))
+
+    def invalidar_empresa(self, empresa_id):
+        self._cache.invalidar(str(empresa_id))
+
+    def limpiar(self):
+        self._cache.limpiar()
+
+    def estadisticas(self) -> dict:
+        return self._cache.estadisticas()
+
+
+# Instancia global por proceso
+signer_cache = CacheSigners(
+    ttl=env.SRI_SIGNER_CACHE_TTL,
+    max_entradas=env.SRI_SIGNER_CACHE_MAX
+)
+
+
+def obtener_signer_empresa(repo, crypto, empresa_id) -> XMLSigner:
+    """
+    Signer de la empresa desde el cache; en un miss descifra y carga el .p12.
+    `repo` es un RepositorioSRI y `crypto` un CryptoService.
+    """
+    config = repo.obtener_config(empresa_id)
+    if not config or config['estado'] != 'ACTIVO':
+        raise AppError("Firma electrónica no activa o inválida", 400, "SRI_CONFIG_INCOMPLETE")
+
+    version = CacheSigners.version_config(config)
+    signer = signer_cache.obtener(empresa_id, version)
+    if signer is not None:
+        return signer
+
+    config = repo.obtener_config(empresa_id, incluir_binarios=True)
+    try:
+        p12 = crypto.decrypt(bytes(config['certificado_digital']))
+        passw = crypto.decrypt_to_str(bytes(config['clave_certificado']))
+        signer = XMLSigner(p12, passw)
+    except Exception:
+        raise AppError("Error de seguridad al acceder a la firma", 500, "CRYPTO_ERROR")
+
+    signer_cache.guardar(empresa_id, CacheSigners.version_config(config), signer)
+    return signer
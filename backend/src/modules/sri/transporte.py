@@ -0,0 +1,201 @@
+"""
+Transporte HTTP compartido hacia los web services del SRI.
+
+Una sola `requests.Session` por proceso con conexiones keep-alive por host
+(`SRI_POOL_CONEXIONES`): la emisión deja de abrir una sesión y un handshake TLS
+por request. Si todas las conexiones están ocupadas la petición espera turno en
+vez de abrir otra.
+
+Cada endpoint (URL de Recepción/Autorización por ambiente) tiene además:
+- Circuit breaker: tras `SRI_CIRCUITO_FALLOS` fallos seguidos (timeout,
+  conexión o HTTP 5xx) se abre durante `SRI_CIRCUITO_ESPERA_SEGUNDOS` y las
+  peticiones fallan al instante sin salir a la red; luego deja pasar una sola
+  petición de prueba que lo cierra o lo vuelve a abrir.
+- Histograma de latencias con buckets fijos, expuesto en
+  `estadisticas_transporte_sri()`.
+
+Las métricas y circuitos son globales al proceso aunque un componente use un
+transporte propio (p. ej. el reconciliador con `ClienteSRI.con_pool`).
+"""
+
+import time
+import bisect
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ...config.env import env
+
+# Límites superiores (ms) de los buckets del histograma; el último es +inf
+BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+CERRADO = "CERRADO"
+ABIERTO = "ABIERTO"
+SEMIABIERTO = "SEMIABIERTO"
+
+
+class CircuitoAbiertoError(Exception):
+    """El circuito del endpoint está abierto: no se envió la petición."""
+
+
+class MetricasEndpoint:
+    """Circuit breaker e histograma de latencias de un endpoint del SRI."""
+
+    def __init__(self, fallos_apertura: int, espera_segundos: float):
+        self._lock = threading.Lock()
+        self._fallos_apertura = max(1, fallos_apertura)
+        self._espera = espera_segundos
+        self.estado = CERRADO
+        self._fallos_seguidos = 0
+        self._abierto_hasta = 0.0
+        self._prueba_en_curso = False
+        self.aperturas = 0
+        self.rechazadas = 0
+        self.solicitudes = 0
+        self.errores = 0
+        self._buckets = [0] * (len(BUCKETS_MS) + 1)
+        self._suma_ms = 0.0
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self.estado == ABIERTO and time.monotonic() >= self._abierto_hasta:
+                self.estado = SEMIABIERTO
+            if self.estado == SEMIABIERTO:
+                if self._prueba_en_curso:
+                    self.rechazadas += 1
+                    return False
+                self._prueba_en_curso = True
+                return True
+            if self.estado == ABIERTO:
+                self.rechazadas += 1
+                return False
+            return True
+
+    def registrar(self, duracion_ms: float, exito: bool):
+        with self._lock:
+            self.solicitudes += 1
+            self._suma_ms += duracion_ms
+            self._buckets[bisect.bisect_left(BUCKETS_MS, duracion_ms)] += 1
+            self._prueba_en_curso = False
+            if exito:
+                self._fallos_seguidos = 0
+                self.estado = CERRADO
+                return
+            self.errores += 1
+            self._fallos_seguidos += 1
+            if self.estado == SEMIABIERTO or self._fallos_seguidos >= self._fallos_apertura:
+                if self.estado != ABIERTO:
+                    self.aperturas += 1
+                self.estado = ABIERTO
+                self._abierto_hasta = time.monotonic() + self._espera
+
+    def _percentil(self, p: float) -> Optional[int]:
+        """Límite superior del bucket donde cae el percentil (None si es +inf o sin datos)."""
+        if not self.solicitudes:
+            return None
+        objetivo = self.solicitudes * p
+        acumulado = 0
+        for i, n in enumerate(self._buckets):
+            acumulado += n
+            if acumulado >= objetivo:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else None
+        return None
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            etiquetas = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+            return {
+                "circuito": self.estado,
+                "fallos_seguidos": self._fallos_seguidos,
+                "aperturas": self.aperturas,
+                "rechazadas": self.rechazadas,
+                "solicitudes": self.solicitudes,
+                "errores": self.errores,
+                "latencia_promedio_ms": round(self._suma_ms / self.solicitudes, 2) if self.solicitudes else None,
+                "latencia_p50_ms": self._percentil(0.50),
+                "latencia_p95_ms": self._percentil(0.95),
+                "latencia_p99_ms": self._percentil(0.99),
+                "histograma": dict(zip(etiquetas, self._buckets)),
+            }
+
+
+_metricas: Dict[str, MetricasEndpoint] = {}
+_metricas_lock = threading.Lock()
+
+
+def metricas_endpoint(url: str) -> MetricasEndpoint:
+    metricas = _metricas.get(url)
+    if metricas is None:
+        with _metricas_lock:
+            metricas = _metricas.get(url)
+            if metricas is None:
+                metricas = MetricasEndpoint(env.SRI_CIRCUITO_FALLOS, env.SRI_CIRCUITO_ESPERA_SEGUNDOS)
+                _metricas[url] = metricas
+    return metricas
+
+
+class TransporteSRI:
+    """Sesión HTTP keep-alive con hasta `conexiones` conexiones por host."""
+
+    def __init__(self, conexiones: int):
+        # Reintentos para fallos de conexión (como el 10054), con espera exponencial (1s, 2s, 4s)
+        reintentos = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["POST"]
+        )
+        adaptador = HTTPAdapter(max_retries=reintentos, pool_maxsize=max(1, conexiones), pool_block=True)
+        self.conexiones = max(1, conexiones)
+        self.session = requests.Session()
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+
+    def post(self, url: str, cuerpo: bytes, headers: dict, timeout: float) -> requests.Response:
+        """
+        POST con circuit breaker y medición de latencia. Propaga las excepciones
+        de `requests` (y `CircuitoAbiertoError`) para que el cliente arme la respuesta.
+        """
+        metricas = metricas_endpoint(url)
+        if not metricas.permitir():
+            raise CircuitoAbiertoError(f"Servicio del SRI no disponible temporalmente ({url})")
+
+        inicio = time.perf_counter()
+        exito = False
+        try:
+            response = self.session.post(url, data=cuerpo, headers=headers, timeout=timeout)
+            # Un 4xx es un problema de la petición, no del servicio
+            exito = response.status_code < 500
+            response.raise_for_status()
+            return response
+        finally:
+            metricas.registrar((time.perf_counter() - inicio) * 1000, exito)
+
+    def cerrar(self):
+        self.session.close()
+
+
+_transporte: Optional[TransporteSRI] = None
+_transporte_lock = threading.Lock()
+
+
+def obtener_transporte_sri() -> TransporteSRI:
+    """Transporte compartido del proceso (se crea en el primer uso)."""
+    global _transporte
+    if _transporte is None:
+        with _transporte_lock:
+            if _transporte is None:
+                _transporte = TransporteSRI(env.SRI_POOL_CONEXIONES)
+    return _transporte
+
+
+def estadisticas_transporte_sri() -> dict:
+    with _metricas_lock:
+        endpoints = dict(_metricas)
+    return {
+        "conexiones_por_host": env.SRI_POOL_CONEXIONES,
+        "endpoints": {url: m.estadisticas() for url, m in endpoints.items()},
+    }
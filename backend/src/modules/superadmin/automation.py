@@ -1,154 +1,156 @@
+import os
+import socket
 import logging
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from ...database.session import get_db_connection_raw
+from datetime import datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
+from ...config.env import env
+from ...database.session import get_db_connection_raw, crear_conexion_directa
+from ...errors.app_error import AppError
+from ...jobs.session_cleanup import cleanup_expired_sessions
+from ...jobs.conciliacion_consumo import conciliar_consumo_suscripciones
+from ...jobs.conciliacion_notificaciones import conciliar_conteo_notificaciones
+from ...jobs.purga_reportes import purgar_reportes
 from ..empresas.repositories import RepositorioEmpresas
-from ..facturas.services.service_factura import ServicioFactura
-from ..facturas.services.invoice_core import ServicioFacturaCore
-from ..facturas.repository import RepositorioFacturas
-from ..clientes.repository import RepositorioClientes
-from ..usuarios.repositories import RepositorioUsuarios
-from ..puntos_emision.repository import RepositorioPuntosEmision
-from ..establecimientos.repository import RepositorioEstablecimientos
-from ..formas_pago.repository import RepositorioFormasPago
-from ..cuentas_cobrar.repository import RepositorioCuentasCobrar
-from ..pagos_factura.repository import RepositorioPagosFactura
+from ..facturas.services.recurring_runner import EjecutorFacturacionRecurrente
+from .repositories import RepositorioAutomatizacion
 
 logger = logging.getLogger("facturacion_api")
 
+ZONA_HORARIA = 'America/Guayaquil'
+
+
+def slot_programado(hora, ahora: Optional[datetime] = None) -> datetime:
+    """
+    Inicio del último horario programado de un job (hora cron, o '*' = cada hora)
+    en America/Guayaquil, sin depender de la zona horaria de la BD.
+    """
+    ahora = ahora or datetime.now(ZoneInfo(ZONA_HORARIA))
+    if hora == '*':
+        return ahora.replace(minute=0, second=0, microsecond=0)
+    slot = ahora.replace(hour=hora, minute=0, second=0, microsecond=0)
+    return slot if slot <= ahora else slot - timedelta(days=1)
+
 
 class AutomationService:
-    def __init__(self):
-        self._scheduler = AsyncIOScheduler()
+    """
+    Runner de jobs en segundo plano.
 
-    def _run_daily_tasks(self):
+    Los jobs se ejecutan en el pool de hilos del scheduler (nunca en el event loop).
+    Cada ejecución toma un advisory lock de Postgres por job, de modo que con
+    varios workers de uvicorn solo uno corre el ciclo; el ganador registra la
+    ejecución en `automatizacion_ejecuciones`.
+    """
+
+    def __init__(self):
+        self._scheduler = BackgroundScheduler(
+            executors={'default': ThreadPoolExecutor(max(1, env.AUTOMATIZACION_HILOS))},
+            job_defaults={'coalesce': True, 'max_instances': 1},
+            timezone=ZONA_HORARIA
+        )
+        self._worker = f"{socket.gethostname()}:{os.getpid()}"
+        # nombre -> (función, hora cron; '*' = cada hora)
+        self.jobs = {
+            'ciclo_diario': (self._run_daily_tasks, 0),
+            'limpieza_sesiones': (cleanup_expired_sessions, 3),
+            'conciliacion_consumo': (conciliar_consumo_suscripciones, 4),
+            'conciliacion_notificaciones': (conciliar_conteo_notificaciones, 4),
+            'purga_reportes': (purgar_reportes, '*'),
+        }
+
+    def _run_daily_tasks(self) -> dict:
         """Ejecuta las tareas diarias: suscripciones y facturación recurrente."""
         logger.info("Automatización: Iniciando ciclo diario...")
+
+        # 1. Procesar suscripciones vencidas
         conn = get_db_connection_raw()
         try:
-            # 1. Procesar suscripciones vencidas
             repo_emp = RepositorioEmpresas(db=conn)
             count = repo_emp.check_expired_subscriptions(tolerance_days=0)
             if count > 0:
                 logger.info(f"RESULTADO SUSCRIPCIONES: {count} empresas vencidas.")
+        finally:
+            conn.close()
 
-            # 2. Procesar Facturación Programada (Recurrente)
-            logger.info("Automatización: Procesando Facturación Recurrente...")
-
-            from ..facturas.repository_programacion import RepositorioProgramacion
-            from ..facturas.services.recurring_service import ServicioRecurringBilling
-            from ..facturas.services.service_autorizacion import ServicioAutorizacion
-            from ..facturas.services.sri_service import ServicioSRIFacturas
-            from ..clientes.services import ServicioClientes
-            from ..establecimientos.service import ServicioEstablecimientos
-            from ..puntos_emision.service import ServicioPuntosEmision
-            from ..empresas.services import ServicioEmpresas
-            from ..sri.repository import RepositorioSRI
-            from ..sri.client import ClienteSRI
-            from ..sri.xml_service import ServicioSRIXML
-            from ..sri.signer import XMLSigner
-            from ..sri.cert_utils import ExtractorCertificadoSRI
-            from ..sri.service import ServicioSRI
-            from ..logs.repository import RepositorioLogs
-            from ..logs.service import ServicioLogs
-
-            # Repositorios base
-            repo_prog = RepositorioProgramacion(db=conn)
-            repo_cli = RepositorioClientes(db=conn)
-            repo_user = RepositorioUsuarios(db=conn)
-            repo_fact = RepositorioFacturas(db=conn)
-            repo_forma = RepositorioFormasPago(db=conn)
-            repo_cc = RepositorioCuentasCobrar(db=conn)
-            repo_pago = RepositorioPagosFactura(db=conn)
-            repo_pe = RepositorioPuntosEmision(db=conn)
-            repo_est = RepositorioEstablecimientos(db=conn)
-            repo_sri = RepositorioSRI(db=conn)
-            repo_logs = RepositorioLogs(db=conn)
-
-            # Servicios intermedios
-            s_est = ServicioEstablecimientos(repo=repo_est)
-            s_cli = ServicioClientes(repo=repo_cli)
-            s_emp = ServicioEmpresas(repo=repo_emp)
-            s_pe = ServicioPuntosEmision(repo=repo_pe, establecimiento_service=s_est)
-            s_logs = ServicioLogs(repo=repo_logs)
-
-            # Core de facturas
-            core_factura = ServicioFacturaCore(
-                repo=repo_fact,
-                cliente_service=s_cli,
-                establecimiento_service=s_est,
-                punto_emision_service=s_pe,
-                punto_emision_repo=repo_pe,
-                empresa_service=s_emp
-            )
-
-            service_factura = ServicioFactura(
-                core=core_factura,
-                usuario_repo=repo_user,
-                formas_pago_repo=repo_forma,
-                cuentas_cobrar_repo=repo_cc,
-                pagos_repo=repo_pago
-            )
-
-            # SRI
-            sri_core = ServicioSRI(
-                repo=repo_sri,
-                factura_repo=repo_fact,
-                empresa_repo=repo_emp,
-                cliente_repo=repo_cli,
-                log_repo=repo_logs,
-                formas_pago_repo=repo_forma,
-                client_sri=ClienteSRI(),
-                xml_service=ServicioSRIXML(),
-                logs_service=s_logs
-            )
-            sri_facturas = ServicioSRIFacturas(repo=repo_fact, sri_core=sri_core)
-
-            service_autorizacion = ServicioAutorizacion(
-                core=core_factura,
-                sri_facturacion=sri_facturas,
-                usuario_repo=repo_user,
-                cuentas_cobrar_repo=repo_cc
-            )
+        # 2. Procesar Facturación Programada (Recurrente)
+        # Cada programación toma su propia conexión del pool
+        logger.info("Automatización: Procesando Facturación Recurrente...")
+        resultado = EjecutorFacturacionRecurrente().ejecutar()
+        logger.info(f"FACTURACION_RECURRENTE: {resultado}")
 
-            service_prog = ServicioRecurringBilling(
-                repo_prog=repo_prog,
-                service_factura=service_factura,
-                service_autorizacion=service_autorizacion,
-                repo_pe=repo_pe,
-                repo_usuarios=repo_user
-            )
-            resultado = service_prog.procesar_emisiones_automaticas()
-            logger.info(f"FACTURACION_RECURRENTE: {resultado}")
+        return {"suscripciones_vencidas": count, "facturacion_recurrente": resultado}
 
+    def ejecutar_job(self, nombre: str, origen: str, disparado_por=None):
+        """Ejecuta un job bajo su advisory lock y registra el resultado."""
+        funcion, hora = self.jobs[nombre]
+        slot = slot_programado(hora)
+        # Conexión dedicada: el lock de sesión se libera aunque el proceso muera
+        conn = crear_conexion_directa()
+        try:
+            repo = RepositorioAutomatizacion(db=conn)
+            if not repo.intentar_bloqueo(nombre):
+                logger.info(f"Automatización: '{nombre}' ya se ejecuta en otro worker, se omite.")
+                if origen == 'MANUAL':
+                    repo.registrar_omitido(nombre, origen, disparado_por, self._worker, "Otra ejecución en curso")
+                return
+            try:
+                # Ni al reiniciar workers ni con el cron de cada worker se repite
+                # un horario que ya terminó (solo MANUAL fuerza otra ejecución)
+                if origen != 'MANUAL' and repo.ejecutado_en_slot(nombre, slot):
+                    logger.info(f"Automatización: '{nombre}' ya se ejecutó en el horario {slot.isoformat()}, se omite.")
+                    return
+                ejecucion_id = repo.registrar_inicio(
+                    nombre, origen, disparado_por, self._worker, None if origen == 'MANUAL' else slot
+                )
+                try:
+                    resultado = funcion()
+                    repo.registrar_fin(ejecucion_id, 'EXITOSO', resultado=resultado)
+                except Exception as e:
+                    logger.error(f"CRITICO: Error en job de automatización '{nombre}': {str(e)}")
+                    conn.rollback()
+                    repo.registrar_fin(ejecucion_id, 'FALLIDO', error=str(e))
+            finally:
+                repo.liberar_bloqueo(nombre)
         except Exception as e:
-            logger.error(f"CRITICO: Error en ciclo de automatización: {str(e)}")
+            logger.error(f"CRITICO: No se pudo ejecutar el job '{nombre}': {str(e)}")
         finally:
             conn.close()
 
-    async def start_daily_tasks(self):
+    def disparar(self, nombre: str, disparado_por=None) -> dict:
+        """Encola una ejecución manual inmediata del job en el pool del scheduler."""
+        if nombre not in self.jobs:
+            raise AppError(f"Job '{nombre}' no existe", 404, "JOB_NOT_FOUND")
+        if not self._scheduler.running:
+            raise AppError("El servicio de automatización no está activo", 503, "AUTOMATION_DISABLED")
+        self._scheduler.add_job(self.ejecutar_job, trigger='date', args=[nombre, 'MANUAL', disparado_por])
+        return {"job": nombre, "encolado": True}
+
+    def start_daily_tasks(self):
         """
-        Inicia el scheduler APScheduler.
-        El primer ciclo se ejecuta inmediatamente al arrancar el servidor.
-        Los siguientes se ejecutan diariamente a las 08:00.
+        Inicia el scheduler en segundo plano.
+        Cada job corre una vez al arrancar (si no se completó en su último horario) y luego
+        diariamente a su hora (America/Guayaquil), o cada hora si la hora es '*'.
         """
-        if self._scheduler.running:
+        if self._scheduler.running or not env.AUTOMATIZACION_HABILITADA:
             return
 
-        # Ejecución diaria a las 00:00 hora Ecuador (America/Guayaquil)
-        self._scheduler.add_job(
-            self._run_daily_tasks,
-            trigger='cron',
-            hour=0,
-            minute=0,
-            timezone='America/Guayaquil',
-            id='daily_automation',
-            replace_existing=True
-        )
-        self._scheduler.start()
-        logger.info("Servicio de Automatización iniciado (cron: 00:00 America/Guayaquil).")
+        for nombre, (_, hora) in self.jobs.items():
+            self._scheduler.add_job(
+                self.ejecutar_job,
+                trigger='cron',
+                hour=hora,
+                minute=0,
+                args=[nombre, 'CRON'],
+                id=f'automatizacion_{nombre}',
+                replace_existing=True
+            )
+            # Primera ejecución inmediata al arrancar (en el pool, no en el event loop)
+            self._scheduler.add_job(self.ejecutar_job, trigger='date', args=[nombre, 'INICIO'])
 
-        # Primera ejecución inmediata al arrancar
-        self._run_daily_tasks()
+        self._scheduler.start()
+        logger.info(f"Servicio de Automatización iniciado (jobs: {', '.join(self.jobs)}; {ZONA_HORARIA}).")
 
     def stop(self):
         """Detiene el scheduler."""
@@ -18,3 +18,28 @@ class SuperadminController:
     def ejecutar_limpieza_suscripciones(self, usuario_actual: dict):
         result = self.service.ejecutar_limpieza_suscripciones(usuario_actual)
         return success_response(result, "Proceso de mantenimiento ejecutado")
+
+    def obtener_estado_pool(self):
+        return success_response(self.service.obtener_estado_pool())
+
+    def obtener_estado_cache_autenticacion(self):
+        return success_response(self.service.obtener_estado_cache_autenticacion())
+
+    def obtener_estado_cache_firmas(self):
+        return success_response(self.service.obtener_estado_cache_firmas())
+
+    def obtener_estado_cache_referencia(self):
+        return success_response(self.service.obtener_estado_cache_referencia())
+
+    def obtener_estado_transporte_sri(self):
+        return success_response(self.service.obtener_estado_transporte_sri())
+
+    def obtener_estado_canal_notificaciones(self):
+        return success_response(self.service.obtener_estado_canal_notificaciones())
+
+    def disparar_job_automatizacion(self, job: str, usuario_actual: dict):
+        result = self.service.disparar_job_automatizacion(job, usuario_actual)
+        return success_response(result, "Ejecución encolada")
+
+    def listar_ejecuciones_automatizacion(self, job, limit: int):
+        return success_response(self.service.listar_ejecuciones_automatizacion(job, limit))
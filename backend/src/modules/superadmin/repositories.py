@@ -1,3 +1,5 @@
+import json
+from datetime import datetime
 from fastapi import Depends
 from typing import Optional, List
 from uuid import UUID
@@ -53,3 +55,80 @@ class SuperadminRepository:
             cur.execute(query, (str(user_id), nombres, apellidos))
             row = cur.fetchone()
             return dict(row) if row else None
+
+
+class RepositorioAutomatizacion:
+    """Advisory locks e historial de los jobs en segundo plano."""
+
+    def __init__(self, db=Depends(get_db)):
+        self.db = db
+
+    def intentar_bloqueo(self, job: str) -> bool:
+        """Lock de sesión no bloqueante: solo un proceso ejecuta el job a la vez."""
+        with db_transaction(self.db) as cur:
+            cur.execute("SELECT pg_try_advisory_lock(hashtext(%s)) AS ok", (f"automatizacion:{job}",))
+            return bool(cur.fetchone()['ok'])
+
+    def liberar_bloqueo(self, job: str):
+        with db_transaction(self.db) as cur:
+            cur.execute("SELECT pg_advisory_unlock(hashtext(%s))", (f"automatizacion:{job}",))
+
+    def ejecutado_en_slot(self, job: str, slot: datetime) -> bool:
+        """Si el job ya terminó con éxito en el horario programado `slot`."""
+        query = """
+            SELECT 1 FROM sistema_facturacion.automatizacion_ejecuciones
+            WHERE job = %s AND slot = %s AND estado = 'EXITOSO'
+            LIMIT 1
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (job, slot))
+            return cur.fetchone() is not None
+
+    def registrar_inicio(self, job: str, origen: str, disparado_por: Optional[UUID], worker: str, slot: Optional[datetime]) -> UUID:
+        query = """
+            INSERT INTO sistema_facturacion.automatizacion_ejecuciones (job, origen, disparado_por, worker, slot)
+            VALUES (%s, %s, %s, %s, %s)
+            RETURNING id
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (job, origen, str(disparado_por) if disparado_por else None, worker, slot))
+            return cur.fetchone()['id']
+
+    def registrar_fin(self, ejecucion_id: UUID, estado: str, resultado=None, error: Optional[str] = None):
+        query = """
+            UPDATE sistema_facturacion.automatizacion_ejecuciones
+            SET estado = %s,
+                resultado = %s,
+                error = %s,
+                finalizado_at = NOW(),
+                duracion_ms = (EXTRACT(EPOCH FROM (NOW() - iniciado_at)) * 1000)::int
+            WHERE id = %s
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (
+                estado,
+                json.dumps(resultado, default=str) if resultado is not None else None,
+                error,
+                str(ejecucion_id)
+            ))
+
+    def registrar_omitido(self, job: str, origen: str, disparado_por: Optional[UUID], worker: str, motivo: str):
+        query = """
+            INSERT INTO sistema_facturacion.automatizacion_ejecuciones
+            (job, origen, disparado_por, worker, estado, error, finalizado_at, duracion_ms)
+            VALUES (%s, %s, %s, %s, 'OMITIDO', %s, NOW(), 0)
+        """
+        with db_transaction(self.db) as cur:
+            cur.execute(query, (job, origen, str(disparado_por) if disparado_por else None, worker, motivo))
+
+    def listar(self, job: Optional[str] = None, limit: int = 50) -> List[dict]:
+        query = "SELECT * FROM sistema_facturacion.automatizacion_ejecuciones"
+        params = []
+        if job:
+            query += " WHERE job = %s"
+            params.append(job)
+        query += " ORDER BY iniciado_at DESC LIMIT %s"
+        params.append(limit)
+        with self.db.cursor() as cur:
+            cur.execute(query, tuple(params))
+            return [dict(row) for row in cur.fetchall()]
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Query, status
+from typing import Optional
 from .controller import SuperadminController
 from .schemas import PerfilUpdate
-from ..autenticacion.routes import get_current_user
+from ..autenticacion.routes import get_current_user, requerir_superadmin
 from ...utils.response_schemas import RespuestaBase
 
 router = APIRouter()
@@ -29,3 +30,70 @@ def disparar_chequeo_suscripciones(
 ):
     """Acción manual solo para superadmins para procesar vencimientos."""
     return controller.ejecutar_limpieza_suscripciones(usuario)
+
+@router.get("/mantenimiento/pool-conexiones", response_model=RespuestaBase)
+def obtener_estado_pool_conexiones(
+    usuario: dict = Depends(requerir_superadmin),
+    controller: SuperadminController = Depends()
+):
+    """Métricas de los pools de conexiones de este worker (uso, esperas, agotamientos; `pool_async` del pool psycopg 3)."""
+    return controller.obtener_estado_pool()
+
+@router.get("/mantenimiento/cache-autenticacion", response_model=RespuestaBase)
+def obtener_estado_cache_autenticacion(
+    usuario: dict = Depends(requerir_superadmin),
+    controller: SuperadminController = Depends()
+):
+    """Hits/misses del cache de principales autenticados de este worker."""
+    return controller.obtener_estado_cache_autenticacion()
+
+@router.get("/mantenimiento/cache-firmas", response_model=RespuestaBase)
+def obtener_estado_cache_firmas(
+    usuario: dict = Depends(requerir_superadmin),
+    controller: SuperadminController = Depends()
+):
+    """Hits/misses del cache de certificados (signers SRI) de este worker."""
+    return controller.obtener_estado_cache_firmas()
+
+@router.get("/mantenimiento/cache-referencia", response_model=RespuestaBase)
+def obtener_estado_cache_referencia(
+    usuario: dict = Depends(requerir_superadmin),
+    controller: SuperadminController = Depends()
+):
+    """Hits/misses y versiones del cache de datos de referencia de este worker."""
+    return controller.obtener_estado_cache_referencia()
+
+@router.get("/mantenimiento/transporte-sri", response_model=RespuestaBase)
+def obtener_estado_transporte_sri(
+    usuario: dict = Depends(requerir_superadmin),
+    controller: SuperadminController = Depends()
+):
+    """Estado del circuit breaker e histograma de latencias por endpoint del SRI en este worker."""
+    return controller.obtener_estado_transporte_sri()
+
+@router.get("/mantenimiento/canal-notificaciones", response_model=RespuestaBase)
+def obtener_estado_canal_notificaciones(
+    usuario: dict = Depends(requerir_superadmin),
+    controller: SuperadminController = Depends()
+):
+    """Escucha LISTEN, streams SSE abiertos y eventos recibidos/descartados en este worker."""
+    return controller.obtener_estado_canal_notificaciones()
+
+@router.post("/mantenimiento/automatizacion/{job}/ejecutar", status_code=status.HTTP_202_ACCEPTED, response_model=RespuestaBase)
+def disparar_job_automatizacion(
+    job: str,
+    usuario: dict = Depends(requerir_superadmin),
+    controller: SuperadminController = Depends()
+):
+    """Encola una ejecución manual de un job en segundo plano (ciclo_diario, limpieza_sesiones, conciliacion_consumo, conciliacion_notificaciones)."""
+    return controller.disparar_job_automatizacion(job, usuario)
+
+@router.get("/mantenimiento/automatizacion/ejecuciones", response_model=RespuestaBase)
+def listar_ejecuciones_automatizacion(
+    job: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    usuario: dict = Depends(requerir_superadmin),
+    controller: SuperadminController = Depends()
+):
+    """Historial de ejecuciones de los jobs en segundo plano con su duración."""
+    return controller.listar_ejecuciones_automatizacion(job, limit)
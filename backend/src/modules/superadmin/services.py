@@ -3,10 +3,18 @@ from uuid import UUID
 from typing import Optional
 import logging
 
-from .repositories import SuperadminRepository
+from .repositories import SuperadminRepository, RepositorioAutomatizacion
+from .automation import automation_service
 from ..empresas.repositories import RepositorioEmpresas
 from ...errors.app_error import AppError
 from ...constants.enums import AuthKeys
+from ...database.pool import obtener_pool
+from ...database.pool_async import estadisticas_pool_async
+from ..autenticacion.principal_cache import principal_cache
+from ..sri.signer_cache import signer_cache
+from ...database.cache_referencia import cache_referencia
+from ..sri.transporte import estadisticas_transporte_sri
+from ..notificaciones.canal import canal_notificaciones
 
 logger = logging.getLogger("facturacion_api")
 
@@ -14,10 +22,12 @@ class SuperadminServices:
     def __init__(
         self, 
         repo: SuperadminRepository = Depends(),
-        repo_empresa: RepositorioEmpresas = Depends()
+        repo_empresa: RepositorioEmpresas = Depends(),
+        repo_automatizacion: RepositorioAutomatizacion = Depends()
     ):
         self.repo = repo
         self.repo_empresa = repo_empresa
+        self.repo_automatizacion = repo_automatizacion
 
     def obtener_perfil(self, user_id: UUID):
         perfil = self.repo.obtener_perfil_por_user_id(user_id)
@@ -55,3 +65,34 @@ class SuperadminServices:
             "procesados": count,
             "mensaje": f"Se han marcado {count} suscripciones como vencidas."
         }
+
+    def obtener_estado_pool(self):
+        """Estadísticas de los pools de conexiones (síncrono y asíncrono) del proceso actual."""
+        return {**obtener_pool().estadisticas(), "pool_async": estadisticas_pool_async()}
+
+    def obtener_estado_cache_autenticacion(self):
+        """Estadísticas del cache de principales autenticados del proceso actual."""
+        return principal_cache.estadisticas()
+
+    def obtener_estado_cache_firmas(self):
+        """Estadísticas del cache de signers SRI del proceso actual."""
+        return signer_cache.estadisticas()
+
+    def obtener_estado_cache_referencia(self):
+        """Estadísticas del cache de datos de referencia del proceso actual."""
+        return cache_referencia.estadisticas()
+
+    def obtener_estado_transporte_sri(self):
+        """Circuitos y latencias por endpoint del SRI del proceso actual."""
+        return estadisticas_transporte_sri()
+
+    def obtener_estado_canal_notificaciones(self):
+        """Streams SSE abiertos y eventos del canal de notificaciones del proceso actual."""
+        return canal_notificaciones.estadisticas()
+
+    def disparar_job_automatizacion(self, job: str, usuario_actual: dict):
+        """Ejecución manual de un job; corre en el pool del scheduler bajo su advisory lock."""
+        return automation_service.disparar(job, usuario_actual.get("id"))
+
+    def listar_ejecuciones_automatizacion(self, job: Optional[str] = None, limit: int = 50):
+        return self.repo_automatizacion.listar(job, limit)
@@ -5,6 +5,8 @@ from datetime import date, datetime
 import json
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ...database.cache_referencia import cache_referencia, PLANES, MODULOS
+from ..autenticacion.principal_cache import principal_cache
 
 class RepositorioSuscripciones:
     def __init__(self, db=Depends(get_db)):
@@ -12,23 +14,33 @@ class RepositorioSuscripciones:
 
     # --- Planes ---
     def listar_planes(self) -> List[dict]:
+        """
+        Catálogo de planes (cacheado) con el conteo de empresas activas por plan.
+        El conteo cambia con cada suscripción, así que se consulta aparte en una
+        sola agregación en vez de una subconsulta por plan.
+        """
+        planes = cache_referencia.obtener_o_cargar(PLANES, "todos", self._cargar_planes)
         with self.db.cursor() as cur:
-            query = """
-                SELECT p.*,
-                (
-                    SELECT COUNT(DISTINCT s.empresa_id)
-                    FROM sistema_facturacion.suscripciones s
-                    WHERE s.plan_id = p.id
-                    AND s.estado = 'ACTIVA'
-                    AND s.fecha_fin >= CURRENT_DATE
-                ) as active_companies
-                FROM sistema_facturacion.planes p
-                ORDER BY p.precio_anual ASC
-            """
-            cur.execute(query)
+            cur.execute("""
+                SELECT s.plan_id, COUNT(DISTINCT s.empresa_id) AS active_companies
+                FROM sistema_facturacion.suscripciones s
+                WHERE s.estado = 'ACTIVA' AND s.fecha_fin >= CURRENT_DATE
+                GROUP BY s.plan_id
+            """)
+            activas = {str(row['plan_id']): row['active_companies'] for row in cur.fetchall()}
+        for plan in planes:
+            plan['active_companies'] = activas.get(str(plan['id']), 0)
+        return planes
+
+    def _cargar_planes(self) -> List[dict]:
+        with self.db.cursor() as cur:
+            cur.execute("SELECT * FROM sistema_facturacion.planes ORDER BY precio_anual ASC")
             return [dict(row) for row in cur.fetchall()]
 
     def obtener_plan_por_id(self, id: UUID) -> Optional[dict]:
+        return cache_referencia.obtener_o_cargar(PLANES, str(id), lambda: self._cargar_plan(id))
+
+    def _cargar_plan(self, id: UUID) -> Optional[dict]:
         with self.db.cursor() as cur:
             cur.execute("SELECT * FROM sistema_facturacion.planes WHERE id = %s", (str(id),))
             row = cur.fetchone()
@@ -48,6 +60,7 @@ class RepositorioSuscripciones:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            cache_referencia.notificar_cambio(cur, PLANES)
             return dict(row) if row else None
 
     def actualizar_plan(self, id: UUID, data: dict) -> Optional[dict]:
@@ -64,13 +77,19 @@ class RepositorioSuscripciones:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
+            if row:
+                cache_referencia.notificar_cambio(cur, PLANES)
             return dict(row) if row else None
 
     def eliminar_plan(self, id: UUID) -> bool:
         # Check if plan has subscribers before deleting (logic could be soft delete too)
         with db_transaction(self.db) as cur:
             cur.execute("DELETE FROM sistema_facturacion.planes WHERE id = %s", (str(id),))
-            return cur.rowcount > 0
+            if cur.rowcount == 0:
+                return False
+            # Módulos por plan: modulo_plan se borra en cascada con el plan
+            cache_referencia.notificar_cambio(cur, PLANES, MODULOS)
+            return True
 
     def listar_empresas_por_plan(self, plan_id: UUID, vendedor_id: Optional[UUID] = None) -> List[dict]:
         query = """
@@ -210,8 +229,9 @@ class RepositorioSuscripciones:
                     json.dumps(snapshot, default=str),
                     "Generación automática por suscripción"
                 ))
-            
-            return pago_id
+
+            principal_cache.notificar_empresa(cur, empresa_data['id'])
+        return pago_id
 
     def obtener_pago_por_id(self, id: UUID) -> Optional[dict]:
         with self.db.cursor() as cur:
@@ -0,0 +1,203 @@
+from fastapi import Depends
+from typing import Iterable, List, Optional
+from uuid import UUID
+
+from ...database.session import get_db
+from ...database.transaction import db_transaction
+
+CONTADORES_CONSUMO = ('facturas', 'usuarios', 'establecimientos', 'programaciones')
+
+# Mayor porcentaje de uso entre los cuatro límites del plan.
+# Requiere los alias `p` (planes) y `c` (consumo_suscripciones).
+SQL_PORCENTAJE_USO = """
+    ROUND(GREATEST(
+        CASE WHEN p.max_facturas_mes > 0 THEN COALESCE(c.facturas, 0)::numeric / p.max_facturas_mes * 100 ELSE 0 END,
+        CASE WHEN p.max_usuarios > 0 THEN COALESCE(c.usuarios, 0)::numeric / p.max_usuarios * 100 ELSE 0 END,
+        CASE WHEN p.max_establecimientos > 0 THEN COALESCE(c.establecimientos, 0)::numeric / p.max_establecimientos * 100 ELSE 0 END,
+        CASE WHEN p.max_programaciones > 0 THEN COALESCE(c.programaciones, 0)::numeric / p.max_programaciones * 100 ELSE 0 END
+    ), 1)
+"""
+
+# Conteo desde las tablas base; misma definición que mantienen los deltas
+SQL_RECALCULO = """
+    SELECT s.empresa_id, s.fecha_inicio, s.fecha_fin,
+        (SELECT COUNT(*) FROM sistema_facturacion.facturas f
+         WHERE f.empresa_id = s.empresa_id AND f.estado != 'ANULADA'
+           AND f.fecha_emision >= s.fecha_inicio
+           AND (s.fecha_fin IS NULL OR f.fecha_emision <= s.fecha_fin)) AS facturas,
+        (SELECT COUNT(*) FROM sistema_facturacion.usuarios u
+         WHERE u.empresa_id = s.empresa_id) AS usuarios,
+        (SELECT COUNT(*) FROM sistema_facturacion.establecimientos est
+         WHERE est.empresa_id = s.empresa_id) AS establecimientos,
+        (SELECT COUNT(*) FROM sistema_facturacion.facturacion_programada fp
+         WHERE fp.empresa_id = s.empresa_id AND fp.activo = TRUE
+           AND fp.created_at >= s.fecha_inicio
+           AND (s.fecha_fin IS NULL OR fp.created_at <= s.fecha_fin)) AS programaciones
+    FROM sistema_facturacion.suscripciones s
+    WHERE s.empresa_id = ANY(%s::uuid[])
+"""
+
+
+class RepositorioConsumo:
+    """
+    Contadores de consumo del plan por empresa (`consumo_suscripciones`).
+
+    Los repositorios que crean o eliminan facturas, usuarios, establecimientos
+    y programaciones llaman a `aplicar_*` / `ajustar` con el cursor de su
+    transacción. `sincronizar` recalcula desde las tablas base las filas que
+    faltan o cuyo periodo ya no coincide con la suscripción.
+    """
+
+    def __init__(self, db=Depends(get_db)):
+        self.db = db
+
+    # --- Deltas (dentro de la transacción de escritura) ---
+
+    def ajustar(self, cur, empresa_id, campo: str, delta: int):
+        """Suma `delta` a un contador sin ventana de periodo (usuarios, establecimientos)."""
+        if campo not in CONTADORES_CONSUMO:
+            raise ValueError(f"Contador de consumo desconocido: {campo}")
+        if not empresa_id or not delta:
+            return
+        cur.execute(f"""
+            UPDATE sistema_facturacion.consumo_suscripciones
+            SET {campo} = {campo} + %s, updated_at = NOW()
+            WHERE empresa_id = %s
+        """, (delta, str(empresa_id)))
+
+    def _ajustar_en_periodo(self, cur, empresa_id, campo: str, fecha_anterior, fecha_nueva):
+        """
+        Resta la fila anterior y suma la nueva si su fecha cae en el periodo
+        guardado (None = la fila no cuenta).
+        """
+        if fecha_anterior == fecha_nueva:
+            return
+        cur.execute(f"""
+            UPDATE sistema_facturacion.consumo_suscripciones c
+            SET {campo} = c.{campo}
+                + CASE WHEN %(nueva)s::timestamptz >= c.periodo_inicio
+                        AND (c.periodo_fin IS NULL OR %(nueva)s::timestamptz <= c.periodo_fin) THEN 1 ELSE 0 END
+                - CASE WHEN %(anterior)s::timestamptz >= c.periodo_inicio
+                        AND (c.periodo_fin IS NULL OR %(anterior)s::timestamptz <= c.periodo_fin) THEN 1 ELSE 0 END,
+                updated_at = NOW()
+            WHERE c.empresa_id = %(empresa_id)s
+        """, {"empresa_id": str(empresa_id), "anterior": fecha_anterior, "nueva": fecha_nueva})
+
+    def aplicar_factura(self, cur, anterior: Optional[dict], nueva: Optional[dict]):
+        """Refleja el paso de `anterior` a `nueva` (None = no existe) en el contador de facturas."""
+        def fecha(f):
+            return f['fecha_emision'] if f and f.get('estado') != 'ANULADA' else None
+
+        empresa_id = (nueva or anterior or {}).get('empresa_id')
+        if empresa_id:
+            self._ajustar_en_periodo(cur, empresa_id, 'facturas', fecha(anterior), fecha(nueva))
+
+    def aplicar_programacion(self, cur, anterior: Optional[dict], nueva: Optional[dict]):
+        """Igual que `aplicar_factura` para programaciones activas (por created_at)."""
+        def fecha(fp):
+            return fp['created_at'] if fp and fp.get('activo') else None
+
+        empresa_id = (nueva or anterior or {}).get('empresa_id')
+        if empresa_id:
+            self._ajustar_en_periodo(cur, empresa_id, 'programaciones', fecha(anterior), fecha(nueva))
+
+    # --- Recalculo ---
+
+    def sincronizar(
+        self,
+        empresa_ids: Optional[Iterable[UUID]] = None,
+        vendedor_id: Optional[UUID] = None,
+        solo_desfasados: bool = True
+    ) -> int:
+        """
+        Recalcula los contadores desde las tablas base.
+
+        Con `solo_desfasados` solo toca empresas sin fila o cuyo periodo cambió
+        (renovación, upgrade); sin él, concilia todas las del filtro.
+        Retorna cuántas filas cambiaron.
+        """
+        condiciones, params = [], []
+        if empresa_ids is not None:
+            condiciones.append("s.empresa_id = ANY(%s::uuid[])")
+            params.append([str(e) for e in empresa_ids])
+        if vendedor_id:
+            condiciones.append("s.empresa_id IN (SELECT id FROM sistema_facturacion.empresas WHERE vendedor_id = %s)")
+            params.append(str(vendedor_id))
+        if solo_desfasados:
+            condiciones.append("""(c.empresa_id IS NULL
+                OR c.periodo_inicio IS DISTINCT FROM s.fecha_inicio
+                OR c.periodo_fin IS DISTINCT FROM s.fecha_fin)""")
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        with db_transaction(self.db) as cur:
+            cur.execute(f"""
+                SELECT s.empresa_id
+                FROM sistema_facturacion.suscripciones s
+                LEFT JOIN sistema_facturacion.consumo_suscripciones c ON c.empresa_id = s.empresa_id
+                {where}
+            """, tuple(params))
+            ids = [str(r['empresa_id']) for r in cur.fetchall()]
+            if not ids:
+                return 0
+
+            cur.execute("""
+                INSERT INTO sistema_facturacion.consumo_suscripciones (empresa_id, periodo_inicio, periodo_fin)
+                SELECT empresa_id, fecha_inicio, fecha_fin
+                FROM sistema_facturacion.suscripciones
+                WHERE empresa_id = ANY(%s::uuid[])
+                ON CONFLICT (empresa_id) DO NOTHING
+            """, (ids,))
+            # Con las filas bloqueadas, el conteo (nueva sentencia, nuevo snapshot)
+            # ve toda escritura que ya ajustó el contador; las que vengan después
+            # esperan el lock y suman su delta sobre el valor recalculado
+            cur.execute("""
+                SELECT empresa_id FROM sistema_facturacion.consumo_suscripciones
+                WHERE empresa_id = ANY(%s::uuid[])
+                ORDER BY empresa_id
+                FOR UPDATE
+            """, (ids,))
+            cur.execute(f"""
+                WITH calc AS ({SQL_RECALCULO})
+                UPDATE sistema_facturacion.consumo_suscripciones c
+                SET periodo_inicio = calc.fecha_inicio,
+                    periodo_fin = calc.fecha_fin,
+                    facturas = calc.facturas,
+                    usuarios = calc.usuarios,
+                    establecimientos = calc.establecimientos,
+                    programaciones = calc.programaciones,
+                    updated_at = NOW()
+                FROM calc
+                WHERE c.empresa_id = calc.empresa_id
+                  AND (c.periodo_inicio, c.periodo_fin, c.facturas, c.usuarios, c.establecimientos, c.programaciones)
+                      IS DISTINCT FROM
+                      (calc.fecha_inicio, calc.fecha_fin, calc.facturas::int, calc.usuarios::int,
+                       calc.establecimientos::int, calc.programaciones::int)
+            """, (ids,))
+            return cur.rowcount
+
+    def listar_empresas_con_suscripcion(self) -> List[str]:
+        with self.db.cursor() as cur:
+            cur.execute("SELECT empresa_id FROM sistema_facturacion.suscripciones ORDER BY empresa_id")
+            return [str(r['empresa_id']) for r in cur.fetchall()]
+
+    # --- Lectura ---
+
+    def obtener(self, empresa_ids: Iterable[UUID]) -> List[dict]:
+        """Suscripción, límites del plan y consumo de las empresas indicadas."""
+        query = f"""
+            SELECT s.empresa_id, p.nombre AS plan_nombre, s.fecha_inicio, s.fecha_fin,
+                   s.estado AS suscripcion_estado,
+                   p.max_facturas_mes, p.max_usuarios, p.max_establecimientos, p.max_programaciones,
+                   COALESCE(c.facturas, 0) AS facturas,
+                   COALESCE(c.usuarios, 0) AS usuarios,
+                   COALESCE(c.establecimientos, 0) AS establecimientos,
+                   COALESCE(c.programaciones, 0) AS programaciones,
+                   {SQL_PORCENTAJE_USO} AS porcentaje_uso
+            FROM sistema_facturacion.suscripciones s
+            JOIN sistema_facturacion.planes p ON p.id = s.plan_id
+            LEFT JOIN sistema_facturacion.consumo_suscripciones c ON c.empresa_id = s.empresa_id
+            WHERE s.empresa_id = ANY(%s::uuid[])
+        """
+        with self.db.cursor() as cur:
+            cur.execute(query, ([str(e) for e in empresa_ids],))
+            return [dict(r) for r in cur.fetchall()]
@@ -0,0 +1,39 @@
+import logging
+from fastapi import Depends
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from .repository_consumo import RepositorioConsumo
+
+logger = logging.getLogger("facturacion_api")
+
+
+class ServicioConsumo:
+    """Consumo del plan (facturas, usuarios, establecimientos, programaciones) frente a sus límites."""
+
+    def __init__(self, repo: RepositorioConsumo = Depends()):
+        self.repo = repo
+
+    def obtener_por_empresas(self, empresa_ids: Iterable[UUID]) -> Dict[str, dict]:
+        """Consumo por empresa (solo empresas con suscripción), sincronizando periodos desfasados."""
+        ids = [str(e) for e in empresa_ids]
+        if not ids:
+            return {}
+        self.repo.sincronizar(empresa_ids=ids)
+        return {str(r['empresa_id']): r for r in self.repo.obtener(ids)}
+
+    def obtener(self, empresa_id: UUID) -> Optional[dict]:
+        return self.obtener_por_empresas([empresa_id]).get(str(empresa_id))
+
+    def conciliar(self, empresa_id: Optional[UUID] = None, lote: int = 200) -> dict:
+        """
+        Recalcula los contadores desde las tablas base y corrige la deriva.
+        Procesa por lotes para no bloquear a la vez los contadores de todas las empresas.
+        """
+        ids = [str(empresa_id)] if empresa_id else self.repo.listar_empresas_con_suscripcion()
+        corregidas = 0
+        for i in range(0, len(ids), lote):
+            corregidas += self.repo.sincronizar(empresa_ids=ids[i:i + lote], solo_desfasados=False)
+        if corregidas:
+            logger.warning(f"Consumo de planes: {corregidas} empresas con contadores corregidos")
+        return {"revisadas": len(ids), "corregidas": corregidas}
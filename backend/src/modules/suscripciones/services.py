@@ -9,6 +9,8 @@ from .schemas import PlanCreacion, PagoSuscripcionCreacion, PagoSuscripcionQuick
 from ..comisiones.service import ServicioComisiones
 from ..modulos.service import ServicioModulos
 from ..empresas.repositories import RepositorioEmpresas
+from ..autenticacion.principal_cache import principal_cache
+from ..empresas.perfil_emisor_cache import perfil_emisor_cache
 from ...constants.enums import AuthKeys
 from ...errors.app_error import AppError
 
@@ -523,6 +525,8 @@ class ServicioSuscripciones:
                 "UPDATE sistema_facturacion.empresas SET activo = TRUE, updated_at = NOW() WHERE id = %s",
                 (str(empresa_id),)
             )
+            principal_cache.notificar_empresa(cur, empresa_id)
+            perfil_emisor_cache.notificar_empresa(cur, empresa_id)
         self.repo.db.commit()
 
         # Sincronizar módulos del nuevo plan
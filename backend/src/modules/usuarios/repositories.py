@@ -4,10 +4,51 @@ from typing import List, Optional
 from ...database.session import get_db
 from ...database.transaction import db_transaction
 from ...constants.roles import RolCodigo
+from ...database.cache_referencia import cache_referencia, SUPERADMIN_TELEFONO
+from ..autenticacion.principal_cache import principal_cache
+from ..suscripciones.repository_consumo import RepositorioConsumo
+
+# Consultas compartidas con el camino asíncrono de autenticación (autenticacion/repositories_async.py)
+SQL_USUARIO_POR_ID = """
+        SELECT us.*,
+               u.id as usuario_id,
+               u.empresa_id,
+               COALESCE(u.nombres, s.nombres, v.nombres) as nombres,
+               COALESCE(u.apellidos, s.apellidos, v.apellidos) as apellidos,
+               u.avatar_url,
+               COALESCE(u.telefono, v.telefono) as telefono,
+               er.nombre as rol_nombre,
+               er.codigo as rol_codigo,
+               v.id as internal_vendedor_id,
+               sub.estado as empresa_suscripcion_estado,
+               e.activo as empresa_activa,
+               u.activo as activo
+        FROM sistema_facturacion.users us
+        LEFT JOIN sistema_facturacion.usuarios u ON us.id = u.user_id
+        LEFT JOIN sistema_facturacion.superadmin s ON us.id = s.user_id
+        LEFT JOIN sistema_facturacion.vendedores v ON us.id = v.user_id
+        LEFT JOIN sistema_facturacion.empresa_roles er ON u.empresa_rol_id = er.id
+        LEFT JOIN sistema_facturacion.suscripciones sub ON u.empresa_id = sub.empresa_id
+        LEFT JOIN sistema_facturacion.empresas e ON u.empresa_id = e.id
+        WHERE us.id = %s
+    """
+
+SQL_ROL_SISTEMA = "SELECT role FROM sistema_facturacion.users WHERE id = %s"
+
+SQL_TODOS_LOS_PERMISOS = "SELECT codigo FROM sistema_facturacion.empresa_permisos"
+
+SQL_PERMISOS_POR_ROL = """
+    SELECT p.codigo
+    FROM sistema_facturacion.usuarios u
+    JOIN sistema_facturacion.empresa_roles_permisos erp ON u.empresa_rol_id = erp.rol_id
+    JOIN sistema_facturacion.empresa_permisos p ON erp.permiso_id = p.id
+    WHERE u.user_id = %s AND erp.activo = TRUE
+"""
 
 class RepositorioUsuarios:
     def __init__(self, db=Depends(get_db)):
         self.db = db
+        self.consumo = RepositorioConsumo(db=db)
     
     def listar_usuarios(self, empresa_id: UUID) -> List[dict]:
         """List users for an empresa with their role and email"""
@@ -59,31 +100,8 @@ class RepositorioUsuarios:
 
     def obtener_por_id(self, user_id: UUID) -> Optional[dict]:
         """Get user by auth ID (sistema_facturacion.users)"""
-        query = """
-            SELECT us.*,
-                   u.id as usuario_id,
-                   u.empresa_id,
-                   COALESCE(u.nombres, s.nombres, v.nombres) as nombres,
-                   COALESCE(u.apellidos, s.apellidos, v.apellidos) as apellidos,
-                   u.avatar_url,
-                   COALESCE(u.telefono, v.telefono) as telefono,
-                   er.nombre as rol_nombre,
-                   er.codigo as rol_codigo,
-                   v.id as internal_vendedor_id,
-                   sub.estado as empresa_suscripcion_estado,
-                   e.activo as empresa_activa,
-                   u.activo as activo
-            FROM sistema_facturacion.users us
-            LEFT JOIN sistema_facturacion.usuarios u ON us.id = u.user_id
-            LEFT JOIN sistema_facturacion.superadmin s ON us.id = s.user_id
-            LEFT JOIN sistema_facturacion.vendedores v ON us.id = v.user_id
-            LEFT JOIN sistema_facturacion.empresa_roles er ON u.empresa_rol_id = er.id
-            LEFT JOIN sistema_facturacion.suscripciones sub ON u.empresa_id = sub.empresa_id
-            LEFT JOIN sistema_facturacion.empresas e ON u.empresa_id = e.id
-            WHERE us.id = %s
-        """
         with self.db.cursor() as cur:
-            cur.execute(query, (str(user_id),))
+            cur.execute(SQL_USUARIO_POR_ID, (str(user_id),))
             row = cur.fetchone()
             return dict(row) if row else None
     
@@ -175,6 +193,7 @@ class RepositorioUsuarios:
             """
             cur.execute(usuario_query, tuple(usuario_values))
             usuario = dict(cur.fetchone())
+            self.consumo.ajustar(cur, usuario.get('empresa_id'), 'usuarios', 1)
 
             # 3. Create log if data provided
             if log_data:
@@ -216,7 +235,12 @@ class RepositorioUsuarios:
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(values))
             row = cur.fetchone()
-            return dict(row) if row else None
+            # El teléfono de contacto del superadmin se toma de este perfil
+            if row and 'telefono' in data:
+                cache_referencia.notificar_cambio(cur, SUPERADMIN_TELEFONO)
+            if row:
+                principal_cache.notificar_usuario(cur, row['user_id'])
+        return dict(row) if row else None
     
     def actualizar_password(self, user_id: UUID, hashed_password: str) -> bool:
         """Update password hash and reset required change flag"""
@@ -227,12 +251,14 @@ class RepositorioUsuarios:
         """
         with db_transaction(self.db) as cur:
             cur.execute(query, (hashed_password, str(user_id)))
-            return cur.rowcount > 0
+            actualizado = cur.rowcount > 0
+            principal_cache.notificar_usuario(cur, user_id)
+        return actualizado
 
     def eliminar_usuario(self, id: UUID) -> bool:
         """Delete usuario (By deleting from users table, CASCADE will clean everything)"""
         # First find the user_id associated with this usuario profile
-        find_query = "SELECT user_id FROM sistema_facturacion.usuarios WHERE id = %s"
+        find_query = "SELECT user_id, empresa_id FROM sistema_facturacion.usuarios WHERE id = %s"
         
         with db_transaction(self.db) as cur:
             cur.execute(find_query, (str(id),))
@@ -246,7 +272,12 @@ class RepositorioUsuarios:
             # This will cascade to usuarios and log tables
             delete_query = "DELETE FROM sistema_facturacion.users WHERE id = %s"
             cur.execute(delete_query, (str(user_id),))
-            return cur.rowcount > 0
+            eliminado = cur.rowcount > 0
+            if eliminado:
+                self.consumo.ajustar(cur, row['empresa_id'], 'usuarios', -1)
+                cache_referencia.notificar_cambio(cur, SUPERADMIN_TELEFONO)
+                principal_cache.notificar_usuario(cur, user_id)
+        return eliminado
 
     def obtener_perfil_completo(self, user_id: UUID) -> Optional[dict]:
         """Fetch full profile: user (profile + auth), company, role and ALL permissions with granted status"""
@@ -332,26 +363,17 @@ class RepositorioUsuarios:
     def obtener_permisos_por_user_id(self, user_id: UUID) -> List[str]:
         """Fetch only the permission codes for a user, handling SUPERADMIN override."""
         # Check if user is system superadmin first
-        check_query = "SELECT role FROM sistema_facturacion.users WHERE id = %s"
         with self.db.cursor() as cur:
-            cur.execute(check_query, (str(user_id),))
+            cur.execute(SQL_ROL_SISTEMA, (str(user_id),))
             user = cur.fetchone()
             if user and user['role'] == RolCodigo.SUPERADMIN.value:
                 # Superadmin has ALL permissions
-                cur.execute("SELECT codigo FROM sistema_facturacion.empresa_permisos")
+                cur.execute(SQL_TODOS_LOS_PERMISOS)
                 return [row['codigo'] for row in cur.fetchall()]
 
             # Regular user: fetch via role
-            query = """
-                SELECT p.codigo
-                FROM sistema_facturacion.usuarios u
-                JOIN sistema_facturacion.empresa_roles_permisos erp ON u.empresa_rol_id = erp.rol_id
-                JOIN sistema_facturacion.empresa_permisos p ON erp.permiso_id = p.id
-                WHERE u.user_id = %s AND erp.activo = TRUE
-            """
-            cur.execute(query, (str(user_id),))
-            perms = [row['codigo'] for row in cur.fetchall()]
-            return perms
+            cur.execute(SQL_PERMISOS_POR_ROL, (str(user_id),))
+            return [row['codigo'] for row in cur.fetchall()]
 
     def listar_todos_usuarios_admin(self, vendedor_id: Optional[UUID] = None, actor_user_id: Optional[UUID] = None) -> List[dict]:
         """List all users with their company and role info for Superadmin/Vendedor context."""
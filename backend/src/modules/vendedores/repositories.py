@@ -4,6 +4,16 @@ from typing import List, Optional
 from uuid import UUID
 from ...database.session import get_db
 from ...database.transaction import db_transaction
+from ..autenticacion.principal_cache import principal_cache
+from ..empresas.perfil_emisor_cache import perfil_emisor_cache
+
+# Compartida con el camino asíncrono de autenticación
+SQL_VENDEDOR_POR_USER_ID = """
+    SELECT v.*, u.email, u.ultimo_acceso, u.requiere_cambio_password
+    FROM sistema_facturacion.vendedores v
+    JOIN sistema_facturacion.users u ON u.id = v.user_id
+    WHERE v.user_id = %s
+"""
 
 class RepositorioVendedores:
     def __init__(self, db=Depends(get_db)):
@@ -39,14 +49,8 @@ class RepositorioVendedores:
             return dict(row) if row else None
 
     def obtener_por_user_id(self, user_id: UUID) -> Optional[dict]:
-        query = """
-            SELECT v.*, u.email, u.ultimo_acceso, u.requiere_cambio_password
-            FROM sistema_facturacion.vendedores v
-            JOIN sistema_facturacion.users u ON u.id = v.user_id
-            WHERE v.user_id = %s
-        """
         with self.db.cursor() as cur:
-            cur.execute(query, (str(user_id),))
+            cur.execute(SQL_VENDEDOR_POR_USER_ID, (str(user_id),))
             row = cur.fetchone()
             return dict(row) if row else None
 
@@ -112,7 +116,9 @@ class RepositorioVendedores:
         with db_transaction(self.db) as cur:
             cur.execute(query, (str(id),))
             row = cur.fetchone()
-            return dict(row) if row else None
+            if row:
+                principal_cache.notificar_usuario(cur, row['user_id'])
+        return dict(row) if row else None
 
     def reasignar_empresas(self, from_vendedor_id: UUID, to_vendedor_id: UUID, empresa_ids: Optional[List[UUID]] = None) -> int:
         query = "UPDATE sistema_facturacion.empresas SET vendedor_id = %s, updated_at = NOW() WHERE vendedor_id = %s"
@@ -125,7 +131,11 @@ class RepositorioVendedores:
             
         with db_transaction(self.db) as cur:
             cur.execute(query, tuple(params))
-            return cur.rowcount
+            reasignadas = cur.rowcount
+            # El vendedor_id del perfil decide el acceso de vendedores
+            if reasignadas:
+                perfil_emisor_cache.notificar_todos(cur)
+            return reasignadas
 
     def eliminar(self, id: UUID) -> bool:
         query = "DELETE FROM sistema_facturacion.vendedores WHERE id = %s"
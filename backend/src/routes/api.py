@@ -46,6 +46,9 @@ api_router.include_router(clientes_router, prefix="/clientes", tags=["Clientes"]
 from ..modules.productos.router import router as productos_router
 api_router.include_router(productos_router, prefix="/productos", tags=["Productos"], dependencies=operativo)
 
+from ..modules.importaciones.router import router as importaciones_router
+api_router.include_router(importaciones_router, prefix="/importaciones", tags=["Importaciones Masivas"], dependencies=operativo)
+
 from ..modules.proveedores.router import router as proveedores_router
 api_router.include_router(proveedores_router, prefix="/proveedores", tags=["Proveedores"], dependencies=operativo)
 
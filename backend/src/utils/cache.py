@@ -0,0 +1,89 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class CacheTTL:
+    """
+    Cache en memoria thread-safe con expiración (TTL) y desalojo LRU.
+
+    Pensado para datos calientes de lectura frecuente dentro de un mismo proceso.
+    Cada worker de uvicorn mantiene su propia instancia.
+    """
+
+    def __init__(self, ttl: float, max_entradas: int = 10000, nombre: str = "cache"):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.nombre = nombre
+        self._datos: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._desalojos = 0
+        self._invalidaciones = 0
+
+    @property
+    def habilitado(self) -> bool:
+        return self.ttl > 0 and self.max_entradas > 0
+
+    def obtener(self, clave: Hashable) -> Optional[Any]:
+        """Retorna el valor vigente o None (cuenta hit/miss)."""
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None:
+                self._misses += 1
+                return None
+            expira, valor = item
+            if expira < time.monotonic():
+                del self._datos[clave]
+                self._misses += 1
+                return None
+            self._datos.move_to_end(clave)
+            self._hits += 1
+            return valor
+
+    def guardar(self, clave: Hashable, valor: Any, ttl: Optional[float] = None):
+        if not self.habilitado:
+            return
+        expira = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._datos[clave] = (expira, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self._desalojos += 1
+
+    def invalidar(self, clave: Hashable):
+        with self._lock:
+            if self._datos.pop(clave, None) is not None:
+                self._invalidaciones += 1
+
+    def invalidar_si(self, predicado: Callable[[Hashable, Any], bool]) -> int:
+        """Elimina todas las entradas para las que `predicado(clave, valor)` sea verdadero."""
+        with self._lock:
+            claves = [k for k, (_, v) in self._datos.items() if predicado(k, v)]
+            for k in claves:
+                del self._datos[k]
+            self._invalidaciones += len(claves)
+            return len(claves)
+
+    def limpiar(self):
+        with self._lock:
+            self._invalidaciones += len(self._datos)
+            self._datos.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "nombre": self.nombre,
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "ratio_hit": round(self._hits / total, 4) if total else 0.0,
+                "desalojos": self._desalojos,
+                "invalidaciones": self._invalidaciones,
+            }
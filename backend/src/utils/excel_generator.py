@@ -1,63 +1,160 @@
-from io import BytesIO
+import csv
+import io
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain, islice
+from tempfile import SpooledTemporaryFile
+from typing import Any, Dict, Iterable, Iterator, List
+
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from typing import List, Dict, Any
+from openpyxl.utils import get_column_letter
+
+logger = logging.getLogger("facturacion_api")
+
+MEDIA_TYPE_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MEDIA_TYPE_CSV = "text/csv; charset=utf-8"
+
+# Filas iniciales con las que se estiman los anchos de columna
+MUESTRA_ANCHOS = 200
+ANCHO_MAXIMO = 50  # Límite para evitar columnas gigantes
+# Límite de filas de una hoja de Excel
+FILAS_MAX_EXCEL = 1_048_576
+# Tamaño de los bloques enviados al cliente; el archivo pasa a disco sobre 8 MB
+TAMANO_BLOQUE = 64 * 1024
+MEMORIA_MAX_ARCHIVO = 8 * 1024 * 1024
+
+_CLAVES_MONEDA = ("total", "monto", "subtotal", "iva")
+
+# Estilos compartidos por todas las celdas
+_FUENTE_TITULO = Font(size=14, bold=True)
+_FUENTE_CABECERA = Font(bold=True, color="FFFFFF")
+_RELLENO_CABECERA = PatternFill(start_color="4F46E5", end_color="4F46E5", fill_type="solid")
+_CENTRADO = Alignment(horizontal="center", vertical="center")
+_BORDE = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+
+def _valor(val: Any) -> Any:
+    """Normaliza un valor para Excel/CSV: números como float, fechas sin zona horaria."""
+    if val is None:
+        return ""
+    if isinstance(val, bool):
+        return "Sí" if val else "No"
+    if isinstance(val, int):
+        return val
+    if isinstance(val, (float, Decimal)):
+        return float(val)
+    if isinstance(val, datetime):
+        return val.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(val, date):
+        return val.isoformat()
+    return str(val)
+
+
+def _anchos(headers: List[str], keys: List[str], muestra: List[Dict[str, Any]]) -> List[int]:
+    anchos = []
+    for header, key in zip(headers, keys):
+        largo = max([len(str(header))] + [len(str(_valor(fila.get(key)))) for fila in muestra])
+        anchos.append(min(largo + 2, ANCHO_MAXIMO))
+    return anchos
+
 
-def generate_excel_report(title: str, headers: List[str], data: List[Dict[str, Any]], keys: List[str]):
+def stream_excel_report(
+    title: str,
+    headers: List[str],
+    rows: Iterable[Dict[str, Any]],
+    keys: List[str],
+    muestra: int = MUESTRA_ANCHOS
+) -> Iterator[bytes]:
     """
-    Genera un archivo Excel dinámico a partir de una lista de diccionarios.
+    Genera un Excel con un workbook de solo escritura y lo entrega por bloques.
+
+    `rows` puede ser un iterador (p. ej. sobre un cursor de servidor): solo se
+    retienen las primeras `muestra` filas para estimar los anchos de columna;
+    el resto se escribe a medida que llega. El archivo final se arma en un
+    temporal que pasa a disco si crece, no en un BytesIO.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = title[:30]
-
-    # Estilos
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4F46E5", end_color="4F46E5", fill_type="solid")
-    center_alignment = Alignment(horizontal="center", vertical="center")
-    border = Border(
-        left=Side(style='thin'), 
-        right=Side(style='thin'), 
-        top=Side(style='thin'), 
-        bottom=Side(style='thin')
-    )
-
-    # Título en la primera fila
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(headers))
-    title_cell = ws.cell(row=1, column=1, value=title.upper())
-    title_cell.font = Font(size=14, bold=True)
-    title_cell.alignment = center_alignment
-
-    # Cabeceras
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=3, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center_alignment
-        cell.border = border
-
-    # Datos
-    for i, row_data in enumerate(data, 4):
-        for j, key in enumerate(keys, 1):
-            val = row_data.get(key, "")
-            # Formatear números
-            if isinstance(val, (int, float)):
-                cell = ws.cell(row=i, column=j, value=float(val))
-                if "total" in key or "monto" in key or "subtotal" in key or "iva" in key:
-                    cell.number_format = '"$"#,##0.00'
-            else:
-                cell = ws.cell(row=i, column=j, value=str(val))
-            
-            cell.border = border
-
-    # Auto-ajuste de columnas
-    from openpyxl.utils import get_column_letter
-    for col_idx, column_cells in enumerate(ws.columns, 1):
-        # Ignorar valores None para el cálculo del ancho
-        length = max(len(str(cell.value)) if cell in column_cells and cell.value is not None else 0 for cell in column_cells)
-        ws.column_dimensions[get_column_letter(col_idx)].width = min(length + 2, 50)  # Límite de 50 para evitar columnas gigantes
-
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return output
+    filas = iter(rows)
+    primeras = list(islice(filas, muestra))
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title[:30])
+    for col, ancho in enumerate(_anchos(headers, keys, primeras), 1):
+        ws.column_dimensions[get_column_letter(col)].width = ancho
+
+    # Título en la primera fila, cabeceras en la tercera
+    titulo = WriteOnlyCell(ws, value=title.upper())
+    titulo.font = _FUENTE_TITULO
+    ws.append([titulo])
+    ws.append([])
+    cabeceras = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = _FUENTE_CABECERA
+        cell.fill = _RELLENO_CABECERA
+        cell.alignment = _CENTRADO
+        cell.border = _BORDE
+        cabeceras.append(cell)
+    ws.append(cabeceras)
+
+    moneda = [any(c in key for c in _CLAVES_MONEDA) for key in keys]
+    escritas = 3
+    for fila in chain(primeras, filas):
+        if escritas >= FILAS_MAX_EXCEL:
+            logger.warning(f"[EXPORTAR] '{title}' truncado en {FILAS_MAX_EXCEL} filas (límite de Excel)")
+            break
+        celdas = []
+        for key, es_moneda in zip(keys, moneda):
+            cell = WriteOnlyCell(ws, value=_valor(fila.get(key)))
+            if es_moneda and isinstance(cell.value, (int, float)):
+                cell.number_format = '"$"#,##0.00'
+            cell.border = _BORDE
+            celdas.append(cell)
+        ws.append(celdas)
+        escritas += 1
+
+    with SpooledTemporaryFile(max_size=MEMORIA_MAX_ARCHIVO) as archivo:
+        wb.save(archivo)
+        archivo.seek(0)
+        while True:
+            bloque = archivo.read(TAMANO_BLOQUE)
+            if not bloque:
+                break
+            yield bloque
+
+
+def stream_csv_report(headers: List[str], rows: Iterable[Dict[str, Any]], keys: List[str]) -> Iterator[bytes]:
+    """CSV (UTF-8 con BOM para que Excel respete los acentos) emitido fila a fila por bloques."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(headers)
+    for fila in rows:
+        writer.writerow([_valor(fila.get(key)) for key in keys])
+        if buffer.tell() >= TAMANO_BLOQUE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_report(
+    formato: str,
+    title: str,
+    headers: List[str],
+    rows: Iterable[Dict[str, Any]],
+    keys: List[str]
+) -> Iterator[bytes]:
+    """Elige el motor según el formato pedido ('csv' o Excel por defecto)."""
+    if formato == 'csv':
+        return stream_csv_report(headers, rows, keys)
+    return stream_excel_report(title, headers, rows, keys)
+
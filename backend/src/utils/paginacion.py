@@ -0,0 +1,43 @@
+"""
+Paginación por cursor (keyset) sobre (created_at, id).
+
+El cursor es opaco para el cliente: base64 url-safe de "created_at|id".
+A diferencia de OFFSET, la página N cuesta lo mismo que la primera porque la
+consulta arranca directamente en el índice (empresa_id, created_at, id).
+"""
+
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+from ..errors.app_error import AppError
+
+# Headers con los que los listados exponen la paginación sin cambiar el body
+HEADER_SIGUIENTE_CURSOR = "X-Next-Cursor"
+HEADER_TOTAL = "X-Total-Count"
+HEADER_TOTAL_ESTIMADO = "X-Total-Count-Estimated"
+
+
+def codificar_cursor(created_at: datetime, id) -> str:
+    crudo = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    if not cursor:
+        return None
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        created_at, id = base64.urlsafe_b64decode(cursor + relleno).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), str(UUID(id))
+    except Exception:
+        raise AppError("Cursor de paginación inválido", 400, "CURSOR_INVALIDO")
+
+
+def cursor_siguiente(filas: list, limit: int) -> Optional[str]:
+    """Cursor de la página siguiente, o None si esta fue la última."""
+    if len(filas) < limit or not filas:
+        return None
+    ultima = filas[-1]
+    return codificar_cursor(ultima['created_at'], ultima['id'])
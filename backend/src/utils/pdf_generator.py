@@ -3,10 +3,13 @@ import base64
 from io import BytesIO
 from jinja2 import Environment, FileSystemLoader
 from fastapi import HTTPException
-from playwright.sync_api import sync_playwright
 import barcode
 from barcode.writer import SVGWriter
 
+from ..errors.app_error import AppError
+from .pdf_pool import pdf_pool
+from .ride_cache import ride_cache
+
 # Configuración de Jinja2
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
@@ -52,39 +55,46 @@ def get_barcode_b64(code: str) -> str:
 def render_to_pdf(template_src: str, context_dict: dict):
     """
     Renderiza una plantilla HTML a un PDF utilizando Playwright para máxima precisión visual.
+    El PDF se genera en el pool de navegadores precalentados (utils/pdf_pool.py).
     """
     try:
         template = env.get_template(template_src)
         html = template.render(context_dict)
-        
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True, args=['--no-sandbox', '--disable-setuid-sandbox'])
-            page = browser.new_page()
-            
-            # Cargar HTML directamente
-            page.set_content(html, wait_until="networkidle")
-            
-            # Generar PDF exacto como se ve en el navegador (incluyendo estilos background)
-            pdf_bytes = page.pdf(
-                format="A4",
-                print_background=True,
-                margin={"top": "1cm", "bottom": "1.5cm", "left": "1cm", "right": "1cm"}
-            )
-            browser.close()
-            
-        return BytesIO(pdf_bytes)
-            
+        return BytesIO(pdf_pool.generar_pdf(html))
+    except AppError:
+        raise
+    except Exception as e:
+        print(f"Excepción al generar PDF con Playwright: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error interno al generar PDF: {str(e)}")
+
+async def render_to_pdf_async(template_src: str, context_dict: dict):
+    """Variante para endpoints async: espera el PDF sin bloquear el event loop."""
+    try:
+        template = env.get_template(template_src)
+        html = template.render(context_dict)
+        return BytesIO(await pdf_pool.generar_pdf_async(html))
+    except AppError:
+        raise
     except Exception as e:
         print(f"Excepción al generar PDF con Playwright: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error interno al generar PDF: {str(e)}")
 
+# ruta -> (mtime, data URI): logo y footer no se releen de disco en cada PDF
+_imagenes_b64 = {}
+
 def get_image_b64(filepath: str) -> str:
     try:
+        mtime = os.path.getmtime(filepath)
+        cacheada = _imagenes_b64.get(filepath)
+        if cacheada and cacheada[0] == mtime:
+            return cacheada[1]
         with open(filepath, "rb") as image_file:
             encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
             ext = os.path.splitext(filepath)[1].lower()
             mime_type = "image/png" if ext == ".png" else "image/jpeg"
-            return f"data:{mime_type};base64,{encoded_string}"
+            data_uri = f"data:{mime_type};base64,{encoded_string}"
+            _imagenes_b64[filepath] = (mtime, data_uri)
+            return data_uri
     except Exception as e:
         print(f"Error loading image {filepath}: {e}")
         return ""
@@ -103,7 +113,14 @@ def inyectar_footer_contexto(context: dict):
 def crear_ride_factura(factura_data: dict):
     """
     Prepara el contexto y genera el PDF para una factura (RIDE).
+    Las facturas AUTORIZADAS se sirven desde el cache de RIDEs (utils/ride_cache.py).
     """
+    cacheado = ride_cache.obtener(factura_data)
+    if cacheado is not None:
+        return BytesIO(cacheado)
+    # La clave del cache se calcula antes de que el contexto se modifique abajo
+    factura_cache = {k: factura_data.get(k) for k in ('id', 'empresa_id', 'estado', 'clave_acceso')}
+
     factura_data["forma_pago_descripcion"] = get_payment_description(factura_data.get("forma_pago_sri", "01"))
     factura_data["tipo_documento_nombre"] = get_document_type_description(factura_data.get("tipo_documento", "01"))
     
@@ -157,4 +174,6 @@ def crear_ride_factura(factura_data: dict):
     # Inyectar logo y footer estándar
     inyectar_footer_contexto(factura_data)
     
-    return render_to_pdf("invoices/ride_classic.html", {"factura": factura_data})
+    pdf_buffer = render_to_pdf("invoices/ride_classic.html", {"factura": factura_data})
+    ride_cache.guardar(factura_cache, pdf_buffer.getvalue())
+    return pdf_buffer
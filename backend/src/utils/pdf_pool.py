@@ -0,0 +1,211 @@
+"""
+Pool de navegadores Chromium (Playwright) precalentados para generar PDFs.
+
+Lanzar Chromium en cada RIDE o reporte cuesta cientos de ms y ~100 MB de RSS.
+Aquí cada hilo del pool mantiene su propio navegador y una página reutilizable
+(la API sync de Playwright no se puede compartir entre hilos), y atiende los
+trabajos de una cola acotada:
+
+- Cola llena -> AppError 503 en lugar de acumular requests sin límite.
+- Si el navegador se cae, el siguiente trabajo de ese hilo lo relanza.
+- Cada navegador se recicla tras `reciclar_cada` PDFs para contener la memoria.
+
+Se usa desde código sync (`generar_pdf`) y async (`generar_pdf_async`); el
+shutdown de la app llama a `cerrar()`.
+"""
+
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from ..config.env import env
+from ..errors.app_error import AppError
+
+logger = logging.getLogger("facturacion_api")
+
+ARGS_CHROMIUM = ['--no-sandbox', '--disable-setuid-sandbox']
+OPCIONES_PDF = {
+    "format": "A4",
+    "print_background": True,
+    "margin": {"top": "1cm", "bottom": "1.5cm", "left": "1cm", "right": "1cm"},
+}
+
+
+class _Navegador:
+    """Navegador + página de un hilo del pool. Solo se usa desde ese hilo."""
+
+    def __init__(self, reciclar_cada: int):
+        self.reciclar_cada = reciclar_cada
+        self._playwright = None
+        self._browser = None
+        self._page = None
+        self.usos = 0
+        self.lanzamientos = 0
+
+    def _preparar(self):
+        from playwright.sync_api import sync_playwright
+
+        if self._browser is None or not self._browser.is_connected() or self.usos >= self.reciclar_cada:
+            self.cerrar()
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=True, args=ARGS_CHROMIUM)
+            self.usos = 0
+            self.lanzamientos += 1
+        if self._page is None or self._page.is_closed():
+            self._page = self._browser.new_page()
+
+    def renderizar(self, html: str, timeout_ms: float) -> bytes:
+        self._preparar()
+        try:
+            # Cargar HTML directamente (reemplaza el documento del PDF anterior)
+            self._page.set_content(html, wait_until="networkidle", timeout=timeout_ms)
+            pdf_bytes = self._page.pdf(**OPCIONES_PDF)
+        except Exception:
+            # Página en estado desconocido: se descarta; el navegador se valida en el próximo uso
+            self._cerrar_pagina()
+            raise
+        self.usos += 1
+        return pdf_bytes
+
+    def _cerrar_pagina(self):
+        try:
+            if self._page is not None and not self._page.is_closed():
+                self._page.close()
+        except Exception:
+            pass
+        self._page = None
+
+    def cerrar(self):
+        self._cerrar_pagina()
+        for recurso, metodo in ((self._browser, "close"), (self._playwright, "stop")):
+            try:
+                if recurso is not None:
+                    getattr(recurso, metodo)()
+            except Exception:
+                pass
+        self._browser = None
+        self._playwright = None
+
+
+class PoolNavegadores:
+    def __init__(self, navegadores: int, cola_max: int, timeout: float, reciclar_cada: int):
+        self.navegadores = max(1, navegadores)
+        self.timeout = timeout
+        self.reciclar_cada = max(1, reciclar_cada)
+        self._cola: "queue.Queue" = queue.Queue(maxsize=max(1, cola_max))
+        self._hilos = []
+        self._lock = threading.Lock()
+        self._activo = False
+        self._stats = {"pdfs": 0, "errores": 0, "rechazados": 0, "lanzamientos": 0, "ms_total": 0.0}
+
+    def iniciar(self):
+        """Arranca los hilos del pool (idempotente; también se llama en el primer uso)."""
+        with self._lock:
+            if self._activo:
+                return
+            self._activo = True
+            self._hilos = [
+                threading.Thread(target=self._bucle, name=f"pdf-pool-{i}", daemon=True)
+                for i in range(self.navegadores)
+            ]
+            for hilo in self._hilos:
+                hilo.start()
+        logger.info(f"Pool de PDF iniciado con {self.navegadores} navegadores.")
+
+    def cerrar(self, timeout: float = 10.0):
+        """Termina los trabajos en cola y cierra los navegadores."""
+        with self._lock:
+            if not self._activo:
+                return
+            self._activo = False
+            hilos, self._hilos = self._hilos, []
+        for _ in hilos:
+            self._cola.put(None)
+        for hilo in hilos:
+            hilo.join(timeout=timeout)
+        logger.info("Pool de PDF detenido.")
+
+    def _encolar(self, html: str) -> Future:
+        self.iniciar()
+        futuro = Future()
+        try:
+            self._cola.put_nowait((html, futuro))
+        except queue.Full:
+            self._sumar(rechazados=1)
+            raise AppError("El generador de PDF está saturado, intente nuevamente", 503, "PDF_POOL_SATURADO")
+        return futuro
+
+    def generar_pdf(self, html: str) -> bytes:
+        futuro = self._encolar(html)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            futuro.cancel()
+            raise AppError("Tiempo de espera agotado al generar el PDF", 504, "PDF_TIMEOUT")
+
+    async def generar_pdf_async(self, html: str) -> bytes:
+        futuro = self._encolar(html)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(futuro), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            futuro.cancel()
+            raise AppError("Tiempo de espera agotado al generar el PDF", 504, "PDF_TIMEOUT")
+
+    def _bucle(self):
+        navegador = _Navegador(self.reciclar_cada)
+        try:
+            while True:
+                trabajo = self._cola.get()
+                if trabajo is None:
+                    break
+                html, futuro = trabajo
+                # Cancelado por timeout mientras esperaba en cola
+                if not futuro.set_running_or_notify_cancel():
+                    continue
+                inicio = time.perf_counter()
+                lanzamientos = navegador.lanzamientos
+                try:
+                    pdf_bytes = navegador.renderizar(html, self.timeout * 1000)
+                    self._sumar(pdfs=1, ms_total=(time.perf_counter() - inicio) * 1000)
+                    futuro.set_result(pdf_bytes)
+                except Exception as e:
+                    self._sumar(errores=1)
+                    logger.error(f"Pool de PDF: error renderizando ({threading.current_thread().name}): {str(e)}")
+                    futuro.set_exception(e)
+                finally:
+                    self._sumar(lanzamientos=navegador.lanzamientos - lanzamientos)
+        finally:
+            navegador.cerrar()
+
+    def _sumar(self, **valores):
+        # Los hilos del pool y los que encolan actualizan los contadores a la vez
+        with self._lock:
+            for clave, valor in valores.items():
+                self._stats[clave] += valor
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        pdfs = stats["pdfs"]
+        return {
+            "activo": self._activo,
+            "navegadores": self.navegadores,
+            "en_cola": self._cola.qsize(),
+            "pdfs": pdfs,
+            "errores": stats["errores"],
+            "rechazados": stats["rechazados"],
+            "lanzamientos": stats["lanzamientos"],
+            "promedio_ms": round(stats["ms_total"] / pdfs, 1) if pdfs else 0,
+        }
+
+
+# Instancia global por proceso
+pdf_pool = PoolNavegadores(
+    navegadores=env.PDF_POOL_NAVEGADORES,
+    cola_max=env.PDF_POOL_COLA_MAX,
+    timeout=env.PDF_POOL_TIMEOUT,
+    reciclar_cada=env.PDF_POOL_RECICLAR_CADA
+)
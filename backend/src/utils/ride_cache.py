@@ -0,0 +1,183 @@
+"""
+Cache en disco de RIDEs (PDF) de facturas AUTORIZADAS.
+
+Una factura autorizada es inmutable, así que su PDF se guarda una vez y se
+sirve tal cual en cada descarga. El nombre del archivo es direccionado por
+contenido: hash de factura id + clave de acceso + versión de la plantilla
+(contenido de la plantilla y de logo/footer, los únicos recursos que usa el
+RIDE). Si cambia la plantilla o las imágenes, la clave cambia sola y los
+archivos viejos quedan huérfanos hasta que los poda el límite de tamaño (LRU
+por mtime).
+
+Estructura: <directorio>/<empresa_id>/<factura_id>-<hash>.pdf
+"""
+
+import os
+import glob
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+from ..config.env import env
+
+logger = logging.getLogger("facturacion_api")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+
+# Archivos cuyo contenido forma parte del RIDE
+ARCHIVOS_PLANTILLA_RIDE = [
+    os.path.join(TEMPLATES_DIR, "invoices", "ride_classic.html"),
+    os.path.join(TEMPLATES_DIR, "invoices", "logo.png"),
+    os.path.join(TEMPLATES_DIR, "invoices", "footer.png"),
+]
+
+
+class CacheRIDE:
+    def __init__(self, directorio: str, max_bytes: int, archivos_plantilla: list):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.archivos_plantilla = archivos_plantilla
+        self._lock = threading.Lock()
+        self._firma_archivos = None
+        self._version = None
+        self._bytes = None  # estimado del tamaño en disco (se calcula al primer guardado)
+        self._stats = {"hits": 0, "misses": 0, "guardados": 0, "podados": 0}
+
+    @property
+    def habilitado(self) -> bool:
+        return self.max_bytes > 0
+
+    def version_plantilla(self) -> str:
+        """Hash del contenido de la plantilla e imágenes; se recalcula si cambia su mtime/tamaño."""
+        firma = []
+        for ruta in self.archivos_plantilla:
+            try:
+                st = os.stat(ruta)
+                firma.append((ruta, st.st_mtime_ns, st.st_size))
+            except OSError:
+                firma.append((ruta, None, None))
+        firma = tuple(firma)
+
+        with self._lock:
+            if firma != self._firma_archivos:
+                h = hashlib.sha256()
+                for ruta, mtime, _ in firma:
+                    if mtime is not None:
+                        with open(ruta, "rb") as f:
+                            h.update(f.read())
+                    h.update(b"\0")
+                self._version = h.hexdigest()[:16]
+                self._firma_archivos = firma
+            return self._version
+
+    def _ruta(self, factura: dict) -> Optional[str]:
+        """Ruta del PDF en cache, o None si la factura no es cacheable."""
+        if not self.habilitado:
+            return None
+        clave_acceso = factura.get('clave_acceso')
+        if factura.get('estado') != 'AUTORIZADA' or not clave_acceso or clave_acceso == '-':
+            return None
+        crudo = f"{factura['id']}|{clave_acceso}|{self.version_plantilla()}"
+        digest = hashlib.sha256(crudo.encode()).hexdigest()[:24]
+        return os.path.join(self.directorio, str(factura.get('empresa_id')), f"{factura['id']}-{digest}.pdf")
+
+    def obtener(self, factura: dict) -> Optional[bytes]:
+        ruta = self._ruta(factura)
+        if ruta is None:
+            return None
+        try:
+            with open(ruta, "rb") as f:
+                contenido = f.read()
+            # mtime = último uso (orden de poda)
+            os.utime(ruta, None)
+            self._stats["hits"] += 1
+            return contenido
+        except FileNotFoundError:
+            self._stats["misses"] += 1
+            return None
+        except OSError as e:
+            logger.warning(f"RIDE cache: no se pudo leer {ruta}: {str(e)}")
+            return None
+
+    def guardar(self, factura: dict, pdf_bytes: bytes):
+        ruta = self._ruta(factura)
+        if ruta is None:
+            return
+        try:
+            carpeta = os.path.dirname(ruta)
+            os.makedirs(carpeta, exist_ok=True)
+            # Versiones anteriores de la misma factura (plantilla distinta)
+            for vieja in glob.glob(os.path.join(carpeta, f"{factura['id']}-*.pdf")):
+                if vieja != ruta:
+                    self._eliminar(vieja)
+            # Escritura atómica: nunca se sirve un PDF a medio escribir
+            temporal = f"{ruta}.{threading.get_ident()}.tmp"
+            with open(temporal, "wb") as f:
+                f.write(pdf_bytes)
+            os.replace(temporal, ruta)
+            self._stats["guardados"] += 1
+            self._sumar_bytes(len(pdf_bytes))
+        except OSError as e:
+            logger.warning(f"RIDE cache: no se pudo guardar {ruta}: {str(e)}")
+
+    def limpiar(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
+        with self._lock:
+            self._bytes = None
+
+    def _archivos(self) -> list:
+        archivos = []
+        for ruta in glob.glob(os.path.join(self.directorio, "*", "*.pdf")):
+            try:
+                st = os.stat(ruta)
+                archivos.append((st.st_mtime, st.st_size, ruta))
+            except OSError:
+                pass
+        return archivos
+
+    def _eliminar(self, ruta: str) -> int:
+        try:
+            tam = os.path.getsize(ruta)
+            os.remove(ruta)
+            return tam
+        except OSError:
+            return 0
+
+    def _sumar_bytes(self, cantidad: int):
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(tam for _, tam, _ in self._archivos())
+            else:
+                self._bytes += cantidad
+            if self._bytes <= self.max_bytes:
+                return
+            # Poda LRU hasta el 90% del límite
+            objetivo = int(self.max_bytes * 0.9)
+            archivos = sorted(self._archivos())
+            self._bytes = sum(tam for _, tam, _ in archivos)
+            for _, _, ruta in archivos:
+                if self._bytes <= objetivo:
+                    break
+                self._bytes -= self._eliminar(ruta)
+                self._stats["podados"] += 1
+
+    def estadisticas(self) -> dict:
+        return {
+            "habilitado": self.habilitado,
+            "directorio": self.directorio,
+            "max_bytes": self.max_bytes,
+            "bytes": self._bytes,
+            "version_plantilla": self._version,
+            **self._stats,
+        }
+
+
+# Instancia global por proceso (los archivos se comparten entre workers)
+ride_cache = CacheRIDE(
+    directorio=env.RIDE_CACHE_DIR,
+    max_bytes=env.RIDE_CACHE_MAX_MB * 1024 * 1024,
+    archivos_plantilla=ARCHIVOS_PLANTILLA_RIDE
+)
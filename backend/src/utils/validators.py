@@ -1,4 +1,5 @@
 import re
+from typing import Dict, Iterable, List
 
 def validar_ruc(ruc: str) -> bool:
     """
@@ -98,3 +99,69 @@ def validar_identificacion(identificacion: str) -> bool:
     
     # Si no es cédula ni RUC, pero tiene formato de pasaporte
     return validar_pasaporte(identificacion)
+
+
+# --- Validación por lote (importaciones masivas) ---
+
+_CONSUMIDOR_FINAL = ("9999999999", "9999999999999")
+_PASAPORTE = re.compile(r"^[a-zA-Z0-9]{3,20}$")
+# Dígito x2 del módulo 10 (restando 9 si pasa de 9), indexado por dígito
+_DOBLE_MOD10 = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+_PESOS_PUBLICO = (3, 2, 7, 6, 5, 4, 3, 2)
+_PESOS_JURIDICO = (4, 3, 2, 7, 6, 5, 4, 3, 2)
+
+
+def _modulo10(d: List[int]) -> bool:
+    suma = _DOBLE_MOD10[d[0]] + d[1] + _DOBLE_MOD10[d[2]] + d[3] + _DOBLE_MOD10[d[4]] \
+        + d[5] + _DOBLE_MOD10[d[6]] + d[7] + _DOBLE_MOD10[d[8]]
+    return (10 - suma % 10) % 10 == d[9]
+
+
+def _modulo11(d: List[int], pesos: tuple, posicion: int) -> bool:
+    res = 11 - sum(x * p for x, p in zip(d, pesos)) % 11
+    return (0 if res == 11 else res) == d[posicion]
+
+
+def _identificacion_valida(v: str) -> bool:
+    """Mismas reglas que `validar_identificacion`, sin regex ni int() por dígito."""
+    if not v:
+        return False
+    if v in _CONSUMIDOR_FINAL:
+        return True
+    largo = len(v)
+    if largo not in (10, 13):
+        return _PASAPORTE.match(v) is not None
+    if not (v.isascii() and v.isdigit()):
+        return False
+
+    d = [ord(c) - 48 for c in v]
+    provincia = d[0] * 10 + d[1]
+    if not (1 <= provincia <= 24 or provincia == 30):
+        return False
+    if largo == 10:
+        return _modulo10(d)
+    if v[10:] == "000":
+        return False
+    if d[2] < 6:
+        return _modulo10(d)
+    if d[2] == 6:
+        return _modulo11(d, _PESOS_PUBLICO, 8)
+    if d[2] == 9:
+        return _modulo11(d, _PESOS_JURIDICO, 9)
+    return False
+
+
+def validar_identificaciones(identificaciones: Iterable[str]) -> List[bool]:
+    """
+    Valida una columna completa de identificaciones (cédula, RUC o pasaporte)
+    en una sola pasada. Cada valor distinto se calcula una vez, así los
+    consumidores finales y repetidos de un archivo no se revalidan.
+    """
+    calculadas: Dict[str, bool] = {}
+    resultado = []
+    for v in identificaciones:
+        ok = calculadas.get(v)
+        if ok is None:
+            ok = calculadas[v] = _identificacion_valida(v)
+        resultado.append(ok)
+    return resultado
@@ -0,0 +1,113 @@
+"""
+Configuración común de las pruebas.
+
+Las pruebas importan `src` desde backend/ y necesitan las variables obligatorias
+de `EnvSettings`; aquí se fijan valores de prueba si no vienen del entorno.
+Las que requieren Postgres usan `DATABASE_TEST` y se omiten si no está definida;
+`empresa_bd` crea en esa base datos reales con las FK activas.
+"""
+import os
+import sys
+from uuid import uuid4
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DB_PASSWORD", "postgres")
+os.environ.setdefault("SECRET_KEY", "clave-de-pruebas")
+os.environ.setdefault("CERT_MASTER_KEY", "0" * 64)
+
+
+class EmpresaPruebas:
+    """
+    Empresa, usuario y facturas reales en `DATABASE_TEST`, insertados con las
+    FK activas; `principal` tiene la forma que entrega `get_current_user`.
+    """
+
+    def __init__(self, dsn: str):
+        import psycopg2
+        from psycopg2.extras import RealDictCursor, register_uuid
+
+        self.conn = psycopg2.connect(dsn, cursor_factory=RealDictCursor)
+        register_uuid(conn_or_curs=self.conn)
+        marca = uuid4().hex
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO sistema_facturacion.users (email, password_hash)
+                VALUES (%s, 'x') RETURNING id
+            """, (f"{marca}@pruebas.local",))
+            user_id = cur.fetchone()['id']
+            cur.execute("""
+                INSERT INTO sistema_facturacion.empresas
+                    (ruc, razon_social, email, direccion, tipo_persona, tipo_contribuyente)
+                VALUES (%s, 'Empresa de pruebas', %s, 'Quito', 'JURIDICA', 'REGIMEN_GENERAL')
+                RETURNING id
+            """, (f"{uuid4().int % 10**10:010d}001", f"{marca}@pruebas.local"))
+            empresa_id = cur.fetchone()['id']
+            cur.execute("""
+                INSERT INTO sistema_facturacion.empresa_roles (empresa_id, codigo, nombre)
+                VALUES (%s, %s, 'Pruebas') RETURNING id
+            """, (empresa_id, marca))
+            rol_id = cur.fetchone()['id']
+            cur.execute("""
+                INSERT INTO sistema_facturacion.usuarios
+                    (user_id, empresa_id, empresa_rol_id, nombres, apellidos, telefono)
+                VALUES (%s, %s, %s, 'Usuario', 'Pruebas', '0999999999') RETURNING id
+            """, (user_id, empresa_id, rol_id))
+            usuario_id = cur.fetchone()['id']
+            cur.execute("""
+                INSERT INTO sistema_facturacion.establecimientos (empresa_id, codigo, nombre, direccion)
+                VALUES (%s, '001', 'Matriz', 'Quito') RETURNING id
+            """, (empresa_id,))
+            self._establecimiento_id = cur.fetchone()['id']
+            cur.execute("""
+                INSERT INTO sistema_facturacion.puntos_emision (establecimiento_id, codigo, nombre)
+                VALUES (%s, '001', 'Caja') RETURNING id
+            """, (self._establecimiento_id,))
+            self._punto_emision_id = cur.fetchone()['id']
+            cur.execute("""
+                INSERT INTO sistema_facturacion.clientes (empresa_id, identificacion, tipo_identificacion, razon_social)
+                VALUES (%s, '9999999999999', '07', 'Consumidor final') RETURNING id
+            """, (empresa_id,))
+            self._cliente_id = cur.fetchone()['id']
+        self.conn.commit()
+
+        self.empresa_id = empresa_id
+        self.principal = {
+            "id": user_id, "usuario_id": usuario_id, "empresa_id": empresa_id,
+            "role": "USUARIO", "is_superadmin": False,
+        }
+
+    def crear_factura(self):
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO sistema_facturacion.facturas
+                    (empresa_id, establecimiento_id, punto_emision_id, cliente_id, usuario_id,
+                     fecha_emision, subtotal_con_iva, iva, total)
+                VALUES (%s, %s, %s, %s, %s, NOW(), 100, 15, 115) RETURNING id
+            """, (self.empresa_id, self._establecimiento_id, self._punto_emision_id,
+                  self._cliente_id, self.principal["usuario_id"]))
+            factura_id = cur.fetchone()['id']
+        self.conn.commit()
+        return factura_id
+
+    def eliminar(self):
+        self.conn.rollback()
+        with self.conn.cursor() as cur:
+            cur.execute("DELETE FROM sistema_facturacion.facturas WHERE empresa_id = %s", (self.empresa_id,))
+            cur.execute("DELETE FROM sistema_facturacion.clientes WHERE empresa_id = %s", (self.empresa_id,))
+            cur.execute("DELETE FROM sistema_facturacion.users WHERE id = %s", (self.principal["id"],))
+            cur.execute("DELETE FROM sistema_facturacion.empresas WHERE id = %s", (self.empresa_id,))
+        self.conn.commit()
+        self.conn.close()
+
+
+@pytest.fixture
+def empresa_bd():
+    dsn = os.environ.get("DATABASE_TEST")
+    if not dsn:
+        pytest.skip("DATABASE_TEST no definida")
+    empresa = EmpresaPruebas(dsn)
+    yield empresa
+    empresa.eliminar()
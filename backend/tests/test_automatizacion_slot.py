@@ -0,0 +1,77 @@
+"""
+Horario programado (slot) con el que se deduplican las ejecuciones de los jobs.
+La prueba de la restricción usa `DATABASE_TEST` y se omite si no está definida.
+"""
+import os
+from datetime import datetime
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+import pytest
+
+pytest.importorskip("apscheduler")
+pytest.importorskip("psycopg2")
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from src.modules.superadmin.automation import ZONA_HORARIA, slot_programado
+from src.modules.superadmin.repositories import RepositorioAutomatizacion
+
+GYE = ZoneInfo(ZONA_HORARIA)
+DATABASE_TEST = os.environ.get("DATABASE_TEST")
+
+
+def test_job_diario_despues_de_su_hora_usa_el_slot_de_hoy():
+    ahora = datetime(2026, 3, 10, 3, 0, 5, tzinfo=GYE)
+    assert slot_programado(3, ahora) == datetime(2026, 3, 10, 3, 0, tzinfo=GYE)
+
+
+def test_job_diario_antes_de_su_hora_usa_el_slot_de_ayer():
+    ahora = datetime(2026, 3, 10, 2, 59, tzinfo=GYE)
+    assert slot_programado(3, ahora) == datetime(2026, 3, 9, 3, 0, tzinfo=GYE)
+
+
+def test_job_horario_usa_el_inicio_de_la_hora():
+    ahora = datetime(2026, 3, 10, 14, 37, 12, tzinfo=GYE)
+    assert slot_programado('*', ahora) == datetime(2026, 3, 10, 14, 0, tzinfo=GYE)
+
+
+def test_slot_se_calcula_en_guayaquil_aunque_utc_ya_cambio_de_dia():
+    # 20:00 en Guayaquil son las 01:00 UTC del día siguiente
+    ahora = datetime(2026, 3, 11, 1, 0, tzinfo=ZoneInfo("UTC")).astimezone(GYE)
+    assert slot_programado(0, ahora) == datetime(2026, 3, 10, 0, 0, tzinfo=GYE)
+
+
+def test_los_workers_del_mismo_cron_comparten_slot():
+    primero = datetime(2026, 3, 10, 0, 0, 0, 100, tzinfo=GYE)
+    segundo = datetime(2026, 3, 10, 0, 0, 2, tzinfo=GYE)
+    assert slot_programado(0, primero) == slot_programado(0, segundo)
+
+
+@pytest.mark.skipif(not DATABASE_TEST, reason="DATABASE_TEST no definida")
+def test_un_horario_termina_con_exito_una_sola_vez():
+    conn = psycopg2.connect(DATABASE_TEST, cursor_factory=RealDictCursor)
+    repo = RepositorioAutomatizacion(db=conn)
+    job, slot = f"pruebas_{uuid4().hex[:8]}", slot_programado(0)
+    try:
+        # Un intento fallido no impide reintentar el mismo horario
+        fallido = repo.registrar_inicio(job, 'CRON', None, 'pruebas:0', slot)
+        repo.registrar_fin(fallido, 'FALLIDO', error="sin conexión")
+        exitoso = repo.registrar_inicio(job, 'INICIO', None, 'pruebas:1', slot)
+        repo.registrar_fin(exitoso, 'EXITOSO')
+        assert repo.ejecutado_en_slot(job, slot)
+
+        # Las ejecuciones MANUAL no llevan slot y pueden repetirse
+        for _ in range(2):
+            repo.registrar_fin(repo.registrar_inicio(job, 'MANUAL', None, 'pruebas:2', None), 'EXITOSO')
+
+        duplicado = repo.registrar_inicio(job, 'CRON', None, 'pruebas:3', slot)
+        with pytest.raises(psycopg2.errors.ExclusionViolation):
+            repo.registrar_fin(duplicado, 'EXITOSO')
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM sistema_facturacion.automatizacion_ejecuciones WHERE job = %s", (job,))
+        conn.commit()
+        conn.close()
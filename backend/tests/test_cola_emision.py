@@ -0,0 +1,301 @@
+"""
+Cola de emisión SRI contra el SRI falso (scripts/fake_sri_server.py).
+
+Las pruebas de base de datos usan `DATABASE_TEST` (DSN de una base de pruebas
+dedicada con el esquema sistema_facturacion) y se omiten si no está definida.
+Los trabajos de las pruebas del worker se insertan con
+`session_replication_role = replica` para no tener que crear facturas y
+empresas reales (requiere un usuario superusuario); el encolado desde el
+servicio usa datos reales (`empresa_bd`) con las FK activas.
+La firma y el registro de la factura se sustituyen por `ServicioSRIPruebas`; el
+envío a Recepción y Autorización usa el ClienteSRI real por HTTP.
+"""
+import os
+import sys
+import time
+import base64
+import threading
+from contextlib import nullcontext
+from http.server import ThreadingHTTPServer
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("fastapi")
+pytest.importorskip("lxml")
+
+import psycopg2
+from psycopg2.extras import RealDictCursor, register_uuid
+
+from src.config.env import env
+from src.database.transaction import db_transaction
+from src.modules.sri import cola_emision
+from src.modules.sri.client import ClienteSRI
+from src.modules.facturas.repository import RepositorioFacturas
+from src.modules.sri.cola_emision import ServicioColaEmision, WorkerEmisionSRI
+from src.modules.sri.repository_cola import RepositorioColaEmision
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+from fake_sri_server import ManejadorSRI
+
+DATABASE_TEST = os.environ.get("DATABASE_TEST")
+requiere_bd = pytest.mark.skipif(not DATABASE_TEST, reason="DATABASE_TEST no definida")
+
+
+def nueva_clave() -> str:
+    # El SRI falso cuenta las consultas por clave: una distinta por prueba
+    return str(uuid4().int)[:49].ljust(49, "0")
+
+
+class FacturasPruebas:
+    def __init__(self):
+        self.actualizaciones = []
+
+    def actualizar_factura(self, factura_id, datos: dict):
+        self.actualizaciones.append((factura_id, datos))
+
+
+class ServicioSRIPruebas:
+    """Sustituye la firma y el registro en BD de ServicioSRI; el SOAP va al SRI falso."""
+
+    def __init__(self, clave: str):
+        self.clave = clave
+        self.client_sri = ClienteSRI()
+        self.factura_repo = FacturasPruebas()
+        self.recepciones = []
+        self.autorizaciones = []
+        self.errores = []
+
+    def preparar_emision(self, factura_id, usuario: dict, force_reemission: bool = False) -> dict:
+        return {
+            "factura_id": factura_id,
+            "facturacion_programada_id": None,
+            "usuario_id": usuario.get("id"),
+            "ambiente": "1",
+            "ya_en_procesamiento": False,
+            "intento_num": 1,
+            "client_info": {},
+            "start_time": time.time(),
+        }
+
+    def fase_recepcion(self, ctx: dict):
+        ctx["clave"] = self.clave
+        ctx["xml_firmado"] = b"<factura/>"
+        res_rec = self.client_sri.validar_comprobante(base64.b64encode(ctx["xml_firmado"]).decode(), ctx["ambiente"])
+        self.recepciones.append(res_rec.get("estado"))
+        return None if res_rec.get("estado") == "RECIBIDA" else res_rec
+
+    def fase_autorizacion(self, ctx: dict, res_aut: dict) -> dict:
+        self.autorizaciones.append(res_aut.get("estado"))
+        return res_aut
+
+    def registrar_error_emision(self, ctx: dict, e: Exception):
+        self.errores.append(e)
+
+
+@pytest.fixture
+def sri_falso(monkeypatch):
+    ManejadorSRI.consultas_en_proceso = 1
+    ManejadorSRI.latencia = 0.0
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ManejadorSRI)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    monkeypatch.setattr(env, "SRI_WS_BASE_URL", f"http://127.0.0.1:{servidor.server_address[1]}")
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def conectar():
+    conn = psycopg2.connect(DATABASE_TEST, cursor_factory=RealDictCursor)
+    register_uuid(conn_or_curs=conn)
+    with conn.cursor() as cur:
+        cur.execute("SET session_replication_role = replica")
+    conn.commit()
+    return conn
+
+
+class ColaPruebas:
+    """Conexión de pruebas y los trabajos encolados desde ella (se borran al cerrar)."""
+
+    def __init__(self):
+        self.conn = conectar()
+        self.repo = RepositorioColaEmision(db=self.conn)
+        self._facturas = []
+
+    def encolar(self) -> dict:
+        factura_id = uuid4()
+        self._facturas.append(str(factura_id))
+        return self.repo.encolar(factura_id, uuid4(), None, {})
+
+    def cerrar(self):
+        self.conn.rollback()
+        with db_transaction(self.conn) as cur:
+            cur.execute(
+                "DELETE FROM sistema_facturacion.cola_emision_sri WHERE factura_id = ANY(%s::uuid[])",
+                (self._facturas,)
+            )
+        self.conn.close()
+
+
+@pytest.fixture
+def cola():
+    cola = ColaPruebas()
+    yield cola
+    cola.cerrar()
+
+
+@requiere_bd
+def test_encolar_recibida_en_proceso_y_autorizado(cola, sri_falso, monkeypatch):
+    servicio = ServicioSRIPruebas(nueva_clave())
+    monkeypatch.setattr(cola_emision, "conexion_pool", lambda: nullcontext(cola.conn))
+    monkeypatch.setattr(cola_emision, "_construir_servicio_sri", lambda conn: servicio)
+    monkeypatch.setattr(cola_emision, "SRI_TIME_SLEEP_AUTORIZACION", 0)
+    monkeypatch.setattr(env, "SRI_COLA_BACKOFF_BASE", 0)
+    repo = cola.repo
+    worker = WorkerEmisionSRI()
+
+    trabajo = cola.encolar()
+    assert trabajo["estado"] == "PENDIENTE"
+
+    # 1. Recepción: RECIBIDA y queda esperando la autorización
+    assert worker.procesar_siguiente("pruebas:0")
+    estado = repo.obtener(trabajo["id"])
+    assert (estado["estado"], estado["etapa"]) == ("ESPERANDO_AUTORIZACION", "AUTORIZACION")
+    assert servicio.recepciones == ["RECIBIDA"]
+
+    # 2. Primera consulta: EN PROCESO, se reprograma con backoff
+    assert worker.procesar_siguiente("pruebas:0")
+    estado = repo.obtener(trabajo["id"])
+    assert (estado["estado"], estado["estado_sri"], estado["consultas_autorizacion"]) == (
+        "ESPERANDO_AUTORIZACION", "EN PROCESO", 1
+    )
+
+    # 3. Segunda consulta: AUTORIZADO
+    assert worker.procesar_siguiente("pruebas:0")
+    estado = repo.obtener(trabajo["id"])
+    assert (estado["estado"], estado["estado_sri"]) == ("COMPLETADO", "AUTORIZADO")
+    assert servicio.autorizaciones == ["AUTORIZADO"]
+    assert servicio.errores == []
+
+
+@requiere_bd
+def test_encolar_guarda_el_usuario_del_principal_con_fk_activas(empresa_bd):
+    factura_id = empresa_bd.crear_factura()
+    servicio = ServicioColaEmision(
+        repo=RepositorioColaEmision(db=empresa_bd.conn),
+        factura_repo=RepositorioFacturas(db=empresa_bd.conn)
+    )
+
+    trabajo = servicio.encolar(factura_id, empresa_bd.principal)
+
+    assert trabajo["estado"] == "PENDIENTE"
+    with empresa_bd.conn.cursor() as cur:
+        cur.execute("SELECT usuario_id FROM sistema_facturacion.cola_emision_sri WHERE id = %s", (trabajo["id"],))
+        assert cur.fetchone()["usuario_id"] == empresa_bd.principal["id"]
+
+
+@requiere_bd
+def test_lease_vencido_tras_caida_del_worker_se_reclama(cola):
+    repo = cola.repo
+    trabajo = cola.encolar()
+
+    # El worker reclama y "muere" sin finalizar ni reprogramar
+    reclamado = repo.reclamar_siguiente("caido:0", lease_segundos=1)
+    assert reclamado["id"] == trabajo["id"]
+    assert repo.reclamar_siguiente("vivo:0", lease_segundos=60) is None
+
+    time.sleep(1.5)
+    recuperado = repo.reclamar_siguiente("vivo:0", lease_segundos=60)
+    assert recuperado["id"] == trabajo["id"]
+    assert (recuperado["worker_id"], recuperado["intentos"]) == ("vivo:0", 2)
+
+
+@requiere_bd
+def test_trabajo_bloqueado_por_otro_worker_se_salta(cola):
+    primero, segundo = cola.encolar(), cola.encolar()
+    otro = conectar()
+    try:
+        # Otro worker tiene la fila del primero bloqueada en una transacción abierta
+        with otro.cursor() as cur:
+            cur.execute("SELECT id FROM sistema_facturacion.cola_emision_sri WHERE id = %s FOR UPDATE", (primero["id"],))
+        with cola.conn.cursor() as cur:
+            cur.execute("SET statement_timeout = '2s'")
+        reclamado = cola.repo.reclamar_siguiente("pruebas:1", lease_segundos=60)
+        assert reclamado["id"] == segundo["id"]
+    finally:
+        otro.rollback()
+        otro.close()
+
+
+@requiere_bd
+def test_dos_workers_no_reclaman_el_mismo_trabajo(cola):
+    ids = {cola.encolar()["id"] for _ in range(20)}
+    reclamados = {0: [], 1: []}
+
+    def consumir(n: int):
+        conn = conectar()
+        try:
+            repo = RepositorioColaEmision(db=conn)
+            while (trabajo := repo.reclamar_siguiente(f"pruebas:{n}", lease_segundos=60)) is not None:
+                reclamados[n].append(trabajo["id"])
+        finally:
+            conn.close()
+
+    hilos = [threading.Thread(target=consumir, args=(n,)) for n in reclamados]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert not set(reclamados[0]) & set(reclamados[1])
+    assert ids <= set(reclamados[0]) | set(reclamados[1])
+
+
+class RepoColaPruebas:
+    """Registra las llamadas del worker sin base de datos."""
+
+    class _Conexion:
+        def rollback(self):
+            pass
+
+    def __init__(self):
+        self.db = self._Conexion()
+        self.finalizados = []
+
+    def finalizar(self, job_id, estado, estado_sri=None, resultado=None, error=None):
+        self.finalizados.append((job_id, estado, error))
+
+
+class ServicioQueFalla(ServicioSRIPruebas):
+    def fase_recepcion(self, ctx: dict):
+        raise RuntimeError("fallo de firma")
+
+    def registrar_error_emision(self, ctx: dict, e: Exception):
+        raise RuntimeError("la base no responde")
+
+
+def test_finalizar_aunque_falle_el_registro_del_error_en_recepcion():
+    repo, trabajo = RepoColaPruebas(), {"id": "t1", "factura_id": "f1", "usuario_id": None, "intentos": 1}
+
+    WorkerEmisionSRI()._etapa_recepcion(trabajo, repo, ServicioQueFalla(nueva_clave()))
+
+    assert repo.finalizados == [("t1", "FALLIDO", "fallo de firma")]
+
+
+def test_finalizar_aunque_falle_el_registro_del_error_en_autorizacion(monkeypatch):
+    servicio = ServicioQueFalla(nueva_clave())
+
+    def autorizar(*_):
+        raise RuntimeError("respuesta inválida")
+
+    monkeypatch.setattr(servicio.client_sri, "autorizar_comprobante", autorizar)
+    repo = RepoColaPruebas()
+    trabajo = {
+        "id": "t2", "factura_id": "f2", "ambiente": "1", "clave_acceso": servicio.clave,
+        "ya_en_procesamiento": False, "consultas_autorizacion": 0,
+    }
+
+    WorkerEmisionSRI()._etapa_autorizacion(trabajo, repo, servicio)
+
+    assert repo.finalizados == [("t2", "FALLIDO", "respuesta inválida")]
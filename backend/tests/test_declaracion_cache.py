@@ -0,0 +1,105 @@
+"""
+Invalidación de los totales de R_027 entre workers (canal de cache_referencia).
+Mismo esquema que test_perfil_emisor_cache: los pg_notify de la transacción se
+entregan a todos los workers al hacer commit.
+"""
+from datetime import date
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("fastapi")
+
+from src.database.cache_referencia import CacheReferencia
+from src.modules.gastos.gasto_repository import RepositorioGastos
+from src.modules.reportes.usuarios.R_027.declaracion_cache import CacheDeclaracionIVA
+
+EMPRESA_ID = "33333333-3333-3333-3333-333333333333"
+ENERO = ("2026-01-01", "2026-01-31")
+FEBRERO = ("2026-02-01", "2026-02-28")
+
+
+def crear_worker():
+    referencia = CacheReferencia(ttl=60, max_entradas=100, canal="referencia_cache_pruebas")
+    referencia.escuchando = True
+    return referencia, CacheDeclaracionIVA(ttl=60, max_entradas=100, referencia=referencia)
+
+
+class CursorFalso:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if "pg_notify" in query:
+            self.conn.pendientes.append(params[1])
+
+    def fetchone(self):
+        return {"id": "g1", "empresa_id": EMPRESA_ID, "fecha_emision": date(2026, 2, 10)}
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    def __init__(self, workers):
+        self.workers = workers
+        self.pendientes = []
+
+    def cursor(self, **_):
+        return CursorFalso(self)
+
+    def commit(self):
+        for payload in self.pendientes:
+            for referencia in self.workers:
+                referencia.registrar_notificacion(payload)
+        self.pendientes = []
+
+    def rollback(self):
+        self.pendientes = []
+
+
+def guardar_periodos(cache):
+    for inicio, fin in (ENERO, FEBRERO):
+        cache.guardar(EMPRESA_ID, inicio, fin, {"periodo": inicio}, cache.generacion())
+
+
+def test_gasto_creado_invalida_su_periodo_en_otro_worker(monkeypatch):
+    referencia_a, cache_a = crear_worker()
+    referencia_b, cache_b = crear_worker()
+    monkeypatch.setattr("src.modules.gastos.gasto_repository.declaracion_iva_cache", cache_a)
+    guardar_periodos(cache_b)
+
+    RepositorioGastos(db=ConexionFalsa([referencia_a, referencia_b])).crear_gasto({"concepto": "Arriendo"})
+
+    assert cache_b.obtener(EMPRESA_ID, *FEBRERO) is None
+    assert cache_b.obtener(EMPRESA_ID, *ENERO) == {"periodo": ENERO[0]}
+
+
+def test_sin_fecha_reconocible_se_invalida_toda_la_empresa():
+    referencia_a, cache_a = crear_worker()
+    referencia_b, cache_b = crear_worker()
+    conn = ConexionFalsa([referencia_a, referencia_b])
+    guardar_periodos(cache_b)
+
+    cache_a.notificar_documento(conn.cursor(), EMPRESA_ID, "sin fecha")
+    conn.commit()
+
+    assert cache_b.obtener(EMPRESA_ID, *ENERO) is None
+    assert cache_b.obtener(EMPRESA_ID, *FEBRERO) is None
+
+
+def test_totales_calculados_antes_de_una_invalidacion_no_se_guardan():
+    _, cache = crear_worker()
+    generacion = cache.generacion()
+    cache.aplicar_invalidacion(f"{EMPRESA_ID}|2026-02-10")
+    cache.guardar(EMPRESA_ID, *FEBRERO, {"periodo": FEBRERO[0]}, generacion)
+
+    assert cache.obtener(EMPRESA_ID, *FEBRERO) is None
+
+
+def test_sin_escucha_no_se_sirve_desde_cache():
+    referencia, cache = crear_worker()
+    guardar_periodos(cache)
+    referencia.escuchando = False
+
+    assert cache.obtener(EMPRESA_ID, *ENERO) is None
@@ -0,0 +1,43 @@
+"""
+Importaciones masivas: registro de la importación contra `DATABASE_TEST`.
+
+Se usan datos reales (`empresa_bd`) con las FK activas; el procesamiento en
+segundo plano no se ejecuta (el executor del módulo se sustituye).
+"""
+import io
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("fastapi")
+
+from src.config.env import env
+from src.modules.importaciones import service as servicio_importaciones
+from src.modules.importaciones.repository import RepositorioImportaciones
+from src.modules.importaciones.service import ServicioImportaciones
+from src.modules.importaciones.validacion import TIPO_CLIENTES
+
+
+class ExecutorPruebas:
+    def __init__(self):
+        self.enviados = []
+
+    def submit(self, funcion, *args):
+        self.enviados.append(args)
+
+
+def test_encolar_guarda_el_usuario_del_principal_con_fk_activas(empresa_bd, tmp_path, monkeypatch):
+    executor = ExecutorPruebas()
+    monkeypatch.setattr(env, "IMPORTACION_DIR", str(tmp_path))
+    monkeypatch.setattr(servicio_importaciones, "_executor", executor)
+    servicio = ServicioImportaciones(repo=RepositorioImportaciones(db=empresa_bd.conn))
+
+    importacion = servicio.encolar(
+        TIPO_CLIENTES, "clientes.csv", io.BytesIO(b"identificacion,razon_social\n"), empresa_bd.principal
+    )
+
+    assert importacion["estado"] == "PENDIENTE"
+    assert [args[0] for args in executor.enviados] == [importacion["id"]]
+    with empresa_bd.conn.cursor() as cur:
+        cur.execute("SELECT usuario_id FROM sistema_facturacion.importaciones_masivas WHERE id = %s", (importacion["id"],))
+        assert cur.fetchone()["usuario_id"] == empresa_bd.principal["id"]
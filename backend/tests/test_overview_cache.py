@@ -0,0 +1,96 @@
+"""
+Invalidación del overview del dashboard entre workers (canal de cache_referencia).
+Mismo esquema que test_perfil_emisor_cache: los pg_notify de la transacción se
+entregan a todos los workers al hacer commit.
+"""
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("fastapi")
+
+from src.database.cache_referencia import CacheReferencia
+from src.modules.dashboards.overview_cache import CacheOverview
+from src.modules.facturas.repository import RepositorioFacturas
+
+EMPRESA_ID = "44444444-4444-4444-4444-444444444444"
+
+
+def crear_worker():
+    referencia = CacheReferencia(ttl=60, max_entradas=100, canal="referencia_cache_pruebas")
+    referencia.escuchando = True
+    return referencia, CacheOverview(ttl=60, max_entradas=100, referencia=referencia)
+
+
+class CursorFalso:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if "pg_notify" in query:
+            self.conn.pendientes.append(params[1])
+
+    def fetchone(self):
+        return {"id": "f1", "empresa_id": EMPRESA_ID, "fecha_emision": datetime(2026, 3, 2)}
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    def __init__(self, workers):
+        self.workers = workers
+        self.pendientes = []
+
+    def cursor(self, **_):
+        return CursorFalso(self)
+
+    def commit(self):
+        for payload in self.pendientes:
+            for referencia in self.workers:
+                referencia.registrar_notificacion(payload)
+        self.pendientes = []
+
+    def rollback(self):
+        self.pendientes = []
+
+
+class AgregadoPruebas:
+    """Sustituye ventas_diarias y consumo: la prueba solo mira el overview."""
+
+    def aplicar_cambio(self, *_):
+        pass
+
+    def aplicar_factura(self, *_):
+        pass
+
+
+def test_factura_eliminada_invalida_el_overview_en_otro_worker(monkeypatch):
+    referencia_a, cache_a = crear_worker()
+    referencia_b, cache_b = crear_worker()
+    monkeypatch.setattr("src.modules.facturas.repository.overview_cache", cache_a)
+    cache_b.guardar(EMPRESA_ID, "month", {"kpis": {}}, cache_b.generacion())
+    repo = RepositorioFacturas(db=ConexionFalsa([referencia_a, referencia_b]))
+    repo.ventas_diarias = repo.consumo = AgregadoPruebas()
+
+    assert repo.eliminar_factura("f1")
+
+    assert cache_b.obtener(EMPRESA_ID, "month") is None
+
+
+def test_overview_armado_antes_de_una_invalidacion_no_se_guarda():
+    _, cache = crear_worker()
+    generacion = cache.generacion()
+    cache.aplicar_invalidacion(EMPRESA_ID)
+    cache.guardar(EMPRESA_ID, "month", {"kpis": {}}, generacion)
+
+    assert cache.obtener(EMPRESA_ID, "month") is None
+
+
+def test_sin_escucha_no_se_sirve_desde_cache():
+    referencia, cache = crear_worker()
+    cache.guardar(EMPRESA_ID, "month", {"kpis": {}}, cache.generacion())
+    referencia.escuchando = False
+
+    assert cache.obtener(EMPRESA_ID, "month") is None
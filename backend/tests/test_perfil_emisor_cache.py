@@ -0,0 +1,99 @@
+"""
+Invalidación del perfil del emisor entre workers (canal de cache_referencia).
+Mismo esquema que test_principal_cache: los pg_notify de la transacción se
+entregan a todos los workers al hacer commit.
+"""
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("fastapi")
+
+from src.database.cache_referencia import CacheReferencia
+from src.modules.empresas.perfil_emisor_cache import CachePerfilEmisor
+from src.modules.sri.repository import RepositorioSRI
+
+EMPRESA_ID = "22222222-2222-2222-2222-222222222222"
+
+
+def crear_worker():
+    referencia = CacheReferencia(ttl=60, max_entradas=100, canal="referencia_cache_pruebas")
+    referencia.escuchando = True
+    return referencia, CachePerfilEmisor(ttl=60, max_entradas=100, referencia=referencia)
+
+
+class CursorFalso:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if "pg_notify" in query:
+            self.conn.pendientes.append(params[1])
+
+    def fetchone(self):
+        return {"id": "c1", "empresa_id": EMPRESA_ID, "ambiente": "2"}
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    def __init__(self, workers):
+        self.workers = workers
+        self.pendientes = []
+
+    def cursor(self, **_):
+        return CursorFalso(self)
+
+    def commit(self):
+        for payload in self.pendientes:
+            for referencia in self.workers:
+                referencia.registrar_notificacion(payload)
+        self.pendientes = []
+
+    def rollback(self):
+        self.pendientes = []
+
+
+def perfil():
+    return {"id": EMPRESA_ID, "ruc": "0999999999001", "sri_ambiente": "1"}
+
+
+def test_cambio_de_parametros_sri_invalida_el_perfil_en_otro_worker(monkeypatch):
+    referencia_a, cache_a = crear_worker()
+    referencia_b, cache_b = crear_worker()
+    monkeypatch.setattr("src.modules.sri.repository.perfil_emisor_cache", cache_a)
+    cache_b.guardar(EMPRESA_ID, perfil(), cache_b.generacion())
+    assert cache_b.obtener(EMPRESA_ID) is not None
+
+    RepositorioSRI(db=ConexionFalsa([referencia_a, referencia_b])).actualizar_config("c1", {"ambiente": "2"})
+
+    assert cache_b.obtener(EMPRESA_ID) is None
+
+
+def test_notificar_todos_vacia_el_perfil_de_todas_las_empresas():
+    referencia_a, cache_a = crear_worker()
+    referencia_b, cache_b = crear_worker()
+    conn = ConexionFalsa([referencia_a, referencia_b])
+    cache_b.guardar(EMPRESA_ID, perfil(), cache_b.generacion())
+
+    cache_a.notificar_todos(conn.cursor())
+    conn.commit()
+
+    assert cache_b.obtener(EMPRESA_ID) is None
+
+
+def test_perfil_leido_antes_de_una_invalidacion_no_se_guarda():
+    _, cache = crear_worker()
+    generacion = cache.generacion()
+    cache.aplicar_invalidacion(EMPRESA_ID)
+    cache.guardar(EMPRESA_ID, perfil(), generacion)
+
+    assert cache.obtener(EMPRESA_ID) is None
+
+
+def test_sin_escucha_no_se_sirve_desde_cache():
+    referencia, cache = crear_worker()
+    cache.guardar(EMPRESA_ID, perfil(), cache.generacion())
+    referencia.escuchando = False
+
+    assert cache.obtener(EMPRESA_ID) is None
@@ -0,0 +1,145 @@
+"""
+Revocación del cache de principales entre workers.
+
+Cada "worker" es un par CacheReferencia + CachePrincipales propio; el canal
+LISTEN/NOTIFY se simula entregando los pg_notify de la transacción a todos los
+workers al hacer commit (y a ninguno con rollback), como hace Postgres.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("fastapi")
+
+from src.database.cache_referencia import CacheReferencia
+from src.database.transaction import db_transaction
+from src.modules.autenticacion.principal_cache import CachePrincipales
+from src.modules.autenticacion.repositories import AuthRepository
+
+CANAL = "referencia_cache_pruebas"
+SID = "a" * 32
+USER_ID = "11111111-1111-1111-1111-111111111111"
+EMPRESA_ID = "22222222-2222-2222-2222-222222222222"
+
+
+def crear_worker():
+    referencia = CacheReferencia(ttl=60, max_entradas=100, canal=CANAL)
+    referencia.escuchando = True
+    return referencia, CachePrincipales(ttl=60, max_entradas=100, referencia=referencia)
+
+
+class CursorFalso:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 1
+
+    def execute(self, query, params=None):
+        if "pg_notify" in query:
+            self.conn.pendientes.append(params[1])
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    """Conexión que entrega los NOTIFY pendientes a los workers al hacer commit."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.pendientes = []
+
+    def cursor(self, **_):
+        return CursorFalso(self)
+
+    def commit(self):
+        for payload in self.pendientes:
+            for referencia in self.workers:
+                referencia.registrar_notificacion(payload)
+        self.pendientes = []
+
+    def rollback(self):
+        self.pendientes = []
+
+
+def principal():
+    return {"id": USER_ID, "empresa_id": EMPRESA_ID, "permisos": ["FACTURAS_VER"]}
+
+
+def expira():
+    return datetime.now(timezone.utc) + timedelta(hours=1)
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """(worker A, worker B): A es la instancia global que usan los repositorios."""
+    referencia_a, cache_a = crear_worker()
+    referencia_b, cache_b = crear_worker()
+    monkeypatch.setattr("src.modules.autenticacion.repositories.principal_cache", cache_a)
+    conn = ConexionFalsa([referencia_a, referencia_b])
+    return cache_a, cache_b, conn
+
+
+def test_logout_revoca_la_sesion_en_otro_worker(workers):
+    _, cache_b, conn = workers
+    cache_b.guardar(SID, principal(), expira(), cache_b.generacion())
+    assert cache_b.obtener(SID, USER_ID) is not None
+
+    AuthRepository(db=conn).invalidar_sesion(SID)
+
+    assert cache_b.obtener(SID, USER_ID) is None
+
+
+def test_cierre_forzado_revoca_todas_las_sesiones_del_usuario(workers):
+    _, cache_b, conn = workers
+    otra_sid = "b" * 32
+    cache_b.guardar(SID, principal(), expira(), cache_b.generacion())
+    cache_b.guardar(otra_sid, principal(), expira(), cache_b.generacion())
+
+    AuthRepository(db=conn).invalidar_todas_sesiones(USER_ID, reason="SEGURIDAD")
+
+    assert cache_b.obtener(SID, USER_ID) is None
+    assert cache_b.obtener(otra_sid, USER_ID) is None
+
+
+def test_rollback_no_publica_la_invalidacion(workers):
+    cache_a, cache_b, conn = workers
+    cache_b.guardar(SID, principal(), expira(), cache_b.generacion())
+
+    with pytest.raises(RuntimeError):
+        with db_transaction(conn) as cur:
+            cache_a.notificar_sesion(cur, SID)
+            raise RuntimeError("falla posterior dentro de la transacción")
+
+    assert cache_b.obtener(SID, USER_ID) is not None
+
+
+def test_cambio_de_empresa_llega_a_otro_worker(workers):
+    cache_a, cache_b, conn = workers
+    cache_b.guardar(SID, principal(), expira(), cache_b.generacion())
+
+    cache_a.notificar_empresa(conn.cursor(), EMPRESA_ID)
+    conn.commit()
+
+    assert cache_b.obtener(SID, USER_ID) is None
+
+
+def test_sin_escucha_no_se_sirve_desde_cache():
+    referencia, cache = crear_worker()
+    cache.guardar(SID, principal(), expira(), cache.generacion())
+    referencia.escuchando = False
+
+    assert cache.obtener(SID, USER_ID) is None
+
+
+def test_principal_leido_antes_de_una_revocacion_no_se_guarda():
+    _, cache = crear_worker()
+    generacion = cache.generacion()
+    # La revocación llega mientras se resolvía el principal desde la BD
+    cache.aplicar_invalidacion(f"sesion:{SID}")
+    cache.guardar(SID, principal(), expira(), generacion)
+
+    assert cache.obtener(SID, USER_ID) is None
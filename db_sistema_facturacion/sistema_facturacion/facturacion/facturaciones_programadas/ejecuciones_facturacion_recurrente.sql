@@ -0,0 +1,41 @@
+-- ===================================================================
+-- TABLA: ejecuciones_facturacion_recurrente
+-- ===================================================================
+-- Una fila por corrida del proceso nocturno de facturación recurrente.
+-- Una corrida EN_CURSO de la misma fecha se retoma tras una caída, solo si la
+-- sesión de Postgres dueña (pid_sesion, la que tiene el advisory lock de corrida)
+-- ya no existe.
+CREATE TABLE IF NOT EXISTS sistema_facturacion.ejecuciones_facturacion_recurrente (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    fecha_programada DATE NOT NULL DEFAULT CURRENT_DATE,
+    estado VARCHAR(20) NOT NULL DEFAULT 'EN_CURSO'
+        CHECK (estado IN ('EN_CURSO', 'COMPLETADA', 'FALLIDA')),
+    concurrencia INT NOT NULL DEFAULT 1,
+    total_programaciones INT NOT NULL DEFAULT 0,
+    resumen JSONB,
+    worker TEXT,
+    pid_sesion INT,
+    iniciado_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    finalizado_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_ejecuciones_recurrente_fecha_estado
+ON sistema_facturacion.ejecuciones_facturacion_recurrente (fecha_programada, estado);
+
+-- ===================================================================
+-- TABLA: ejecuciones_facturacion_recurrente_items
+-- ===================================================================
+-- Checkpoint por programación procesada dentro de una corrida.
+CREATE TABLE IF NOT EXISTS sistema_facturacion.ejecuciones_facturacion_recurrente_items (
+    ejecucion_id UUID NOT NULL
+        REFERENCES sistema_facturacion.ejecuciones_facturacion_recurrente(id) ON DELETE CASCADE,
+    facturacion_programada_id UUID NOT NULL
+        REFERENCES sistema_facturacion.facturacion_programada(id) ON DELETE CASCADE,
+    empresa_id UUID NOT NULL,
+    exitosa BOOLEAN NOT NULL,
+    duracion_ms INT,
+    tiempos_etapas JSONB,
+    error TEXT,
+    procesado_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (ejecucion_id, facturacion_programada_id)
+);
@@ -0,0 +1,20 @@
+-- ===================================================================
+-- ÍNDICES: listado paginado de facturas (keyset sobre created_at, id)
+-- ===================================================================
+-- El listado ordena por (created_at DESC, id DESC) dentro de la empresa y
+-- pagina con "(created_at, id) < cursor": con estos índices cada página es
+-- un recorrido acotado del índice, sin importar la profundidad.
+CREATE INDEX IF NOT EXISTS idx_facturas_empresa_created_id
+ON sistema_facturacion.facturas (empresa_id, created_at DESC, id DESC);
+
+-- Listado "mis facturas" (solo_propias)
+CREATE INDEX IF NOT EXISTS idx_facturas_empresa_usuario_created_id
+ON sistema_facturacion.facturas (empresa_id, usuario_id, created_at DESC, id DESC);
+
+-- Listado global del SUPERADMIN (sin filtro de empresa)
+CREATE INDEX IF NOT EXISTS idx_facturas_created_id
+ON sistema_facturacion.facturas (created_at DESC, id DESC);
+
+-- Primera forma de pago por factura (LATERAL ... ORDER BY created_at LIMIT 1)
+CREATE INDEX IF NOT EXISTS idx_formas_pago_factura_created
+ON sistema_facturacion.formas_pago (factura_id, created_at);
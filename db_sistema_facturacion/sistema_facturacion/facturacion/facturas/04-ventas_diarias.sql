@@ -0,0 +1,29 @@
+-- ===================================================================
+-- TABLA: ventas_diarias
+-- ===================================================================
+-- Agregado diario de facturas por empresa × día × estado × usuario.
+-- Lo mantiene RepositorioFacturas en la misma transacción que crea,
+-- actualiza (autorización, anulación, totales) o elimina la factura, así
+-- los dashboards leen unas pocas filas en lugar de recorrer `facturas`.
+-- `fecha` es fecha_emision::date en la zona horaria de la sesión.
+-- Reconstrucción: scripts/backfill_ventas_diarias.py
+CREATE TABLE IF NOT EXISTS sistema_facturacion.ventas_diarias (
+    empresa_id UUID NOT NULL
+        REFERENCES sistema_facturacion.empresas(id) ON DELETE CASCADE,
+    fecha DATE NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    usuario_id UUID NOT NULL,
+
+    num_facturas INT NOT NULL DEFAULT 0,
+    subtotal NUMERIC(14,2) NOT NULL DEFAULT 0,
+    iva NUMERIC(14,2) NOT NULL DEFAULT 0,
+    total NUMERIC(14,2) NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (empresa_id, fecha, estado, usuario_id)
+);
+
+-- Gráficos globales del SUPERADMIN (sin filtro de empresa)
+CREATE INDEX IF NOT EXISTS idx_ventas_diarias_fecha
+ON sistema_facturacion.ventas_diarias (fecha);
@@ -0,0 +1,46 @@
+-- ===================================================================
+-- ÍNDICES: consultas calientes sobre facturas y tablas hijas
+-- ===================================================================
+-- Cubren los filtros que usan los repositorios (dashboards, R_027,
+-- cartera, facturación programada, emisión SRI). Se verifican con
+-- backend/scripts/plan_regresion_consultas.py, que falla si alguna de
+-- esas consultas vuelve a un Seq Scan.
+-- Otras búsquedas ya tienen índice por sus restricciones UNIQUE:
+-- clientes (empresa_id, identificacion), cuentas_cobrar (factura_id).
+
+-- Rangos por fecha dentro de la empresa (KPIs, facturas recientes,
+-- consumo del plan, recalculo de ventas_diarias)
+CREATE INDEX IF NOT EXISTS idx_facturas_empresa_fecha_emision
+ON sistema_facturacion.facturas (empresa_id, fecha_emision DESC, created_at DESC);
+
+-- Formulario 104 (R_027): solo facturas autorizadas
+CREATE INDEX IF NOT EXISTS idx_facturas_autorizadas_empresa_fecha
+ON sistema_facturacion.facturas (empresa_id, fecha_emision)
+WHERE estado = 'AUTORIZADA' AND tipo_documento = '01';
+
+-- Historial de un cliente y validación antes de eliminarlo
+CREATE INDEX IF NOT EXISTS idx_facturas_cliente_fecha
+ON sistema_facturacion.facturas (cliente_id, fecha_emision DESC);
+
+-- "¿Ya se emitió hoy?" de cada programación
+CREATE INDEX IF NOT EXISTS idx_facturas_programada_fecha
+ON sistema_facturacion.facturas (facturacion_programada_id, fecha_emision)
+WHERE facturacion_programada_id IS NOT NULL;
+
+-- Facturas enviadas al SRI pendientes de respuesta
+CREATE INDEX IF NOT EXISTS idx_facturas_en_proceso
+ON sistema_facturacion.facturas (updated_at)
+WHERE estado = 'EN_PROCESO';
+
+-- Detalles de una factura (RIDE, XML, R_027, top productos)
+CREATE INDEX IF NOT EXISTS idx_facturas_detalle_factura
+ON sistema_facturacion.facturas_detalle (factura_id, created_at);
+
+-- Cartera abierta por vencimiento (obtener_resumen_cobros)
+CREATE INDEX IF NOT EXISTS idx_cuentas_cobrar_empresa_vencimiento
+ON sistema_facturacion.cuentas_cobrar (empresa_id, fecha_vencimiento)
+WHERE saldo_pendiente > 0;
+
+-- Cartera por cliente
+CREATE INDEX IF NOT EXISTS idx_cuentas_cobrar_cliente
+ON sistema_facturacion.cuentas_cobrar (cliente_id);
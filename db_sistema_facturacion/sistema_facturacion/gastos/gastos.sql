@@ -43,4 +43,7 @@ CREATE INDEX idx_gastos_empresa ON sistema_facturacion.gastos(empresa_id);
 CREATE INDEX idx_gastos_usuario ON sistema_facturacion.gastos(user_id);
 CREATE INDEX idx_gastos_categoria ON sistema_facturacion.gastos(categoria_gasto_id);
 CREATE INDEX idx_gastos_fecha_emision ON sistema_facturacion.gastos(fecha_emision);
-CREATE INDEX idx_gastos_estado_pago ON sistema_facturacion.gastos(estado_pago);
\ No newline at end of file
+CREATE INDEX idx_gastos_estado_pago ON sistema_facturacion.gastos(estado_pago);
+
+-- Compras del periodo por empresa (R_027, bloque 500)
+CREATE INDEX idx_gastos_empresa_fecha_activos ON sistema_facturacion.gastos(empresa_id, fecha_emision) WHERE deleted_at IS NULL;
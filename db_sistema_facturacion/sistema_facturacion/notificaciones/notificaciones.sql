@@ -42,3 +42,7 @@ CREATE TABLE IF NOT EXISTS sistema_facturacion.notificaciones (
 -- Índice para mejorar el rendimiento de carga de notificaciones no leídas por usuario
 CREATE INDEX IF NOT EXISTS idx_notificaciones_user_leido ON sistema_facturacion.notificaciones(user_id, leido);
 CREATE INDEX IF NOT EXISTS idx_notificaciones_tipo ON sistema_facturacion.notificaciones(tipo);
+
+-- Listado paginado por cursor (keyset) sobre (created_at, id) por usuario
+CREATE INDEX IF NOT EXISTS idx_notificaciones_user_created
+ON sistema_facturacion.notificaciones (user_id, created_at DESC, id DESC);
@@ -0,0 +1,20 @@
+-- =========================================
+-- MÓDULO: NOTIFICACIONES
+-- TABLA: notificaciones_conteo
+-- Descripción:
+-- Notificaciones sin leer por usuario, mantenido
+-- como contador incremental.
+-- =========================================
+-- RepositorioNotificaciones suma al crear (una fila por destinatario y lote)
+-- y resta al marcar como leídas, en la misma transacción que escribe. El job
+-- `conciliacion_notificaciones` corrige cualquier deriva.
+
+CREATE TABLE IF NOT EXISTS sistema_facturacion.notificaciones_conteo (
+    user_id UUID PRIMARY KEY
+        REFERENCES sistema_facturacion.users(id)
+        ON DELETE CASCADE,
+
+    no_leidas INT NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
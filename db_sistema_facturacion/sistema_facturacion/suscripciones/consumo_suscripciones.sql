@@ -0,0 +1,32 @@
+-- =====================================================
+-- MÓDULO: SUSCRIPCIONES
+-- TABLA: consumo_suscripciones
+-- Descripción:
+-- Consumo actual de cada empresa frente a los límites
+-- de su plan, mantenido por contadores incrementales.
+-- =====================================================
+-- Los repositorios de facturas, usuarios, establecimientos y facturación
+-- programada ajustan los contadores en la misma transacción que escriben.
+-- Facturas (no anuladas, por fecha_emision) y programaciones (activas, por
+-- created_at) cuentan solo dentro del periodo [periodo_inicio, periodo_fin];
+-- usuarios y establecimientos son totales.
+-- Si el periodo guardado no coincide con el de `suscripciones` (renovación,
+-- upgrade), la fila se recalcula al leerla. El job `conciliacion_consumo`
+-- corrige cualquier deriva.
+
+CREATE TABLE IF NOT EXISTS sistema_facturacion.consumo_suscripciones (
+    empresa_id UUID PRIMARY KEY
+        REFERENCES sistema_facturacion.empresas(id)
+        ON DELETE CASCADE,
+
+    -- Periodo de la suscripción con el que se calcularon los contadores
+    periodo_inicio TIMESTAMPTZ NOT NULL,
+    periodo_fin TIMESTAMPTZ,
+
+    facturas INT NOT NULL DEFAULT 0,
+    usuarios INT NOT NULL DEFAULT 0,
+    establecimientos INT NOT NULL DEFAULT 0,
+    programaciones INT NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
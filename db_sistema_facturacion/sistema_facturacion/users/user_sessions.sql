@@ -33,9 +33,10 @@ CREATE TABLE IF NOT EXISTS sistema_facturacion.user_sessions (
 CREATE INDEX IF NOT EXISTS idx_user_sessions_user
 ON sistema_facturacion.user_sessions (user_id);
 
--- Sesiones válidas
-CREATE INDEX IF NOT EXISTS idx_user_sessions_valid
-ON sistema_facturacion.user_sessions (is_valid);
+-- Sesiones vigentes de un usuario (tiene_sesion_activa, invalidar sesiones)
+CREATE INDEX IF NOT EXISTS idx_user_sessions_user_vigentes
+ON sistema_facturacion.user_sessions (user_id, expires_at)
+WHERE is_valid = TRUE;
 
 -- Expiración de sesiones
 CREATE INDEX IF NOT EXISTS idx_user_sessions_expires